@@ -19,8 +19,13 @@ class ExploreExampleAppConfig(AppConfig):
         Returns:
 
         """
+        from core_explore_example_app import signals
+
+        signals.connect()
+
         if "migrate" not in sys.argv:
             from core_explore_example_app import discover as app_discover
 
             app_discover.init_periodic_tasks()
+            app_discover.init_explore_data_structures()
             discover.init_permissions(self.apps)
@@ -7,7 +7,7 @@ class CustomExploreDataStructureAdmin(admin.ModelAdmin):
     """CustomExploreDataStructureAdmin"""
 
     readonly_fields = ["template", "data_structure_element_root"]
-    exclude = ["selected_fields_html_tree"]
+    exclude = ["selected_fields"]
 
     def has_add_permission(self, request, obj=None):
         """Prevent from manually adding Data Structures"""
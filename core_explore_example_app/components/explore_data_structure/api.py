@@ -1,10 +1,36 @@
 """Explore data Structure api"""
 
+from django.db import IntegrityError, transaction
+
+from core_main_app.access_control.exceptions import AccessControlError
+from core_main_app.commons import exceptions
+from core_parser_app.components.data_structure.models import (
+    DataStructureElement,
+)
+from core_parser_app.components.data_structure_element import (
+    api as data_structure_element_api,
+)
 from core_explore_example_app.components.explore_data_structure.models import (
     ExploreDataStructure,
 )
+from core_explore_example_app.settings import (
+    EXPLORE_EXAMPLE_PREGENERATION_TIMEOUT,
+)
+from core_explore_example_app.utils.cache import (
+    bump_data_structure_revision,
+    get_cache,
+)
+from core_explore_example_app.utils.element_tree import (
+    load_element_tree,
+    resolve_element_id,
+)
 from core_explore_example_app.utils.parser import generate_form
 
+# owner of the base data structures, generated once per template and shared
+# by the data structures of the users
+BASE_DATA_STRUCTURE_USER = "core_explore_example_app"
+BASE_GENERATION_KEY_PREFIX = "core_explore_example_app:base_generation"
+
 
 def get_by_user_id_and_template_id(user_id, template_id):
     """Returns object with the given user id and template id
@@ -31,11 +57,370 @@ def upsert(explore_data_structure):
 
     """
     explore_data_structure.save()
+    bump_data_structure_revision(explore_data_structure.id)
+    return explore_data_structure
+
+
+def save_selected_fields(explore_data_structure):
+    """Saves the fields selected in the explore data structure. The tree of
+    elements is not changed, its revision is kept.
+
+    Args:
+        explore_data_structure:
+
+    Returns:
+
+    """
+    explore_data_structure.save(update_fields=["selected_fields"])
+    return explore_data_structure
+
+
+def get_or_create_base_explore_data_structure(template, request):
+    """Return the base data structure of a template, generate it if it does
+    not exist. The elements of the base data structure are shared by the data
+    structures of the users, and never modified.
+
+    Args:
+        template:
+        request:
+
+    Returns: Explore Data structure
+
+    """
+    try:
+        return get_by_user_id_and_template_id(
+            user_id=BASE_DATA_STRUCTURE_USER, template_id=template.id
+        )
+    except exceptions.DoesNotExist:
+        pass
+
+    try:
+        with transaction.atomic():
+            base_data_structure = ExploreDataStructure(
+                user=BASE_DATA_STRUCTURE_USER,
+                template=template,
+                name=template.filename,
+            )
+            upsert(base_data_structure)
+            base_data_structure.data_structure_element_root = generate_form(
+                template.content,
+                data_structure=base_data_structure,
+                request=request,
+            )
+            upsert(base_data_structure)
+            # the elements are owned by the base data structure, not by the
+            # user who generated it
+            DataStructureElement.objects.filter(
+                data_structure=base_data_structure
+            ).update(user=BASE_DATA_STRUCTURE_USER)
+    except IntegrityError:
+        # generated at the same time by another request
+        return get_by_user_id_and_template_id(
+            user_id=BASE_DATA_STRUCTURE_USER, template_id=template.id
+        )
+    return base_data_structure
+
+
+def has_base_explore_data_structure(template_id):
+    """Return True if the base data structure of a template exists
+
+    Args:
+        template_id:
+
+    Returns:
+
+    """
+    return ExploreDataStructure.objects.filter(
+        user=BASE_DATA_STRUCTURE_USER, template=template_id
+    ).exists()
+
+
+def set_base_generation_pending(template_id, is_pending=True):
+    """Mark the base data structure of a template as being generated in the
+    background, or not
+
+    Args:
+        template_id:
+        is_pending:
+
+    Returns:
+
+    """
+    cache_key = f"{BASE_GENERATION_KEY_PREFIX}:{template_id}"
+    if is_pending:
+        get_cache().set(
+            cache_key, True, timeout=EXPLORE_EXAMPLE_PREGENERATION_TIMEOUT
+        )
+    else:
+        get_cache().delete(cache_key)
+
+
+def is_base_generation_pending(template_id):
+    """Return True if the base data structure of a template is being
+    generated in the background
+
+    Args:
+        template_id:
+
+    Returns:
+
+    """
+    return bool(
+        get_cache().get(f"{BASE_GENERATION_KEY_PREFIX}:{template_id}", False)
+    )
+
+
+def check_explore_data_structure_owner(explore_data_structure, request):
+    """Check that the user of the request can modify an explore data
+    structure
+
+    Args:
+        explore_data_structure:
+        request:
+
+    Returns:
+
+    """
+    if request.user.is_superuser:
+        return
+    if explore_data_structure.user != str(request.user.id):
+        raise AccessControlError(
+            "The user doesn't have enough rights to access this data structure."
+        )
+
+
+def get_tree_element(explore_data_structure, element_id, request):
+    """Return an element of the tree of an explore data structure. The
+    elements shared with the other users are returned for reading only.
+
+    Args:
+        explore_data_structure:
+        element_id:
+        request:
+
+    Returns:
+        DataStructureElement
+
+    """
+    element_id = resolve_element_id(explore_data_structure, element_id)
+    if explore_data_structure.base_data_structure_id is not None:
+        check_explore_data_structure_owner(explore_data_structure, request)
+        element = DataStructureElement.get_by_id(element_id)
+        if (
+            element.data_structure_id
+            == explore_data_structure.base_data_structure_id
+        ):
+            return element
+    else:
+        element = data_structure_element_api.get_by_id(element_id, request)
+    if element.data_structure_id != explore_data_structure.id:
+        raise exceptions.DoesNotExist(
+            "The element is not in the tree of the data structure."
+        )
+    return element
+
+
+def get_by_element_id(element_id, request):
+    """Return the explore data structure of the user of the request whose
+    tree contains an element
+
+    Args:
+        element_id:
+        request:
+
+    Returns:
+
+    """
+    element = DataStructureElement.get_by_id(element_id)
+    explore_data_structure = get_by_id(element.data_structure_id)
+    if explore_data_structure.user == BASE_DATA_STRUCTURE_USER:
+        # element shared with the other users
+        explore_data_structure = get_by_user_id_and_template_id(
+            str(request.user.id), explore_data_structure.template_id
+        )
+    check_explore_data_structure_owner(explore_data_structure, request)
     return explore_data_structure
 
 
+def _get_source_element_id(explore_data_structure, element_id):
+    """Return the id of the shared element an element was copied from, None
+    if not copied from a shared element
+
+    Args:
+        explore_data_structure:
+        element_id:
+
+    Returns:
+
+    """
+    source_ids = [
+        int(source_id)
+        for source_id, copy_id in explore_data_structure.copied_elements.items()
+        if copy_id == str(element_id)
+    ]
+    return (
+        DataStructureElement.objects.filter(
+            pk__in=source_ids,
+            data_structure=explore_data_structure.base_data_structure_id,
+        )
+        .values_list("pk", flat=True)
+        .first()
+    )
+
+
+def get_editable_element(explore_data_structure, element_id, request):
+    """Return an element of the tree of an explore data structure, that the
+    parser can modify. The subtree of the parent of a shared element is
+    copied to the data structure of the user first, the parser modifying the
+    parent and the branches of its children.
+
+    Args:
+        explore_data_structure:
+        element_id:
+        request:
+
+    Returns:
+        DataStructureElement
+
+    """
+    element = get_tree_element(explore_data_structure, element_id, request)
+    if element.data_structure_id == explore_data_structure.id:
+        if (
+            element.parent_id is not None
+            or element.pk
+            == explore_data_structure.data_structure_element_root_id
+        ):
+            return element
+        # root of a copied subtree, still a child of a shared element
+        source_id = _get_source_element_id(explore_data_structure, element.pk)
+        if source_id is None:
+            raise exceptions.DoesNotExist(
+                "The element is not in the tree of the data structure."
+            )
+        source_parent_id = DataStructureElement.get_by_id(source_id).parent_id
+    else:
+        source_parent_id = element.parent_id
+
+    with transaction.atomic():
+        copy_subtree(
+            explore_data_structure,
+            source_parent_id if source_parent_id is not None else element.pk,
+            user=str(request.user.id) if request.user.id else None,
+        )
+    return data_structure_element_api.get_by_id(
+        resolve_element_id(explore_data_structure, element.pk), request
+    )
+
+
+def _list_subtree(element):
+    """List the elements of a loaded subtree, each element before its
+    children, the children in their order
+
+    Args:
+        element:
+
+    Returns:
+        list: (element, parent) of the elements
+
+    """
+    elements = []
+    stack = [(element, None)]
+    while stack:
+        element, parent = stack.pop()
+        elements.append((element, parent))
+        stack.extend((child, element) for child in reversed(element.children))
+    return elements
+
+
+def copy_subtree(explore_data_structure, element_id, user):
+    """Copy the subtree of an element of the tree of an explore data
+    structure to the data structure, in a fixed number of queries. The copy
+    replaces the element in the tree.
+
+    Args:
+        explore_data_structure:
+        element_id: id of a shared element, or of an element of the data
+            structure
+        user: owner of the copied elements
+
+    Returns:
+        DataStructureElement: copy of the element
+
+    """
+    element = DataStructureElement.get_by_id(element_id)
+    source_elements = _list_subtree(
+        load_element_tree(element, explore_data_structure)
+    )
+    # the children are copied after their parent, in their order
+    copies = DataStructureElement.objects.bulk_create(
+        [
+            DataStructureElement(
+                user=user,
+                tag=source_element.tag,
+                value=source_element.value,
+                options=source_element.options,
+                data_structure=explore_data_structure,
+            )
+            for source_element, _ in source_elements
+        ]
+    )
+    copies_by_source_id = {
+        source_element.pk: copy
+        for (source_element, _), copy in zip(source_elements, copies)
+    }
+    updated_elements = []
+    for source_element, source_parent in source_elements:
+        copy = copies_by_source_id[source_element.pk]
+        if source_element.tag == "choice-iter" and source_element.value:
+            # the value of a choice is the id of its selected child
+            copy.value = str(copies_by_source_id[int(source_element.value)].pk)
+        if source_parent is not None:
+            copy.parent = copies_by_source_id[source_parent.pk]
+        if copy.parent_id is not None or source_element.tag == "choice-iter":
+            updated_elements.append(copy)
+    DataStructureElement.objects.bulk_update(
+        updated_elements, ["parent", "value"]
+    )
+
+    # elements of the data structure copied again are replaced by their copy
+    copy_ids = {
+        str(source_id): str(copy.pk)
+        for source_id, copy in copies_by_source_id.items()
+    }
+    copied_elements = {
+        source_id: copy_ids.get(copy_id, copy_id)
+        for source_id, copy_id in explore_data_structure.copied_elements.items()
+    }
+    copied_elements.update(copy_ids)
+    explore_data_structure.copied_elements = copied_elements
+    DataStructureElement.objects.filter(
+        pk__in=copies_by_source_id.keys(),
+        data_structure=explore_data_structure,
+    ).delete()
+
+    root_copy = copies_by_source_id.get(
+        explore_data_structure.data_structure_element_root_id
+    )
+    if root_copy is not None:
+        explore_data_structure.data_structure_element_root = root_copy
+    if explore_data_structure.selected_fields:
+        # imported here, the field selection depends on the catalogs of the
+        # explore data structures
+        from core_explore_example_app.utils.field_selection import (
+            translate_selection,
+        )
+
+        explore_data_structure.selected_fields = translate_selection(
+            explore_data_structure.selected_fields, copied_elements
+        )
+    upsert(explore_data_structure)
+    return copies_by_source_id[element.pk]
+
+
 def create_and_get_explore_data_structure(template, request):
-    """Get Data structure from template and user, generate them if no exist
+    """Get Data structure from template and user, create it from the base
+    data structure of the template if no exist. The elements of the base data
+    structure are shared until the user modifies them.
 
     Args:
         template:
@@ -50,21 +435,20 @@ def create_and_get_explore_data_structure(template, request):
             user_id=str(request.user.id), template_id=template.id
         )
     except Exception:
-        # create explore data structure
+        base_data_structure = get_or_create_base_explore_data_structure(
+            template, request
+        )
+        # create explore data structure, sharing the base elements
         explore_data_structure = ExploreDataStructure(
             user=str(request.user.id),
             template=template,
             name=template.filename,
+            base_data_structure=base_data_structure,
+            data_structure_element_root_id=(
+                base_data_structure.data_structure_element_root_id
+            ),
         )
         upsert(explore_data_structure)
-        # generate the root element
-        root_element = generate_form(
-            template.content,
-            data_structure=explore_data_structure,
-            request=request,
-        )
-        explore_data_structure.data_structure_element_root = root_element
-        upsert(explore_data_structure)
 
     # Return the data structure
     return explore_data_structure
@@ -11,9 +11,20 @@ from core_explore_example_app.permissions import rights
 class ExploreDataStructure(DataStructure):
     """Explore data structure"""
 
-    selected_fields_html_tree = models.TextField(
-        blank=True, default=None, null=True
+    # ids of the selected elements, and selected leaves by parent element
+    selected_fields = models.JSONField(blank=True, default=None, null=True)
+    # base data structure of the template, sharing its elements with the
+    # data structure of the user
+    base_data_structure = models.ForeignKey(
+        "self",
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="+",
     )
+    # id of the copy of the elements of the base data structure modified by
+    # the user, and of the copies copied again, by id of the copied element
+    copied_elements = models.JSONField(blank=True, default=dict)
 
     @staticmethod
     def get_permission():
@@ -24,6 +24,18 @@ def get_by_id(query_id):
     return SavedQuery.get_by_id(query_id)
 
 
+def get_by_id_list(query_id_list):
+    """Get the Saved Queries with the given ids
+
+    Args:
+        query_id_list:
+
+    Returns:
+
+    """
+    return SavedQuery.get_by_id_list(query_id_list)
+
+
 def get_all_by_user_and_template(user_id, template_id):
     """Gets a saved query by user id and template id
 
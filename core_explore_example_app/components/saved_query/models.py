@@ -49,6 +49,21 @@ class SavedQuery(models.Model):
         except Exception as exception:
             raise exceptions.ModelError(str(exception))
 
+    @staticmethod
+    def get_by_id_list(query_id_list):
+        """Get the saved queries with the given ids
+
+        Args:
+            query_id_list:
+
+        Returns:
+
+        """
+        try:
+            return list(SavedQuery.objects.filter(pk__in=query_id_list))
+        except Exception as exception:
+            raise exceptions.ModelError(str(exception))
+
     @staticmethod
     def get_all_by_user_and_template(user_id, template_id):
         """Gets a saved query by user id and template id
@@ -5,7 +5,20 @@ import logging
 from django.core.exceptions import ObjectDoesNotExist
 from django_celery_beat.models import CrontabSchedule, PeriodicTask
 
-from core_explore_example_app.tasks import delete_temporary_saved_queries
+from core_explore_example_app.components.explore_data_structure.api import (
+    BASE_DATA_STRUCTURE_USER,
+)
+from core_explore_example_app.components.explore_data_structure.models import (
+    ExploreDataStructure,
+)
+from core_explore_example_app.settings import (
+    EXPLORE_EXAMPLE_PREGENERATE_DATA_STRUCTURES,
+)
+from core_explore_example_app.tasks import (
+    delete_temporary_saved_queries,
+    schedule_base_explore_data_structure,
+)
+from core_main_app.components.template.models import Template
 
 logger = logging.getLogger(__name__)
 
@@ -26,3 +39,24 @@ def init_periodic_tasks():
         )
     except Exception as exception:
         logger.error(str(exception))
+
+
+def init_explore_data_structures():
+    """Generate the data structures of the current templates in the
+    background, if not generated yet"""
+    if not EXPLORE_EXAMPLE_PREGENERATE_DATA_STRUCTURES:
+        return
+    try:
+        template_ids = (
+            Template.objects.filter(is_current=True, is_disabled=False)
+            .exclude(
+                pk__in=ExploreDataStructure.objects.filter(
+                    user=BASE_DATA_STRUCTURE_USER
+                ).values("template")
+            )
+            .values_list("pk", flat=True)
+        )
+        for template_id in template_ids:
+            schedule_base_explore_data_structure(template_id)
+    except Exception as exception:
+        logger.error(str(exception))
@@ -0,0 +1,108 @@
+"""Create explore indexes command"""
+
+import logging
+from argparse import BooleanOptionalAction
+
+from django.core.management import BaseCommand, CommandError
+
+from core_explore_example_app.utils import index_advisor
+from core_main_app.settings import MONGODB_INDEXING
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Create the MongoDB indexes advised for the queries of templates"""
+
+    help = (
+        "Create MongoDB indexes for the paths used by the queries recorded "
+        "against templates"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--template",
+            default=None,
+            type=int,
+            action="append",
+            help="Id of the template (can be repeated)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            default=False,
+            action=BooleanOptionalAction,
+            help="Dry run",
+        )
+
+    def handle(self, *args, **options):
+        """Create the indexes advised for the queries recorded against the
+        templates.
+
+        Parameters:
+            "template": integer, repeatable
+            "dry-run": boolean
+
+        Examples:
+            create_explore_indexes --template 1
+            create_explore_indexes --template 1 --template 2 --dry-run
+
+        Args:
+            args:
+            options:
+
+        """
+        template_ids = options["template"]
+        dry_run = options["dry_run"]
+
+        if not template_ids:
+            raise CommandError(
+                "The following arguments are required: --template."
+            )
+
+        if dry_run:
+            self.stdout.write("Dry run: no index will be created.")
+
+        try:
+            queries = []
+            for template_id in template_ids:
+                queries.extend(index_advisor.get_template_queries(template_id))
+
+            paths, elem_match_paths = dict(), dict()
+            for query in queries:
+                index_advisor.collect_query_paths(
+                    query, paths, elem_match_paths
+                )
+            self.stdout.write(f"{len(queries)} queries found. Paths queried:")
+            for path in sorted(paths):
+                self.stdout.write(f"{path}: {', '.join(sorted(paths[path]))}")
+            for parent_path in sorted(elem_match_paths):
+                for path, operators in sorted(
+                    elem_match_paths[parent_path].items()
+                ):
+                    self.stdout.write(
+                        f"{path} ($elemMatch on {parent_path}): "
+                        f"{', '.join(sorted(operators))}"
+                    )
+
+            index_specs = index_advisor.get_index_specs(queries)
+            if MONGODB_INDEXING:
+                from core_main_app.components.mongo.models import MongoData
+
+                index_specs = index_advisor.create_indexes(
+                    MongoData._get_collection(), index_specs, dry_run=dry_run
+                )
+            elif not dry_run:
+                raise CommandError(
+                    "MongoDB indexing is disabled (MONGODB_INDEXING=False)."
+                )
+
+            self.stdout.write(
+                "Indexes to create:" if dry_run else "Indexes created:"
+            )
+            for index_spec in index_specs:
+                self.stdout.write(str(index_spec))
+            self.stdout.write(self.style.SUCCESS("Command completed."))
+        except CommandError:
+            raise
+        except Exception as exception:
+            raise CommandError(f"{str(exception)}")
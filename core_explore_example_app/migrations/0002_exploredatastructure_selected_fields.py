@@ -0,0 +1,78 @@
+"""Migrations"""
+
+from django.db import migrations, models
+from lxml import html
+
+
+def _get_selection(html_tree_string):
+    """Return the selection stored in a pruned tree of selected fields
+
+    Args:
+        html_tree_string:
+
+    Returns:
+
+    """
+    elements = []
+    parents = dict()
+    for li in html.fromstring(html_tree_string).iter("li"):
+        select_class = li.attrib.get("select_class")
+        if select_class == "element":
+            elements.append(li.attrib["select_id"])
+        elif select_class == "parent":
+            parents[li.attrib.get("class", "")] = li.attrib["select_id"].split(
+                " "
+            )
+    if not elements:
+        return None
+    return {"elements": elements, "parents": parents}
+
+
+def html_tree_to_selection(apps, schema_editor):
+    """Convert the trees of selected fields to selections
+
+    Args:
+        apps:
+        schema_editor:
+
+    Returns:
+
+    """
+    explore_data_structure_model = apps.get_model(
+        "core_explore_example_app", "ExploreDataStructure"
+    )
+    for explore_data_structure in explore_data_structure_model.objects.filter(
+        selected_fields_html_tree__isnull=False
+    ).iterator():
+        try:
+            selected_fields = _get_selection(
+                explore_data_structure.selected_fields_html_tree
+            )
+        except Exception:
+            # unreadable tree: the fields have to be selected again
+            selected_fields = None
+        explore_data_structure.selected_fields = selected_fields
+        explore_data_structure.save(update_fields=["selected_fields"])
+
+
+class Migration(migrations.Migration):
+    """Migration"""
+
+    dependencies = [
+        ("core_explore_example_app", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exploredatastructure",
+            name="selected_fields",
+            field=models.JSONField(blank=True, default=None, null=True),
+        ),
+        migrations.RunPython(
+            html_tree_to_selection, migrations.RunPython.noop
+        ),
+        migrations.RemoveField(
+            model_name="exploredatastructure",
+            name="selected_fields_html_tree",
+        ),
+    ]
@@ -0,0 +1,34 @@
+"""Migrations"""
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Migration"""
+
+    dependencies = [
+        (
+            "core_explore_example_app",
+            "0002_exploredatastructure_selected_fields",
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exploredatastructure",
+            name="base_data_structure",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="core_explore_example_app.exploredatastructure",
+            ),
+        ),
+        migrations.AddField(
+            model_name="exploredatastructure",
+            name="copied_elements",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,47 @@
+"""Query Compile Serializers"""
+
+from rest_framework.serializers import (
+    BooleanField,
+    CharField,
+    JSONField,
+    ListField,
+    ValidationError,
+)
+
+from core_main_app.commons.serializers import BasicSerializer
+from core_explore_example_app.settings import (
+    EXPLORE_EXAMPLE_BATCH_COMPILE_MAX_ITEMS,
+)
+
+
+class CompileQueryItemSerializer(BasicSerializer):
+    """Query builder form to compile"""
+
+    template_id = CharField(required=True)
+    form_values = JSONField(required=True)
+    use_wildcard = BooleanField(required=False, default=False)
+
+
+class CompileQueryListSerializer(BasicSerializer):
+    """Batch of query builder forms to compile"""
+
+    items = ListField(
+        child=CompileQueryItemSerializer(), allow_empty=False, required=True
+    )
+
+    def validate_items(self, value):
+        """Validate the size of the batch
+
+        Args:
+            value:
+
+        Returns:
+
+        """
+        if len(value) > EXPLORE_EXAMPLE_BATCH_COMPILE_MAX_ITEMS:
+            raise ValidationError(
+                "A batch can not contain more than {0} items.".format(
+                    EXPLORE_EXAMPLE_BATCH_COMPILE_MAX_ITEMS
+                )
+            )
+        return value
@@ -0,0 +1,105 @@
+"""REST Views to compile queries built by example in batch"""
+
+from drf_spectacular.utils import (
+    extend_schema,
+    OpenApiExample,
+    OpenApiResponse,
+)
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core_explore_example_app.rest.query_compile.serializers import (
+    CompileQueryListSerializer,
+)
+from core_explore_example_app.utils.query_pipeline import compile_forms
+
+
+@extend_schema(
+    tags=["Query by Example"],
+    description="Compile queries built by example",
+)
+class CompileQueryList(APIView):
+    """Compile a batch of queries built by example"""
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        summary="Compile a batch of queries built by example",
+        description="Compile each query builder form of the batch to a query "
+        "and a displayed query. The errors are reported for each form.",
+        request=CompileQueryListSerializer,
+        responses={
+            200: OpenApiResponse(description="Compiled queries"),
+            400: OpenApiResponse(description="Validation error"),
+            500: OpenApiResponse(description="Internal server error"),
+        },
+        examples=[
+            OpenApiExample(
+                "Compile queries",
+                summary="Compile a query on an element",
+                request_only=True,
+                value={
+                    "items": [
+                        {
+                            "template_id": "1",
+                            "use_wildcard": False,
+                            "form_values": [
+                                {
+                                    "id": "1",
+                                    "operator": "AND",
+                                    "name": "element",
+                                    "type": "xs:string",
+                                    "comparison": "is",
+                                    "value": "value",
+                                }
+                            ],
+                        }
+                    ]
+                },
+            ),
+        ],
+    )
+    def post(self, request):
+        """Compile the query builder forms of the batch
+        Parameters:
+            {
+              "items": [
+                {
+                  "template_id": "1",
+                  "form_values": [...],
+                  "use_wildcard": false
+                }
+              ]
+            }
+        Args:
+            request: HTTP request
+        Returns:
+            - code: 200
+              content: List of compiled queries, in the order of the items
+            - code: 400
+              content: Validation error
+            - code: 500
+              content: Internal server error
+        """
+        try:
+            # Build serializer
+            serializer = CompileQueryListSerializer(data=request.data)
+            # Validate data
+            serializer.is_valid(raise_exception=True)
+            items = [dict(item) for item in serializer.validated_data["items"]]
+
+            return Response(
+                compile_forms(items, request=request),
+                status=status.HTTP_200_OK,
+            )
+        except ValidationError as validation_exception:
+            content = {"message": validation_exception.detail}
+            return Response(content, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as api_exception:
+            content = {"message": str(api_exception)}
+            return Response(
+                content, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
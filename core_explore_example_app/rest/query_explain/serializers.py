@@ -0,0 +1,12 @@
+"""Query Explain Serializers"""
+
+from rest_framework.serializers import CharField, JSONField
+
+from core_main_app.commons.serializers import BasicSerializer
+
+
+class ExplainQuerySerializer(BasicSerializer):
+    """Query builder form to explain, same payload as the query builder"""
+
+    formValues = JSONField(required=True)
+    templateID = CharField(required=True)
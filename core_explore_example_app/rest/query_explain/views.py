@@ -0,0 +1,110 @@
+"""REST Views to explain the queries built by example"""
+
+from drf_spectacular.utils import (
+    extend_schema,
+    OpenApiExample,
+    OpenApiResponse,
+)
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core_explore_example_app.rest.query_explain.serializers import (
+    ExplainQuerySerializer,
+)
+from core_explore_example_app.utils.query_explain import (
+    explain_query,
+    get_data_collection,
+)
+from core_explore_example_app.utils.query_normalizer import normalize_query
+from core_explore_example_app.utils.query_pipeline import compile_form
+
+
+@extend_schema(
+    tags=["Query by Example"],
+    description="Explain a query built by example",
+)
+class ExplainQuery(APIView):
+    """Explain a query built by example"""
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        summary="Explain a query built by example",
+        description="Compile the query builder form and report the shape of "
+        "the query, the paths it touches and its winning plan",
+        request=ExplainQuerySerializer,
+        responses={
+            200: OpenApiResponse(description="Query explanation"),
+            400: OpenApiResponse(description="Validation error"),
+            500: OpenApiResponse(description="Internal server error"),
+        },
+        examples=[
+            OpenApiExample(
+                "Explain a query",
+                summary="Explain a query on an element",
+                request_only=True,
+                value={
+                    "templateID": "1",
+                    "formValues": [
+                        {
+                            "id": "1",
+                            "operator": "AND",
+                            "name": "element",
+                            "type": "xs:string",
+                            "comparison": "is",
+                            "value": "value",
+                        }
+                    ],
+                },
+            ),
+        ],
+    )
+    def post(self, request):
+        """Explain the query built from the query builder form
+        Parameters:
+            {
+              "templateID": "1",
+              "formValues": [...]
+            }
+        Args:
+            request: HTTP request
+        Returns:
+            - code: 200
+              content: Query explanation
+            - code: 400
+              content: Validation error
+            - code: 500
+              content: Internal server error
+        """
+        try:
+            # Build serializer
+            serializer = ExplainQuerySerializer(data=request.data)
+            # Validate data
+            serializer.is_valid(raise_exception=True)
+            template_id = serializer.validated_data["templateID"]
+            form_values = serializer.validated_data["formValues"]
+
+            compiled_form = compile_form(
+                form_values, template_id, request=request
+            )
+            if len(compiled_form.errors) > 0:
+                content = {"message": compiled_form.errors}
+                return Response(content, status=status.HTTP_400_BAD_REQUEST)
+
+            explanation = explain_query(
+                normalize_query(compiled_form.query),
+                template_id,
+                get_data_collection(),
+            )
+            return Response(explanation, status=status.HTTP_200_OK)
+        except ValidationError as validation_exception:
+            content = {"message": validation_exception.detail}
+            return Response(content, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as api_exception:
+            content = {"message": str(api_exception)}
+            return Response(
+                content, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
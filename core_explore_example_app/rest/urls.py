@@ -6,6 +6,12 @@ from rest_framework.urlpatterns import format_suffix_patterns
 from core_explore_example_app.rest.persistent_query_example import (
     views as persistent_query_example_views,
 )
+from core_explore_example_app.rest.query_compile import (
+    views as query_compile_views,
+)
+from core_explore_example_app.rest.query_explain import (
+    views as query_explain_views,
+)
 from core_explore_example_app.rest.saved_query import (
     views as saved_query_views,
 )
@@ -21,6 +27,16 @@ urlpatterns = [
         saved_query_views.SavedQueryDetail.as_view(),
         name="core_explore_example_app_rest_saved_query_detail",
     ),
+    re_path(
+        r"^explain/query/$",
+        query_explain_views.ExplainQuery.as_view(),
+        name="core_explore_example_app_rest_explain_query",
+    ),
+    re_path(
+        r"^compile/query/$",
+        query_compile_views.CompileQueryList.as_view(),
+        name="core_explore_example_app_rest_compile_query_list",
+    ),
     re_path(
         r"^admin/persistent_query_example/$",
         persistent_query_example_views.AdminPersistentQueryExampleList.as_view(),
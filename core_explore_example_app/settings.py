@@ -20,3 +20,134 @@ QUERIES_MAX_DAYS_IN_DATABASE = getattr(
 EXPLORE_EXAMPLE_MENU_NAME = getattr(
     settings, "EXPLORE_EXAMPLE_MENU_NAME", "Query by Example"
 )
+
+EXPLORE_EXAMPLE_CACHE_ALIAS = getattr(
+    settings, "EXPLORE_EXAMPLE_CACHE_ALIAS", "default"
+)
+""" :py:class:`str`: Django cache shared by all workers.
+"""
+EXPLORE_EXAMPLE_QUERY_CACHE_SIZE = getattr(
+    settings, "EXPLORE_EXAMPLE_QUERY_CACHE_SIZE", 512
+)
+""" :py:class:`int`: Compiled queries kept in memory per worker (0 disables).
+"""
+EXPLORE_EXAMPLE_QUERY_CACHE_TIMEOUT = getattr(
+    settings, "EXPLORE_EXAMPLE_QUERY_CACHE_TIMEOUT", 3600
+)
+""" :py:class:`int`: Seconds compiled queries are kept in the shared cache.
+"""
+EXPLORE_EXAMPLE_SCHEMA_CACHE_SIZE = getattr(
+    settings, "EXPLORE_EXAMPLE_SCHEMA_CACHE_SIZE", 128
+)
+""" :py:class:`int`: Template schema information kept in memory per worker.
+"""
+EXPLORE_EXAMPLE_SCHEMA_CACHE_TIMEOUT = getattr(
+    settings, "EXPLORE_EXAMPLE_SCHEMA_CACHE_TIMEOUT", 86400
+)
+""" :py:class:`int`: Seconds template schema information is kept in the shared
+cache.
+"""
+EXPLORE_EXAMPLE_CATALOG_CACHE_SIZE = getattr(
+    settings, "EXPLORE_EXAMPLE_CATALOG_CACHE_SIZE", 128
+)
+""" :py:class:`int`: Data structure element catalogs kept in memory per worker.
+"""
+EXPLORE_EXAMPLE_CATALOG_CACHE_TIMEOUT = getattr(
+    settings, "EXPLORE_EXAMPLE_CATALOG_CACHE_TIMEOUT", 86400
+)
+""" :py:class:`int`: Seconds data structure element catalogs are kept in the
+shared cache.
+"""
+EXPLORE_EXAMPLE_SCHEMA_AWARE_CRITERIA = getattr(
+    settings, "EXPLORE_EXAMPLE_SCHEMA_AWARE_CRITERIA", True
+)
+""" :py:class:`bool`: Only query the element / element.#text representations
+allowed by the schema. Set to False if the data was ingested inconsistently.
+"""
+EXPLORE_EXAMPLE_SAVED_QUERY_CACHE_SIZE = getattr(
+    settings, "EXPLORE_EXAMPLE_SAVED_QUERY_CACHE_SIZE", 256
+)
+""" :py:class:`int`: Parsed saved queries kept in memory per worker.
+"""
+EXPLORE_EXAMPLE_TEXT_SEARCH = getattr(
+    settings, "EXPLORE_EXAMPLE_TEXT_SEARCH", False
+)
+""" :py:class:`bool`: Allow the "contains word" string comparison, using a
+$text search. Requires a text index on the data, only enable it when the data
+is stored in MongoDB with a text index.
+"""
+EXPLORE_EXAMPLE_BATCH_COMPILE_MAX_ITEMS = getattr(
+    settings, "EXPLORE_EXAMPLE_BATCH_COMPILE_MAX_ITEMS", 1000
+)
+""" :py:class:`int`: Maximum number of forms compiled by a batch request.
+"""
+EXPLORE_EXAMPLE_BATCH_COMPILE_WORKERS = getattr(
+    settings, "EXPLORE_EXAMPLE_BATCH_COMPILE_WORKERS", 4
+)
+""" :py:class:`int`: Worker threads compiling large batches of forms.
+"""
+EXPLORE_EXAMPLE_BATCH_COMPILE_THREAD_THRESHOLD = getattr(
+    settings, "EXPLORE_EXAMPLE_BATCH_COMPILE_THREAD_THRESHOLD", 50
+)
+""" :py:class:`int`: Number of forms from which a batch is compiled by the
+worker threads.
+"""
+EXPLORE_EXAMPLE_USER_INPUTS_CACHE_SIZE = getattr(
+    settings, "EXPLORE_EXAMPLE_USER_INPUTS_CACHE_SIZE", 1024
+)
+""" :py:class:`int`: User inputs of the query builder elements kept in memory
+per worker (0 disables).
+"""
+EXPLORE_EXAMPLE_USER_INPUTS_CACHE_TIMEOUT = getattr(
+    settings, "EXPLORE_EXAMPLE_USER_INPUTS_CACHE_TIMEOUT", 86400
+)
+""" :py:class:`int`: Seconds user inputs of the query builder elements are kept
+in the shared cache.
+"""
+EXPLORE_EXAMPLE_SELECTION_TREE_CACHE_SIZE = getattr(
+    settings, "EXPLORE_EXAMPLE_SELECTION_TREE_CACHE_SIZE", 64
+)
+""" :py:class:`int`: Trees of the selected fields kept in memory per worker.
+"""
+EXPLORE_EXAMPLE_SELECTION_TREE_CACHE_TIMEOUT = getattr(
+    settings, "EXPLORE_EXAMPLE_SELECTION_TREE_CACHE_TIMEOUT", 86400
+)
+""" :py:class:`int`: Seconds trees of the selected fields are kept in the
+shared cache.
+"""
+EXPLORE_EXAMPLE_PREGENERATE_DATA_STRUCTURES = getattr(
+    settings, "EXPLORE_EXAMPLE_PREGENERATE_DATA_STRUCTURES", True
+)
+""" :py:class:`bool`: Generate the data structures of the current templates in
+a background task.
+"""
+EXPLORE_EXAMPLE_PREGENERATION_TIMEOUT = getattr(
+    settings, "EXPLORE_EXAMPLE_PREGENERATION_TIMEOUT", 3600
+)
+""" :py:class:`int`: Seconds a data structure is shown as being generated in
+the background.
+"""
+EXPLORE_EXAMPLE_RENDERED_FORM_CACHE_SIZE = getattr(
+    settings, "EXPLORE_EXAMPLE_RENDERED_FORM_CACHE_SIZE", 32
+)
+""" :py:class:`int`: Rendered forms of the data structures kept in memory per
+worker.
+"""
+EXPLORE_EXAMPLE_RENDERED_FORM_CACHE_TIMEOUT = getattr(
+    settings, "EXPLORE_EXAMPLE_RENDERED_FORM_CACHE_TIMEOUT", 86400
+)
+""" :py:class:`int`: Seconds rendered forms are kept in the shared cache.
+"""
+EXPLORE_EXAMPLE_RENDERED_FORM_COMPRESSION_THRESHOLD = getattr(
+    settings, "EXPLORE_EXAMPLE_RENDERED_FORM_COMPRESSION_THRESHOLD", 16384
+)
+""" :py:class:`int`: Size in bytes from which rendered forms are compressed in
+the shared cache.
+"""
+EXPLORE_EXAMPLE_LAZY_RENDER_DEPTH = getattr(
+    settings, "EXPLORE_EXAMPLE_LAZY_RENDER_DEPTH", 0
+)
+""" :py:class:`int`: Levels of complex elements rendered when the select fields
+page is loaded, the deeper levels are rendered when expanded (0 renders the
+whole form).
+"""
@@ -0,0 +1,149 @@
+"""Signals of the explore example app"""
+
+import logging
+
+from django.conf import settings
+from django.db.models import signals as models_signals
+from django.template.autoreload import get_template_directories
+from django.utils.autoreload import file_changed
+
+from core_explore_example_app.components.saved_query.models import SavedQuery
+from core_explore_example_app.settings import (
+    EXPLORE_EXAMPLE_PREGENERATE_DATA_STRUCTURES,
+)
+from core_explore_example_app.tasks import (
+    schedule_base_explore_data_structure,
+)
+from core_explore_example_app.utils.cache import bump_generation
+from core_explore_example_app.utils.parser import clear_rendered_forms
+from core_explore_example_app.utils.query_builder import clear_template_cache
+from core_explore_example_app.utils.query_cache import (
+    SAVED_QUERY_NAMESPACE,
+    TEMPLATE_NAMESPACE,
+)
+from core_main_app.components.template.models import Template
+
+logger = logging.getLogger(__name__)
+
+
+def connect():
+    """Connect signals invalidating the caches of the app"""
+    models_signals.post_save.connect(invalidate_template, sender=Template)
+    models_signals.post_delete.connect(invalidate_template, sender=Template)
+    if EXPLORE_EXAMPLE_PREGENERATE_DATA_STRUCTURES:
+        models_signals.pre_save.connect(
+            remember_current_version, sender=Template
+        )
+        models_signals.post_save.connect(
+            pregenerate_explore_data_structure, sender=Template
+        )
+    models_signals.post_save.connect(invalidate_saved_query, sender=SavedQuery)
+    models_signals.post_delete.connect(
+        invalidate_saved_query, sender=SavedQuery
+    )
+    if settings.DEBUG:
+        # templates are reloaded without restarting the server
+        file_changed.connect(
+            invalidate_rendered_templates,
+            dispatch_uid="core_explore_example_app_rendered_templates",
+        )
+
+
+def invalidate_template(sender, instance, **kwargs):
+    """Invalidate cache entries built from a template
+
+    Args:
+        sender:
+        instance:
+        kwargs:
+    """
+    try:
+        bump_generation(TEMPLATE_NAMESPACE, instance.pk)
+    except Exception as exception:
+        logger.error(
+            "Unable to invalidate cache of template %s: %s",
+            str(instance.pk),
+            str(exception),
+        )
+
+
+def remember_current_version(sender, instance, **kwargs):
+    """Store on the template whether it was the current version before being
+    saved
+
+    Args:
+        sender:
+        instance:
+        kwargs:
+    """
+    instance._explore_example_was_current = (
+        instance.pk is not None
+        and sender.objects.filter(pk=instance.pk, is_current=True).exists()
+    )
+
+
+def pregenerate_explore_data_structure(
+    sender, instance, created=False, **kwargs
+):
+    """Generate the data structure of a template in the background when it
+    is created as, or becomes, the current version
+
+    Args:
+        sender:
+        instance:
+        created:
+        kwargs:
+    """
+    if not instance.is_current or instance.is_disabled:
+        return
+    if not created and getattr(
+        instance, "_explore_example_was_current", False
+    ):
+        # already current: scheduled when it became current
+        return
+    try:
+        schedule_base_explore_data_structure(instance.pk)
+    except Exception as exception:
+        logger.error(
+            "Unable to schedule the generation of the data structure of "
+            "template %s: %s",
+            str(instance.pk),
+            str(exception),
+        )
+
+
+def invalidate_saved_query(sender, instance, **kwargs):
+    """Invalidate cache entries built from a saved query
+
+    Args:
+        sender:
+        instance:
+        kwargs:
+    """
+    try:
+        bump_generation(SAVED_QUERY_NAMESPACE, instance.pk)
+    except Exception as exception:
+        logger.error(
+            "Unable to invalidate cache of saved query %s: %s",
+            str(instance.pk),
+            str(exception),
+        )
+
+
+def invalidate_rendered_templates(sender, file_path, **kwargs):
+    """Invalidate the query builder templates and the rendered forms when a
+    template is reloaded
+
+    Args:
+        sender:
+        file_path:
+        kwargs:
+    """
+    if file_path.suffix == ".py":
+        return
+    if any(
+        template_dir in file_path.parents
+        for template_dir in get_template_directories()
+    ):
+        clear_template_cache()
+        clear_rendered_forms()
@@ -19,12 +19,14 @@ var selectElement = function(event)
 {
     var elementID = $(event.target).attr('select_id');
     var criteriaID = $("#current_criteria").html();
+    var templateID = $("#template_id").html();
 	$.ajax({
         url : selectElementUrl,
         type : "POST",
         dataType: "json",
         data : {
-        	elementID: elementID
+        	elementID: elementID,
+        	templateID: templateID
         },
 		success: function(data){
             var $criteriaTag = $("#" + criteriaID);
@@ -1,36 +1,64 @@
+// Elements toggled since the page was loaded: element id -> selected
+var toggledFields = {};
+
+/**
+ * Returns the id of the element of a checkbox
+ * @param checkbox
+ */
+var getCheckboxElementId = function(checkbox)
+{
+    var $parent = $(checkbox).parent();
+    // the box of an element with children is in its list
+    if($parent.is("ul")) {
+        $parent = $parent.parent();
+    }
+    return $parent.attr("class");
+};
+
+// Keep track of the toggled fields
+var toggleField = function(event)
+{
+    var elementID = getCheckboxElementId(event.target);
+    if(elementID !== undefined) {
+        toggledFields[elementID] = event.target.checked;
+    }
+};
+
 // Save the selected fields
 var saveFields = function()
 {
     var templateID = $("#template_id").html();
-    var $xsd_form = $("#xsd_form");
-    // Need to Set input values explicitly before sending innerHTML for save
-    var elements = $xsd_form.find("input");
-    for(var i = 0; i < elements.length; i++) {
-    	// sent attribute to property value
-    	elements[i].setAttribute("value", elements[i].checked);
-    	if(elements[i].checked == true)
-    	{
-    		elements[i].setAttribute("checked","checked");
-    	}
+    var selected = [];
+    var deselected = [];
+    for(var elementID in toggledFields) {
+        if(toggledFields[elementID] === true) {
+            selected.push(elementID);
+        } else {
+            deselected.push(elementID);
+        }
     }
-    $('select option').each(function(){ this.defaultSelected = this.selected; });
-    var formContent = $xsd_form.html();
-    save_fields(formContent, templateID);
+    if(selected.length === 0 && deselected.length === 0) {
+        window.location = buildQueryUrl;
+        return;
+    }
+    update_selected_fields(selected, deselected, templateID);
 };
 
 
 /**
- * AJAX call, save the selected fields and redirects to perform search
- * @param formContent
+ * AJAX call, save the toggled fields and redirects to perform search
+ * @param selected
+ * @param deselected
  * @param templateID
  */
-var save_fields = function(formContent, templateID){
+var update_selected_fields = function(selected, deselected, templateID){
 	$.ajax({
-        url : saveFieldsUrl,
+        url : updateSelectedFieldsUrl,
         type : "POST",
         dataType: "json",
         data : {
-        	formContent : formContent,
+        	selected : JSON.stringify(selected),
+        	deselected : JSON.stringify(deselected),
             templateID: templateID
         },
         success: function(data){
@@ -39,7 +67,57 @@ var save_fields = function(formContent, templateID){
     });
 };
 
+/**
+ * Collapses the lists of the subtrees left out of the form
+ * @param container
+ */
+var initLazySubtrees = function(container)
+{
+    $(container).find("li.lazy-subtree").each(function() {
+        var $list = $(this).parent();
+        $list.hide();
+        $list.siblings("span.collapse").attr("class", "expand");
+    });
+};
+
+// Load a subtree left out of the form the first time it is expanded
+var expandLazySubtree = function(event)
+{
+    var $placeholder = $(event.target).siblings("ul").children("li.lazy-subtree");
+    if($placeholder.length === 0 || $placeholder.hasClass("loading")) {
+        return;
+    }
+    $placeholder.addClass("loading");
+    render_subtree($placeholder);
+};
+
+
+/**
+ * AJAX call, renders a subtree and replaces its placeholder
+ * @param $placeholder
+ */
+var render_subtree = function($placeholder){
+	$.ajax({
+        url : renderSubtreeUrl,
+        type : "POST",
+        data : {
+            id: $placeholder.attr("data-subtree-id")
+        },
+        success: function(data){
+            var $list = $placeholder.parent();
+            $placeholder.replaceWith(data);
+            initLazySubtrees($list);
+        },
+        error: function(){
+            $placeholder.removeClass("loading");
+        }
+    });
+};
+
 //Load controllers for enter data
 $(document).ready(function() {
     $('.btn.save-fields').on('click', saveFields);
-});
\ No newline at end of file
+    $('#xsd_form').on('change', 'input[type=checkbox]', toggleField);
+    $('#xsd_form').on('click', 'span.collapse, span.expand', expandLazySubtree);
+    initLazySubtrees($('#xsd_form'));
+});
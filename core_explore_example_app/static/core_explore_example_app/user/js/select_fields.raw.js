@@ -1,2 +1,4 @@
 var saveFieldsUrl = "{% url 'core_explore_example_save_fields' %}";
-var buildQueryUrl = "{% url data.build_query_url data.template_id %}";
\ No newline at end of file
+var updateSelectedFieldsUrl = "{% url 'core_explore_example_update_selected_fields' %}";
+var buildQueryUrl = "{% url data.build_query_url data.template_id %}";
+var renderSubtreeUrl = "{% url data.render_subtree_url data.data_structure_id %}";
@@ -0,0 +1,10 @@
+/**
+ * Reload the page until the form of the template is generated
+ */
+$(document).ready(function() {
+    var REFRESH_INTERVAL = 5000;
+
+    setTimeout(function() {
+        window.location.reload();
+    }, REFRESH_INTERVAL);
+});
@@ -1,9 +1,61 @@
 """System API"""
 
+from django.http import HttpRequest
+
 from core_explore_example_app.apps import ExploreExampleAppConfig
+from core_explore_example_app.components.explore_data_structure.api import (
+    BASE_DATA_STRUCTURE_USER,
+)
+from core_explore_example_app.components.explore_data_structure.models import (
+    ExploreDataStructure,
+)
+from core_explore_example_app.components.persistent_query_example.models import (
+    PersistentQueryExample,
+)
 from core_explore_example_app.components.saved_query.models import SavedQuery
 
 
+class BaseDataStructureOwner:
+    """Owner of the base data structures, generating them outside of a user
+    request. It is not a superuser: it only has the permission to access the
+    explore data structures, owns the elements it creates, and reads the
+    global templates."""
+
+    id = BASE_DATA_STRUCTURE_USER
+    pk = BASE_DATA_STRUCTURE_USER
+    username = BASE_DATA_STRUCTURE_USER
+    is_superuser = False
+    is_staff = False
+    is_active = True
+    is_anonymous = False
+    is_authenticated = True
+
+    def has_perm(self, perm, obj=None):
+        """Return True for the permission to access the explore data
+        structures only
+
+        Args:
+            perm:
+            obj:
+
+        Returns:
+
+        """
+        return perm == ExploreDataStructure.get_permission()
+
+
+def get_base_data_structure_request():
+    """Return the request generating the base data structures outside of a
+    user request
+
+    Returns:
+
+    """
+    request = HttpRequest()
+    request.user = BaseDataStructureOwner()
+    return request
+
+
 def get_saved_queries_created_by_app():
     """Return saved queries created by the app.
 
@@ -13,3 +65,27 @@ def get_saved_queries_created_by_app():
     return SavedQuery.objects.filter(
         user_id=ExploreExampleAppConfig.name
     ).all()
+
+
+def get_saved_queries_by_template(template_id):
+    """Return saved queries recorded against a template.
+
+    Args:
+        template_id:
+
+    Returns:
+
+    """
+    return SavedQuery.objects.filter(template=template_id).all()
+
+
+def get_persistent_queries_by_template(template_id):
+    """Return persistent queries recorded against a template.
+
+    Args:
+        template_id:
+
+    Returns:
+
+    """
+    return PersistentQueryExample.objects.filter(templates=template_id).all()
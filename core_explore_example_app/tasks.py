@@ -3,11 +3,18 @@
 import logging
 
 from celery import shared_task
+from django.db import transaction
 
+from core_explore_example_app.components.explore_data_structure import (
+    api as explore_data_structure_api,
+)
 from core_explore_example_app.settings import QUERIES_MAX_DAYS_IN_DATABASE
 from core_explore_example_app.system.api import (
+    get_base_data_structure_request,
     get_saved_queries_created_by_app,
 )
+from core_explore_example_app.utils.template_schema import get_schema_info
+from core_main_app.components.template.models import Template
 from core_main_app.utils.datetime import datetime_now, datetime_timedelta
 
 logger = logging.getLogger(__name__)
@@ -38,3 +45,82 @@ def delete_temporary_saved_queries():
             "An error occurred while deleting temporary saved queries (%s).",
             str(exception),
         )
+
+
+@shared_task
+def generate_base_explore_data_structure(template_id):
+    """Generate the base data structure of a template, and warm the cached
+    schema information of the template.
+
+    Args:
+        template_id:
+
+    Returns:
+
+    """
+    try:
+        template = Template.get_by_id(template_id)
+        logger.info(
+            "Generating the explore data structure of template %s.",
+            str(template_id),
+        )
+        explore_data_structure_api.get_or_create_base_explore_data_structure(
+            template, get_base_data_structure_request()
+        )
+        get_schema_info(template)
+    except Exception as exception:
+        logger.error(
+            "An error occurred while generating the explore data structure "
+            "of template %s (%s).",
+            str(template_id),
+            str(exception),
+        )
+    finally:
+        explore_data_structure_api.set_base_generation_pending(
+            template_id, is_pending=False
+        )
+
+
+def schedule_base_explore_data_structure(template_id):
+    """Generate the base data structure of a template in the background, once
+    the current transaction is committed
+
+    Args:
+        template_id:
+
+    Returns:
+
+    """
+    if explore_data_structure_api.is_base_generation_pending(
+        template_id
+    ) or explore_data_structure_api.has_base_explore_data_structure(
+        template_id
+    ):
+        return
+    explore_data_structure_api.set_base_generation_pending(template_id)
+    transaction.on_commit(lambda: _start_base_generation(template_id))
+
+
+def _start_base_generation(template_id):
+    """Send the generation of the base data structure of a template to the
+    workers
+
+    Args:
+        template_id:
+
+    Returns:
+
+    """
+    try:
+        generate_base_explore_data_structure.delay(template_id)
+    except Exception as exception:
+        # the data structure will be generated by the first user
+        explore_data_structure_api.set_base_generation_pending(
+            template_id, is_pending=False
+        )
+        logger.error(
+            "Unable to start the generation of the explore data structure "
+            "of template %s (%s).",
+            str(template_id),
+            str(exception),
+        )
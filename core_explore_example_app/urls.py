@@ -3,7 +3,6 @@
 from django.conf.urls import include
 from django.urls import re_path
 
-from core_explore_example_app.utils.mongo_query import fields_to_query
 from core_explore_example_app.views.user import (
     views as user_views,
     ajax as user_ajax,
@@ -41,6 +40,11 @@ urlpatterns = [
         user_ajax.save_fields,
         name="core_explore_example_save_fields",
     ),
+    re_path(
+        r"^update-selected-fields$",
+        user_ajax.update_selected_fields,
+        name="core_explore_example_update_selected_fields",
+    ),
     re_path(
         r"^generate-element/(?P<explore_data_structure_id>\w+)$",
         user_ajax.generate_element,
@@ -51,6 +55,11 @@ urlpatterns = [
         user_ajax.generate_choice,
         name="core_explore_example_generate_choice",
     ),
+    re_path(
+        r"^render-subtree/(?P<explore_data_structure_id>\w+)$",
+        user_ajax.render_subtree,
+        name="core_explore_example_render_subtree",
+    ),
     re_path(
         r"^remove-element$",
         user_ajax.remove_element,
@@ -83,7 +92,7 @@ urlpatterns = [
     ),
     re_path(
         r"^save-query$",
-        user_ajax.SaveQueryView.as_view(fields_to_query_func=fields_to_query),
+        user_ajax.SaveQueryView.as_view(),
         name="core_explore_example_save_query",
     ),
     re_path(
@@ -108,9 +117,14 @@ urlpatterns = [
     ),
     re_path(
         r"^get-query$",
-        user_ajax.GetQueryView.as_view(fields_to_query_func=fields_to_query),
+        user_ajax.GetQueryView.as_view(),
         name="core_explore_example_get_query",
     ),
+    re_path(
+        r"^explain-query$",
+        user_ajax.ExplainQueryView.as_view(),
+        name="core_explore_example_explain_query",
+    ),
     re_path(
         r"^get-persistent-query-url$",
         user_ajax.CreatePersistentQueryExampleUrlView.as_view(),
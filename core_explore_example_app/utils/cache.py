@@ -0,0 +1,211 @@
+"""Cache utils for explore example app"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+from core_explore_example_app.settings import EXPLORE_EXAMPLE_CACHE_ALIAS
+
+GENERATION_KEY_PREFIX = "core_explore_example_app:generation"
+DATA_STRUCTURE_NAMESPACE = "data_structure"
+
+
+class LRUCache:
+    """Thread-safe cache that evicts the least recently used entries once full"""
+
+    def __init__(self, max_size):
+        """Initialize the cache
+
+        Args:
+            max_size: maximum number of entries kept (0 disables the cache)
+        """
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the value stored for key and mark it as recently used
+
+        Args:
+            key:
+            default:
+
+        Returns:
+
+        """
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                return default
+            return self._entries[key]
+
+    def set(self, key, value):
+        """Store value for key, evicting the least recently used entries
+
+        Args:
+            key:
+            value:
+
+        Returns:
+
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Remove key from the cache
+
+        Args:
+            key:
+
+        Returns:
+
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries from the cache
+
+        Returns:
+
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+def get_cache():
+    """Return the Django cache shared by all the workers
+
+    Returns:
+
+    """
+    return caches[EXPLORE_EXAMPLE_CACHE_ALIAS]
+
+
+def _get_generation_key(namespace, object_id):
+    """Return the cache key storing the generation of an object
+
+    Args:
+        namespace:
+        object_id:
+
+    Returns:
+
+    """
+    return f"{GENERATION_KEY_PREFIX}:{namespace}:{object_id}"
+
+
+def _new_generation():
+    """Return a new generation number.
+
+    Generations start from the current time so that a counter lost by the
+    cache backend never restarts at a value used by older entries.
+
+    Returns:
+
+    """
+    return time.time_ns()
+
+
+def get_generations(namespace, object_ids):
+    """Return the current generation of each object, in a single cache call
+
+    Args:
+        namespace:
+        object_ids:
+
+    Returns:
+        dict: generation by object id
+
+    """
+    cache = get_cache()
+    keys = {
+        _get_generation_key(namespace, object_id): str(object_id)
+        for object_id in object_ids
+    }
+    generations = {
+        keys[key]: generation
+        for key, generation in cache.get_many(list(keys)).items()
+    }
+    for key, object_id in keys.items():
+        if object_id not in generations:
+            generation = _new_generation()
+            cache.add(key, generation, timeout=None)
+            # fall back to the new generation if the backend does not store
+            generations[object_id] = cache.get(key, generation)
+    return generations
+
+
+def get_generation(namespace, object_id):
+    """Return the current generation of an object
+
+    Args:
+        namespace:
+        object_id:
+
+    Returns:
+
+    """
+    return get_generations(namespace, [object_id])[str(object_id)]
+
+
+def bump_generation(namespace, object_id):
+    """Increment the generation of an object, invalidating entries built
+    with the previous one
+
+    Args:
+        namespace:
+        object_id:
+
+    Returns:
+
+    """
+    cache = get_cache()
+    key = _get_generation_key(namespace, object_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_generation(), timeout=None)
+
+
+def get_data_structure_revision(data_structure_id):
+    """Return the revision of a data structure, changed every time its tree
+    of elements is modified
+
+    Args:
+        data_structure_id:
+
+    Returns:
+
+    """
+    return get_generation(DATA_STRUCTURE_NAMESPACE, data_structure_id)
+
+
+def bump_data_structure_revision(data_structure_id):
+    """Change the revision of a data structure after a modification of its
+    tree of elements
+
+    Args:
+        data_structure_id:
+
+    Returns:
+
+    """
+    bump_generation(DATA_STRUCTURE_NAMESPACE, data_structure_id)
@@ -0,0 +1,274 @@
+"""Typed criteria compiler.
+
+Each XSD type is compiled and validated by a type handler. Handlers are
+registered with a function returning the types they support for a namespace
+prefix, and are resolved once per prefix into a dispatch table.
+"""
+
+import re
+from functools import lru_cache
+from types import MappingProxyType
+
+from core_main_app.commons.exceptions import QueryError
+from core_main_app.utils.query.mongo.prepare import (
+    sanitize_number,
+    sanitize_value,
+)
+from xml_utils.xsd_types.xsd_types import (
+    get_xsd_floating_numbers,
+    get_xsd_gregorian_types,
+    get_xsd_numbers,
+)
+
+IS_COMPARISON = "is"
+LIKE_COMPARISON = "like"
+STARTS_WITH_COMPARISON = "starts_with"
+IS_IGNORE_CASE_COMPARISON = "is_ignore_case"
+CONTAINS_WORD_COMPARISON = "contains_word"
+
+
+def build_int_criteria(path, comparison, value):
+    """Builds a criteria for the type integer
+
+    Args:
+        path:
+        comparison:
+        value:
+
+    Returns:
+
+    """
+    if comparison == "=":
+        return {path: int(value)}
+    return {path: {f"${comparison}": int(value)}}
+
+
+def build_float_criteria(path, comparison, value):
+    """Builds a criteria for the type float
+
+    Args:
+        path:
+        comparison:
+        value:
+
+    Returns:
+
+    """
+    if comparison == "=":
+        return {path: float(value)}
+    return {path: {f"${comparison}": float(value)}}
+
+
+def build_string_criteria(path, comparison, value):
+    """Builds a criteria for the type string
+
+    Args:
+        path:
+        comparison:
+        value:
+
+    Returns:
+
+    """
+    criteria = dict()
+
+    if comparison == IS_COMPARISON:
+        criteria[path] = value
+    elif comparison == LIKE_COMPARISON:
+        criteria[path] = "/" + value + "/"
+    elif comparison == STARTS_WITH_COMPARISON:
+        # anchored and case sensitive: the index on the path can be used
+        criteria[path] = "/^" + re.escape(value) + "/"
+    elif comparison == IS_IGNORE_CASE_COMPARISON:
+        # \Z instead of $, rejected by the query sanitizer
+        criteria[path] = "/(?i)^" + re.escape(value) + "\\Z/"
+    elif comparison == CONTAINS_WORD_COMPARISON:
+        # the text index finds the documents, the regular expression keeps
+        # the ones where the word is in the element
+        # the search string has no escape sequence: the quotes of the value
+        # would end the phrase, they are replaced by spaces, which separate
+        # the words as well
+        phrase = value.replace('"', " ")
+        criteria["$text"] = {"$search": '"' + phrase + '"'}
+        criteria[path] = "/(?i)" + re.escape(value) + "/"
+
+    return criteria
+
+
+class TypeHandler:
+    """Compiles and validates the values of an XSD type"""
+
+    def compile(self, path, comparison, value):
+        """Returns the list of criteria matching the value at the path, one of
+        them has to match
+
+        Args:
+            path:
+            comparison:
+            value:
+
+        Returns:
+
+        """
+        raise NotImplementedError("compile not implemented")
+
+    def validate(self, element_name, value):
+        """Returns an error message if the value is not valid, None otherwise
+
+        Args:
+            element_name:
+            value:
+
+        Returns:
+
+        """
+        raise NotImplementedError("validate not implemented")
+
+
+class StringTypeHandler(TypeHandler):
+    """Handler of the string types, used for types without handler"""
+
+    def compile(self, path, comparison, value):
+        return [build_string_criteria(path, comparison, value)]
+
+    def validate(self, element_name, value):
+        try:
+            sanitize_value(value)
+        except QueryError:
+            return f"Element {element_name} is not valid."
+        return None
+
+
+class IntTypeHandler(TypeHandler):
+    """Handler of the integer types"""
+
+    def compile(self, path, comparison, value):
+        return [build_int_criteria(path, comparison, value)]
+
+    def validate(self, element_name, value):
+        try:
+            sanitize_number(int(value))
+        except (ValueError, QueryError):
+            return f"Element {element_name} must be an integer."
+        return None
+
+
+class FloatTypeHandler(TypeHandler):
+    """Handler of the floating number types"""
+
+    def compile(self, path, comparison, value):
+        return [build_float_criteria(path, comparison, value)]
+
+    def validate(self, element_name, value):
+        try:
+            sanitize_number(float(value))
+        except (ValueError, QueryError):
+            return f"Element {element_name} must be a number."
+        return None
+
+
+class GregorianTypeHandler(StringTypeHandler):
+    """Handler of the gregorian types (gYear, gMonth...)"""
+
+    def compile(self, path, comparison, value):
+        criteria_list = []
+        # if the format is number perform a strict match
+        try:
+            criteria_list.append(build_int_criteria(path, "=", int(value)))
+        except (TypeError, ValueError):
+            pass
+        criteria_list.extend(super().compile(path, comparison, value))
+        return criteria_list
+
+
+# (get_types, handler) in registration order, later registrations win
+_type_handlers = [
+    (get_xsd_gregorian_types, GregorianTypeHandler()),
+    (get_xsd_numbers, IntTypeHandler()),
+    (get_xsd_floating_numbers, FloatTypeHandler()),
+]
+_default_type_handler = StringTypeHandler()
+
+
+def register_type_handler(get_types, handler):
+    """Registers a handler for XSD types. The handler replaces the ones
+    previously registered for the same types.
+
+    Args:
+        get_types: function returning the types for a namespace prefix
+        handler: TypeHandler
+
+    Returns:
+
+    """
+    _type_handlers.append((get_types, handler))
+    get_criteria_compiler.cache_clear()
+
+
+class CriteriaCompiler:
+    """Compiles and validates criteria for the types of a namespace prefix"""
+
+    def __init__(self, default_prefix):
+        """Resolves the dispatch table of the namespace prefix
+
+        Args:
+            default_prefix:
+        """
+        self.default_prefix = default_prefix
+        dispatch_table = dict()
+        for get_types, handler in _type_handlers:
+            for element_type in get_types(default_prefix):
+                dispatch_table[element_type] = handler
+        self.dispatch_table = MappingProxyType(dispatch_table)
+
+    def get_handler(self, element_type):
+        """Returns the handler of a type
+
+        Args:
+            element_type:
+
+        Returns:
+
+        """
+        return self.dispatch_table.get(element_type, _default_type_handler)
+
+    def compile(self, path, comparison, value, element_type):
+        """Returns the list of criteria matching the value at the path
+
+        Args:
+            path:
+            comparison:
+            value:
+            element_type:
+
+        Returns:
+
+        """
+        return self.get_handler(element_type).compile(path, comparison, value)
+
+    def validate(self, element_name, element_type, value):
+        """Returns an error message if the value is not valid, None otherwise
+
+        Args:
+            element_name:
+            element_type:
+            value:
+
+        Returns:
+
+        """
+        return self.get_handler(element_type).validate(element_name, value)
+
+
+@lru_cache(maxsize=None)
+def get_criteria_compiler(default_prefix):
+    """Returns the criteria compiler of a namespace prefix
+
+    Args:
+        default_prefix:
+
+    Returns:
+        CriteriaCompiler
+
+    """
+    return CriteriaCompiler(default_prefix)
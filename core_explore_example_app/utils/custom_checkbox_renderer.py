@@ -1,11 +1,55 @@
 """Custom Checkbox Renderer class"""
 
+from django.template import loader
+
+from core_parser_app.components.data_structure.models import (
+    DataStructureElement,
+)
 from core_parser_app.tools.parser.renderer.checkbox import CheckboxRenderer
+from core_explore_example_app.utils.element_tree import load_element_tree
 
 
 class CustomCheckboxRenderer(CheckboxRenderer):
     """Custom Checkbox renderer, makes elements selectable and allows only one occurrence of each element"""
 
+    def __init__(
+        self, xsd_data, request, max_depth=None, explore_data_structure=None
+    ):
+        """Initializes the renderer. The subtree of the element to render is
+        loaded in a single query.
+
+        Args:
+            xsd_data:
+            request:
+            max_depth: levels of complex types to render, the deeper ones are
+                replaced by a placeholder loading them on demand
+            explore_data_structure: data structure of the user, its copied
+                elements are rendered instead of the shared ones
+        """
+        super().__init__(xsd_data, request)
+        if isinstance(xsd_data, DataStructureElement):
+            self.data = load_element_tree(xsd_data, explore_data_structure)
+        self.templates["lazy_subtree"] = loader.get_template(
+            "core_explore_example_app/user/lazy_subtree.html"
+        )
+        self.max_depth = max_depth
+        self.depth = 0
+
+    def render_complex_type(self, element):
+        """render_complex_type
+        Args:
+            element:
+
+        Returns:
+        """
+        if self.max_depth and self.depth >= self.max_depth:
+            return self._load_template("lazy_subtree", {"id": element.pk})
+        self.depth += 1
+        try:
+            return super().render_complex_type(element)
+        finally:
+            self.depth -= 1
+
     def render_element(self, element):
         """render_element
         Args:
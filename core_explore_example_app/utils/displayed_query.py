@@ -1,13 +1,11 @@
 """Util to build user readable queries"""
 
-from core_parser_app.components.data_structure_element import (
-    api as data_structure_element_api,
-)
 from core_explore_example_app.utils.mongo_query import get_parent_name
 from core_explore_example_app.utils.query_builder import (
     get_element_value,
     get_element_comparison,
 )
+from core_explore_example_app.utils.schema_catalog import get_element_record
 
 
 def build_pretty_criteria(element_name, comparison, value, is_not=False):
@@ -43,6 +41,12 @@ def build_pretty_criteria(element_name, comparison, value, is_not=False):
         pretty_criteria += " is "
     elif comparison == "like":
         pretty_criteria += " like "
+    elif comparison == "starts_with":
+        pretty_criteria += " starts with "
+    elif comparison == "is_ignore_case":
+        pretty_criteria += " equals (ignore case) "
+    elif comparison == "contains_word":
+        pretty_criteria += " contains word "
 
     if value:
         pretty_criteria += value
@@ -97,6 +101,48 @@ def build_and_pretty_criteria(query, criteria):
     return "(" + query + " AND " + criteria + ")"
 
 
+def build_field_pretty_criteria(field):
+    """Returns a pretty representation of the criteria of a form field
+
+    Args:
+        field:
+
+    Returns:
+
+    """
+    is_not = field["operator"] == "NOT"
+    if field.get("type", None) == "query":
+        return build_query_pretty_criteria(field["name"], is_not)
+
+    return build_pretty_criteria(
+        field["name"],
+        get_element_comparison(field),
+        get_element_value(field),
+        is_not,
+    )
+
+
+def add_pretty_criteria(query, criteria, bool_comp, index):
+    """Adds the pretty criteria of the field at the index to the pretty query
+
+    Args:
+        query:
+        criteria:
+        bool_comp: operator of the field
+        index:
+
+    Returns:
+
+    """
+    if bool_comp == "OR":
+        return build_or_pretty_criteria(query, criteria)
+    if bool_comp == "AND":
+        return build_and_pretty_criteria(query, criteria)
+    if index == 0:
+        return query + criteria
+    return build_and_pretty_criteria(query, criteria)
+
+
 def fields_to_pretty_query(form_values):
     """Transforms fields from the HTML form into pretty representation
 
@@ -109,76 +155,62 @@ def fields_to_pretty_query(form_values):
 
     query = ""
 
-    for field in form_values:
-        bool_comp = field["operator"]
-        if bool_comp == "NOT":
-            is_not = True
-        else:
-            is_not = False
-
-        # get element value
-        value = get_element_value(field)
-        # get comparison operator
-        comparison = get_element_comparison(field)
-
-        element_type = field.get("type", None)
-        if element_type == "query":
-            criteria = build_query_pretty_criteria(field["name"], is_not)
-        else:
-            criteria = build_pretty_criteria(
-                field["name"], comparison, value, is_not
-            )
-
-        if bool_comp == "OR":
-            query = build_or_pretty_criteria(query, criteria)
-        elif bool_comp == "AND":
-            query = build_and_pretty_criteria(query, criteria)
-        else:
-            if form_values.index(field) == 0:
-                query += criteria
-            else:
-                query = build_and_pretty_criteria(query, criteria)
+    for index, field in enumerate(form_values):
+        query = add_pretty_criteria(
+            query, build_field_pretty_criteria(field), field["operator"], index
+        )
 
     return query
 
 
-def sub_elements_to_pretty_query(form_values, namespaces, request):
+def build_sub_element_pretty_criteria(field, element_record):
+    """Returns a pretty representation of the criteria of a form field on a
+    sub-element
+
+    Args:
+        field:
+        element_record:
+
+    Returns:
+
+    """
+    return build_pretty_criteria(
+        element_record.name,
+        get_element_comparison(field),
+        get_element_value(field),
+        field["operator"] == "NOT",
+    )
+
+
+def sub_elements_to_pretty_query(
+    form_values, namespaces, request, catalog=None
+):
     """Transforms HTML fields in a user readable query
 
     Args:
         form_values:
         namespaces:
         request:
+        catalog:
 
     Returns:
 
     """
     # get the parent path using the first element of the list
-    parent_name = get_parent_name(form_values[0]["id"], namespaces, request)
+    parent_name = get_parent_name(
+        form_values[0]["id"], namespaces, request, catalog
+    )
 
     list_criteria = []
-    for i in range(0, len(form_values)):
-        field = form_values[i]
+    for field in form_values:
         if field["selected"] is True:
-            bool_comp = field["operator"]
-            if bool_comp == "NOT":
-                is_not = True
-            else:
-                is_not = False
-
-            data_structure_element = data_structure_element_api.get_by_id(
-                field["id"], request
+            element_record = get_element_record(
+                field["id"], namespaces, request, catalog
             )
-            element_name = data_structure_element.options["name"]
-            value = get_element_value(field)
-            comparison = get_element_comparison(field)
-
-            criteria = build_pretty_criteria(
-                element_name, comparison, value, is_not
+            list_criteria.append(
+                build_sub_element_pretty_criteria(field, element_record)
             )
 
-            list_criteria.append(criteria)
-
     query = "{0}({1})".format(parent_name, ", ".join(list_criteria))
 
     return query
@@ -0,0 +1,329 @@
+"""In-memory trees of data structure elements.
+
+The subtree of an element is fetched in a single query, and its elements are
+linked to their children in memory, so that the renderers can walk the tree
+without querying the children of each element.
+
+The tree of a user explore data structure is the tree of the base data
+structure of its template, shared by all the users. The subtrees modified by
+the user are copied to the user data structure, and replace the shared
+elements when the tree is loaded.
+"""
+
+from django.db import connection
+
+from core_parser_app.components.data_structure.models import (
+    DataStructureElement,
+)
+
+# columns of the elements loaded in the trees
+ELEMENT_COLUMNS = ["id", "tag", "value", "options", "parent_id"]
+
+
+def get_subtree_sql(columns):
+    """Return the query selecting columns of the subtree of an element,
+    ordered by id. The query takes the id of the element as parameter.
+
+    Args:
+        columns: names of the columns to select
+
+    Returns:
+        str
+
+    """
+    quote_name = connection.ops.quote_name
+    table = quote_name(DataStructureElement._meta.db_table)
+    pk = quote_name("id")
+    parent_id = quote_name("parent_id")
+    selected_columns = ", ".join(quote_name(column) for column in columns)
+    return (
+        f"WITH RECURSIVE subtree ({pk}) AS ("
+        f"SELECT {pk} FROM {table} WHERE {pk} = %s "
+        f"UNION ALL "
+        f"SELECT child.{pk} FROM {table} child "
+        f"INNER JOIN subtree ON child.{parent_id} = subtree.{pk}"
+        f") "
+        f"SELECT {selected_columns} FROM {table} "
+        f"WHERE {pk} IN (SELECT {pk} FROM subtree) ORDER BY {pk}"
+    )
+
+
+class LoadedChildren:
+    """Children of a loaded element, sorted by id. Provides the part of the
+    related manager API used by the renderers."""
+
+    __slots__ = ("_elements",)
+
+    def __init__(self):
+        """Initialize an empty list of children"""
+        self._elements = []
+
+    def all(self):
+        """Return the children
+
+        Returns:
+
+        """
+        return self
+
+    def order_by(self, *field_names):
+        """Return the children, already sorted by id
+
+        Args:
+            field_names:
+
+        Returns:
+
+        """
+        return self
+
+    def count(self):
+        """Return the number of children
+
+        Returns:
+
+        """
+        return len(self._elements)
+
+    def add(self, element):
+        """Add a child, loaded after the previous ones
+
+        Args:
+            element:
+
+        Returns:
+
+        """
+        self._elements.append(element)
+
+    def set(self, elements):
+        """Keep only the given children. The other children are detached
+        from the element in the database, as done by the related manager.
+
+        Args:
+            elements:
+
+        Returns:
+
+        """
+        kept_ids = {element.pk for element in elements}
+        removed_ids = [
+            element.pk
+            for element in self._elements
+            if element.pk not in kept_ids
+        ]
+        if removed_ids:
+            DataStructureElement.objects.filter(pk__in=removed_ids).update(
+                parent=None
+            )
+        self._elements = list(elements)
+
+    def __iter__(self):
+        return iter(self._elements)
+
+    def __getitem__(self, index):
+        return self._elements[index]
+
+    def __len__(self):
+        return len(self._elements)
+
+
+class LoadedElement:
+    """Data structure element loaded with its subtree"""
+
+    __slots__ = ("pk", "tag", "value", "options", "children")
+
+    def __init__(self, pk, tag, value, options):
+        """Initialize an element without children
+
+        Args:
+            pk:
+            tag:
+            value:
+            options:
+        """
+        self.pk = pk
+        self.tag = tag
+        self.value = value
+        self.options = options
+        self.children = LoadedChildren()
+
+
+def get_tree_data_structure_id(explore_data_structure):
+    """Return the id of the data structure holding the elements of the tree
+    of an explore data structure: the base data structure of the template
+    while the user has not modified the tree
+
+    Args:
+        explore_data_structure:
+
+    Returns:
+
+    """
+    if (
+        explore_data_structure.base_data_structure_id is not None
+        and not explore_data_structure.copied_elements
+    ):
+        return explore_data_structure.base_data_structure_id
+    return explore_data_structure.id
+
+
+def has_copied_elements(explore_data_structure):
+    """Return True if the tree of an explore data structure mixes elements
+    shared with the other users and elements copied to the user data
+    structure
+
+    Args:
+        explore_data_structure:
+
+    Returns:
+
+    """
+    return (
+        explore_data_structure is not None
+        and explore_data_structure.base_data_structure_id is not None
+        and bool(explore_data_structure.copied_elements)
+    )
+
+
+def resolve_element_id(explore_data_structure, element_id):
+    """Return the id of an element in the tree of an explore data structure,
+    the id of its copy if the element was copied to the user data structure
+
+    Args:
+        explore_data_structure:
+        element_id:
+
+    Returns:
+        str
+
+    """
+    element_id = str(element_id)
+    return (explore_data_structure.copied_elements or {}).get(
+        element_id, element_id
+    )
+
+
+def get_copied_element_rows(explore_data_structure):
+    """Return the rows of the elements copied to a user data structure,
+    ordered by id
+
+    Args:
+        explore_data_structure:
+
+    Returns:
+        list: (id, tag, value, options, parent_id) of the elements
+
+    """
+    return list(
+        DataStructureElement.objects.filter(
+            data_structure=explore_data_structure.id
+        )
+        .order_by("pk")
+        .values_list(*ELEMENT_COLUMNS)
+    )
+
+
+def merge_copied_elements(rows, copied_rows, copied_elements):
+    """Return the rows of the elements of a tree, where the copied elements
+    are replaced by their copies. The root of a copied subtree has no parent
+    in the database, it takes the parent and the place of the element it
+    was copied from.
+
+    Args:
+        rows: (id, tag, value, options, parent_id) of the shared elements,
+            ordered by id
+        copied_rows: rows of the elements of the user data structure,
+            ordered by id
+        copied_elements: id of the copy by id of the copied element
+
+    Returns:
+        list: rows of the elements, the children of an element being listed
+            in their order
+
+    """
+    parent_ids = dict()
+    merged_rows = []
+    for element_id, tag, value, options, parent_id in rows:
+        if str(element_id) in copied_elements:
+            parent_ids[element_id] = parent_id
+            continue
+        if tag == "choice-iter" and value in copied_elements:
+            # the selected child of the choice was copied
+            value = copied_elements[value]
+        merged_rows.append(
+            (element_id, (element_id, tag, value, options, parent_id))
+        )
+
+    # copied elements replacing the shared elements
+    copied_from = {
+        int(copy_id): int(source_id)
+        for source_id, copy_id in copied_elements.items()
+        if int(source_id) in parent_ids
+    }
+    for element_id, tag, value, options, parent_id in copied_rows:
+        position = element_id
+        if parent_id is None and element_id in copied_from:
+            position = copied_from[element_id]
+            parent_id = parent_ids[position]
+        merged_rows.append(
+            (position, (element_id, tag, value, options, parent_id))
+        )
+
+    merged_rows.sort(key=lambda merged_row: merged_row[0])
+    return [row for _, row in merged_rows]
+
+
+def load_element_tree(data_structure_element, explore_data_structure=None):
+    """Load the subtree of a data structure element in a single query
+
+    Args:
+        data_structure_element:
+        explore_data_structure: data structure of the user loading the tree,
+            its copied elements replace the shared ones
+
+    Returns:
+        LoadedElement: the element, with the values of the given instance
+
+    """
+    root = LoadedElement(
+        data_structure_element.pk,
+        data_structure_element.tag,
+        data_structure_element.value,
+        data_structure_element.options,
+    )
+    rows = [
+        (
+            element.pk,
+            element.tag,
+            element.value,
+            element.options,
+            element.parent_id,
+        )
+        for element in DataStructureElement.objects.raw(
+            get_subtree_sql(ELEMENT_COLUMNS), [data_structure_element.pk]
+        )
+    ]
+    if (
+        has_copied_elements(explore_data_structure)
+        and data_structure_element.data_structure_id
+        != explore_data_structure.id
+    ):
+        rows = merge_copied_elements(
+            rows,
+            get_copied_element_rows(explore_data_structure),
+            explore_data_structure.copied_elements,
+        )
+
+    elements = {root.pk: root}
+    parent_ids = []
+    for element_id, tag, value, options, parent_id in rows:
+        if element_id == root.pk:
+            continue
+        elements[element_id] = LoadedElement(element_id, tag, value, options)
+        parent_ids.append((element_id, parent_id))
+    # the children are added in their order
+    for element_id, parent_id in parent_ids:
+        if parent_id in elements:
+            elements[parent_id].children.add(elements[element_id])
+    return root
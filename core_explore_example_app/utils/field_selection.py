@@ -0,0 +1,626 @@
+"""Fields selected by the user to build queries.
+
+The selection is stored as the ids of the selected elements and the groups of
+selected leaves sharing a parent element, as computed when pruning the form.
+The tree of the selected fields is rendered from the selection when needed.
+The selection is updated with the elements toggled by the user, using an
+index of the selectable elements of the form built once per revision of the
+data structure. The form itself is rendered once per revision.
+"""
+
+import hashlib
+import json
+from collections import defaultdict
+from io import BytesIO
+
+from lxml import etree, html
+
+from core_main_app.settings import MONGODB_INDEXING
+from core_explore_example_app.settings import (
+    EXPLORE_EXAMPLE_LAZY_RENDER_DEPTH,
+    EXPLORE_EXAMPLE_SELECTION_TREE_CACHE_SIZE,
+    EXPLORE_EXAMPLE_SELECTION_TREE_CACHE_TIMEOUT,
+)
+from core_explore_example_app.utils.cache import (
+    LRUCache,
+    get_cache,
+    get_data_structure_revision,
+)
+from core_explore_example_app.utils.element_tree import (
+    get_tree_data_structure_id,
+)
+from core_explore_example_app.utils.parser import (
+    get_rendered_form,
+    render_subtree,
+)
+from core_explore_example_app.utils.query_builder import (
+    BranchInfo,
+    prune_html_tree,
+)
+from xml_utils.html_tree import parser as html_tree_parser
+
+SELECTION_TREE_KEY_PREFIX = "core_explore_example_app:selection_tree"
+SELECTION_INDEX_KEY_PREFIX = "core_explore_example_app:selection_index"
+ELEMENTS_KEY = "elements"
+PARENTS_KEY = "parents"
+# keys of the selection index
+POSITIONS_KEY = "positions"
+LEAVES_KEY = "leaves"
+
+# trees of selected fields kept in memory by the current worker
+_selection_trees = LRUCache(EXPLORE_EXAMPLE_SELECTION_TREE_CACHE_SIZE)
+# selection indexes kept in memory by the current worker
+_selection_indexes = LRUCache(EXPLORE_EXAMPLE_SELECTION_TREE_CACHE_SIZE)
+
+
+def get_selection(html_tree):
+    """Return the selection of a pruned tree
+
+    Args:
+        html_tree:
+
+    Returns:
+        dict: ids of the selected elements, and selected leaves by parent
+            element id
+
+    """
+    elements = []
+    parents = dict()
+    for li in html_tree.iter("li"):
+        select_class = li.attrib.get("select_class")
+        if select_class == "element":
+            elements.append(li.attrib["select_id"])
+        elif select_class == "parent":
+            parents[li.attrib.get("class", "")] = li.attrib["select_id"].split(
+                " "
+            )
+    return {ELEMENTS_KEY: elements, PARENTS_KEY: parents}
+
+
+class _ListFrame:
+    """Store information about an ul or li element of the form while it is
+    being parsed"""
+
+    __slots__ = (
+        "level",
+        "position",
+        "branch_info",
+        "checkbox_value",
+        "has_checkbox",
+        "first_child_tag",
+        "is_selected",
+    )
+
+    def __init__(self, level, position):
+        # level of the top list containing the element
+        self.level = level
+        # position of the element in the form
+        self.position = position
+        # information of the child elements once processed
+        self.branch_info = BranchInfo()
+        # value of the first checkbox of the element
+        self.checkbox_value = None
+        self.has_checkbox = False
+        self.first_child_tag = None
+        # true if the box of the list of the element is checked
+        self.is_selected = False
+
+
+def parse_selection(form_content):
+    """Return the selection of a form, built while the form is parsed. The
+    lists are processed as by prune_html_tree, and each list is cleared once
+    processed, so the tree of the form is never fully in memory.
+
+    Args:
+        form_content: HTML of the form
+
+    Returns:
+        dict: ids of the selected elements, and selected leaves by parent
+            element id, None if no element is selected
+
+    """
+    # the lists are the ul children of the element containing the form: the
+    # top element of the form, or the body if the form has several top
+    # elements. Both candidates are processed, by level.
+    top_branches = {1: BranchInfo(), 2: BranchInfo()}
+    # (level, position, id) of the selected elements and of the parents
+    elements = dict()
+    parents = dict()
+    # one frame per open element under the body: _ListFrame for the
+    # elements of the lists, True for the top element of the form, None
+    # for the others
+    frames = []
+    top_elements = 0
+    position = 0
+    body = None
+
+    for event, element in etree.iterparse(
+        BytesIO(form_content.encode("utf-8")),
+        events=("start", "end"),
+        html=True,
+        encoding="utf-8",
+    ):
+        if body is None:
+            if event == "start" and element.tag == "body":
+                body = element
+            continue
+
+        if event == "start":
+            position += 1
+            parent_frame = frames[-1] if frames else True
+            if isinstance(parent_frame, _ListFrame):
+                if parent_frame.first_child_tag is None:
+                    parent_frame.first_child_tag = element.tag
+                # lists alternate ul and li elements
+                expected_tag = (
+                    "li" if element.getparent().tag == "ul" else "ul"
+                )
+                if element.tag == expected_tag:
+                    frames.append(_ListFrame(parent_frame.level, position))
+                    continue
+                if (
+                    element.tag == "input"
+                    and element.attrib.get("type") == "checkbox"
+                    and not parent_frame.has_checkbox
+                ):
+                    parent_frame.has_checkbox = True
+                    parent_frame.checkbox_value = element.attrib.get("value")
+                frames.append(None)
+            elif parent_frame is True:
+                level = len(frames) + 1
+                if level == 1:
+                    top_elements += 1
+                if element.tag == "ul":
+                    frames.append(_ListFrame(level, position))
+                else:
+                    frames.append(True if level == 1 else None)
+            else:
+                frames.append(None)
+            continue
+
+        if element is body:
+            break
+        frame = frames.pop()
+        if not isinstance(frame, _ListFrame):
+            continue
+
+        branch_info = frame.branch_info
+        parent = element.getparent()
+        if element.tag == "ul":
+            if frame.checkbox_value == "true":
+                element_id = parent.attrib["class"]
+                if parent.tag == "li" and isinstance(frames[-1], _ListFrame):
+                    frames[-1].is_selected = True
+                    elements[frames[-1].position] = (frame.level, element_id)
+                # tells to keep this branch until this leaf
+                branch_info.add_selected_leaf(element_id)
+        elif branch_info.has_branches:
+            selected_leaves = branch_info.selected_leaves
+            # sub element queries available when more than one selected
+            # elements under the same element, and data stored in MongoDB
+            if (
+                MONGODB_INDEXING
+                and len(selected_leaves) > 1
+                and frame.first_child_tag != "select"
+                and not frame.is_selected
+                and "select_class" not in element.attrib
+            ):
+                parents[frame.position] = (
+                    frame.level,
+                    element.attrib.get("class", ""),
+                    selected_leaves,
+                )
+            # the selected leaves are not passed to the parent list
+            branch_info = BranchInfo(branch_info.keep_the_branch)
+        else:
+            branch_info = BranchInfo()
+            element_id = element.attrib.get("class")
+            if (
+                frame.checkbox_value is not None
+                and frame.checkbox_value != "false"
+                and element_id is not None
+            ):
+                elements[frame.position] = (frame.level, element_id)
+                # tells to keep this branch until this leaf
+                branch_info.add_selected_leaf(element_id)
+
+        if frames and isinstance(frames[-1], _ListFrame):
+            frames[-1].branch_info.add_branch(branch_info)
+        else:
+            top_branches[frame.level].add_branch(branch_info)
+
+        # the processed elements are not needed anymore
+        element.clear(keep_tail=True)
+        if element.tag == "li":
+            while element.getprevious() is not None:
+                del parent[0]
+
+    if body is None:
+        return None
+    # lists of the top element of the form, unless it has several elements
+    level = (
+        2
+        if top_elements == 1
+        and not (body.text or "").strip()
+        and not (body[-1].tail or "").strip()
+        else 1
+    )
+    if not top_branches[level].keep_the_branch:
+        return None
+
+    return {
+        ELEMENTS_KEY: [
+            element_id
+            for _, (element_level, element_id) in sorted(elements.items())
+            if element_level == level
+        ],
+        PARENTS_KEY: {
+            parent_id: leaves
+            for _, (parent_level, parent_id, leaves) in sorted(parents.items())
+            if parent_level == level
+        },
+    }
+
+
+def translate_selection(selection, copied_elements):
+    """Return a selection where the ids of the copied elements are replaced
+    by the ids of their copies
+
+    Args:
+        selection: selection, None if nothing is selected
+        copied_elements: id of the copy by id of the copied element
+
+    Returns:
+        dict: translated selection, None if nothing is selected
+
+    """
+    if not selection or not copied_elements:
+        return selection
+
+    return {
+        ELEMENTS_KEY: [
+            copied_elements.get(element_id, element_id)
+            for element_id in selection[ELEMENTS_KEY]
+        ],
+        PARENTS_KEY: {
+            copied_elements.get(parent_id, parent_id): [
+                copied_elements.get(leaf_id, leaf_id) for leaf_id in leaves
+            ]
+            for parent_id, leaves in selection[PARENTS_KEY].items()
+        },
+    }
+
+
+def apply_selection(html_tree, element_ids):
+    """Check the boxes of the selected elements of a form, and uncheck the
+    others
+
+    Args:
+        html_tree:
+        element_ids:
+
+    Returns:
+
+    """
+    element_ids = set(element_ids)
+    for checkbox in html_tree.iter("input"):
+        if checkbox.attrib.get("type") != "checkbox":
+            continue
+        # the box of an element is in its item, or in its list if it has
+        # children
+        parent = checkbox.getparent()
+        if parent.tag == "ul":
+            parent = parent.getparent()
+        if parent is not None and parent.attrib.get("class") in element_ids:
+            checkbox.attrib["value"] = "true"
+            checkbox.attrib["checked"] = "checked"
+        else:
+            checkbox.attrib["value"] = "false"
+            checkbox.attrib.pop("checked", None)
+
+
+def build_selection_tree(request, explore_data_structure):
+    """Render the tree of the selected fields of a data structure
+
+    Args:
+        request:
+        explore_data_structure:
+
+    Returns:
+        str: HTML of the pruned tree, None if no field is selected
+
+    """
+    selection = explore_data_structure.selected_fields
+    html_tree = html_tree_parser.from_string(
+        get_rendered_form(request, explore_data_structure)
+    )
+    apply_selection(html_tree, selection[ELEMENTS_KEY])
+    if not prune_html_tree(html_tree):
+        return None
+    return html_tree_parser.to_string(html_tree, encoding="unicode")
+
+
+def _get_cache_key(explore_data_structure):
+    """Return the cache key of the tree of the selected fields
+
+    Args:
+        explore_data_structure:
+
+    Returns:
+
+    """
+    selection_fingerprint = hashlib.sha256(
+        json.dumps(
+            explore_data_structure.selected_fields, sort_keys=True
+        ).encode("utf-8")
+    ).hexdigest()
+    tree_id = get_tree_data_structure_id(explore_data_structure)
+    revision = get_data_structure_revision(tree_id)
+    return ":".join(
+        [
+            SELECTION_TREE_KEY_PREFIX,
+            str(tree_id),
+            str(revision),
+            selection_fingerprint,
+        ]
+    )
+
+
+def get_selection_tree(request, explore_data_structure):
+    """Return the tree of the selected fields of a data structure, rendered
+    once per selection and revision of the data structure
+
+    Args:
+        request:
+        explore_data_structure:
+
+    Returns:
+        str: HTML of the pruned tree, None if no field is selected
+
+    """
+    if not explore_data_structure.selected_fields:
+        return None
+
+    cache_key = _get_cache_key(explore_data_structure)
+    selection_tree = _selection_trees.get(cache_key)
+    if selection_tree is not None:
+        return selection_tree
+
+    cache = get_cache()
+    selection_tree = cache.get(cache_key)
+    if selection_tree is None:
+        selection_tree = build_selection_tree(request, explore_data_structure)
+        if selection_tree is None:
+            return None
+        cache.set(
+            cache_key,
+            selection_tree,
+            timeout=EXPLORE_EXAMPLE_SELECTION_TREE_CACHE_TIMEOUT,
+        )
+    _selection_trees.set(cache_key, selection_tree)
+    return selection_tree
+
+
+def _apply_selection_to_form(xsd_form, selection):
+    """Check the boxes of the selected elements of a rendered form
+
+    Args:
+        xsd_form:
+        selection:
+
+    Returns:
+
+    """
+    if not selection:
+        return xsd_form
+
+    form_fragment = html.fragment_fromstring(xsd_form, create_parent="div")
+    apply_selection(form_fragment, selection[ELEMENTS_KEY])
+    return (form_fragment.text or "") + "".join(
+        html.tostring(child, encoding="unicode") for child in form_fragment
+    )
+
+
+def render_selection_form(request, explore_data_structure):
+    """Render the form of a data structure, with the boxes of the selected
+    elements checked. Only the first levels of the form are rendered in lazy
+    mode.
+
+    Args:
+        request:
+        explore_data_structure:
+
+    Returns:
+
+    """
+    xsd_form = get_rendered_form(
+        request,
+        explore_data_structure,
+        max_depth=EXPLORE_EXAMPLE_LAZY_RENDER_DEPTH,
+    )
+    return _apply_selection_to_form(
+        xsd_form, explore_data_structure.selected_fields
+    )
+
+
+def render_selection_subtree(
+    request, explore_data_structure, complex_type_element
+):
+    """Render a subtree left out of the form of a data structure, with the
+    boxes of the selected elements checked
+
+    Args:
+        request:
+        explore_data_structure:
+        complex_type_element:
+
+    Returns:
+
+    """
+    xsd_form = render_subtree(
+        request,
+        complex_type_element,
+        max_depth=EXPLORE_EXAMPLE_LAZY_RENDER_DEPTH,
+        explore_data_structure=explore_data_structure,
+    )
+    return _apply_selection_to_form(
+        xsd_form, explore_data_structure.selected_fields
+    )
+
+
+def build_selection_index(html_tree):
+    """Build the index of the selectable elements of a form
+
+    Args:
+        html_tree:
+
+    Returns:
+        dict: position of the selectable elements, parent of the leaves that
+            can be grouped, and leaves by parent
+
+    """
+    positions = dict()
+    parents = dict()
+    leaves = defaultdict(list)
+    for li in html_tree.iter("li"):
+        element_id = li.attrib.get("class")
+        if element_id is None:
+            continue
+        list_ul = li.findall("./ul")
+        if list_ul:
+            # the box of an element with children is in its list
+            if any(
+                ul.find("./input[@type='checkbox']") is not None
+                for ul in list_ul
+            ):
+                positions[element_id] = len(positions)
+            continue
+        if li.find("./input[@type='checkbox']") is None:
+            continue
+        positions[element_id] = len(positions)
+
+        # leaves are grouped by the item containing their list
+        parent_ul = li.getparent()
+        parent_li = parent_ul.getparent() if parent_ul is not None else None
+        if parent_li is None or parent_li.tag != "li":
+            continue
+        # not for the choices
+        if parent_li[0].tag == "select":
+            continue
+        parent_id = parent_li.attrib.get("class")
+        if parent_id is not None:
+            parents[element_id] = parent_id
+            leaves[parent_id].append(element_id)
+
+    return {
+        POSITIONS_KEY: positions,
+        PARENTS_KEY: parents,
+        LEAVES_KEY: dict(leaves),
+    }
+
+
+def get_selection_index(request, explore_data_structure):
+    """Return the index of the selectable elements of the form of a data
+    structure, built once per revision of the data structure
+
+    Args:
+        request:
+        explore_data_structure:
+
+    Returns:
+        dict
+
+    """
+    tree_id = get_tree_data_structure_id(explore_data_structure)
+    revision = get_data_structure_revision(tree_id)
+    cache_key = f"{SELECTION_INDEX_KEY_PREFIX}:{tree_id}:{revision}"
+    selection_index = _selection_indexes.get(cache_key)
+    if selection_index is not None:
+        return selection_index
+
+    cache = get_cache()
+    selection_index = cache.get(cache_key)
+    if selection_index is None:
+        html_tree = html_tree_parser.from_string(
+            get_rendered_form(request, explore_data_structure)
+        )
+        selection_index = build_selection_index(html_tree)
+        cache.set(
+            cache_key,
+            selection_index,
+            timeout=EXPLORE_EXAMPLE_SELECTION_TREE_CACHE_TIMEOUT,
+        )
+    _selection_indexes.set(cache_key, selection_index)
+    return selection_index
+
+
+def update_selection(selection, selection_index, selected_ids, deselected_ids):
+    """Return the selection updated with the toggled elements. Only the
+    groups of the parents of the toggled elements are computed again.
+
+    Args:
+        selection: current selection, None if nothing is selected
+        selection_index:
+        selected_ids: ids of the elements to select
+        deselected_ids: ids of the elements to deselect
+
+    Returns:
+        dict: updated selection, None if nothing is selected
+
+    """
+    positions = selection_index[POSITIONS_KEY]
+    # elements removed from the form since they were toggled are ignored
+    selected_ids = [
+        str(element_id)
+        for element_id in selected_ids
+        if str(element_id) in positions
+    ]
+    deselected_ids = [str(element_id) for element_id in deselected_ids]
+
+    if selection is None:
+        selection = {ELEMENTS_KEY: [], PARENTS_KEY: {}}
+    # elements removed from the data structure are dropped
+    elements = {
+        element_id
+        for element_id in selection[ELEMENTS_KEY]
+        if element_id in positions
+    }
+    elements.difference_update(deselected_ids)
+    elements.update(selected_ids)
+    if not elements:
+        return None
+
+    parents = {
+        parent_id: leaves
+        for parent_id, leaves in selection[PARENTS_KEY].items()
+        if parent_id in selection_index[LEAVES_KEY]
+    }
+    toggled_ids = selected_ids + deselected_ids
+    affected_parent_ids = {
+        selection_index[PARENTS_KEY][element_id]
+        for element_id in toggled_ids
+        if element_id in selection_index[PARENTS_KEY]
+    }
+    # an element containing a group is not a group once selected
+    affected_parent_ids.update(
+        element_id
+        for element_id in toggled_ids
+        if element_id in selection_index[LEAVES_KEY]
+    )
+    for parent_id in affected_parent_ids:
+        leaves = [
+            leaf_id
+            for leaf_id in selection_index[LEAVES_KEY][parent_id]
+            if leaf_id in elements
+        ]
+        # sub element queries are only available when the data is stored
+        # in MongoDB
+        if MONGODB_INDEXING and len(leaves) > 1 and parent_id not in elements:
+            parents[parent_id] = leaves
+        else:
+            parents.pop(parent_id, None)
+
+    return {
+        ELEMENTS_KEY: sorted(elements, key=positions.get),
+        PARENTS_KEY: parents,
+    }
@@ -0,0 +1,242 @@
+"""Index advisor for the queries built by the explore example app.
+
+The paths queried are collected from the queries recorded against a
+template, and used to propose MongoDB indexes on the data collection.
+"""
+
+import json
+import logging
+
+from core_explore_example_app.system import api as system_api
+from core_explore_example_app.utils.query_ast import is_regex
+
+logger = logging.getLogger(__name__)
+
+# field of the data collection containing the data converted to dict
+SUB_DOCUMENT_ROOT = "dict_content"
+# field of the data collection containing the template id, filtered by all
+# the queries of the app
+TEMPLATE_FIELD = "template"
+
+LOGICAL_OPERATORS = ("$and", "$or", "$nor")
+ELEM_MATCH_OPERATOR = "$elemMatch"
+EQUALITY_OPERATORS = ("$eq", "$in")
+# maximum number of fields in a compound index
+MAX_COMPOUND_INDEX_FIELDS = 32
+
+
+def collect_query_paths(query, paths=None, elem_match_paths=None, prefix=""):
+    """Collects the paths queried and the operators used on them
+
+    Args:
+        query:
+        paths: operators by path
+        elem_match_paths: operators by path queried in an $elemMatch, by
+            parent path
+        prefix:
+
+    Returns:
+        tuple: paths, elem_match_paths
+
+    """
+    if paths is None:
+        paths = dict()
+    if elem_match_paths is None:
+        elem_match_paths = dict()
+    if not isinstance(query, dict):
+        return paths, elem_match_paths
+
+    for key, value in query.items():
+        if key in LOGICAL_OPERATORS:
+            for criteria in value:
+                collect_query_paths(criteria, paths, elem_match_paths, prefix)
+            continue
+        if key.startswith("$"):
+            continue
+
+        path = f"{prefix}{key}"
+        if not isinstance(value, dict):
+            paths.setdefault(path, set()).add(
+                "$regex" if is_regex(value) else "$eq"
+            )
+            continue
+
+        for operator, operand in value.items():
+            if operator == ELEM_MATCH_OPERATOR:
+                collect_query_paths(
+                    operand,
+                    elem_match_paths.setdefault(path, dict()),
+                    elem_match_paths,
+                    f"{path}.",
+                )
+            else:
+                paths.setdefault(path, set()).add(operator)
+
+    return paths, elem_match_paths
+
+
+def get_template_queries(template_id):
+    """Returns the saved and persistent queries recorded against a template
+
+    Args:
+        template_id:
+
+    Returns:
+
+    """
+    queries = []
+    query_strings = [
+        saved_query.query
+        for saved_query in system_api.get_saved_queries_by_template(
+            template_id
+        )
+    ] + [
+        persistent_query.content
+        for persistent_query in system_api.get_persistent_queries_by_template(
+            template_id
+        )
+    ]
+    for query_string in query_strings:
+        if not query_string:
+            continue
+        try:
+            queries.append(json.loads(query_string))
+        except ValueError as exception:
+            logger.warning("Unable to read query: %s", str(exception))
+
+    return queries
+
+
+def _get_index_field(path):
+    """Returns the field of the data collection for a query path
+
+    Args:
+        path:
+
+    Returns:
+
+    """
+    return f"{SUB_DOCUMENT_ROOT}.{path}"
+
+
+def _get_field_order(path, paths):
+    """Returns the sort key of a path in a compound index: equality
+    predicates first, then range predicates
+
+    Args:
+        path:
+        paths: operators by path
+
+    Returns:
+
+    """
+    is_equality = paths[path].issubset(EQUALITY_OPERATORS)
+    return (0 if is_equality else 1, path)
+
+
+def get_index_specs(queries):
+    """Returns the index specifications for a list of queries.
+
+    Each path gets a compound index with the template field. The paths
+    queried in an $elemMatch get a multikey compound index on their parent
+    array.
+
+    Args:
+        queries:
+
+    Returns:
+        list: index specifications, lists of (field, direction)
+
+    """
+    paths = dict()
+    elem_match_paths = dict()
+    for query in queries:
+        collect_query_paths(query, paths, elem_match_paths)
+
+    index_specs = [
+        [(TEMPLATE_FIELD, 1), (_get_index_field(path), 1)]
+        for path in sorted(paths)
+    ]
+    for parent_path in sorted(elem_match_paths):
+        sub_paths = elem_match_paths[parent_path]
+        if not sub_paths:
+            continue
+        sorted_sub_paths = sorted(
+            sub_paths, key=lambda path: _get_field_order(path, sub_paths)
+        )
+        index_specs.append(
+            [(TEMPLATE_FIELD, 1)]
+            + [
+                (_get_index_field(path), 1)
+                for path in sorted_sub_paths[: MAX_COMPOUND_INDEX_FIELDS - 1]
+            ]
+        )
+
+    return _remove_prefix_specs(index_specs)
+
+
+def _remove_prefix_specs(index_specs):
+    """Removes duplicate index specifications, and the ones that are a
+    prefix of another index
+
+    Args:
+        index_specs:
+
+    Returns:
+
+    """
+    unique_specs = []
+    for index_spec in index_specs:
+        if index_spec not in unique_specs:
+            unique_specs.append(index_spec)
+
+    return [
+        index_spec
+        for index_spec in unique_specs
+        if not any(
+            len(other_spec) > len(index_spec)
+            and other_spec[: len(index_spec)] == index_spec
+            for other_spec in unique_specs
+        )
+    ]
+
+
+def get_template_index_specs(template_id):
+    """Returns the index specifications for the queries recorded against a
+    template
+
+    Args:
+        template_id:
+
+    Returns:
+
+    """
+    return get_index_specs(get_template_queries(template_id))
+
+
+def create_indexes(collection, index_specs, dry_run=False):
+    """Creates the indexes on a collection, skipping existing ones
+
+    Args:
+        collection: pymongo collection
+        index_specs:
+        dry_run: do not create the indexes
+
+    Returns:
+        list: index specifications to create
+
+    """
+    existing_keys = {
+        tuple(tuple(key) for key in index_info["key"])
+        for index_info in collection.index_information().values()
+    }
+    missing_specs = [
+        index_spec
+        for index_spec in index_specs
+        if tuple(tuple(key) for key in index_spec) not in existing_keys
+    ]
+    if not dry_run:
+        for index_spec in missing_specs:
+            collection.create_index(index_spec)
+
+    return missing_specs
@@ -1,32 +1,45 @@
 """Util to build queries for mongo db"""
 
-import json
-import re
-from typing import List, Any
-
-from core_main_app.commons.exceptions import DoesNotExist
-from core_main_app.components.template import api as template_api
 from core_main_app.utils.xml import xpath_to_dot_notation
-from core_parser_app.components.data_structure_element import (
-    api as data_structure_element_api,
+from core_explore_example_app.commons.exceptions import MongoQueryException
+from core_explore_example_app.settings import (
+    EXPLORE_EXAMPLE_SCHEMA_AWARE_CRITERIA,
+    EXPLORE_EXAMPLE_TEXT_SEARCH,
 )
-from xml_utils.xsd_tree.operations.namespaces import (
-    get_namespaces,
-    get_default_prefix,
+from core_explore_example_app.utils import query_cache
+
+from core_explore_example_app.utils.criteria_compiler import (
+    CONTAINS_WORD_COMPARISON,
+    LIKE_COMPARISON,
+    get_criteria_compiler,
 )
-from xml_utils.xsd_types.xsd_types import (
-    get_xsd_numbers,
-    get_xsd_floating_numbers,
-    get_xsd_gregorian_types,
+
+# build_*_criteria are also imported to be available from this module
+from core_explore_example_app.utils.criteria_compiler import (  # noqa: F401
+    build_float_criteria,
+    build_int_criteria,
+    build_string_criteria,
 )
-from core_explore_example_app.commons.exceptions import MongoQueryException
-from core_explore_example_app.components.saved_query import (
-    api as saved_query_api,
+from core_explore_example_app.utils.query_ast import (
+    AndNode,
+    ComparisonNode,
+    OrNode,
+    from_mongo,
 )
 from core_explore_example_app.utils.query_builder import (
     get_element_value,
     get_element_comparison,
 )
+from core_explore_example_app.utils.schema_catalog import (
+    ALL_VALUE_LOCATIONS,
+    ELEMENT_VALUE,
+    get_catalog_by_template_id,
+    get_concrete_path_table,
+    get_element_record,
+)
+from core_explore_example_app.utils.template_schema import (
+    get_schema_info_by_template_id,
+)
 from core_explore_example_app.utils.xml import validate_element_value
 
 
@@ -41,76 +54,25 @@ def build_query_criteria(query, is_not=False):
 
     """
     if is_not:
-        return invert_query(query.copy())
+        return invert_query(query)
     else:
         return query
 
 
-def build_int_criteria(path, comparison, value):
-    """Builds a criteria for the type integer
-
-    Args:
-        path:
-        comparison:
-        value:
-
-    Returns:
-
-    """
-    criteria = dict()
-
-    if comparison == "=":
-        criteria[path] = int(value)
-    else:
-        criteria[path] = json.loads(
-            '{{"${0}": {1} }}'.format(comparison, int(value))
-        )
-
-    return criteria
-
-
-def build_float_criteria(path, comparison, value):
-    """Builds a criteria for the type float
+def build_query_criteria_node(query, is_not=False):
+    """Builds the query tree of a criteria for a query
 
     Args:
-        path:
-        comparison:
-        value:
-
-    Returns:
-
-    """
-    criteria = dict()
-
-    if comparison == "=":
-        criteria[path] = float(value)
-    else:
-        criteria[path] = json.loads(
-            '{{"${0}": {1} }}'.format(comparison, float(value))
-        )
-
-    return criteria
-
-
-def build_string_criteria(path, comparison, value):
-    """Builds a criteria for the type string
-
-    Args:
-        path:
-        comparison:
-        value:
+        query:
+        is_not:
 
     Returns:
 
     """
-    criteria = dict()
-
-    if comparison == "is":
-        criteria[path] = value
-    elif comparison == "like":
-        criteria[path] = "/" + value + "/"
-
-    return criteria
+    node = from_mongo(query)
+    if is_not:
+        return node.negate()
+    return node
 
 
 def build_and_criteria(*criteria_list):
@@ -194,6 +156,8 @@ def build_criteria(
     default_prefix,
     is_not=False,
     use_wildcard=False,
+    value_locations=None,
+    wildcard_paths=None,
 ):
     """Looks at element type and route to the right function to build the criteria
 
@@ -205,155 +169,163 @@ def build_criteria(
         default_prefix:
         is_not:
         use_wildcard:
+        value_locations: where the value can be found (element and/or
+            element.#text), both if not set
+        wildcard_paths: concrete paths matched by the wildcard
 
     Returns:
 
     """
-    element_query: List[Any] = []
-    attribute_query: List[Any] = []
-    # build the query: value can be found at element:value or at element.#text:value
-    # second case appends when the element has attributes or namespace information
-    if element_type in get_xsd_floating_numbers(default_prefix):
-        element_query.append(
-            build_float_criteria(element_path, comparison, value)
-        )
-        attribute_query.append(
-            build_float_criteria(
-                "{}.#text".format(element_path), comparison, value
-            )
-        )
-    elif element_type in get_xsd_numbers(default_prefix):
-        element_query.append(
-            build_int_criteria(element_path, comparison, value)
-        )
-        attribute_query.append(
-            build_int_criteria(
-                "{}.#text".format(element_path), comparison, value
-            )
-        )
-    elif element_type in get_xsd_gregorian_types(default_prefix):
-        # before creating the int query check if the value type is int
-        try:
-            int_value = int(value)
-            # if the format is number perform a strict match
-            attribute_query.append(
-                build_int_criteria(
-                    "{}.#text".format(element_path), "=", int_value
-                )
-            )
-            element_query.append(
-                build_int_criteria(element_path, "=", int_value)
-            )
-        except Exception:
-            pass
+    return build_criteria_node(
+        element_path,
+        comparison,
+        value,
+        element_type,
+        default_prefix,
+        is_not,
+        use_wildcard,
+        value_locations,
+        wildcard_paths,
+    ).to_mongo()
+
+
+def build_criteria_node(
+    element_path,
+    comparison,
+    value,
+    element_type,
+    default_prefix,
+    is_not=False,
+    use_wildcard=False,
+    value_locations=None,
+    wildcard_paths=None,
+):
+    """Builds the query tree of the criteria on an element
 
-        # string query
-        element_query.append(
-            build_string_criteria(element_path, comparison, value)
-        )
-        attribute_query.append(
-            build_string_criteria(
-                "{}.#text".format(element_path), comparison, value
-            )
-        )
+    Args:
+        element_path:
+        comparison:
+        value:
+        element_type:
+        default_prefix:
+        is_not:
+        use_wildcard:
+        value_locations: where the value can be found (element and/or
+            element.#text), both if not set
+        wildcard_paths: concrete paths matched by the wildcard, known from
+            the user data structure. A regular expression on the paths is
+            also used, the data structure may not contain all of them.
 
-    else:
-        element_query.append(
-            build_string_criteria(element_path, comparison, value)
-        )
-        attribute_query.append(
-            build_string_criteria(
-                "{}.#text".format(element_path), comparison, value
-            )
-        )
+    Returns:
 
-    if use_wildcard:
-        element_query.append(build_wildcard_criteria(element_query))
-        attribute_query.append(build_wildcard_criteria(attribute_query))
+    """
+    paths = get_value_paths(element_path, value_locations)
+    if use_wildcard and wildcard_paths:
+        paths = tuple(dict.fromkeys(paths + tuple(wildcard_paths)))
 
-    # add a $or operator
-    criteria = build_or_criteria(*(element_query + attribute_query))
+    element_query = get_criteria_compiler(default_prefix).compile(
+        element_path, comparison, value, element_type
+    )
+    nodes = [
+        _set_comparison_paths(from_mongo(criteria), paths)
+        for criteria in element_query
+    ]
+    if use_wildcard:
+        nodes.extend(
+            from_mongo(build_wildcard_criteria(dict(criteria)))
+            for criteria in element_query
+        )
 
+    node = OrNode.create(*nodes)
     if is_not:
-        return invert_query(criteria)
-    else:
-        return criteria
+        return node.negate()
+    return node
 
 
-def invert_query(query):
-    """Inverts each field of the query to build NOT(query)
+def get_value_paths(element_path, value_locations=None):
+    """Returns the paths where the value of an element can be found
 
     Args:
-        query:
+        element_path:
+        value_locations: where the value can be found (element and/or
+            element.#text), both if not set
 
     Returns:
 
     """
-    for key, value in list(query.items()):
-        if key == "$and" or key == "$or":
-            # Invert the query for the case value can be found at element:value or at
-            # element.#text:value. Second case happens when the element has attributes
-            # or namespace information.
-            if (
-                len(value) == 2
-                and len(list(value[0].keys())) == 1
-                and len(list(value[1].keys())) == 1
-                and list(value[1].keys())[0]
-                == "{}.#text".format(list(value[0].keys())[0])
-            ):
-                # second query is the same as the first
-                if key == "$and":
-                    return {
-                        "$or": [invert_query(value[0]), invert_query(value[1])]
-                    }
-                elif key == "$or":
-                    return {
-                        "$and": [
-                            invert_query(value[0]),
-                            invert_query(value[1]),
-                        ]
-                    }
-            for sub_value in value:
-                invert_query(sub_value)
-        else:
-            # lt, lte, =, gte, gt, not, ne
-            if isinstance(value, dict):
-                if (
-                    list(value.keys())[0] == "$not"
-                    or list(value.keys())[0] == "$ne"
-                ):
-                    query[key] = value[list(value.keys())[0]]
-                else:
-                    saved_value = value
-                    query[key] = dict()
-                    query[key]["$not"] = saved_value
-            else:
-                saved_value = value
-                if is_regex(value):
-                    query[key] = dict()
-                    query[key]["$not"] = saved_value
-                else:
-                    query[key] = dict()
-                    query[key]["$ne"] = saved_value
-    return query
+    if value_locations is None:
+        value_locations = ALL_VALUE_LOCATIONS
+    # value can be found at element:value or at element.#text:value
+    # second case appends when the element has attributes or namespace information
+    return tuple(
+        (
+            element_path
+            if value_location == ELEMENT_VALUE
+            else "{}.#text".format(element_path)
+        )
+        for value_location in value_locations
+    )
 
 
-def is_regex(expr):
-    """Returns true if the expression is a regular expression
+def get_wildcard_paths(element_record, concrete_path_table):
+    """Returns the concrete paths of the elements with the same name as the
+    element
 
     Args:
-        expr:
+        element_record:
+        concrete_path_table:
 
     Returns:
 
     """
-    if isinstance(expr, re.Pattern):
-        return True
+    name = element_record.dot_notation.split(".")[-1]
+    return tuple(
+        path
+        for dot_notation, value_locations in concrete_path_table.get(name, ())
+        for path in get_value_paths(
+            dot_notation,
+            (
+                value_locations
+                if EXPLORE_EXAMPLE_SCHEMA_AWARE_CRITERIA
+                else None
+            ),
+        )
+    )
+
+
+def _set_comparison_paths(node, paths):
+    """Returns the node where the comparisons look for the value at all the
+    paths
 
-    try:
-        return expr.startswith("/") and expr.endswith("/")
-    except Exception:
-        return False
+    Args:
+        node:
+        paths:
+
+    Returns:
+
+    """
+    if isinstance(node, ComparisonNode):
+        return ComparisonNode(paths, node.operator, node.value)
+    if isinstance(node, AndNode):
+        return AndNode(
+            tuple(
+                _set_comparison_paths(child, paths) for child in node.children
+            )
+        )
+    return node
+
+
+def invert_query(query):
+    """Inverts each field of the query to build NOT(query). The query is not
+    modified.
+
+    Args:
+        query:
+
+    Returns:
+
+    """
+    return from_mongo(query).negate().to_mongo()
 
 
 def get_dot_notation_to_element(data_structure_element, namespaces):
@@ -374,54 +346,129 @@ def get_dot_notation_to_element(data_structure_element, namespaces):
     return dot_notation
 
 
-def get_parent_name(data_structure_element_id, namespaces, request):
+def get_parent_name(
+    data_structure_element_id, namespaces, request, catalog=None
+):
     """
 
     Args:
         data_structure_element_id:
         namespaces:
         request:
+        catalog:
 
     Returns:
 
     """
-    # get the data structure element
-    data_structure_element = data_structure_element_api.get_by_id(
-        data_structure_element_id, request
+    # get the data structure element record
+    element_record = get_element_record(
+        data_structure_element_id, namespaces, request, catalog
     )
-    # convert xml path to mongo dot notation
-    data_structure_element_dot_notation = get_dot_notation_to_element(
-        data_structure_element, namespaces
-    )
-    # get parent name
-    parent_name = data_structure_element_dot_notation.split(".")[-2]
 
-    return parent_name
+    return element_record.parent_name
 
 
-def get_parent_path(data_structure_element_id, namespaces, request):
+def get_parent_path(
+    data_structure_element_id, namespaces, request, catalog=None
+):
     """
 
     Args:
         data_structure_element_id:
         namespaces:
         request:
+        catalog:
 
     Returns:
 
     """
-    # get the data structure element
-    data_structure_element = data_structure_element_api.get_by_id(
-        data_structure_element_id, request
+    # get the data structure element record
+    element_record = get_element_record(
+        data_structure_element_id, namespaces, request, catalog
     )
-    # convert xml path to mongo dot notation
-    data_structure_element_dot_notation = get_dot_notation_to_element(
-        data_structure_element, namespaces
-    )
-    # get path to parent element
-    parent_path = ".".join(data_structure_element_dot_notation.split(".")[:-1])
 
-    return parent_path
+    return element_record.parent_path
+
+
+def get_value_locations(element_record):
+    """Returns where the value of the element can be found, None to look
+    everywhere if the queries are not schema aware
+
+    Args:
+        element_record:
+
+    Returns:
+
+    """
+    if not EXPLORE_EXAMPLE_SCHEMA_AWARE_CRITERIA:
+        return None
+    return element_record.value_locations
+
+
+def check_form_field(field, default_prefix):
+    """Checks that the value entered by the user in a field matches the
+    element type
+
+    Args:
+        field:
+        default_prefix:
+
+    Returns:
+        list: errors
+
+    """
+    errors = []
+    element_value = get_element_value(field)
+    element_name = field.get("name", "Unnamed field")
+    element_type = field.get("type", None)
+    if get_element_comparison(field) == CONTAINS_WORD_COMPARISON:
+        if not EXPLORE_EXAMPLE_TEXT_SEARCH:
+            errors.append(
+                f"Element {element_name}: text search is not enabled."
+            )
+        elif field.get("operator") == "NOT":
+            errors.append(
+                f"Element {element_name}: 'contains word' can't be negated."
+            )
+        elif field.get("operator") == "OR":
+            errors.append(
+                f"Element {element_name}: 'contains word' can't be combined "
+                f"with OR."
+            )
+    # If there is a type to check
+    if element_type:
+        error = validate_element_value(
+            element_name, element_type, element_value, default_prefix
+        )
+        if error is not None:
+            errors.append(error)
+
+    return errors
+
+
+def check_text_search(form_values):
+    """Checks that the form performs at most one text search, the only
+    number allowed in a query, and that the text search is not part of an OR
+
+    Args:
+        form_values:
+
+    Returns:
+        list: errors
+
+    """
+    text_search_count = sum(
+        1
+        for field in form_values
+        if get_element_comparison(field) == CONTAINS_WORD_COMPARISON
+    )
+    if text_search_count > 1:
+        return ["Only one 'contains word' criteria can be used."]
+    if text_search_count == 1 and any(
+        field.get("operator") == "OR" for field in form_values
+    ):
+        return ["'contains word' can't be used in a query with OR."]
+    return []
 
 
 def check_query_form(form_values, template_id, request=None):
@@ -435,9 +482,9 @@ def check_query_form(form_values, template_id, request=None):
     Returns:
 
     """
-    template = template_api.get_by_id(template_id, request=request)
-    namespaces = get_namespaces(template.content)
-    default_prefix = get_default_prefix(namespaces)
+    default_prefix = get_schema_info_by_template_id(
+        template_id, request=request
+    ).default_prefix
 
     # check if there are no errors in the query
     errors = []
@@ -446,16 +493,9 @@ def check_query_form(form_values, template_id, request=None):
         errors.append("The query is empty.")
 
     for field in form_values:
-        element_value = get_element_value(field)
-        element_name = field.get("name", "Unnamed field")
-        element_type = field.get("type", None)
-        # If there is a type to check
-        if element_type:
-            error = validate_element_value(
-                element_name, element_type, element_value, default_prefix
-            )
-            if error is not None:
-                errors.append(error)
+        errors.extend(check_form_field(field, default_prefix))
+
+    errors.extend(check_text_search(form_values))
 
     return errors
 
@@ -465,6 +505,8 @@ def fields_to_query(
 ):
     """Takes values from the html tree and creates a query from them
 
+    Compiled queries are cached by template, user and form values.
+
     Args:
         form_values:
         template_id:
@@ -473,67 +515,194 @@ def fields_to_query(
     Returns:
 
     """
-    # get template
-    template = template_api.get_by_id(template_id, request=request)
-    # get namespaces
-    namespaces = get_namespaces(template.content)
-    # get default prefix
-    default_prefix = get_default_prefix(namespaces)
-
-    query = dict()
-    for field in form_values:
-        bool_comp = field["operator"]
-        is_not = bool_comp == "NOT"
-        element_type = field.get("type", None)
-
-        # get element value
-        value = get_element_value(field)
-        # get comparison operator
-        comparison = get_element_comparison(field)
-
-        element_id = field["id"]
-
-        if element_type == "query":
-            try:
-                saved_query = saved_query_api.get_by_id(element_id)
-            except DoesNotExist:
-                raise MongoQueryException(
-                    "The saved query does not exist anymore."
-                )
-            criteria = build_query_criteria(
-                json.loads(saved_query.query), is_not
-            )
-        else:
-            data_structure_element = data_structure_element_api.get_by_id(
-                element_id, request
-            )
-            element = get_dot_notation_to_element(
-                data_structure_element, namespaces
+    cache_key = query_cache.get_cache_key(
+        template_id, form_values, use_wildcard, request
+    )
+    query = query_cache.get_compiled_query(cache_key)
+    if query is None:
+        query = _compile_fields_to_query(
+            form_values, template_id, use_wildcard, request
+        )
+        query_cache.set_compiled_query(cache_key, query)
+
+    return query
+
+
+class QueryContext:
+    """Information about the template shared by the criteria of a query"""
+
+    __slots__ = (
+        "namespaces",
+        "default_prefix",
+        "catalog",
+        "saved_queries",
+        "concrete_path_table",
+        "use_wildcard",
+        "request",
+    )
+
+    def __init__(
+        self, schema_info, form_values, use_wildcard, request, catalog=None
+    ):
+        """Get the template information used by the form
+
+        Args:
+            schema_info: TemplateSchemaInfo
+            form_values:
+            use_wildcard:
+            request:
+            catalog: catalog of the user data structure, fetched if not set
+        """
+        self.namespaces = schema_info.namespaces
+        self.default_prefix = schema_info.default_prefix
+        self.use_wildcard = use_wildcard
+        self.request = request
+        # get the elements of the user data structure
+        self.catalog = (
+            catalog
+            if catalog is not None
+            else get_catalog_by_template_id(
+                schema_info.template_id, self.namespaces, request
             )
-            criteria = build_criteria(
-                element,
-                comparison,
-                value,
-                element_type,
-                default_prefix,
-                is_not,
-                use_wildcard,
+        )
+        self.concrete_path_table = (
+            get_concrete_path_table(self.catalog) if use_wildcard else None
+        )
+        # get all the saved queries used by the form at once
+        saved_query_ids = [
+            field["id"]
+            for field in form_values
+            if field.get("type") == "query"
+        ]
+        self.saved_queries = (
+            query_cache.get_parsed_saved_queries(saved_query_ids)
+            if saved_query_ids
+            else {}
+        )
+
+
+def build_field_criteria_node(field, context):
+    """Builds the query tree of the criteria of a form field
+
+    Args:
+        field:
+        context: QueryContext
+
+    Returns:
+
+    """
+    is_not = field["operator"] == "NOT"
+    element_type = field.get("type", None)
+    element_id = field["id"]
+
+    if element_type == "query":
+        try:
+            saved_query = context.saved_queries[str(element_id)]
+        except KeyError:
+            raise MongoQueryException(
+                "The saved query does not exist anymore."
             )
+        return build_query_criteria_node(saved_query, is_not)
 
-        if bool_comp == "OR":
-            query = build_or_criteria(query, criteria)
-        elif bool_comp == "AND":
-            query = build_and_criteria(query, criteria)
-        else:
-            if form_values.index(field) == 0:
-                query.update(criteria)
-            else:
-                query = build_and_criteria(query, criteria)
+    element_record = get_element_record(
+        element_id, context.namespaces, context.request, context.catalog
+    )
+    return build_criteria_node(
+        element_record.dot_notation,
+        get_element_comparison(field),
+        get_element_value(field),
+        element_type,
+        context.default_prefix,
+        is_not,
+        context.use_wildcard,
+        get_value_locations(element_record),
+        (
+            get_wildcard_paths(element_record, context.concrete_path_table)
+            if context.use_wildcard
+            else None
+        ),
+    )
 
-    return query
 
+def add_criteria_node(query_node, criteria_node, bool_comp, index):
+    """Adds the criteria of the field at the index to the query tree
+
+    Args:
+        query_node:
+        criteria_node:
+        bool_comp: operator of the field
+        index:
+
+    Returns:
+
+    """
+    if bool_comp == "OR":
+        return OrNode.create(query_node, criteria_node)
+    if bool_comp == "AND" or index > 0:
+        return AndNode.create(query_node, criteria_node)
+    return criteria_node
+
+
+def _compile_fields_to_query(form_values, template_id, use_wildcard, request):
+    """Takes values from the html tree and creates a query from them
+
+    Args:
+        form_values:
+        template_id:
+        use_wildcard:
+        request:
+    Returns:
+
+    """
+    context = QueryContext(
+        get_schema_info_by_template_id(template_id, request=request),
+        form_values,
+        use_wildcard,
+        request,
+    )
+
+    query_node = AndNode()
+    for index, field in enumerate(form_values):
+        query_node = add_criteria_node(
+            query_node,
+            build_field_criteria_node(field, context),
+            field["operator"],
+            index,
+        )
+
+    return query_node.to_mongo()
 
-def sub_elements_to_query(form_values, namespaces, default_prefix, request):
+
+def build_sub_element_criteria(field, element_record, default_prefix):
+    """Builds the criteria of a form field on a sub-element
+
+    Args:
+        field:
+        element_record:
+        default_prefix:
+
+    Returns:
+
+    """
+    comparison = get_element_comparison(field)
+    # text search can't be performed in an $elemMatch
+    if comparison == CONTAINS_WORD_COMPARISON:
+        comparison = LIKE_COMPARISON
+
+    return build_criteria(
+        element_record.name,
+        comparison,
+        get_element_value(field),
+        element_record.type,
+        default_prefix,
+        field["operator"] == "NOT",
+        value_locations=get_value_locations(element_record),
+    )
+
+
+def sub_elements_to_query(
+    form_values, namespaces, default_prefix, request, catalog=None
+):
     """Transforms HTML fields in a query on sub-elements
 
     Args:
@@ -541,6 +710,7 @@ def sub_elements_to_query(form_values, namespaces, default_prefix, request):
         namespaces:
         default_prefix:
         request:
+        catalog:
 
     Returns:
 
@@ -548,36 +718,21 @@ def sub_elements_to_query(form_values, namespaces, default_prefix, request):
     elem_match = []
 
     # get the parent path using the first element of the list
-    parent_path = get_parent_path(form_values[0]["id"], namespaces, request)
+    parent_path = get_parent_path(
+        form_values[0]["id"], namespaces, request, catalog
+    )
 
-    for i in range(0, len(form_values)):
-        field = form_values[i]
+    for field in form_values:
         if field["selected"] is True:
-            bool_comp = field["operator"]
-            if bool_comp == "NOT":
-                is_not = True
-            else:
-                is_not = False
-
-            data_structure_element = data_structure_element_api.get_by_id(
-                field["id"], request
+            element_record = get_element_record(
+                field["id"], namespaces, request, catalog
             )
-            element_type = data_structure_element.options["type"]
-            element_name = data_structure_element.options["name"]
-            value = get_element_value(field)
-            comparison = get_element_comparison(field)
-
-            criteria = build_criteria(
-                element_name,
-                comparison,
-                value,
-                element_type,
-                default_prefix,
-                is_not,
+            elem_match.append(
+                build_sub_element_criteria(
+                    field, element_record, default_prefix
+                )
             )
 
-            elem_match.append(criteria)
-
     query = {parent_path: {"$elemMatch": {"$and": elem_match}}}
 
     return query
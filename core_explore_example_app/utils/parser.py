@@ -1,13 +1,36 @@
 """Parser util for explore app"""
 
+import zlib
+
+from django.conf import settings
+
 from core_parser_app.components.data_structure_element import (
     api as data_structure_element_api,
 )
 from core_parser_app.tools.parser.parser import XSDParser, remove_child_element
-from core_explore_example_app.settings import PARSER_DOWNLOAD_DEPENDENCIES
+from core_explore_example_app.settings import (
+    EXPLORE_EXAMPLE_RENDERED_FORM_CACHE_SIZE,
+    EXPLORE_EXAMPLE_RENDERED_FORM_CACHE_TIMEOUT,
+    EXPLORE_EXAMPLE_RENDERED_FORM_COMPRESSION_THRESHOLD,
+    PARSER_DOWNLOAD_DEPENDENCIES,
+)
+from core_explore_example_app.utils.cache import (
+    LRUCache,
+    bump_data_structure_revision,
+    get_cache,
+    get_data_structure_revision,
+)
 from core_explore_example_app.utils.custom_checkbox_renderer import (
     CustomCheckboxRenderer,
 )
+from core_explore_example_app.utils.element_tree import (
+    get_tree_data_structure_id,
+)
+
+RENDERED_FORM_KEY_PREFIX = "core_explore_example_app:rendered_form"
+
+# rendered forms kept in memory by the current worker
+_rendered_forms = LRUCache(EXPLORE_EXAMPLE_RENDERED_FORM_CACHE_SIZE)
 
 # TODO: the form renders 'add' buttons based on maxOccurs attributes, but we
 #  don't need more than one of each element
@@ -58,24 +81,138 @@ def generate_form(xsd_string, data_structure=None, request=None):
     return root_element
 
 
-def render_form(request, root_element):
+def render_form(
+    request, root_element, max_depth=None, explore_data_structure=None
+):
     """Renders the form
 
     Args:
         request:
         root_element:
+        max_depth: levels of complex types to render, all if not set
+        explore_data_structure: data structure of the user, its copied
+            elements are rendered instead of the shared ones
 
     Returns:
 
     """
     # build a renderer
-    renderer = CustomCheckboxRenderer(root_element, request)
+    renderer = CustomCheckboxRenderer(
+        root_element, request, max_depth, explore_data_structure
+    )
     # render the form
     xsd_form = renderer.render()
 
     return xsd_form
 
 
+def _compress_form(xsd_form):
+    """Return the form to store in the shared cache, compressed if large
+
+    Args:
+        xsd_form:
+
+    Returns:
+        str or bytes
+
+    """
+    data = xsd_form.encode("utf-8")
+    if len(data) < EXPLORE_EXAMPLE_RENDERED_FORM_COMPRESSION_THRESHOLD:
+        return xsd_form
+    return zlib.compress(data)
+
+
+def _decompress_form(cached_form):
+    """Return the form stored in the shared cache
+
+    Args:
+        cached_form:
+
+    Returns:
+        str
+
+    """
+    if isinstance(cached_form, bytes):
+        return zlib.decompress(cached_form).decode("utf-8")
+    return cached_form
+
+
+def get_rendered_form(request, explore_data_structure, max_depth=None):
+    """Return the form of a data structure, rendered once per revision of the
+    data structure. The users who did not modify the tree of a template
+    share the form of its base data structure.
+
+    Args:
+        request:
+        explore_data_structure:
+        max_depth: levels of complex types to render, all if not set
+
+    Returns:
+        str
+
+    """
+    tree_id = get_tree_data_structure_id(explore_data_structure)
+    revision = get_data_structure_revision(tree_id)
+    cache_key = (
+        f"{RENDERED_FORM_KEY_PREFIX}:{tree_id}:{revision}:{max_depth or 0}"
+    )
+    xsd_form = _rendered_forms.get(cache_key)
+    if xsd_form is not None:
+        return xsd_form
+
+    # rendered templates may be reloaded in debug mode
+    cache = get_cache() if not settings.DEBUG else None
+    cached_form = cache.get(cache_key) if cache is not None else None
+    if cached_form is None:
+        xsd_form = render_form(
+            request,
+            explore_data_structure.data_structure_element_root,
+            max_depth,
+            explore_data_structure,
+        )
+        if cache is not None:
+            cache.set(
+                cache_key,
+                _compress_form(xsd_form),
+                timeout=EXPLORE_EXAMPLE_RENDERED_FORM_CACHE_TIMEOUT,
+            )
+    else:
+        xsd_form = _decompress_form(cached_form)
+    _rendered_forms.set(cache_key, xsd_form)
+    return xsd_form
+
+
+def render_subtree(
+    request, complex_type_element, max_depth=None, explore_data_structure=None
+):
+    """Renders the content of a complex type left out of the form
+
+    Args:
+        request:
+        complex_type_element:
+        max_depth: levels of complex types to render, all if not set
+        explore_data_structure: data structure of the user, its copied
+            elements are rendered instead of the shared ones
+
+    Returns:
+
+    """
+    renderer = CustomCheckboxRenderer(
+        complex_type_element, request, max_depth, explore_data_structure
+    )
+    # render the subtree loaded by the renderer
+    return renderer.render_complex_type(renderer.data)
+
+
+def clear_rendered_forms():
+    """Clear the rendered forms kept in memory by the current worker
+
+    Returns:
+
+    """
+    _rendered_forms.clear()
+
+
 # TODO: need to be reworked + similar as code in curate app
 def remove_form_element(request, element_id):
     """Remove an element from the form.
@@ -99,6 +236,7 @@ def remove_form_element(request, element_id):
     data_structure_element = remove_child_element(
         data_structure_element, data_structure_element_to_pull, request
     )
+    bump_data_structure_revision(data_structure_element.data_structure_id)
 
     code = 0
     html_form = ""
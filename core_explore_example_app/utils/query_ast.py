@@ -0,0 +1,413 @@
+"""Immutable query tree built from the query builder, lowered to a Mongo query.
+
+Negations are pushed down to the comparisons when the tree is built, using
+De Morgan's laws, so that the Mongo query only negates single comparisons:
+- a range comparison is replaced by the inverted range, or the absence of
+  the value, on all the paths where the value can be found,
+- an equality or a regular expression is replaced by an exclusion ($ne,
+  $not), which must hold for all the paths where the value can be found.
+
+The queries are executed after being converted to ORM filters by
+core_main_app, which doesn't support $nor and $nin: they are not emitted.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Tuple
+
+from core_explore_example_app.commons.exceptions import MongoQueryException
+
+AND_OPERATOR = "$and"
+OR_OPERATOR = "$or"
+NOR_OPERATOR = "$nor"
+NOT_OPERATOR = "$not"
+EQUAL_OPERATOR = "$eq"
+EXISTS_OPERATOR = "$exists"
+NOT_EQUAL_OPERATOR = "$ne"
+REGEX_OPERATOR = "$regex"
+TEXT_OPERATOR = "$text"
+# value is an operator document that is not interpreted
+RAW_OPERATOR = None
+
+INVERTED_RANGE_OPERATORS = {
+    "$gt": "$lte",
+    "$gte": "$lt",
+    "$lt": "$gte",
+    "$lte": "$gt",
+}
+COMPARISON_OPERATORS = (EQUAL_OPERATOR, "$in") + tuple(
+    INVERTED_RANGE_OPERATORS
+)
+
+
+def is_regex(expr):
+    """Returns true if the expression is a regular expression
+
+    Args:
+        expr:
+
+    Returns:
+
+    """
+    if isinstance(expr, re.Pattern):
+        return True
+
+    try:
+        return expr.startswith("/") and expr.endswith("/")
+    except Exception:
+        return False
+
+
+class QueryNode:
+    """Node of a query tree"""
+
+    __slots__ = ()
+
+    def negate(self):
+        """Returns the node matching the documents not matched by this node
+
+        Returns:
+
+        """
+        raise NotImplementedError("negate not implemented")
+
+    def to_mongo(self):
+        """Returns the Mongo query of the node
+
+        Returns:
+
+        """
+        raise NotImplementedError("to_mongo not implemented")
+
+
+def _lower_children(children, operator):
+    """Lowers the children of a logical node, flattening the children lowered
+    to the same operator
+
+    Args:
+        children:
+        operator:
+
+    Returns:
+
+    """
+    criteria_list = []
+    for child in children:
+        criteria = child.to_mongo()
+        # the $or of a range exclusion on a path is kept, to be parsed again
+        if list(criteria.keys()) == [operator] and not (
+            isinstance(child, RangeExclusionNode) and len(child.paths) == 1
+        ):
+            criteria_list.extend(criteria[operator])
+        else:
+            criteria_list.append(criteria)
+    return criteria_list
+
+
+@dataclass(frozen=True, slots=True)
+class AndNode(QueryNode):
+    """Matches the documents matched by all the children, all the documents
+    if there is no children"""
+
+    children: Tuple[QueryNode, ...] = ()
+
+    @classmethod
+    def create(cls, *children):
+        """Creates a node, flattening the children of the same type
+
+        Args:
+            children:
+
+        Returns:
+
+        """
+        flat_children = []
+        for child in children:
+            if isinstance(child, AndNode):
+                flat_children.extend(child.children)
+            else:
+                flat_children.append(child)
+        if len(flat_children) == 1:
+            return flat_children[0]
+        return cls(tuple(flat_children))
+
+    def negate(self):
+        if not self.children:
+            # nothing matches: this can't be expressed without $nor
+            raise MongoQueryException("Unable to negate an empty query.")
+        return OrNode.create(*(child.negate() for child in self.children))
+
+    def to_mongo(self):
+        criteria_list = _lower_children(self.children, AND_OPERATOR)
+        if not criteria_list:
+            return {}
+        if len(criteria_list) == 1:
+            return criteria_list[0]
+        return {AND_OPERATOR: criteria_list}
+
+
+@dataclass(frozen=True, slots=True)
+class OrNode(QueryNode):
+    """Matches the documents matched by one of the children"""
+
+    children: Tuple[QueryNode, ...]
+
+    @classmethod
+    def create(cls, *children):
+        """Creates a node, flattening the children of the same type. Returns
+        a node matching all the documents if one of the children does.
+
+        Args:
+            children:
+
+        Returns:
+
+        """
+        flat_children = []
+        for child in children:
+            if isinstance(child, AndNode) and not child.children:
+                return child
+            if isinstance(child, OrNode):
+                flat_children.extend(child.children)
+            else:
+                flat_children.append(child)
+        if len(flat_children) == 1:
+            return flat_children[0]
+        if any(_has_text_search(child) for child in flat_children):
+            raise MongoQueryException(
+                "Unable to combine a text search with OR."
+            )
+        return cls(tuple(flat_children))
+
+    def negate(self):
+        return AndNode.create(*(child.negate() for child in self.children))
+
+    def to_mongo(self):
+        criteria_list = _lower_children(self.children, OR_OPERATOR)
+        if len(criteria_list) == 1:
+            return criteria_list[0]
+        return {OR_OPERATOR: criteria_list}
+
+
+@dataclass(frozen=True, slots=True)
+class ComparisonNode(QueryNode):
+    """Matches the documents where the value found at one of the paths
+    matches the comparison"""
+
+    paths: Tuple[str, ...]
+    operator: Any
+    value: Any
+
+    def negate(self):
+        if self.operator in INVERTED_RANGE_OPERATORS:
+            return RangeExclusionNode(self.paths, self.operator, self.value)
+        return ExclusionNode(self.paths, self.operator, self.value)
+
+    def _get_path_criteria(self):
+        """Returns the criteria on a path
+
+        Returns:
+
+        """
+        if self.operator in (EQUAL_OPERATOR, REGEX_OPERATOR, RAW_OPERATOR):
+            return self.value
+        return {self.operator: self.value}
+
+    def to_mongo(self):
+        path_criteria = self._get_path_criteria()
+        if len(self.paths) == 1:
+            return {self.paths[0]: path_criteria}
+        return {OR_OPERATOR: [{path: path_criteria} for path in self.paths]}
+
+
+@dataclass(frozen=True, slots=True)
+class ExclusionNode(QueryNode):
+    """Matches the documents where no value found at the paths matches the
+    comparison"""
+
+    paths: Tuple[str, ...]
+    operator: Any
+    value: Any
+
+    def negate(self):
+        return ComparisonNode(self.paths, self.operator, self.value)
+
+    def _get_path_criteria(self):
+        """Returns the criteria on a path
+
+        Returns:
+
+        """
+        if self.operator == EQUAL_OPERATOR:
+            return {NOT_EQUAL_OPERATOR: self.value}
+        if self.operator in (REGEX_OPERATOR, RAW_OPERATOR):
+            return {NOT_OPERATOR: self.value}
+        return {NOT_OPERATOR: {self.operator: self.value}}
+
+    def to_mongo(self):
+        path_criteria = self._get_path_criteria()
+        if len(self.paths) == 1:
+            return {self.paths[0]: path_criteria}
+        return {AND_OPERATOR: [{path: path_criteria} for path in self.paths]}
+
+
+@dataclass(frozen=True, slots=True)
+class RangeExclusionNode(QueryNode):
+    """Matches the documents where no value found at the paths is in the
+    range: the value is in the inverted range, or is missing"""
+
+    paths: Tuple[str, ...]
+    operator: Any
+    value: Any
+
+    def negate(self):
+        return ComparisonNode(self.paths, self.operator, self.value)
+
+    def _get_path_criteria(self, path):
+        """Returns the criteria on a path. The absence of the value is
+        expressed with $not since core_main_app doesn't support
+        {"$exists": False}.
+
+        Args:
+            path:
+
+        Returns:
+
+        """
+        return {
+            OR_OPERATOR: [
+                {path: {INVERTED_RANGE_OPERATORS[self.operator]: self.value}},
+                {path: {NOT_OPERATOR: {EXISTS_OPERATOR: True}}},
+            ]
+        }
+
+    def to_mongo(self):
+        criteria_list = [self._get_path_criteria(path) for path in self.paths]
+        if len(criteria_list) == 1:
+            return criteria_list[0]
+        return {AND_OPERATOR: criteria_list}
+
+
+@dataclass(frozen=True, slots=True)
+class TextSearchNode(QueryNode):
+    """Matches the documents found by a search on the text index"""
+
+    search: Any
+
+    def negate(self):
+        raise MongoQueryException("Unable to negate a text search.")
+
+    def to_mongo(self):
+        return {TEXT_OPERATOR: self.search}
+
+
+def _has_text_search(node):
+    """Returns true if the node performs a text search
+
+    Args:
+        node:
+
+    Returns:
+
+    """
+    if isinstance(node, TextSearchNode):
+        return True
+    if isinstance(node, (AndNode, OrNode)):
+        return any(_has_text_search(child) for child in node.children)
+    return False
+
+
+def _parse_field(path, value):
+    """Returns the node of the criteria on a field
+
+    Args:
+        path:
+        value:
+
+    Returns:
+
+    """
+    paths = (path,)
+    if not isinstance(value, dict):
+        operator = REGEX_OPERATOR if is_regex(value) else EQUAL_OPERATOR
+        return ComparisonNode(paths, operator, value)
+    if len(value) != 1:
+        return ComparisonNode(paths, RAW_OPERATOR, value)
+
+    operator, operand = next(iter(value.items()))
+    if operator in COMPARISON_OPERATORS:
+        return ComparisonNode(paths, operator, operand)
+    if operator == NOT_EQUAL_OPERATOR:
+        return ExclusionNode(paths, EQUAL_OPERATOR, operand)
+    if operator == NOT_OPERATOR:
+        negated_node = _parse_field(path, operand)
+        if isinstance(negated_node, ComparisonNode) and (
+            negated_node.operator != EQUAL_OPERATOR
+        ):
+            return ExclusionNode(
+                paths, negated_node.operator, negated_node.value
+            )
+        return ExclusionNode(paths, RAW_OPERATOR, operand)
+    return ComparisonNode(paths, RAW_OPERATOR, value)
+
+
+def _parse_range_exclusion(criteria_list):
+    """Returns the range exclusion node lowered to the criteria of an $or,
+    None if the criteria are not the lowering of a range exclusion
+
+    Args:
+        criteria_list:
+
+    Returns:
+
+    """
+    if len(criteria_list) != 2 or not all(
+        isinstance(criteria, dict) and len(criteria) == 1
+        for criteria in criteria_list
+    ):
+        return None
+    (path, range_criteria), (other_path, missing_criteria) = (
+        next(iter(criteria.items())) for criteria in criteria_list
+    )
+    if (
+        path != other_path
+        or missing_criteria != {NOT_OPERATOR: {EXISTS_OPERATOR: True}}
+        or not isinstance(range_criteria, dict)
+        or len(range_criteria) != 1
+    ):
+        return None
+    operator, value = next(iter(range_criteria.items()))
+    if operator not in INVERTED_RANGE_OPERATORS:
+        return None
+    return RangeExclusionNode(
+        (path,), INVERTED_RANGE_OPERATORS[operator], value
+    )
+
+
+def from_mongo(query):
+    """Returns the query tree of a Mongo query
+
+    Args:
+        query:
+
+    Returns:
+
+    """
+    nodes = []
+    for key, value in query.items():
+        if key == AND_OPERATOR:
+            nodes.append(AndNode.create(*(from_mongo(item) for item in value)))
+        elif key == OR_OPERATOR:
+            node = _parse_range_exclusion(value)
+            if node is None:
+                node = OrNode.create(*(from_mongo(item) for item in value))
+            nodes.append(node)
+        elif key == NOR_OPERATOR:
+            nodes.append(
+                OrNode.create(*(from_mongo(item) for item in value)).negate()
+            )
+        elif key == TEXT_OPERATOR:
+            nodes.append(TextSearchNode(value))
+        else:
+            nodes.append(_parse_field(key, value))
+    return AndNode.create(*nodes)
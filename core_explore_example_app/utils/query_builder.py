@@ -1,25 +1,53 @@
 """Utils for the query builder"""
 
+import hashlib
 from os.path import join
 
+from django.conf import settings
 from django.template import loader
+from lxml import etree
 
 from core_main_app.settings import MONGODB_INDEXING
+from core_explore_example_app.settings import (
+    EXPLORE_EXAMPLE_TEXT_SEARCH,
+    EXPLORE_EXAMPLE_USER_INPUTS_CACHE_SIZE,
+    EXPLORE_EXAMPLE_USER_INPUTS_CACHE_TIMEOUT,
+)
 from xml_utils.xsd_types.xsd_types import (
     get_xsd_numbers,
     get_xsd_gregorian_types,
 )
+from core_explore_example_app.utils.cache import (
+    LRUCache,
+    get_cache,
+    get_generation,
+)
+from core_explore_example_app.utils.query_cache import TEMPLATE_NAMESPACE
+from core_explore_example_app.utils.schema_catalog import (
+    ElementRecord,
+    get_catalog_by_template_id,
+    get_element_record,
+)
 from core_explore_example_app.utils.xml import get_enumerations
 
+USER_INPUTS_KEY_PREFIX = "core_explore_example_app:user_inputs"
+
+# element type and user inputs kept in memory by the current worker
+_user_inputs = LRUCache(EXPLORE_EXAMPLE_USER_INPUTS_CACHE_SIZE)
+
 
 class BranchInfo:
     """Store information about a branch from the xml schema while it is being processed for field selection"""
 
+    __slots__ = ("keep_the_branch", "selected_leaves", "has_branches")
+
     def __init__(self, keep_the_branch=False, selected_leaves=None):
         self.keep_the_branch = keep_the_branch
         self.selected_leaves = (
             selected_leaves if selected_leaves is not None else []
         )
+        # true if a child branch was processed
+        self.has_branches = False
 
     def add_selected_leaf(self, leaf_id):
         """add_selected_leaf
@@ -31,12 +59,28 @@ class BranchInfo:
         self.selected_leaves.append(leaf_id)
         self.keep_the_branch = True
 
+    def add_branch(self, branch_info):
+        """Add the information of a processed child branch
+
+        Args:
+            branch_info:
+
+        Returns:
+
+        """
+        self.has_branches = True
+        if branch_info.keep_the_branch:
+            self.keep_the_branch = True
+        self.selected_leaves.extend(branch_info.selected_leaves)
+
 
 # Util functions
 
 
 def prune_html_tree(html_tree):
-    """Create a custom HTML tree from fields chosen by the user
+    """Create a custom HTML tree from fields chosen by the user. The ul and
+    li elements are processed bottom-up in a single walk of the tree, without
+    recursion.
 
     Args:
         html_tree:
@@ -44,35 +88,56 @@ def prune_html_tree(html_tree):
     Returns:
 
     """
-    any_branch_checked = False
-
-    list_ul = html_tree.findall("./ul")
-    for ul in list_ul:
-        branch_info = prune_ul(ul)
-        if branch_info.keep_the_branch:
-            any_branch_checked = True
+    # branches of the ul and li elements being processed, None for the
+    # elements that are not part of the list
+    branches = [BranchInfo()]
+    walker = etree.iterwalk(html_tree, events=("start", "end"))
+    for event, element in walker:
+        if event == "start":
+            if element is html_tree:
+                continue
+            parent_branch = branches[-1]
+            if len(branches) == 1:
+                expected_tag = "ul"
+            elif parent_branch is not None:
+                # lists alternate ul and li elements
+                expected_tag = (
+                    "li" if element.getparent().tag == "ul" else "ul"
+                )
+            else:
+                expected_tag = None
+            if element.tag == expected_tag:
+                branches.append(BranchInfo())
+            else:
+                branches.append(None)
+                walker.skip_subtree()
+            continue
+
+        if element is html_tree:
+            break
+        branch_info = branches.pop()
+        if branch_info is None:
+            continue
+        if element.tag == "ul":
+            prune_ul(element, branch_info)
+        else:
+            branch_info = prune_li(element, branch_info)
+        branches[-1].add_branch(branch_info)
 
-    return any_branch_checked
+    return branches[0].keep_the_branch
 
 
-def prune_ul(ul):
-    """Process the ul element of an HTML list
+def prune_ul(ul, branch_info):
+    """Process the ul element of an HTML list, once its li elements are
+    processed
 
     Args:
         ul:
+        branch_info: information of the li elements of the list
 
     Returns:
 
     """
-    list_li = ul.findall("./li")
-    branch_info = BranchInfo()
-
-    for li in list_li:
-        li_branch_info = prune_li(li)
-        if li_branch_info.keep_the_branch:
-            branch_info.keep_the_branch = True
-        branch_info.selected_leaves.extend(li_branch_info.selected_leaves)
-
     checkbox = ul.find("./input[@type='checkbox']")
     if checkbox is not None:
         if "value" in checkbox.attrib and checkbox.attrib["value"] == "true":
@@ -86,28 +151,21 @@ def prune_ul(ul):
     if not branch_info.keep_the_branch:
         add_selection_attributes(ul, "none")
 
-    return branch_info
-
 
-def prune_li(li):
-    """Process the li element of an HTML list
+def prune_li(li, branch_info):
+    """Process the li element of an HTML list, once its ul elements are
+    processed
 
     Args:
         li:
+        branch_info: information of the ul elements of the item
 
     Returns:
+        BranchInfo: information passed to the parent list
 
     """
-    list_ul = li.findall("./ul")
-    branch_info = BranchInfo()
-
-    if len(list_ul) != 0:
-        selected_leaves = []
-        for ul in list_ul:
-            ul_branch_info = prune_ul(ul)
-            if ul_branch_info.keep_the_branch:
-                branch_info.keep_the_branch = True
-            selected_leaves.extend(ul_branch_info.selected_leaves)
+    if branch_info.has_branches:
+        selected_leaves = branch_info.selected_leaves
 
         # sub element queries available when more than one selected elements under the same element,
         # and data stored in MongoDB
@@ -121,21 +179,22 @@ def prune_li(li):
         if not branch_info.keep_the_branch:
             add_selection_attributes(li, "none")
 
-        return branch_info
-    else:
-        try:
-            checkbox = li.find("./input[@type='checkbox']")
-            if checkbox.attrib["value"] == "false":
-                add_selection_attributes(li, "none")
-                return branch_info
-            else:
-                element_id = li.attrib["class"]
-                add_selection_attributes(li, "element", element_id)
-                # tells to keep this branch until this leaf
-                branch_info.add_selected_leaf(element_id)
-                return branch_info
-        except Exception:
-            return branch_info
+        # the selected leaves are not passed to the parent list
+        return BranchInfo(branch_info.keep_the_branch)
+
+    leaf_info = BranchInfo()
+    checkbox = li.find("./input[@type='checkbox']")
+    if checkbox is None or "value" not in checkbox.attrib:
+        return leaf_info
+    if checkbox.attrib["value"] == "false":
+        add_selection_attributes(li, "none")
+        return leaf_info
+    element_id = li.attrib.get("class")
+    if element_id is not None:
+        add_selection_attributes(li, "element", element_id)
+        # tells to keep this branch until this leaf
+        leaf_info.add_selected_leaf(element_id)
+    return leaf_info
 
 
 def add_selection_attributes(element, select_class, select_id=None):
@@ -156,6 +215,11 @@ def add_selection_attributes(element, select_class, select_id=None):
 
 # Rendering functions
 
+# fragments rendered without context, kept as strings by the current worker
+_static_fragments = dict()
+# compiled templates of the fragments rendered with a context
+_compiled_templates = dict()
+
 
 def render_yes_or_not():
     """Return a string that represents an html select with yes or not options
@@ -163,7 +227,7 @@ def render_yes_or_not():
     Returns:
 
     """
-    return _render_template(
+    return _render_static_template(
         join(
             "core_explore_example_app", "user", "query_builder", "yes_no.html"
         )
@@ -176,7 +240,7 @@ def render_and_or_not():
     Returns:
 
     """
-    return _render_template(
+    return _render_static_template(
         join(
             "core_explore_example_app",
             "user",
@@ -192,7 +256,7 @@ def render_numeric_select():
     Returns:
 
     """
-    return _render_template(
+    return _render_static_template(
         join(
             "core_explore_example_app",
             "user",
@@ -208,7 +272,7 @@ def render_value_input():
     Returns:
 
     """
-    return _render_template(
+    return _render_static_template(
         join("core_explore_example_app", "user", "query_builder", "input.html")
     )
 
@@ -219,7 +283,7 @@ def render_gregorian_strict_match():
     Returns:
 
     """
-    return _render_template(
+    return _render_static_template(
         join(
             "core_explore_example_app",
             "user",
@@ -230,18 +294,23 @@ def render_gregorian_strict_match():
 
 
 def render_string_select():
-    """Return an input to type a value
+    """Return a select of the string comparisons
 
     Returns:
 
     """
-    return _render_template(
+    context = {
+        "text_search": EXPLORE_EXAMPLE_TEXT_SEARCH,
+    }
+
+    return _render_static_template(
         join(
             "core_explore_example_app",
             "user",
             "query_builder",
             "string_select.html",
-        )
+        ),
+        context,
     )
 
 
@@ -251,7 +320,7 @@ def render_initial_form():
     Returns:
 
     """
-    return _render_template(
+    return _render_static_template(
         join(
             "core_explore_example_app",
             "user",
@@ -267,7 +336,7 @@ def render_remove_button():
     Returns:
 
     """
-    return _render_template(
+    return _render_static_template(
         join(
             "core_explore_example_app", "user", "query_builder", "remove.html"
         )
@@ -280,7 +349,7 @@ def render_add_button():
     Returns:
 
     """
-    return _render_template(
+    return _render_static_template(
         join("core_explore_example_app", "user", "query_builder", "add.html")
     )
 
@@ -404,7 +473,7 @@ def get_user_inputs(element_type, data_structure_element, default_prefix):
 
     Args:
         element_type:
-        data_structure_element:
+        data_structure_element: data structure element or its catalog record
         default_prefix:
 
     Returns:
@@ -427,7 +496,11 @@ def get_user_inputs(element_type, data_structure_element, default_prefix):
                 user_inputs = render_string_select() + render_value_input()
         else:
             # enumeration
-            enums = get_enumerations(data_structure_element)
+            enums = (
+                data_structure_element.get_enumerations()
+                if isinstance(data_structure_element, ElementRecord)
+                else get_enumerations(data_structure_element)
+            )
             user_inputs = render_enum(enums)
     except Exception:
         # default renders string form
@@ -436,16 +509,120 @@ def get_user_inputs(element_type, data_structure_element, default_prefix):
     return user_inputs
 
 
+def get_element_user_inputs(schema_info, element_id, request, catalog=None):
+    """Return the type and the user inputs of an element, built once per
+    generation of the template and path of the element. They only depend on
+    the schema of the template, and are shared by all its users, whose data
+    structures have their own copies of the elements.
+
+    Args:
+        schema_info: TemplateSchemaInfo
+        element_id:
+        request:
+        catalog: catalog of the user data structure, fetched if not set
+
+    Returns:
+        tuple: element type, html of the user inputs
+
+    """
+    template_id = schema_info.template_id
+    if catalog is None:
+        catalog = get_catalog_by_template_id(
+            template_id, schema_info.namespaces, request
+        )
+    # elements missing from the catalog of the user are checked for access
+    element_record = get_element_record(
+        element_id, schema_info.namespaces, request, catalog
+    )
+    generation = get_generation(TEMPLATE_NAMESPACE, template_id)
+    path_hash = hashlib.sha256(
+        f"{element_record.dot_notation}:{element_record.type}".encode("utf-8")
+    ).hexdigest()
+    cache_key = (
+        f"{USER_INPUTS_KEY_PREFIX}:{template_id}:{generation}:{path_hash}"
+    )
+    user_inputs = _user_inputs.get(cache_key)
+    if user_inputs is not None:
+        return user_inputs
+
+    # rendered templates may be reloaded in debug mode
+    cache = get_cache() if not settings.DEBUG else None
+    user_inputs = cache.get(cache_key) if cache is not None else None
+    if user_inputs is None:
+        user_inputs = (
+            element_record.type,
+            get_user_inputs(
+                element_record.type,
+                element_record,
+                schema_info.default_prefix,
+            ),
+        )
+        if cache is not None and EXPLORE_EXAMPLE_USER_INPUTS_CACHE_SIZE > 0:
+            cache.set(
+                cache_key,
+                user_inputs,
+                timeout=EXPLORE_EXAMPLE_USER_INPUTS_CACHE_TIMEOUT,
+            )
+    _user_inputs.set(cache_key, user_inputs)
+    return user_inputs
+
+
+def _get_template(template_path):
+    """Return the compiled template, loaded once by the current worker
+
+    Args:
+        template_path:
+
+    Returns:
+
+    """
+    template = _compiled_templates.get(template_path)
+    if template is None:
+        template = loader.get_template(template_path)
+        _compiled_templates[template_path] = template
+    return template
+
+
 def _render_template(template_path, context=None):
     """Return an HTML string rendered from the template
 
     Args:
         template_path:
+        context:
 
     Returns:
 
     """
     if context is None:
         context = {}
-    template = loader.get_template(template_path)
-    return template.render(context)
+    return _get_template(template_path).render(context)
+
+
+def _render_static_template(template_path, context=None):
+    """Return an HTML string rendered from the template, rendered once by the
+    current worker. The context must not change during the life of the worker.
+
+    Args:
+        template_path:
+        context:
+
+    Returns:
+
+    """
+    fragment = _static_fragments.get(template_path)
+    if fragment is None:
+        fragment = _render_template(template_path, context)
+        _static_fragments[template_path] = fragment
+    return fragment
+
+
+def clear_template_cache():
+    """Remove the templates, the fragments and the user inputs kept by the
+    current worker
+
+    Returns:
+
+    """
+    _static_fragments.clear()
+    _compiled_templates.clear()
+    _user_inputs.clear()
@@ -0,0 +1,192 @@
+"""Cache of the queries compiled from the query builder form values"""
+
+import hashlib
+import json
+
+from core_explore_example_app.components.saved_query import (
+    api as saved_query_api,
+)
+from core_explore_example_app.settings import (
+    EXPLORE_EXAMPLE_QUERY_CACHE_SIZE,
+    EXPLORE_EXAMPLE_QUERY_CACHE_TIMEOUT,
+    EXPLORE_EXAMPLE_SAVED_QUERY_CACHE_SIZE,
+    EXPLORE_EXAMPLE_SCHEMA_AWARE_CRITERIA,
+)
+from core_explore_example_app.utils.cache import (
+    LRUCache,
+    get_cache,
+    get_generations,
+)
+
+COMPILED_QUERY_KEY_PREFIX = "core_explore_example_app:compiled_query"
+TEMPLATE_NAMESPACE = "template"
+SAVED_QUERY_NAMESPACE = "saved_query"
+
+# keys of a form field that have an impact on the compiled query
+QUERY_FIELD_KEYS = ("id", "type", "operator", "comparison", "value")
+
+# compiled queries kept in memory by the current worker
+_compiled_queries = LRUCache(EXPLORE_EXAMPLE_QUERY_CACHE_SIZE)
+# parsed saved queries kept in memory by the current worker, shared by all
+# the requests: they must not be modified
+_parsed_saved_queries = LRUCache(EXPLORE_EXAMPLE_SAVED_QUERY_CACHE_SIZE)
+
+
+def get_form_values_fingerprint(form_values, use_wildcard=False):
+    """Return a canonical fingerprint of the form values
+
+    Args:
+        form_values:
+        use_wildcard:
+
+    Returns:
+
+    """
+    canonical_form_values = [
+        {key: field.get(key) for key in QUERY_FIELD_KEYS}
+        for field in form_values
+    ]
+    canonical_string = json.dumps(
+        [canonical_form_values, use_wildcard],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical_string.encode("utf-8")).hexdigest()
+
+
+def _get_user_key(request):
+    """Return the part of the cache key identifying the user of the request
+
+    Args:
+        request:
+
+    Returns:
+
+    """
+    if request is None or request.user is None:
+        return "system"
+    return f"user_{request.user.id}"
+
+
+def get_cache_key(template_id, form_values, use_wildcard=False, request=None):
+    """Return the cache key of the query compiled from the form values.
+
+    The key contains the generation of the template and of the saved queries
+    referenced by the form, so that their modification invalidates the entry,
+    and the settings changing how queries are compiled. The key also contains
+    the user: the form references the elements of the user data structure,
+    whose access is checked when the query is compiled.
+
+    Args:
+        template_id:
+        form_values:
+        use_wildcard:
+        request:
+
+    Returns:
+
+    """
+    saved_query_ids = {
+        str(field["id"])
+        for field in form_values
+        if field.get("type") == "query"
+    }
+    generations = {
+        TEMPLATE_NAMESPACE: get_generations(TEMPLATE_NAMESPACE, [template_id]),
+        SAVED_QUERY_NAMESPACE: (
+            get_generations(SAVED_QUERY_NAMESPACE, saved_query_ids)
+            if saved_query_ids
+            else {}
+        ),
+    }
+    generations_fingerprint = hashlib.sha256(
+        json.dumps(generations, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    return ":".join(
+        [
+            COMPILED_QUERY_KEY_PREFIX,
+            str(template_id),
+            _get_user_key(request),
+            generations_fingerprint,
+            "schema_aware" if EXPLORE_EXAMPLE_SCHEMA_AWARE_CRITERIA else "all",
+            get_form_values_fingerprint(form_values, use_wildcard),
+        ]
+    )
+
+
+def get_compiled_query(cache_key):
+    """Return the compiled query stored for the key, None if not found
+
+    Args:
+        cache_key:
+
+    Returns:
+
+    """
+    if EXPLORE_EXAMPLE_QUERY_CACHE_SIZE <= 0:
+        return None
+    query_string = _compiled_queries.get(cache_key)
+    if query_string is None:
+        query_string = get_cache().get(cache_key)
+        if query_string is None:
+            return None
+        _compiled_queries.set(cache_key, query_string)
+    # a new dict is returned every time, callers can modify it safely
+    return json.loads(query_string)
+
+
+def set_compiled_query(cache_key, query):
+    """Store the compiled query for the key
+
+    Args:
+        cache_key:
+        query:
+
+    Returns:
+
+    """
+    if EXPLORE_EXAMPLE_QUERY_CACHE_SIZE <= 0:
+        return
+    query_string = json.dumps(query)
+    _compiled_queries.set(cache_key, query_string)
+    get_cache().set(
+        cache_key, query_string, timeout=EXPLORE_EXAMPLE_QUERY_CACHE_TIMEOUT
+    )
+
+
+def get_parsed_saved_queries(saved_query_ids):
+    """Return the parsed queries of saved queries, fetched in a single
+    database query. Parsed queries are kept in memory by id and generation,
+    and must not be modified.
+
+    Args:
+        saved_query_ids:
+
+    Returns:
+        dict: parsed query by saved query id, missing saved queries are not
+            included
+
+    """
+    generations = get_generations(SAVED_QUERY_NAMESPACE, saved_query_ids)
+    parsed_queries = dict()
+    for saved_query in saved_query_api.get_by_id_list(list(generations)):
+        saved_query_id = str(saved_query.id)
+        key = (saved_query_id, generations.get(saved_query_id))
+        parsed_query = _parsed_saved_queries.get(key)
+        if parsed_query is None:
+            parsed_query = json.loads(saved_query.query)
+            _parsed_saved_queries.set(key, parsed_query)
+        parsed_queries[saved_query_id] = parsed_query
+
+    return parsed_queries
+
+
+def clear_local_cache():
+    """Remove all the queries kept in memory by the current worker
+
+    Returns:
+
+    """
+    _compiled_queries.clear()
+    _parsed_saved_queries.clear()
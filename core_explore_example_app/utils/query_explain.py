@@ -0,0 +1,216 @@
+"""Explain the queries built by the explore example app.
+
+Reports the shape of a compiled query, the paths it touches and whether they
+are indexed, and the winning plan of the query on the data collection when
+the data is stored in MongoDB.
+"""
+
+import json
+
+from core_main_app.settings import MONGODB_INDEXING
+from core_main_app.utils.query.mongo.prepare import prepare_query
+
+from core_explore_example_app.utils.index_advisor import (
+    ELEM_MATCH_OPERATOR,
+    LOGICAL_OPERATORS,
+    SUB_DOCUMENT_ROOT,
+    TEMPLATE_FIELD,
+    collect_query_paths,
+)
+from core_explore_example_app.utils.query_ast import (
+    NOT_OPERATOR,
+    REGEX_OPERATOR,
+    TEXT_OPERATOR,
+    is_regex,
+)
+
+
+def get_data_collection():
+    """Returns the data collection if the data is stored in MongoDB, None
+    otherwise
+
+    Returns:
+
+    """
+    if not MONGODB_INDEXING:
+        return None
+    from core_main_app.components.mongo.models import MongoData
+
+    return MongoData._get_collection()
+
+
+def get_query_depth(query):
+    """Returns the nesting depth of the logical operators and $elemMatch of
+    a query
+
+    Args:
+        query:
+
+    Returns:
+
+    """
+    depth = 0
+    for key, value in query.items():
+        if key in LOGICAL_OPERATORS:
+            depth = max(
+                depth,
+                1 + max((get_query_depth(item) for item in value), default=0),
+            )
+        elif isinstance(value, dict) and isinstance(
+            value.get(ELEM_MATCH_OPERATOR), dict
+        ):
+            depth = max(depth, 1 + get_query_depth(value[ELEM_MATCH_OPERATOR]))
+    return depth
+
+
+def iter_predicates(query, prefix=""):
+    """Yields the predicates of a query
+
+    Args:
+        query:
+        prefix:
+
+    Returns:
+        generator: (path, operator, operand), path is None for a text search
+
+    """
+    for key, value in query.items():
+        if key in LOGICAL_OPERATORS:
+            for criteria in value:
+                yield from iter_predicates(criteria, prefix)
+        elif key == TEXT_OPERATOR:
+            yield None, TEXT_OPERATOR, value
+        elif not isinstance(value, dict):
+            yield (
+                f"{prefix}{key}",
+                REGEX_OPERATOR if is_regex(value) else "$eq",
+                value,
+            )
+        else:
+            for operator, operand in value.items():
+                if operator == ELEM_MATCH_OPERATOR:
+                    yield from iter_predicates(operand, f"{prefix}{key}.")
+                else:
+                    yield f"{prefix}{key}", operator, operand
+
+
+def get_regex_predicates(predicates):
+    """Returns the regular expressions of the predicates. Only the anchored
+    and case sensitive ones can use an index.
+
+    Args:
+        predicates:
+
+    Returns:
+
+    """
+    regex_predicates = []
+    for path, operator, operand in predicates:
+        is_negated = operator == NOT_OPERATOR
+        if operator not in (REGEX_OPERATOR, NOT_OPERATOR) or not is_regex(
+            operand
+        ):
+            continue
+        pattern = operand[1:-1]
+        regex_predicates.append(
+            {
+                "path": path,
+                "pattern": pattern,
+                "negated": is_negated,
+                "anchored": pattern.startswith("^"),
+            }
+        )
+    return regex_predicates
+
+
+def get_indexed_fields(collection):
+    """Returns the fields of the indexes of a collection
+
+    Args:
+        collection: pymongo collection
+
+    Returns:
+
+    """
+    return {
+        field
+        for index_info in collection.index_information().values()
+        for field, _ in index_info["key"]
+    }
+
+
+def get_winning_plan(collection, query, template_id):
+    """Returns the winning plan of the query on the data of a template
+
+    Args:
+        collection: pymongo collection
+        query:
+        template_id:
+
+    Returns:
+
+    """
+    query_filter = prepare_query(
+        query, regex=True, sub_document_root=SUB_DOCUMENT_ROOT
+    )
+    query_filter[TEMPLATE_FIELD] = int(template_id)
+    # only the query planner runs: the query is not executed
+    explanation = collection.database.command(
+        "explain",
+        {"find": collection.name, "filter": query_filter},
+        verbosity="queryPlanner",
+    )
+    # the plan may contain BSON values
+    return json.loads(
+        json.dumps(
+            explanation.get("queryPlanner", {}).get("winningPlan"),
+            default=str,
+        )
+    )
+
+
+def explain_query(query, template_id, collection=None):
+    """Returns the explanation of a compiled query
+
+    Args:
+        query:
+        template_id:
+        collection: data collection, the indexes and winning plan are not
+            reported if not set
+
+    Returns:
+        dict
+
+    """
+    predicates = list(iter_predicates(query))
+    paths, elem_match_paths = collect_query_paths(query)
+    for sub_paths in elem_match_paths.values():
+        for path, operators in sub_paths.items():
+            paths.setdefault(path, set()).update(operators)
+    indexed_fields = (
+        get_indexed_fields(collection) if collection is not None else None
+    )
+
+    return {
+        "query": query,
+        "depth": get_query_depth(query),
+        "predicate_count": len(predicates),
+        "regex_predicates": get_regex_predicates(predicates),
+        "paths": [
+            {
+                "path": path,
+                "operators": sorted(paths[path]),
+                "indexed": (
+                    f"{SUB_DOCUMENT_ROOT}.{path}" in indexed_fields
+                    if indexed_fields is not None
+                    else None
+                ),
+            }
+            for path in sorted(paths)
+        ],
+        "winning_plan": (
+            get_winning_plan(collection, query, template_id)
+            if collection is not None
+            else None
+        ),
+    }
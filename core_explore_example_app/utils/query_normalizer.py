@@ -0,0 +1,231 @@
+"""Normalization of the queries built from the query builder.
+
+The queries built field by field are left-deep chains of $and/$or. The
+normalizer flattens them, removes the empty seed and the duplicate
+predicates, and keeps only the tightest bounds of the range predicates on
+the same path.
+
+Criteria keep a single operator per path: the conversion of the queries to
+the ORM only reads one operator from each operator document.
+"""
+
+import json
+
+AND_OPERATOR = "$and"
+OR_OPERATOR = "$or"
+NOR_OPERATOR = "$nor"
+ELEM_MATCH_OPERATOR = "$elemMatch"
+
+LOWER_BOUND_OPERATORS = ("$gt", "$gte")
+UPPER_BOUND_OPERATORS = ("$lt", "$lte")
+
+
+def normalize_query(query):
+    """Returns an equivalent query with flat $and/$or operators, without
+    empty or duplicate predicates, and with merged range predicates.
+
+    Args:
+        query:
+
+    Returns:
+
+    """
+    if not isinstance(query, dict):
+        return query
+
+    normalized_query = dict()
+    conjuncts = []
+    for key, value in query.items():
+        if key == AND_OPERATOR:
+            for criteria in value:
+                _add_conjunct(conjuncts, normalize_query(criteria))
+        elif key == OR_OPERATOR:
+            disjuncts = _get_disjuncts(value)
+            if disjuncts is None:
+                # one of the criteria matches all documents
+                continue
+            if len(disjuncts) == 1:
+                _add_conjunct(conjuncts, disjuncts[0])
+            else:
+                normalized_query[OR_OPERATOR] = disjuncts
+        elif key == NOR_OPERATOR:
+            normalized_query[key] = [
+                normalize_query(criteria) for criteria in value
+            ]
+        else:
+            normalized_query[key] = _normalize_value(value)
+
+    conjuncts = _merge_range_criteria(_remove_duplicates(conjuncts))
+    if len(conjuncts) == 1 and not set(conjuncts[0]) & set(normalized_query):
+        normalized_query.update(conjuncts[0])
+    elif conjuncts:
+        normalized_query[AND_OPERATOR] = conjuncts
+
+    return normalized_query
+
+
+def _normalize_value(value):
+    """Normalizes the queries nested in the value of a field
+
+    Args:
+        value:
+
+    Returns:
+
+    """
+    if not isinstance(value, dict):
+        return value
+
+    return {
+        operator: (
+            normalize_query(operand)
+            if operator == ELEM_MATCH_OPERATOR
+            else operand
+        )
+        for operator, operand in value.items()
+    }
+
+
+def _add_conjunct(conjuncts, criteria):
+    """Adds a normalized criteria to a list of criteria joined by $and
+
+    Args:
+        conjuncts:
+        criteria:
+
+    Returns:
+
+    """
+    if criteria == {}:
+        # empty criteria matches all documents
+        return
+    if list(criteria.keys()) == [AND_OPERATOR]:
+        conjuncts.extend(criteria[AND_OPERATOR])
+    else:
+        conjuncts.append(criteria)
+
+
+def _get_disjuncts(criteria_list):
+    """Returns the normalized criteria joined by $or, None if one of them
+    matches all documents
+
+    Args:
+        criteria_list:
+
+    Returns:
+
+    """
+    disjuncts = []
+    for criteria in criteria_list:
+        criteria = normalize_query(criteria)
+        if criteria == {}:
+            return None
+        if list(criteria.keys()) == [OR_OPERATOR]:
+            disjuncts.extend(criteria[OR_OPERATOR])
+        else:
+            disjuncts.append(criteria)
+
+    return _remove_duplicates(disjuncts)
+
+
+def _remove_duplicates(criteria_list):
+    """Removes duplicate criteria, keeping the first occurrence
+
+    Args:
+        criteria_list:
+
+    Returns:
+
+    """
+    unique_criteria = []
+    seen = set()
+    for criteria in criteria_list:
+        key = json.dumps(criteria, sort_keys=True, default=str)
+        if key not in seen:
+            seen.add(key)
+            unique_criteria.append(criteria)
+
+    return unique_criteria
+
+
+def _get_range_criteria(criteria):
+    """Returns the path, operator and bound of a criteria with a single
+    numeric range operator, None otherwise
+
+    Args:
+        criteria:
+
+    Returns:
+
+    """
+    if len(criteria) != 1:
+        return None
+
+    path, value = next(iter(criteria.items()))
+    if path.startswith("$") or not isinstance(value, dict) or len(value) != 1:
+        return None
+
+    operator, bound = next(iter(value.items()))
+    if operator not in LOWER_BOUND_OPERATORS + UPPER_BOUND_OPERATORS:
+        return None
+    if not isinstance(bound, (int, float)) or isinstance(bound, bool):
+        return None
+
+    return path, operator, bound
+
+
+def _is_tighter_bound(operator, bound, other_operator, other_bound):
+    """Returns true if a bound is tighter than a bound of the same kind
+
+    Args:
+        operator:
+        bound:
+        other_operator:
+        other_bound:
+
+    Returns:
+
+    """
+    if bound == other_bound:
+        # strict comparison is tighter
+        return operator in ("$gt", "$lt") and other_operator not in (
+            "$gt",
+            "$lt",
+        )
+    if operator in LOWER_BOUND_OPERATORS:
+        return bound > other_bound
+    return bound < other_bound
+
+
+def _merge_range_criteria(conjuncts):
+    """Keeps only the tightest lower and upper bounds of the range criteria
+    joined by $and on the same path
+
+    Args:
+        conjuncts:
+
+    Returns:
+
+    """
+    merged_conjuncts = []
+    # position in merged_conjuncts, operator and bound by (path, bound kind)
+    bounds = dict()
+    for criteria in conjuncts:
+        range_criteria = _get_range_criteria(criteria)
+        if range_criteria is None:
+            merged_conjuncts.append(criteria)
+            continue
+
+        path, operator, bound = range_criteria
+        bound_key = (path, operator in LOWER_BOUND_OPERATORS)
+        if bound_key not in bounds:
+            bounds[bound_key] = (len(merged_conjuncts), operator, bound)
+            merged_conjuncts.append(criteria)
+            continue
+
+        position, other_operator, other_bound = bounds[bound_key]
+        if _is_tighter_bound(operator, bound, other_operator, other_bound):
+            bounds[bound_key] = (position, operator, bound)
+            merged_conjuncts[position] = criteria
+
+    return merged_conjuncts
@@ -0,0 +1,343 @@
+"""Single pass compilation of the query builder form.
+
+The form is walked once to validate the fields, and build the Mongo query and
+the displayed query, sharing the template information and the element
+records.
+"""
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+
+from core_explore_example_app.commons.exceptions import MongoQueryException
+from core_explore_example_app.settings import (
+    EXPLORE_EXAMPLE_BATCH_COMPILE_THREAD_THRESHOLD,
+    EXPLORE_EXAMPLE_BATCH_COMPILE_WORKERS,
+)
+from core_explore_example_app.utils import query_cache
+from core_explore_example_app.utils.displayed_query import (
+    add_pretty_criteria,
+    build_field_pretty_criteria,
+    build_sub_element_pretty_criteria,
+)
+from core_explore_example_app.utils.mongo_query import (
+    QueryContext,
+    add_criteria_node,
+    build_field_criteria_node,
+    build_sub_element_criteria,
+    check_form_field,
+    check_text_search,
+)
+from core_explore_example_app.utils.query_ast import AndNode
+from core_explore_example_app.utils.query_normalizer import normalize_query
+from core_explore_example_app.utils.schema_catalog import (
+    get_catalog_by_template_id,
+    get_element_record,
+)
+from core_explore_example_app.utils.template_schema import (
+    get_schema_info_by_template_id,
+)
+
+
+class CompiledForm:
+    """Result of the compilation of a query builder form. The query and the
+    displayed query are not set if there are errors."""
+
+    __slots__ = ("template_id", "errors", "query", "displayed_query")
+
+    def __init__(self, template_id):
+        """Initialize an empty result
+
+        Args:
+            template_id:
+        """
+        self.template_id = template_id
+        self.errors = []
+        self.query = None
+        self.displayed_query = None
+
+
+def compile_form(
+    form_values,
+    template_id,
+    use_wildcard=False,
+    request=None,
+    fields_to_query_func=None,
+    schema_info=None,
+    catalog=None,
+):
+    """Validates the form and builds the query and the displayed query
+
+    Args:
+        form_values:
+        template_id:
+        use_wildcard:
+        request:
+        fields_to_query_func: function building the query from the form
+            values, the form is compiled in the same pass if not set
+        schema_info: schema information of the template, fetched if not set
+        catalog: catalog of the user data structure, fetched if not set
+
+    Returns:
+        CompiledForm
+
+    """
+    if schema_info is None:
+        schema_info = get_schema_info_by_template_id(
+            template_id, request=request
+        )
+    compiled_form = CompiledForm(schema_info.template_id)
+    errors = compiled_form.errors
+
+    if len(form_values) == 0:
+        errors.append("The query is empty.")
+
+    query = None
+    context = None
+    if fields_to_query_func is None:
+        cache_key = query_cache.get_cache_key(
+            template_id, form_values, use_wildcard, request
+        )
+        query = query_cache.get_compiled_query(cache_key)
+        if query is None:
+            context = QueryContext(
+                schema_info, form_values, use_wildcard, request, catalog
+            )
+
+    query_node = AndNode()
+    displayed_query = ""
+    for index, field in enumerate(form_values):
+        bool_comp = field["operator"]
+        errors.extend(check_form_field(field, schema_info.default_prefix))
+        displayed_query = add_pretty_criteria(
+            displayed_query,
+            build_field_pretty_criteria(field),
+            bool_comp,
+            index,
+        )
+        if context is None or errors:
+            continue
+        try:
+            query_node = add_criteria_node(
+                query_node,
+                build_field_criteria_node(field, context),
+                bool_comp,
+                index,
+            )
+        except MongoQueryException as exception:
+            errors.append(str(exception))
+
+    errors.extend(check_text_search(form_values))
+    if errors:
+        return compiled_form
+
+    if fields_to_query_func is not None:
+        try:
+            query = fields_to_query_func(
+                form_values, template_id, request=request
+            )
+        except MongoQueryException as exception:
+            errors.append(str(exception))
+            return compiled_form
+    elif query is None:
+        query = query_node.to_mongo()
+        query_cache.set_compiled_query(cache_key, query)
+
+    compiled_form.query = query
+    compiled_form.displayed_query = displayed_query
+    return compiled_form
+
+
+def compile_sub_elements_form(form_values, template_id, request=None):
+    """Validates the selected fields of the sub-elements form and builds the
+    query and the displayed query
+
+    Args:
+        form_values:
+        template_id:
+        request:
+
+    Returns:
+        CompiledForm
+
+    """
+    schema_info = get_schema_info_by_template_id(template_id, request=request)
+    namespaces = schema_info.namespaces
+    default_prefix = schema_info.default_prefix
+    compiled_form = CompiledForm(schema_info.template_id)
+    errors = compiled_form.errors
+
+    form_values = [field for field in form_values if field["selected"] is True]
+    if len(form_values) == 0:
+        errors.append("The query is empty.")
+        return compiled_form
+
+    # get the elements of the user data structure
+    catalog = get_catalog_by_template_id(
+        schema_info.template_id, namespaces, request
+    )
+
+    elem_match = []
+    list_criteria = []
+    element_records = []
+    for field in form_values:
+        errors.extend(check_form_field(field, default_prefix))
+        element_record = get_element_record(
+            field["id"], namespaces, request, catalog
+        )
+        element_records.append(element_record)
+        list_criteria.append(
+            build_sub_element_pretty_criteria(field, element_record)
+        )
+        if not errors:
+            elem_match.append(
+                build_sub_element_criteria(
+                    field, element_record, default_prefix
+                )
+            )
+
+    errors.extend(check_text_search(form_values))
+    if errors:
+        return compiled_form
+
+    # get the parent using the first element of the list
+    first_record = element_records[0]
+    compiled_form.query = {
+        first_record.parent_path: {"$elemMatch": {"$and": elem_match}}
+    }
+    compiled_form.displayed_query = "{0}({1})".format(
+        first_record.parent_name, ", ".join(list_criteria)
+    )
+    return compiled_form
+
+
+def _resolve_templates(items, request):
+    """Resolves the schema information and the catalog of each template of
+    the batch once
+
+    Args:
+        items:
+        request:
+
+    Returns:
+        dict: (schema information, catalog), or the exception raised, by
+            template id
+
+    """
+    templates = dict()
+    for item in items:
+        template_id = str(item["template_id"])
+        if template_id in templates:
+            continue
+        try:
+            schema_info = get_schema_info_by_template_id(
+                template_id, request=request
+            )
+            catalog = get_catalog_by_template_id(
+                schema_info.template_id, schema_info.namespaces, request
+            )
+            templates[template_id] = (schema_info, catalog)
+        except Exception as exception:
+            templates[template_id] = exception
+    return templates
+
+
+def _compile_item(item, templates, request):
+    """Compiles an item of the batch
+
+    Args:
+        item:
+        templates: (schema information, catalog) by template id
+        request:
+
+    Returns:
+        dict
+
+    """
+    template_id = str(item["template_id"])
+    result = {
+        "template_id": template_id,
+        "query": None,
+        "displayed_query": None,
+        "errors": [],
+    }
+    template = templates[template_id]
+    if isinstance(template, Exception):
+        result["errors"].append(str(template))
+        return result
+
+    schema_info, catalog = template
+    try:
+        compiled_form = compile_form(
+            item["form_values"],
+            template_id,
+            item.get("use_wildcard", False),
+            request,
+            schema_info=schema_info,
+            catalog=catalog,
+        )
+    except Exception as exception:
+        result["errors"].append(str(exception))
+        return result
+
+    result["errors"] = compiled_form.errors
+    if not compiled_form.errors:
+        result["query"] = normalize_query(compiled_form.query)
+        result["displayed_query"] = compiled_form.displayed_query
+    return result
+
+
+def _compile_chunk(items, templates, request):
+    """Compiles items of the batch in a worker thread
+
+    Args:
+        items:
+        templates:
+        request:
+
+    Returns:
+
+    """
+    try:
+        return [_compile_item(item, templates, request) for item in items]
+    finally:
+        # database connections are opened per thread
+        connections.close_all()
+
+
+def compile_forms(items, request=None):
+    """Compiles a batch of forms. The items sharing a template share its
+    schema information and catalog. Large batches are compiled by a pool of
+    worker threads.
+
+    Args:
+        items: list of dict with template_id, form_values and use_wildcard
+        request:
+
+    Returns:
+        list: dict with the template_id, query, displayed_query and errors of
+            each item, in the order of the items
+
+    """
+    templates = _resolve_templates(items, request)
+
+    workers = EXPLORE_EXAMPLE_BATCH_COMPILE_WORKERS
+    if (
+        workers <= 1
+        or len(items) < EXPLORE_EXAMPLE_BATCH_COMPILE_THREAD_THRESHOLD
+    ):
+        return [_compile_item(item, templates, request) for item in items]
+
+    chunk_size = math.ceil(len(items) / workers)
+    chunks = []
+    for start in range(0, len(items), chunk_size):
+        end = start + chunk_size
+        chunks.append(items[start:end])
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for chunk_results in executor.map(
+            lambda chunk: _compile_chunk(chunk, templates, request), chunks
+        ):
+            results.extend(chunk_results)
+    return results
@@ -0,0 +1,488 @@
+"""Catalog of the elements of an explore data structure, used to build
+queries without fetching the data structure elements one by one"""
+
+from collections import defaultdict
+
+from core_explore_example_app.components.explore_data_structure import (
+    api as explore_data_structure_api,
+)
+from core_explore_example_app.settings import (
+    EXPLORE_EXAMPLE_CATALOG_CACHE_SIZE,
+    EXPLORE_EXAMPLE_CATALOG_CACHE_TIMEOUT,
+)
+from core_explore_example_app.utils.cache import (
+    LRUCache,
+    get_cache,
+    get_data_structure_revision,
+)
+from core_explore_example_app.utils.element_tree import (
+    ELEMENT_COLUMNS,
+    get_tree_data_structure_id,
+    has_copied_elements,
+    merge_copied_elements,
+)
+from core_explore_example_app.utils.xml import (
+    find_enumerations,
+    get_enumerations,
+)
+from core_main_app.commons.exceptions import DoesNotExist, XMLError
+from core_main_app.utils.xml import xpath_to_dot_notation
+from core_parser_app.components.data_structure.models import (
+    DataStructureElement,
+)
+from core_parser_app.components.data_structure_element import (
+    api as data_structure_element_api,
+)
+
+CATALOG_KEY_PREFIX = "core_explore_example_app:schema_catalog"
+CONCRETE_PATHS_KEY_PREFIX = "core_explore_example_app:concrete_paths"
+
+# value found at element:value
+ELEMENT_VALUE = "element"
+# value found at element.#text:value, when the element has attributes or
+# namespace information
+TEXT_VALUE = "#text"
+ALL_VALUE_LOCATIONS = (ELEMENT_VALUE, TEXT_VALUE)
+
+# catalogs kept in memory by the current worker
+_catalogs = LRUCache(EXPLORE_EXAMPLE_CATALOG_CACHE_SIZE)
+# concrete path tables kept in memory by the current worker
+_concrete_path_tables = LRUCache(EXPLORE_EXAMPLE_CATALOG_CACHE_SIZE)
+
+
+class Catalog(dict):
+    """ElementRecord by element id, built from a revision of a data
+    structure"""
+
+    def __init__(self, records, data_structure_id=None, revision=None):
+        """Initialize the catalog
+
+        Args:
+            records: ElementRecord by element id
+            data_structure_id: id of the data structure, None if unknown
+            revision: revision of the data structure
+        """
+        super().__init__(records)
+        self.data_structure_id = data_structure_id
+        self.revision = revision
+
+
+class ElementRecord:
+    """Information about a data structure element needed to build queries"""
+
+    __slots__ = (
+        "element_id",
+        "name",
+        "label",
+        "type",
+        "dot_notation",
+        "parent_path",
+        "parent_name",
+        "enumerations",
+        "value_locations",
+    )
+
+    def __init__(
+        self,
+        element_id,
+        options,
+        namespaces,
+        enumerations=None,
+        value_locations=ALL_VALUE_LOCATIONS,
+    ):
+        """Initialize the record from the options of the element
+
+        Args:
+            element_id:
+            options:
+            namespaces:
+            enumerations: enumerations of the simple type, None if not found
+            value_locations: where the value of the element can be found
+        """
+        self.element_id = str(element_id)
+        self.name = options.get("name")
+        self.label = options.get("label")
+        self.type = options.get("type")
+        self.dot_notation = xpath_to_dot_notation(
+            options["xpath"]["xml"], namespaces
+        )
+        path = self.dot_notation.split(".")
+        self.parent_path = ".".join(path[:-1])
+        self.parent_name = path[-2] if len(path) > 1 else None
+        self.enumerations = (
+            tuple(enumerations) if enumerations is not None else None
+        )
+        self.value_locations = tuple(value_locations)
+
+    def get_enumerations(self):
+        """Return the enumerations of the element
+
+        Returns:
+
+        """
+        if self.enumerations is None:
+            raise XMLError(
+                "Unable to find a simple type for the data structure element."
+            )
+        return list(self.enumerations)
+
+
+def _find_parent_element(element_id, elements, parents):
+    """Find the closest ancestor of an element that is an XML element
+
+    Args:
+        element_id:
+        elements: (tag, value, options) by element id
+        parents: parent id by element id
+
+    Returns:
+
+    """
+    parent_id = parents.get(element_id)
+    while parent_id is not None and elements[parent_id][0] != "element":
+        parent_id = parents.get(parent_id)
+    return parent_id
+
+
+def _has_required_attribute(element_id, elements, children):
+    """Check if a type declares a required attribute, without looking into
+    the sub-elements
+
+    Args:
+        element_id:
+        elements: (tag, value, options) by element id
+        children: sorted children ids by parent id
+
+    Returns:
+
+    """
+    for child_id in children[element_id]:
+        tag, _, options = elements[child_id]
+        if tag == "element":
+            continue
+        if tag == "attribute":
+            if (options or {}).get("min", 0) >= 1:
+                return True
+        elif _has_required_attribute(child_id, elements, children):
+            return True
+    return False
+
+
+def _find_value_locations(element_id, elements, children, parents):
+    """Find where the value of an element can be found in the data, using
+    the schema information stored in the in-memory tree.
+
+    The value is found at element.#text when the element has attributes or
+    namespace declarations, at element otherwise.
+
+    Args:
+        element_id:
+        elements: (tag, value, options) by element id
+        children: sorted children ids by parent id
+        parents: parent id by element id
+
+    Returns:
+
+    """
+    tag, _, options = elements[element_id]
+    if tag == "attribute":
+        return (ELEMENT_VALUE,)
+    if tag != "element":
+        return ALL_VALUE_LOCATIONS
+
+    parent_element_id = _find_parent_element(element_id, elements, parents)
+    if parent_element_id is None:
+        # namespace declarations are set on the root element
+        return ALL_VALUE_LOCATIONS
+    parent_options = elements[parent_element_id][2] or {}
+    if (options or {}).get("xmlns") != parent_options.get("xmlns"):
+        # element may declare its own namespace
+        return ALL_VALUE_LOCATIONS
+
+    try:
+        elem_iter_id = children[element_id][0]
+        type_id = children[elem_iter_id][0]
+    except IndexError:
+        return ALL_VALUE_LOCATIONS
+
+    type_tag = elements[type_id][0]
+    if type_tag in ("input", "simple_type"):
+        # simple types can't have attributes
+        return (ELEMENT_VALUE,)
+    if type_tag == "complex_type" and any(
+        elements[child_id][0] == "simple_content"
+        for child_id in children[type_id]
+    ):
+        if _has_required_attribute(type_id, elements, children):
+            return (TEXT_VALUE,)
+    return ALL_VALUE_LOCATIONS
+
+
+def build_catalog_from_rows(rows, namespaces):
+    """Build the catalog of the elements of a tree
+
+    Args:
+        rows: (id, tag, value, options, parent_id) of the elements, the
+            children of an element being listed in their order
+        namespaces:
+
+    Returns:
+        dict: ElementRecord by element id
+
+    """
+    elements = {}
+    children = defaultdict(list)
+    parents = {}
+    options_by_id = {}
+    for element_id, tag, value, options, parent_id in rows:
+        elements[element_id] = (tag, value, options)
+        children[parent_id].append(element_id)
+        parents[element_id] = parent_id
+        if options and isinstance(options.get("xpath"), dict):
+            if not options["xpath"].get("xml"):
+                continue
+            options_by_id[element_id] = options
+
+    return {
+        str(element_id): ElementRecord(
+            element_id,
+            options,
+            namespaces,
+            find_enumerations(element_id, elements, children),
+            _find_value_locations(element_id, elements, children, parents),
+        )
+        for element_id, options in options_by_id.items()
+    }
+
+
+def _get_element_rows(data_structure_id):
+    """Return the rows of the elements of a data structure, ordered by id
+
+    Args:
+        data_structure_id:
+
+    Returns:
+        list: (id, tag, value, options, parent_id) of the elements
+
+    """
+    return list(
+        DataStructureElement.objects.filter(data_structure=data_structure_id)
+        .order_by("pk")
+        .values_list(*ELEMENT_COLUMNS)
+    )
+
+
+def build_catalog(data_structure_id, namespaces):
+    """Build the catalog of a data structure, in a single query
+
+    Args:
+        data_structure_id:
+        namespaces:
+
+    Returns:
+        dict: ElementRecord by element id
+
+    """
+    return build_catalog_from_rows(
+        _get_element_rows(data_structure_id), namespaces
+    )
+
+
+def build_merged_catalog(explore_data_structure, namespaces):
+    """Build the catalog of the tree of an explore data structure, where the
+    elements copied by the user replace the shared ones. The ids of the
+    copied elements give the records of their copies.
+
+    Args:
+        explore_data_structure:
+        namespaces:
+
+    Returns:
+        dict: ElementRecord by element id
+
+    """
+    copied_elements = explore_data_structure.copied_elements
+    catalog = build_catalog_from_rows(
+        merge_copied_elements(
+            _get_element_rows(explore_data_structure.base_data_structure_id),
+            _get_element_rows(explore_data_structure.id),
+            copied_elements,
+        ),
+        namespaces,
+    )
+    for source_id, copy_id in copied_elements.items():
+        if copy_id in catalog:
+            catalog[source_id] = catalog[copy_id]
+    return catalog
+
+
+def _get_cache_key(data_structure_id, revision):
+    """Return the cache key of the catalog of a data structure
+
+    Args:
+        data_structure_id:
+        revision:
+
+    Returns:
+
+    """
+    return f"{CATALOG_KEY_PREFIX}:{data_structure_id}:{revision}"
+
+
+def get_catalog(data_structure_id, namespaces, explore_data_structure=None):
+    """Return the catalog of a data structure, built once per revision of
+    the data structure
+
+    Args:
+        data_structure_id:
+        namespaces:
+        explore_data_structure: explore data structure with copied elements,
+            its tree is merged with the tree of its base data structure
+
+    Returns:
+        Catalog
+
+    """
+    revision = get_data_structure_revision(data_structure_id)
+    cache_key = _get_cache_key(data_structure_id, revision)
+    catalog = _catalogs.get(cache_key)
+    if catalog is not None:
+        return catalog
+
+    cache = get_cache()
+    catalog = cache.get(cache_key)
+    if catalog is None:
+        if explore_data_structure is not None:
+            records = build_merged_catalog(explore_data_structure, namespaces)
+        else:
+            records = build_catalog(data_structure_id, namespaces)
+        catalog = Catalog(records, data_structure_id, revision)
+        cache.set(
+            cache_key, catalog, timeout=EXPLORE_EXAMPLE_CATALOG_CACHE_TIMEOUT
+        )
+    _catalogs.set(cache_key, catalog)
+    return catalog
+
+
+def get_catalog_by_template_id(template_id, namespaces, request):
+    """Return the catalog of the explore data structure of the user for the
+    template, an empty catalog if the user has no data structure
+
+    Args:
+        template_id:
+        namespaces:
+        request:
+
+    Returns:
+        Catalog
+
+    """
+    try:
+        explore_data_structure = (
+            explore_data_structure_api.get_by_user_id_and_template_id(
+                str(request.user.id), template_id
+            )
+        )
+    except DoesNotExist:
+        return {}
+    if has_copied_elements(explore_data_structure):
+        return get_catalog(
+            explore_data_structure.id, namespaces, explore_data_structure
+        )
+    # the users who did not modify the tree share the catalog of the base
+    return get_catalog(
+        get_tree_data_structure_id(explore_data_structure), namespaces
+    )
+
+
+def build_concrete_path_table(catalog):
+    """Build the table of the concrete paths of the elements of a catalog,
+    by element name
+
+    Args:
+        catalog:
+
+    Returns:
+        dict: tuple of (dot notation, value locations) by element name
+
+    """
+    concrete_paths = defaultdict(set)
+    for record in catalog.values():
+        name = record.dot_notation.split(".")[-1]
+        concrete_paths[name].add((record.dot_notation, record.value_locations))
+
+    return {
+        name: tuple(sorted(paths)) for name, paths in concrete_paths.items()
+    }
+
+
+def get_concrete_path_table(catalog):
+    """Return the table of the concrete paths of the elements of a catalog,
+    built once per revision of its data structure. The data structures of
+    the users of a template contain different elements, the table of one of
+    them can't be used for the others.
+
+    Args:
+        catalog:
+
+    Returns:
+        dict: tuple of (dot notation, value locations) by element name
+
+    """
+    data_structure_id = getattr(catalog, "data_structure_id", None)
+    if data_structure_id is None:
+        # catalog not built from a data structure
+        return build_concrete_path_table(catalog)
+
+    cache_key = (
+        f"{CONCRETE_PATHS_KEY_PREFIX}:{data_structure_id}:{catalog.revision}"
+    )
+    concrete_path_table = _concrete_path_tables.get(cache_key)
+    if concrete_path_table is not None:
+        return concrete_path_table
+
+    cache = get_cache()
+    concrete_path_table = cache.get(cache_key)
+    if concrete_path_table is None:
+        concrete_path_table = build_concrete_path_table(catalog)
+        cache.set(
+            cache_key,
+            concrete_path_table,
+            timeout=EXPLORE_EXAMPLE_CATALOG_CACHE_TIMEOUT,
+        )
+    _concrete_path_tables.set(cache_key, concrete_path_table)
+    return concrete_path_table
+
+
+def get_element_record(element_id, namespaces, request, catalog=None):
+    """Return the record of an element, from the catalog if available
+
+    Args:
+        element_id:
+        namespaces:
+        request:
+        catalog:
+
+    Returns:
+        ElementRecord
+
+    """
+    if catalog is not None:
+        record = catalog.get(str(element_id))
+        if record is not None:
+            return record
+
+    # element not in the catalog: get it from the database
+    data_structure_element = data_structure_element_api.get_by_id(
+        element_id, request
+    )
+    try:
+        enumerations = get_enumerations(data_structure_element)
+    except XMLError:
+        enumerations = None
+    return ElementRecord(
+        data_structure_element.id,
+        data_structure_element.options,
+        namespaces,
+        enumerations,
+    )
@@ -0,0 +1,125 @@
+"""Schema information of the templates, cached to avoid parsing the XSD"""
+
+from core_explore_example_app.settings import (
+    EXPLORE_EXAMPLE_SCHEMA_CACHE_SIZE,
+    EXPLORE_EXAMPLE_SCHEMA_CACHE_TIMEOUT,
+)
+from core_explore_example_app.utils.cache import (
+    LRUCache,
+    get_cache,
+    get_generation,
+)
+from core_explore_example_app.utils.query_cache import TEMPLATE_NAMESPACE
+from core_main_app.components.template import api as template_api
+from xml_utils.xsd_tree.operations.namespaces import (
+    get_namespaces,
+    get_default_prefix,
+)
+from xml_utils.xsd_types.xsd_types import (
+    get_xsd_numbers,
+    get_xsd_floating_numbers,
+    get_xsd_gregorian_types,
+)
+
+TEMPLATE_SCHEMA_KEY_PREFIX = "core_explore_example_app:template_schema"
+
+# schema information kept in memory by the current worker
+_template_schemas = LRUCache(EXPLORE_EXAMPLE_SCHEMA_CACHE_SIZE)
+
+
+class TemplateSchemaInfo:
+    """Information read from the XSD of a template"""
+
+    __slots__ = (
+        "template_id",
+        "namespaces",
+        "default_prefix",
+        "xsd_numbers",
+        "xsd_floating_numbers",
+        "xsd_gregorian_types",
+    )
+
+    def __init__(self, template_id, namespaces, default_prefix):
+        """Initialize the schema information
+
+        Args:
+            template_id:
+            namespaces:
+            default_prefix:
+        """
+        self.template_id = template_id
+        self.namespaces = namespaces
+        self.default_prefix = default_prefix
+        self.xsd_numbers = frozenset(get_xsd_numbers(default_prefix))
+        self.xsd_floating_numbers = frozenset(
+            get_xsd_floating_numbers(default_prefix)
+        )
+        self.xsd_gregorian_types = frozenset(
+            get_xsd_gregorian_types(default_prefix)
+        )
+
+
+def _get_cache_key(template):
+    """Return the cache key of the schema information of a template.
+
+    The key contains the hash of the template content, or its generation if
+    the template has no hash.
+
+    Args:
+        template:
+
+    Returns:
+
+    """
+    template_hash = template.hash
+    if not template_hash:
+        template_hash = get_generation(TEMPLATE_NAMESPACE, template.id)
+    return f"{TEMPLATE_SCHEMA_KEY_PREFIX}:{template.id}:{template_hash}"
+
+
+def get_schema_info(template):
+    """Return the schema information of the template.
+
+    The template content is only read if the information is not in cache.
+
+    Args:
+        template:
+
+    Returns:
+        TemplateSchemaInfo
+
+    """
+    cache_key = _get_cache_key(template)
+    schema_info = _template_schemas.get(cache_key)
+    if schema_info is not None:
+        return schema_info
+
+    cache = get_cache()
+    schema_info = cache.get(cache_key)
+    if schema_info is None:
+        namespaces = get_namespaces(template.content)
+        schema_info = TemplateSchemaInfo(
+            str(template.id), namespaces, get_default_prefix(namespaces)
+        )
+        cache.set(
+            cache_key,
+            schema_info,
+            timeout=EXPLORE_EXAMPLE_SCHEMA_CACHE_TIMEOUT,
+        )
+    _template_schemas.set(cache_key, schema_info)
+    return schema_info
+
+
+def get_schema_info_by_template_id(template_id, request=None):
+    """Return the schema information of the template with the given id
+
+    Args:
+        template_id:
+        request:
+
+    Returns:
+        TemplateSchemaInfo
+
+    """
+    template = template_api.get_by_id(template_id, request=request)
+    return get_schema_info(template)
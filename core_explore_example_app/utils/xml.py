@@ -1,14 +1,17 @@
 """XML utils"""
 
-from core_main_app.commons.exceptions import XMLError, QueryError
-from core_main_app.utils.query.mongo.prepare import (
-    sanitize_number,
-    sanitize_value,
-)
-from xml_utils.xsd_types.xsd_types import (
-    get_xsd_floating_numbers,
-    get_xsd_numbers,
+from collections import defaultdict
+
+from django.db import connection
+
+from core_explore_example_app.utils.criteria_compiler import (
+    get_criteria_compiler,
 )
+from core_explore_example_app.utils.element_tree import get_subtree_sql
+from core_main_app.commons.exceptions import XMLError
+
+# attribute of a data structure element storing its enumerations
+ENUMERATIONS_ATTRIBUTE = "_explore_example_enumerations"
 
 
 def validate_element_value(
@@ -25,31 +28,63 @@ def validate_element_value(
     Returns:
 
     """
-    error = None
-
-    # Floating number
-    if element_type in get_xsd_floating_numbers(namespace_prefix):
-        try:
-            sanitize_number(float(element_value))
-        except (ValueError, QueryError):
-            error = f"Element {element_name} must be a number."
-    # Number
-    elif element_type in get_xsd_numbers(namespace_prefix):
-        try:
-            sanitize_number(int(element_value))
-        except (ValueError, QueryError):
-            error = f"Element {element_name} must be an integer."
-    else:
-        try:
-            sanitize_value(element_value)
-        except QueryError:
-            error = f"Element {element_name} is not valid."
-
-    return error
+    return get_criteria_compiler(namespace_prefix).validate(
+        element_name, element_type, element_value
+    )
 
 
-def get_enumerations(data_structure_element):
+def find_enumerations(element_id, elements, children):
+    """Find the enumerations of an element in an in-memory tree: the first
+    descendant simple type is found following the first children
+
+    Args:
+        element_id:
+        elements: (tag, value, ...) by element id
+        children: sorted children ids by parent id
+
+    Returns:
+        list: enumerations, None if no simple type was found
+
     """
+    try:
+        while elements[element_id][0] != "simple_type":
+            element_id = children[element_id][0]
+        simple_type_id = children[element_id][0]
+    except (IndexError, KeyError):
+        return None
+
+    return [
+        elements[child_id][1]
+        for child_id in children[simple_type_id]
+        if elements[child_id][0] == "enumeration"
+    ]
+
+
+def _fetch_subtree(element_id):
+    """Fetch the subtree of a data structure element, in a single query
+
+    Args:
+        element_id:
+
+    Returns:
+        tuple: (tag, value) by element id, sorted children ids by parent id
+
+    """
+    sql = get_subtree_sql(["id", "tag", "value", "parent_id"])
+    elements = {}
+    children = defaultdict(list)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [element_id])
+        for pk_value, tag, value, parent_id_value in cursor.fetchall():
+            elements[pk_value] = (tag, value)
+            children[parent_id_value].append(pk_value)
+    return elements, children
+
+
+def get_enumerations(data_structure_element):
+    """Return the enumerations of the simple type of a data structure
+    element. The subtree of the element is fetched in a single query, and
+    the enumerations are kept on the element.
 
     Args:
         data_structure_element:
@@ -57,18 +92,17 @@ def get_enumerations(data_structure_element):
     Returns:
 
     """
-    # find child simple type
-    try:
-        while data_structure_element.tag != "simple_type":
-            data_structure_element = data_structure_element.children.all()[0]
-        simple_type_element = data_structure_element.children.all()[0]
-    except Exception:
-        raise XMLError(
-            "Unable to find a simple type for the data structure element."
+    enumerations = getattr(
+        data_structure_element, ENUMERATIONS_ATTRIBUTE, None
+    )
+    if enumerations is None:
+        elements, children = _fetch_subtree(data_structure_element.pk)
+        enumerations = find_enumerations(
+            data_structure_element.pk, elements, children
         )
-
-    enums = []
-    for enum_element in simple_type_element.children.all():
-        if enum_element.tag == "enumeration":
-            enums.append(enum_element.value)
-    return enums
+        if enumerations is None:
+            raise XMLError(
+                "Unable to find a simple type for the data structure element."
+            )
+        setattr(data_structure_element, ENUMERATIONS_ATTRIBUTE, enumerations)
+    return list(enumerations)
@@ -16,7 +16,6 @@ from core_explore_common_app.views.user.ajax import (
     CreatePersistentQueryUrlView,
 )
 from core_explore_example_app.apps import ExploreExampleAppConfig
-from core_explore_example_app.commons.exceptions import MongoQueryException
 from core_explore_example_app.components.explore_data_structure import (
     api as explore_data_structure_api,
 )
@@ -27,18 +26,21 @@ from core_explore_example_app.components.saved_query import (
     api as saved_query_api,
 )
 from core_explore_example_app.components.saved_query.models import SavedQuery
+from core_explore_example_app.utils.cache import (
+    bump_data_structure_revision,
+)
 from core_explore_example_app.utils.custom_checkbox_renderer import (
     CustomCheckboxRenderer,
 )
-from core_explore_example_app.utils.displayed_query import (
-    sub_elements_to_pretty_query,
-    fields_to_pretty_query,
-)
-from core_explore_example_app.utils.mongo_query import (
-    get_parent_name,
-    sub_elements_to_query,
-    check_query_form,
+from core_explore_example_app.utils.element_tree import resolve_element_id
+from core_explore_example_app.utils.field_selection import (
+    get_selection_index,
+    parse_selection,
+    render_selection_subtree,
+    translate_selection,
+    update_selection,
 )
+from core_explore_example_app.utils.mongo_query import get_parent_name
 from core_explore_example_app.utils.parser import (
     remove_form_element,
     get_parser,
@@ -48,20 +50,27 @@ from core_explore_example_app.utils.query_builder import (
     render_new_query,
     render_new_criteria,
     render_sub_elements_query,
-    prune_html_tree,
-    get_user_inputs,
+    get_element_user_inputs,
+)
+from core_explore_example_app.utils.query_explain import (
+    explain_query,
+    get_data_collection,
+)
+from core_explore_example_app.utils.query_normalizer import normalize_query
+from core_explore_example_app.utils.query_pipeline import (
+    compile_form,
+    compile_sub_elements_form,
+)
+from core_explore_example_app.utils.schema_catalog import (
+    get_catalog_by_template_id,
+    get_element_record,
+)
+from core_explore_example_app.utils.template_schema import (
+    get_schema_info_by_template_id,
 )
 from core_main_app.commons import exceptions
 from core_main_app.components.template import api as template_api
 from core_main_app.utils.query.mongo.prepare import sanitize_value
-from core_parser_app.components.data_structure_element import (
-    api as data_structure_element_api,
-)
-from xml_utils.html_tree import parser as html_tree_parser
-from xml_utils.xsd_tree.operations.namespaces import (
-    get_namespaces,
-    get_default_prefix,
-)
 
 logger = logging.getLogger(__name__)
 
@@ -89,13 +98,18 @@ def generate_element(request, explore_data_structure_id):
         template = template_api.get_by_id(
             str(explore_data_structure.template.id), request=request
         )
+        # the shared elements are copied before being modified
+        element = explore_data_structure_api.get_editable_element(
+            explore_data_structure, element_id, request
+        )
         xsd_parser = get_parser(request=request)
         html_form = xsd_parser.generate_element_absent(
-            element_id,
+            str(element.pk),
             template.content,
             data_structure=explore_data_structure,
             renderer_class=CustomCheckboxRenderer,
         )
+        bump_data_structure_revision(explore_data_structure.id)
     except Exception as exception:
         return HttpResponseBadRequest(
             "An unexpected error occurred: %s" % escape(str(exception)),
@@ -128,13 +142,61 @@ def generate_choice(request, explore_data_structure_id):
         template = template_api.get_by_id(
             str(explore_data_structure.template.id), request=request
         )
+        # the shared elements are copied before being modified
+        element = explore_data_structure_api.get_editable_element(
+            explore_data_structure, element_id, request
+        )
         xsd_parser = get_parser(request=request)
         html_form = xsd_parser.generate_choice_absent(
-            element_id,
+            str(element.pk),
             template.content,
             data_structure=explore_data_structure,
             renderer_class=CustomCheckboxRenderer,
         )
+        bump_data_structure_revision(explore_data_structure.id)
+    except Exception as exception:
+        return HttpResponseBadRequest(
+            "An unexpected error occurred: %s" % escape(str(exception)),
+            content_type="application/javascript",
+        )
+
+    return HttpResponse(html_form)
+
+
+@decorators.permission_required(
+    content_type=rights.EXPLORE_EXAMPLE_CONTENT_TYPE,
+    permission=rights.EXPLORE_EXAMPLE_ACCESS,
+    raise_exception=True,
+)
+def render_subtree(request, explore_data_structure_id):
+    """Render a subtree left out of the form, when expanded.
+
+    Args:
+        request:
+        explore_data_structure_id:
+
+    Returns:
+
+    """
+    try:
+        element_id = request.POST["id"]
+        explore_data_structure = explore_data_structure_api.get_by_id(
+            explore_data_structure_id
+        )
+        try:
+            element = explore_data_structure_api.get_tree_element(
+                explore_data_structure, element_id, request
+            )
+        except exceptions.DoesNotExist:
+            element = None
+        if element is None or element.tag != "complex_type":
+            return HttpResponseBadRequest(
+                "The element is not a subtree of the form.",
+                content_type="application/javascript",
+            )
+        html_form = render_selection_subtree(
+            request, explore_data_structure, element
+        )
     except Exception as exception:
         return HttpResponseBadRequest(
             "An unexpected error occurred: %s" % escape(str(exception)),
@@ -159,7 +221,14 @@ def remove_element(request):
 
     """
     element_id = request.POST["id"]
-    code, html_form = remove_form_element(request, element_id)
+    explore_data_structure = explore_data_structure_api.get_by_element_id(
+        element_id, request
+    )
+    # the shared elements are copied before being modified
+    element = explore_data_structure_api.get_editable_element(
+        explore_data_structure, element_id, request
+    )
+    code, html_form = remove_form_element(request, str(element.pk))
     return HttpResponse(json.dumps({"code": code, "html": html_form}))
 
 
@@ -182,10 +251,6 @@ def save_fields(request):
         form_content = sanitize_value(request.POST["formContent"])
         template_id = sanitize_value(request.POST["templateID"])
 
-        # modify the form string to only keep the selected elements
-        html_tree = html_tree_parser.from_string(form_content)
-        any_checked = prune_html_tree(html_tree)
-
         # get explore data structure
         explore_data_structure = (
             explore_data_structure_api.get_by_user_id_and_template_id(
@@ -193,19 +258,16 @@ def save_fields(request):
             )
         )
 
-        # if checkboxes were checked
-        if any_checked:
-            # save html form by adding the encoding to unicode, we force to_string
-            # method to return a string rather than bytes.
-            explore_data_structure.selected_fields_html_tree = (
-                html_tree_parser.to_string(html_tree, encoding="unicode")
-            )
-        else:
-            # otherwise, empty any previously saved html form
-            explore_data_structure.selected_fields_html_tree = None
+        # save the selection of the form, the tree is rendered from it when
+        # needed. The selection is emptied if no checkbox is checked. The
+        # form may have been rendered before elements were copied.
+        explore_data_structure.selected_fields = translate_selection(
+            parse_selection(form_content),
+            explore_data_structure.copied_elements,
+        )
 
-        # update explore data structure
-        explore_data_structure_api.upsert(explore_data_structure)
+        # update the selection, the tree of elements is unchanged
+        explore_data_structure_api.save_selected_fields(explore_data_structure)
 
         return HttpResponse(
             json.dumps({}), content_type="application/javascript"
@@ -217,6 +279,59 @@ def save_fields(request):
         )
 
 
+@decorators.permission_required(
+    content_type=rights.EXPLORE_EXAMPLE_CONTENT_TYPE,
+    permission=rights.EXPLORE_EXAMPLE_ACCESS,
+    raise_exception=True,
+)
+def update_selected_fields(request):
+    """Updates the fields selected by the user with the toggled elements
+
+    Args:
+        request:
+
+    Returns:
+
+    """
+    try:
+        # get parameters form request
+        template_id = request.POST["templateID"]
+        selected_ids = json.loads(request.POST.get("selected", "[]"))
+        deselected_ids = json.loads(request.POST.get("deselected", "[]"))
+
+        # get explore data structure
+        explore_data_structure = (
+            explore_data_structure_api.get_by_user_id_and_template_id(
+                str(request.user.id), template_id
+            )
+        )
+
+        explore_data_structure.selected_fields = update_selection(
+            explore_data_structure.selected_fields,
+            get_selection_index(request, explore_data_structure),
+            [
+                resolve_element_id(explore_data_structure, element_id)
+                for element_id in selected_ids
+            ],
+            [
+                resolve_element_id(explore_data_structure, element_id)
+                for element_id in deselected_ids
+            ],
+        )
+
+        # update the selection, the tree of elements is unchanged
+        explore_data_structure_api.save_selected_fields(explore_data_structure)
+
+        return HttpResponse(
+            json.dumps({}), content_type="application/javascript"
+        )
+    except Exception as exception:
+        logger.error(escape(str(exception)))
+        return HttpResponseBadRequest(
+            "An error occurred while saving the selected fields."
+        )
+
+
 @decorators.permission_required(
     content_type=rights.EXPLORE_EXAMPLE_CONTENT_TYPE,
     permission=rights.EXPLORE_EXAMPLE_ACCESS,
@@ -233,12 +348,29 @@ def select_element(request):
     """
     # get element id
     element_id = request.POST["elementID"]
-
-    # get schema element
-    schema_element = data_structure_element_api.get_by_id(element_id, request)
+    template_id = request.POST.get("templateID", None)
+
+    if template_id is not None:
+        # get element label from the catalog of the user data structure
+        namespaces = get_schema_info_by_template_id(
+            template_id, request=request
+        ).namespaces
+        catalog = get_catalog_by_template_id(template_id, namespaces, request)
+        element_label = get_element_record(
+            element_id, namespaces, request, catalog
+        ).label
+    else:
+        # get schema element, from the tree of the user data structure
+        explore_data_structure = explore_data_structure_api.get_by_element_id(
+            element_id, request
+        )
+        schema_element = explore_data_structure_api.get_tree_element(
+            explore_data_structure, element_id, request
+        )
+        element_label = schema_element.options["label"]
 
     response_dict = {
-        "elementName": schema_element.options["label"],
+        "elementName": element_label,
         "elementID": element_id,
     }
 
@@ -267,33 +399,30 @@ def get_sub_elements_query_builder(request):
     # get list of ids from string
     list_leaves_id = leaves_id.split(" ")
 
-    # get template
-    template = template_api.get_by_id(template_id, request=request)
-
-    # get template namespaces
-    namespaces = get_namespaces(template.content)
-    # get default prefix
-    default_prefix = get_default_prefix(namespaces)
+    # get template schema information
+    schema_info = get_schema_info_by_template_id(template_id, request=request)
+    namespaces = schema_info.namespaces
+    # get the elements of the user data structure
+    catalog = get_catalog_by_template_id(template_id, namespaces, request)
 
     # get the parent name using the first schema element of the list
-    parent_name = get_parent_name(list_leaves_id[0], namespaces, request)
+    parent_name = get_parent_name(
+        list_leaves_id[0], namespaces, request, catalog
+    )
 
     form_fields = []
     for leaf_id in list_leaves_id:
-        data_structure_element = data_structure_element_api.get_by_id(
-            leaf_id, request
+        element_record = get_element_record(
+            leaf_id, namespaces, request, catalog
         )
-        element_type = data_structure_element.options["type"]
-        element_name = data_structure_element.options["name"]
-
-        user_inputs = get_user_inputs(
-            element_type, data_structure_element, default_prefix
+        element_type, user_inputs = get_element_user_inputs(
+            schema_info, leaf_id, request, catalog
         )
 
         form_fields.append(
             {
                 "element_id": leaf_id,
-                "element_name": element_name,
+                "element_name": element_record.name,
                 "element_type": element_type,
                 "html": user_inputs,
             }
@@ -327,29 +456,18 @@ def insert_sub_elements_query(request):
     template_id = request.POST["templateID"]
     criteria_id = request.POST["criteriaID"]
 
-    # get template
-    template = template_api.get_by_id(template_id, request=request)
-
-    # get template namespaces
-    namespaces = get_namespaces(template.content)
-    # get default prefix
-    default_prefix = get_default_prefix(namespaces)
-
-    # keep only selected fields
-    form_values = [field for field in form_values if field["selected"] is True]
-    errors = check_query_form(form_values, template_id, request=request)
+    compiled_form = compile_sub_elements_form(
+        form_values, template_id, request=request
+    )
+    errors = compiled_form.errors
 
     if len(errors) == 0:
-        query = sub_elements_to_query(
-            form_values, namespaces, default_prefix, request
-        )
-        displayed_query = sub_elements_to_pretty_query(
-            form_values, namespaces, request
-        )
+        query = compiled_form.query
+        displayed_query = compiled_form.displayed_query
         ui_id = "ui" + criteria_id[4:]
         temporary_query = SavedQuery(
             user_id=ExploreExampleAppConfig.name,
-            template=template,
+            template_id=compiled_form.template_id,
             query=json.dumps(query),
             displayed_query=displayed_query,
         )
@@ -388,20 +506,12 @@ def update_user_input(request):
     from_element_id = request.POST["elementID"]
     template_id = request.POST["templateID"]
 
-    # get schema element
-    data_structure_element = data_structure_element_api.get_by_id(
-        from_element_id, request
-    )
-    # get template
-    template = template_api.get_by_id(template_id, request=request)
-
-    # convert xml path to mongo dot notation
-    namespaces = get_namespaces(template.content)
-    default_prefix = get_default_prefix(namespaces)
+    # get template schema information
+    schema_info = get_schema_info_by_template_id(template_id, request=request)
 
-    element_type = data_structure_element.options["type"]
-    user_inputs = get_user_inputs(
-        element_type, data_structure_element, default_prefix
+    # get the user inputs of the element, shared by the users of the template
+    element_type, user_inputs = get_element_user_inputs(
+        schema_info, from_element_id, request
     )
 
     response_dict = {"userInputs": user_inputs, "element_type": element_type}
@@ -595,9 +705,13 @@ class GetQueryView(View):
             if len(query_object.data_sources) == 0:
                 errors = ["Please select at least 1 data source."]
             elif form_values:
-                errors = check_query_form(
-                    form_values, template_id, request=request
+                compiled_form = compile_form(
+                    form_values,
+                    template_id,
+                    request=request,
+                    fields_to_query_func=self.fields_to_query_func,
                 )
+                errors = compiled_form.errors
 
             if len(errors) > 0:  # If any error, send it back to the user.
                 return HttpResponseBadRequest(
@@ -616,9 +730,7 @@ class GetQueryView(View):
 
             if form_values:
                 query_object.content = json.dumps(
-                    self.fields_to_query_func(
-                        form_values, template_id, request=request
-                    )
+                    normalize_query(compiled_form.query)
                 )
 
             query_api.upsert(query_object, request.user)
@@ -669,40 +781,84 @@ class SaveQueryView(View):
             )
 
         # Check that the query is valid
-        errors = check_query_form(form_values, template_id, request=request)
-        if len(errors) == 0:
-            try:
-                query = self.fields_to_query_func(
-                    form_values, template_id, request=request
-                )
-                displayed_query = fields_to_pretty_query(form_values)
-
-                # save the query in the data base
-                saved_query = SavedQuery(
-                    user_id=str(request.user.id),
-                    template=template_api.get_by_id(
-                        template_id, request=request
-                    ),
-                    query=json.dumps(query),
-                    displayed_query=displayed_query,
-                )
-                saved_query_api.upsert(saved_query)
-            except MongoQueryException as exception:
-                errors = [str(exception)]
-                return HttpResponseBadRequest(
-                    _render_errors(errors),
-                    content_type="application/javascript",
-                )
-        else:
+        compiled_form = compile_form(
+            form_values,
+            template_id,
+            request=request,
+            fields_to_query_func=self.fields_to_query_func,
+        )
+        if len(compiled_form.errors) > 0:
             return HttpResponseBadRequest(
-                _render_errors(errors), content_type="application/javascript"
+                _render_errors(compiled_form.errors),
+                content_type="application/javascript",
             )
 
+        # save the query in the data base
+        saved_query = SavedQuery(
+            user_id=str(request.user.id),
+            template_id=compiled_form.template_id,
+            query=json.dumps(normalize_query(compiled_form.query)),
+            displayed_query=compiled_form.displayed_query,
+        )
+        saved_query_api.upsert(saved_query)
+
         return HttpResponse(
             json.dumps({}), content_type="application/javascript"
         )
 
 
+class ExplainQueryView(View):
+    """Explain Query View"""
+
+    fields_to_query_func = None
+
+    @method_decorator(
+        decorators.permission_required(
+            content_type=rights.EXPLORE_EXAMPLE_CONTENT_TYPE,
+            permission=rights.EXPLORE_EXAMPLE_ACCESS,
+            raise_exception=True,
+        )
+    )
+    def post(self, request):
+        """Explain the query built from the form
+
+        Args:
+            request:
+
+        Returns:
+
+        """
+        try:
+            template_id = request.POST["templateID"]
+            form_values = json.loads(request.POST["formValues"])
+
+            compiled_form = compile_form(
+                form_values,
+                template_id,
+                request=request,
+                fields_to_query_func=self.fields_to_query_func,
+            )
+            if len(compiled_form.errors) > 0:
+                return HttpResponseBadRequest(
+                    _render_errors(compiled_form.errors),
+                    content_type="application/javascript",
+                )
+
+            explanation = explain_query(
+                normalize_query(compiled_form.query),
+                template_id,
+                get_data_collection(),
+            )
+            return HttpResponse(
+                json.dumps(explanation), content_type="application/javascript"
+            )
+        except Exception as exception:
+            return HttpResponseBadRequest(
+                "An unexpected error occurred: %s" % escape(str(exception)),
+                content_type="application/javascript",
+            )
+
+
 class CreatePersistentQueryExampleUrlView(CreatePersistentQueryUrlView):
     """Create the persistent url from a Query"""
 
@@ -27,7 +27,10 @@ from core_explore_example_app.components.saved_query import (
 )
 from core_explore_example_app.permissions import rights
 from core_explore_example_app.settings import INSTALLED_APPS
-from core_explore_example_app.utils.parser import render_form
+from core_explore_example_app.utils.field_selection import (
+    get_selection_tree,
+    render_selection_form,
+)
 from core_main_app.commons import exceptions as exceptions
 from core_main_app.components.template import api as template_api
 from core_main_app.components.template.models import Template
@@ -121,6 +124,7 @@ class SelectFieldsView(View):
     generate_element_url = "core_explore_example_generate_element"
     remove_element_url = "core_explore_example_remove_element"
     generate_choice_url = "core_explore_example_generate_choice"
+    render_subtree_url = "core_explore_example_render_subtree"
 
     @method_decorator(
         decorators.permission_required(
@@ -185,14 +189,35 @@ class SelectFieldsView(View):
             }
 
             template = template_api.get_by_id(template_id, request=request)
+            if explore_data_structure_api.is_base_generation_pending(
+                template.id
+            ):
+                try:
+                    explore_data_structure_api.get_by_user_id_and_template_id(
+                        user_id=str(request.user.id), template_id=template.id
+                    )
+                except exceptions.DoesNotExist:
+                    # the data structure is generated in the background
+                    return render(
+                        request,
+                        "core_explore_example_app/user/select_fields_pending.html",
+                        assets={
+                            "js": [
+                                {
+                                    "path": "core_explore_example_app/user/js/select_fields_pending.js",
+                                    "is_raw": False,
+                                }
+                            ]
+                        },
+                        context={"page_title": "Select Fields"},
+                    )
             # get data structure
             data_structure = explore_data_structure_api.create_and_get_explore_data_structure(
                 template, request
             )
-            root_element = data_structure.data_structure_element_root
 
-            # renders the form
-            xsd_form = render_form(request, root_element)
+            # renders the form, with the fields already selected
+            xsd_form = render_selection_form(request, data_structure)
 
             # Set the context
             context = {
@@ -202,6 +227,7 @@ class SelectFieldsView(View):
                 "generate_element_url": self.generate_element_url,
                 "remove_element_url": self.remove_element_url,
                 "generate_choice_url": self.generate_choice_url,
+                "render_subtree_url": self.render_subtree_url,
                 "data_structure_id": str(data_structure.id),
                 "xsd_form": xsd_form,
             }
@@ -279,8 +305,10 @@ class BuildQueryView(View):
                         str(request.user.id), template_id
                     )
                 )
-                # If custom fields form present, set it
-                custom_form = explore_data_structure.selected_fields_html_tree
+                # If custom fields selected, render their tree
+                custom_form = get_selection_tree(
+                    request, explore_data_structure
+                )
             except exceptions.DoesNotExist:
                 custom_form = None
 
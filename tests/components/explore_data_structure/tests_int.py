@@ -0,0 +1,534 @@
+"""Integration tests for the explore data structure api"""
+
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core_main_app.access_control.exceptions import AccessControlError
+from core_main_app.components.template.models import Template
+from core_main_app.utils.tests_tools.MockUser import create_mock_user
+from core_main_app.utils.tests_tools.RequestMock import create_mock_request
+from core_parser_app.components.data_structure.models import (
+    DataStructureElement,
+)
+from core_explore_example_app.components.explore_data_structure import (
+    api as explore_data_structure_api,
+)
+from core_explore_example_app.components.explore_data_structure.models import (
+    ExploreDataStructure,
+)
+from core_explore_example_app.system.api import (
+    get_base_data_structure_request,
+)
+from core_explore_example_app.utils.element_tree import load_element_tree
+
+
+def _generate_form(xsd_string, data_structure=None, request=None):
+    """Generate a small tree of elements
+
+    Args:
+        xsd_string:
+        data_structure:
+        request:
+
+    Returns:
+
+    """
+    user = str(request.user.id)
+    root = DataStructureElement.objects.create(
+        user=user, tag="schema", data_structure=data_structure
+    )
+    element = DataStructureElement.objects.create(
+        user=user,
+        tag="element",
+        value="root",
+        options={"name": "root"},
+        parent=root,
+        data_structure=data_structure,
+    )
+    for name in ("a", "b"):
+        DataStructureElement.objects.create(
+            user=user,
+            tag="element",
+            options={"name": name},
+            parent=element,
+            data_structure=data_structure,
+        )
+    return root
+
+
+@patch(
+    "core_explore_example_app.components.explore_data_structure.api.generate_form",
+    side_effect=_generate_form,
+)
+class TestCreateAndGetExploreDataStructure(TestCase):
+    """Test create_and_get_explore_data_structure"""
+
+    def setUp(self):
+        """setUp"""
+        self.template = Template.objects.create(
+            filename="template.xsd",
+            content="<xs:schema/>",
+            hash="hash",
+            user="1",
+        )
+
+    def test_base_data_structure_is_generated_once(self, mock_generate_form):
+        """test_base_data_structure_is_generated_once"""
+        for user_id in ("1", "2"):
+            explore_data_structure_api.create_and_get_explore_data_structure(
+                self.template,
+                create_mock_request(user=create_mock_user(user_id)),
+            )
+
+        self.assertEqual(mock_generate_form.call_count, 1)
+        self.assertEqual(
+            ExploreDataStructure.objects.filter(
+                template=self.template
+            ).count(),
+            3,
+        )
+
+    def test_base_elements_are_owned_by_base_data_structure(
+        self, mock_generate_form
+    ):
+        """test_base_elements_are_owned_by_base_data_structure"""
+        explore_data_structure_api.create_and_get_explore_data_structure(
+            self.template, create_mock_request(user=create_mock_user("1"))
+        )
+        base_data_structure = ExploreDataStructure.objects.get(
+            user=explore_data_structure_api.BASE_DATA_STRUCTURE_USER
+        )
+
+        self.assertEqual(
+            set(
+                DataStructureElement.objects.filter(
+                    data_structure=base_data_structure
+                ).values_list("user", flat=True)
+            ),
+            {explore_data_structure_api.BASE_DATA_STRUCTURE_USER},
+        )
+
+    def test_user_data_structure_shares_base_elements(
+        self, mock_generate_form
+    ):
+        """test_user_data_structure_shares_base_elements"""
+        explore_data_structure = (
+            explore_data_structure_api.create_and_get_explore_data_structure(
+                self.template, create_mock_request(user=create_mock_user("1"))
+            )
+        )
+        base_data_structure = ExploreDataStructure.objects.get(
+            user=explore_data_structure_api.BASE_DATA_STRUCTURE_USER
+        )
+
+        self.assertEqual(
+            explore_data_structure.base_data_structure_id,
+            base_data_structure.id,
+        )
+        self.assertEqual(
+            explore_data_structure.data_structure_element_root_id,
+            base_data_structure.data_structure_element_root_id,
+        )
+        self.assertEqual(explore_data_structure.copied_elements, {})
+        self.assertFalse(
+            DataStructureElement.objects.filter(
+                data_structure=explore_data_structure
+            ).exists()
+        )
+
+    def test_existing_data_structure_is_returned(self, mock_generate_form):
+        """test_existing_data_structure_is_returned"""
+        request = create_mock_request(user=create_mock_user("1"))
+        explore_data_structure = (
+            explore_data_structure_api.create_and_get_explore_data_structure(
+                self.template, request
+            )
+        )
+
+        self.assertEqual(
+            explore_data_structure_api.create_and_get_explore_data_structure(
+                self.template, request
+            ).id,
+            explore_data_structure.id,
+        )
+
+
+@patch(
+    "core_explore_example_app.components.explore_data_structure.api.generate_form",
+    side_effect=_generate_form,
+)
+class TestGetEditableElement(TestCase):
+    """Test get_editable_element"""
+
+    def setUp(self):
+        """setUp"""
+        self.template = Template.objects.create(
+            filename="template.xsd",
+            content="<xs:schema/>",
+            hash="hash",
+            user="1",
+        )
+        self.request = create_mock_request(
+            user=create_mock_user("1", has_perm=True)
+        )
+
+    def _create_explore_data_structure(self):
+        """Create the data structure of the user, and return it with the
+        elements of the base data structure
+
+        Returns:
+
+        """
+        explore_data_structure = (
+            explore_data_structure_api.create_and_get_explore_data_structure(
+                self.template, self.request
+            )
+        )
+        base_root = explore_data_structure.data_structure_element_root
+        base_element = base_root.children.get()
+        base_a, base_b = base_element.children.order_by("pk")
+        return explore_data_structure, base_root, base_element, base_a, base_b
+
+    def test_subtree_of_parent_is_copied(self, mock_generate_form):
+        """test_subtree_of_parent_is_copied"""
+        (
+            explore_data_structure,
+            base_root,
+            base_element,
+            base_a,
+            base_b,
+        ) = self._create_explore_data_structure()
+
+        element = explore_data_structure_api.get_editable_element(
+            explore_data_structure, base_a.pk, self.request
+        )
+
+        self.assertEqual(element.data_structure_id, explore_data_structure.id)
+        self.assertEqual(element.user, "1")
+        self.assertEqual(element.options, {"name": "a"})
+        self.assertIsNone(element.parent.parent_id)
+        self.assertEqual(element.parent.value, "root")
+        self.assertEqual(
+            [child.options["name"] for child in element.parent.children.all()],
+            ["a", "b"],
+        )
+        self.assertEqual(
+            explore_data_structure.copied_elements,
+            {
+                str(base_element.pk): str(element.parent_id),
+                str(base_a.pk): str(element.pk),
+                str(base_b.pk): str(element.parent.children.last().pk),
+            },
+        )
+        # the root is still shared
+        self.assertEqual(
+            explore_data_structure.data_structure_element_root_id, base_root.pk
+        )
+        self.assertEqual(base_a.parent.pk, base_element.pk)
+
+    def test_element_of_copied_subtree_is_not_copied_again(
+        self, mock_generate_form
+    ):
+        """test_element_of_copied_subtree_is_not_copied_again"""
+        (
+            explore_data_structure,
+            _,
+            _,
+            base_a,
+            base_b,
+        ) = self._create_explore_data_structure()
+        element = explore_data_structure_api.get_editable_element(
+            explore_data_structure, base_a.pk, self.request
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            other_element = explore_data_structure_api.get_editable_element(
+                explore_data_structure, base_b.pk, self.request
+            )
+
+        self.assertEqual(other_element.parent_id, element.parent_id)
+        self.assertFalse(
+            any(query["sql"].startswith("INSERT") for query in queries)
+        )
+
+    def test_root_of_copied_subtree_is_copied_with_its_parent(
+        self, mock_generate_form
+    ):
+        """test_root_of_copied_subtree_is_copied_with_its_parent"""
+        (
+            explore_data_structure,
+            base_root,
+            base_element,
+            base_a,
+            _,
+        ) = self._create_explore_data_structure()
+        element = explore_data_structure_api.get_editable_element(
+            explore_data_structure, base_a.pk, self.request
+        )
+
+        copied_element = explore_data_structure_api.get_editable_element(
+            explore_data_structure, element.parent_id, self.request
+        )
+
+        root = explore_data_structure.data_structure_element_root
+        self.assertEqual(root.data_structure_id, explore_data_structure.id)
+        self.assertEqual(root.tag, "schema")
+        self.assertEqual(copied_element.parent_id, root.pk)
+        # the previous copies are replaced
+        self.assertFalse(
+            DataStructureElement.objects.filter(pk=element.pk).exists()
+        )
+        self.assertEqual(
+            DataStructureElement.objects.filter(
+                data_structure=explore_data_structure
+            ).count(),
+            4,
+        )
+        copied_a = copied_element.children.order_by("pk").first()
+        self.assertEqual(
+            explore_data_structure.copied_elements[str(base_a.pk)],
+            str(copied_a.pk),
+        )
+        self.assertEqual(
+            explore_data_structure.copied_elements[str(element.pk)],
+            str(copied_a.pk),
+        )
+        self.assertEqual(
+            explore_data_structure.copied_elements[str(base_element.pk)],
+            str(copied_element.pk),
+        )
+        self.assertEqual(
+            explore_data_structure.copied_elements[str(base_root.pk)],
+            str(root.pk),
+        )
+
+    def test_loaded_tree_contains_copied_elements(self, mock_generate_form):
+        """test_loaded_tree_contains_copied_elements"""
+        (
+            explore_data_structure,
+            base_root,
+            _,
+            base_a,
+            base_b,
+        ) = self._create_explore_data_structure()
+        element = explore_data_structure_api.get_editable_element(
+            explore_data_structure, base_a.pk, self.request
+        )
+        # element added by the user, after the copied ones
+        DataStructureElement.objects.create(
+            user="1",
+            tag="element",
+            options={"name": "c"},
+            parent=element.parent,
+            data_structure=explore_data_structure,
+        )
+
+        root = load_element_tree(base_root, explore_data_structure)
+
+        self.assertEqual(root.pk, base_root.pk)
+        tree_element = root.children[0]
+        self.assertEqual(tree_element.pk, element.parent_id)
+        self.assertEqual(
+            [child.options["name"] for child in tree_element.children],
+            ["a", "b", "c"],
+        )
+        self.assertEqual(tree_element.children[0].pk, element.pk)
+        self.assertNotIn(
+            base_b.pk, [child.pk for child in tree_element.children]
+        )
+
+    def test_selection_is_translated(self, mock_generate_form):
+        """test_selection_is_translated"""
+        (
+            explore_data_structure,
+            _,
+            base_element,
+            base_a,
+            base_b,
+        ) = self._create_explore_data_structure()
+        explore_data_structure.selected_fields = {
+            "elements": [str(base_a.pk), str(base_b.pk)],
+            "parents": {
+                str(base_element.pk): [str(base_a.pk), str(base_b.pk)]
+            },
+        }
+
+        element = explore_data_structure_api.get_editable_element(
+            explore_data_structure, base_a.pk, self.request
+        )
+
+        copied_b = element.parent.children.last()
+        self.assertEqual(
+            explore_data_structure.selected_fields,
+            {
+                "elements": [str(element.pk), str(copied_b.pk)],
+                "parents": {
+                    str(element.parent_id): [str(element.pk), str(copied_b.pk)]
+                },
+            },
+        )
+
+    def test_subtree_is_copied_in_constant_queries(self, mock_generate_form):
+        """test_subtree_is_copied_in_constant_queries"""
+        (
+            explore_data_structure,
+            base_root,
+            _,
+            _,
+            _,
+        ) = self._create_explore_data_structure()
+        base_elements = [
+            DataStructureElement.objects.create(
+                user=explore_data_structure_api.BASE_DATA_STRUCTURE_USER,
+                tag="element",
+                parent=base_root,
+                data_structure=explore_data_structure.base_data_structure,
+            )
+            for _ in range(20)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            explore_data_structure_api.copy_subtree(
+                explore_data_structure, base_root.pk, "1"
+            )
+
+        self.assertLessEqual(len(queries), 8)
+        self.assertEqual(
+            DataStructureElement.objects.filter(
+                data_structure=explore_data_structure
+            ).count(),
+            24,
+        )
+        self.assertEqual(
+            explore_data_structure.copied_elements[str(base_elements[0].pk)],
+            str(
+                explore_data_structure.data_structure_element_root.children.order_by(
+                    "pk"
+                )[
+                    1
+                ].pk
+            ),
+        )
+
+    def test_other_user_cannot_modify_data_structure(self, mock_generate_form):
+        """test_other_user_cannot_modify_data_structure"""
+        (
+            explore_data_structure,
+            _,
+            _,
+            base_a,
+            _,
+        ) = self._create_explore_data_structure()
+
+        with self.assertRaises(AccessControlError):
+            explore_data_structure_api.get_editable_element(
+                explore_data_structure,
+                base_a.pk,
+                create_mock_request(user=create_mock_user("2", has_perm=True)),
+            )
+
+    def test_data_structure_is_found_from_shared_element(
+        self, mock_generate_form
+    ):
+        """test_data_structure_is_found_from_shared_element"""
+        (
+            explore_data_structure,
+            _,
+            _,
+            base_a,
+            _,
+        ) = self._create_explore_data_structure()
+
+        self.assertEqual(
+            explore_data_structure_api.get_by_element_id(
+                base_a.pk, self.request
+            ).id,
+            explore_data_structure.id,
+        )
+
+
+CHOICE_XSD = (
+    "<xs:schema xmlns:xs='http://www.w3.org/2001/XMLSchema'>"
+    "<xs:element name='root'><xs:complexType><xs:choice>"
+    "<xs:element name='a' type='xs:string'/>"
+    "<xs:element name='b' type='xs:int'/>"
+    "</xs:choice></xs:complexType></xs:element>"
+    "</xs:schema>"
+)
+
+
+class TestCopySubtree(TestCase):
+    """Test copy_subtree"""
+
+    def setUp(self):
+        """setUp"""
+        self.template = Template.objects.create(
+            filename="choice.xsd",
+            content=CHOICE_XSD,
+            hash="choice_hash",
+            user="1",
+        )
+
+    def test_choice_selects_copy_of_selected_child(self):
+        """test_choice_selects_copy_of_selected_child"""
+        request = create_mock_request(
+            user=create_mock_user("1", has_perm=True)
+        )
+        explore_data_structure = (
+            explore_data_structure_api.create_and_get_explore_data_structure(
+                self.template, request
+            )
+        )
+        base_choice_iter = DataStructureElement.objects.get(
+            data_structure=explore_data_structure.base_data_structure,
+            tag="choice-iter",
+        )
+
+        explore_data_structure_api.copy_subtree(
+            explore_data_structure, base_choice_iter.pk, "1"
+        )
+
+        choice_iter = DataStructureElement.objects.get(
+            data_structure=explore_data_structure, tag="choice-iter"
+        )
+        selected_child = DataStructureElement.objects.get(
+            pk=int(choice_iter.value)
+        )
+        self.assertEqual(selected_child.parent_id, choice_iter.pk)
+        self.assertEqual(
+            selected_child.data_structure_id, explore_data_structure.id
+        )
+        self.assertEqual(
+            selected_child.pk,
+            choice_iter.children.order_by("pk").first().pk,
+        )
+        self.assertEqual(
+            explore_data_structure.copied_elements[base_choice_iter.value],
+            str(selected_child.pk),
+        )
+
+
+class TestGetOrCreateBaseExploreDataStructure(TestCase):
+    """Test get_or_create_base_explore_data_structure"""
+
+    def test_base_data_structure_is_generated_outside_user_request(self):
+        """test_base_data_structure_is_generated_outside_user_request"""
+        template = Template.objects.create(
+            filename="choice.xsd", content=CHOICE_XSD, hash="choice_hash"
+        )
+
+        base_data_structure = explore_data_structure_api.get_or_create_base_explore_data_structure(
+            template, get_base_data_structure_request()
+        )
+
+        self.assertEqual(
+            set(
+                DataStructureElement.objects.filter(
+                    data_structure=base_data_structure
+                ).values_list("user", flat=True)
+            ),
+            {explore_data_structure_api.BASE_DATA_STRUCTURE_USER},
+        )
@@ -32,6 +32,31 @@ class TestExploreDataStructureInsert(TestCase):
         explore_data_structure_api.upsert(data)
 
 
+class TestExploreDataStructureRevision(TestCase):
+    """Test the revision of the tree of elements after a save"""
+
+    @patch.object(explore_data_structure_api, "bump_data_structure_revision")
+    @patch.object(ExploreDataStructure, "save")
+    def test_upsert_bumps_revision(self, mock_save, mock_bump):
+        """test_upsert_bumps_revision"""
+        data = create_explore_data_structure("1", "name_title_1")
+
+        explore_data_structure_api.upsert(data)
+
+        mock_bump.assert_called_once_with(data.id)
+
+    @patch.object(explore_data_structure_api, "bump_data_structure_revision")
+    @patch.object(ExploreDataStructure, "save")
+    def test_save_selected_fields_keeps_revision(self, mock_save, mock_bump):
+        """test_save_selected_fields_keeps_revision"""
+        data = create_explore_data_structure("1", "name_title_1")
+
+        explore_data_structure_api.save_selected_fields(data)
+
+        mock_save.assert_called_once_with(update_fields=["selected_fields"])
+        mock_bump.assert_not_called()
+
+
 class TestExploreDataStructureGetByUserIdAndTemplateId(TestCase):
     """Test Explore Data Structure Get By User Id And TemplateId"""
 
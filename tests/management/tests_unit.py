@@ -0,0 +1,46 @@
+"""Unit tests for the management commands."""
+
+from io import StringIO
+from unittest import TestCase
+from unittest.mock import patch
+
+from django.core.management import call_command, CommandError
+
+
+class TestCreateExploreIndexesCommand(TestCase):
+    """Test create_explore_indexes command"""
+
+    def test_command_without_template_fails(self):
+        """test_command_without_template_fails"""
+        with self.assertRaises(CommandError):
+            call_command("create_explore_indexes", stdout=StringIO())
+
+    @patch("core_explore_example_app.utils.index_advisor.get_template_queries")
+    def test_dry_run_prints_paths_and_indexes(self, mock_get_template_queries):
+        """test_dry_run_prints_paths_and_indexes"""
+        mock_get_template_queries.return_value = [{"root.a": {"$gt": 1}}]
+        stdout = StringIO()
+
+        call_command(
+            "create_explore_indexes",
+            "--template",
+            "1",
+            "--dry-run",
+            stdout=stdout,
+        )
+
+        output = stdout.getvalue()
+        self.assertIn("root.a: $gt", output)
+        self.assertIn("dict_content.root.a", output)
+
+    @patch("core_explore_example_app.utils.index_advisor.get_template_queries")
+    def test_command_without_mongodb_indexing_fails(
+        self, mock_get_template_queries
+    ):
+        """test_command_without_mongodb_indexing_fails"""
+        mock_get_template_queries.return_value = [{"root.a": 1}]
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "create_explore_indexes", "--template", "1", stdout=StringIO()
+            )
@@ -7,3 +7,71 @@ class MockQueryObject(Mock):
     """MockQueryObject"""
 
     data_sources = []
+
+
+class MockMongoCollection:
+    """Local stand-in for a pymongo collection, recording the indexes"""
+
+    def __init__(self, name="data"):
+        self.name = name
+        self.indexes = {"_id_": {"key": [("_id", 1)]}}
+        self.database = MockMongoDatabase(self)
+
+    def index_information(self):
+        """Return the indexes of the collection
+
+        Returns:
+
+        """
+        return self.indexes
+
+    def create_index(self, keys):
+        """Create an index
+
+        Args:
+            keys:
+
+        Returns:
+
+        """
+        name = "_".join(f"{field}_{direction}" for field, direction in keys)
+        self.indexes[name] = {"key": list(keys)}
+        return name
+
+
+class MockMongoDatabase:
+    """Local stand-in for a pymongo database, explaining the find commands
+    with the indexes of the collection and recording the commands run"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.commands = []
+
+    def command(self, command, value=1, **kwargs):
+        """Run a command. Only explain of a find command on the collection is
+        supported, it returns a simplified plan: an index scan if the first
+        field of an index is in the filter, a collection scan otherwise
+
+        Args:
+            command:
+            value:
+            kwargs:
+
+        Returns:
+
+        """
+        self.commands.append((command, value, kwargs))
+        if command != "explain" or value.get("find") != self.collection.name:
+            raise NotImplementedError(f"Unsupported command: {command}")
+        query_filter = value["filter"]
+        for name, index_info in self.collection.indexes.items():
+            if index_info["key"][0][0] in query_filter:
+                winning_plan = {
+                    "stage": "FETCH",
+                    "filter": query_filter,
+                    "inputStage": {"stage": "IXSCAN", "indexName": name},
+                }
+                break
+        else:
+            winning_plan = {"stage": "COLLSCAN", "filter": query_filter}
+        return {"queryPlanner": {"winningPlan": winning_plan}}
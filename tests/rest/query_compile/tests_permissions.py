@@ -0,0 +1,73 @@
+"""Authentication tests for Query Compile REST API"""
+
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from rest_framework import status
+
+from core_explore_example_app.rest.query_compile.views import CompileQueryList
+from core_main_app.utils.tests_tools.MockUser import create_mock_user
+from core_main_app.utils.tests_tools.RequestMock import RequestMock
+
+MOCK_DATA = {"items": [{"template_id": "1", "form_values": [{"id": "1"}]}]}
+
+
+class TestCompileQueryListPostPermissions(SimpleTestCase):
+    """Test Compile Query List Post Permissions"""
+
+    def test_anonymous_returns_http_403(self):
+        """test_anonymous_returns_http_403"""
+        response = RequestMock.do_request_post(
+            CompileQueryList.as_view(), None, data=MOCK_DATA
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @patch("core_explore_example_app.rest.query_compile.views.compile_forms")
+    def test_authenticated_returns_http_200(self, mock_compile_forms):
+        """test_authenticated_returns_http_200"""
+        mock_compile_forms.return_value = [{"query": {"root.a": 1}}]
+        mock_user = create_mock_user("1")
+
+        response = RequestMock.do_request_post(
+            CompileQueryList.as_view(), mock_user, data=MOCK_DATA
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{"query": {"root.a": 1}}])
+        self.assertEqual(
+            mock_compile_forms.call_args[0][0],
+            [
+                {
+                    "template_id": "1",
+                    "form_values": [{"id": "1"}],
+                    "use_wildcard": False,
+                }
+            ],
+        )
+
+    def test_empty_batch_returns_http_400(self):
+        """test_empty_batch_returns_http_400"""
+        mock_user = create_mock_user("1")
+
+        response = RequestMock.do_request_post(
+            CompileQueryList.as_view(), mock_user, data={"items": []}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch(
+        "core_explore_example_app.rest.query_compile.serializers.EXPLORE_EXAMPLE_BATCH_COMPILE_MAX_ITEMS",
+        1,
+    )
+    def test_too_large_batch_returns_http_400(self):
+        """test_too_large_batch_returns_http_400"""
+        mock_user = create_mock_user("1")
+
+        response = RequestMock.do_request_post(
+            CompileQueryList.as_view(),
+            mock_user,
+            data={"items": MOCK_DATA["items"] * 2},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
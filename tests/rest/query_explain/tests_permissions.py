@@ -0,0 +1,61 @@
+"""Authentication tests for Query Explain REST API"""
+
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+from rest_framework import status
+
+from core_explore_example_app.rest.query_explain.views import ExplainQuery
+from core_main_app.utils.tests_tools.MockUser import create_mock_user
+from core_main_app.utils.tests_tools.RequestMock import RequestMock
+
+MOCK_DATA = {"templateID": "1", "formValues": [{"id": "1"}]}
+
+
+class TestExplainQueryPostPermissions(SimpleTestCase):
+    """Test Explain Query Post Permissions"""
+
+    def test_anonymous_returns_http_403(self):
+        """test_anonymous_returns_http_403"""
+        response = RequestMock.do_request_post(
+            ExplainQuery.as_view(), None, data=MOCK_DATA
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @patch("core_explore_example_app.rest.query_explain.views.compile_form")
+    def test_authenticated_returns_http_200(self, mock_compile_form):
+        """test_authenticated_returns_http_200"""
+        mock_compile_form.return_value = MagicMock(
+            errors=[], query={"root.a": 1}
+        )
+        mock_user = create_mock_user("1")
+
+        response = RequestMock.do_request_post(
+            ExplainQuery.as_view(), mock_user, data=MOCK_DATA
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["query"], {"root.a": 1})
+
+    @patch("core_explore_example_app.rest.query_explain.views.compile_form")
+    def test_invalid_form_returns_http_400(self, mock_compile_form):
+        """test_invalid_form_returns_http_400"""
+        mock_compile_form.return_value = MagicMock(errors=["error"])
+        mock_user = create_mock_user("1")
+
+        response = RequestMock.do_request_post(
+            ExplainQuery.as_view(), mock_user, data=MOCK_DATA
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_missing_template_returns_http_400(self):
+        """test_missing_template_returns_http_400"""
+        mock_user = create_mock_user("1")
+
+        response = RequestMock.do_request_post(
+            ExplainQuery.as_view(), mock_user, data={"formValues": []}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,28 @@
+"""Integration tests for the tasks of the explore example app"""
+
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from core_explore_example_app import signals
+from core_main_app.components.template.models import Template
+
+
+@patch.object(signals, "schedule_base_explore_data_structure")
+class TestPregenerateExploreDataStructure(TestCase):
+    """Test the generation scheduled when templates are saved"""
+
+    def test_generation_is_scheduled_when_template_becomes_current(
+        self, mock_schedule
+    ):
+        """test_generation_is_scheduled_when_template_becomes_current"""
+        template = Template.objects.create(
+            filename="template.xsd", content="<xs:schema/>", hash="hash"
+        )
+        mock_schedule.assert_not_called()
+
+        template.is_current = True
+        template.save()
+        template.save()
+
+        mock_schedule.assert_called_once_with(template.pk)
@@ -0,0 +1,179 @@
+"""Unit tests for the tasks of the explore example app"""
+
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from core_explore_example_app import signals, tasks
+from core_explore_example_app.components.explore_data_structure import (
+    api as explore_data_structure_api,
+)
+
+
+class TestGenerateBaseExploreDataStructure(TestCase):
+    """Test generate_base_explore_data_structure"""
+
+    @patch.object(tasks, "get_schema_info")
+    @patch.object(
+        explore_data_structure_api,
+        "get_or_create_base_explore_data_structure",
+    )
+    @patch.object(tasks.Template, "get_by_id")
+    def test_generates_base_data_structure(
+        self, mock_get_by_id, mock_get_or_create, mock_get_schema_info
+    ):
+        """test_generates_base_data_structure"""
+        template = MagicMock()
+        mock_get_by_id.return_value = template
+        explore_data_structure_api.set_base_generation_pending(1)
+
+        tasks.generate_base_explore_data_structure(1)
+
+        self.assertEqual(mock_get_or_create.call_args.args[0], template)
+        user = mock_get_or_create.call_args.args[1].user
+        self.assertFalse(user.is_superuser)
+        self.assertEqual(
+            user.id, explore_data_structure_api.BASE_DATA_STRUCTURE_USER
+        )
+        mock_get_schema_info.assert_called_once_with(template)
+        self.assertFalse(
+            explore_data_structure_api.is_base_generation_pending(1)
+        )
+
+    @patch.object(
+        explore_data_structure_api,
+        "get_or_create_base_explore_data_structure",
+    )
+    @patch.object(tasks.Template, "get_by_id")
+    def test_error_clears_pending_state(
+        self, mock_get_by_id, mock_get_or_create
+    ):
+        """test_error_clears_pending_state"""
+        mock_get_or_create.side_effect = Exception("error")
+        explore_data_structure_api.set_base_generation_pending(1)
+
+        tasks.generate_base_explore_data_structure(1)
+
+        self.assertFalse(
+            explore_data_structure_api.is_base_generation_pending(1)
+        )
+
+
+class TestScheduleBaseExploreDataStructure(TestCase):
+    """Test schedule_base_explore_data_structure"""
+
+    def tearDown(self):
+        """tearDown"""
+        explore_data_structure_api.set_base_generation_pending(
+            1, is_pending=False
+        )
+
+    @patch.object(tasks.transaction, "on_commit")
+    @patch.object(
+        explore_data_structure_api, "has_base_explore_data_structure"
+    )
+    def test_schedules_generation(self, mock_has_base, mock_on_commit):
+        """test_schedules_generation"""
+        mock_has_base.return_value = False
+
+        tasks.schedule_base_explore_data_structure(1)
+
+        mock_on_commit.assert_called_once()
+        self.assertTrue(
+            explore_data_structure_api.is_base_generation_pending(1)
+        )
+
+    @patch.object(tasks.transaction, "on_commit")
+    @patch.object(
+        explore_data_structure_api, "has_base_explore_data_structure"
+    )
+    def test_existing_base_is_not_generated(
+        self, mock_has_base, mock_on_commit
+    ):
+        """test_existing_base_is_not_generated"""
+        mock_has_base.return_value = True
+
+        tasks.schedule_base_explore_data_structure(1)
+
+        mock_on_commit.assert_not_called()
+        self.assertFalse(
+            explore_data_structure_api.is_base_generation_pending(1)
+        )
+
+    @patch.object(tasks.transaction, "on_commit")
+    @patch.object(
+        explore_data_structure_api, "has_base_explore_data_structure"
+    )
+    def test_pending_generation_is_not_scheduled_again(
+        self, mock_has_base, mock_on_commit
+    ):
+        """test_pending_generation_is_not_scheduled_again"""
+        mock_has_base.return_value = False
+        explore_data_structure_api.set_base_generation_pending(1)
+
+        tasks.schedule_base_explore_data_structure(1)
+
+        mock_on_commit.assert_not_called()
+
+    @patch.object(tasks.generate_base_explore_data_structure, "delay")
+    def test_unavailable_workers_clear_pending_state(self, mock_delay):
+        """test_unavailable_workers_clear_pending_state"""
+        mock_delay.side_effect = Exception("broker unavailable")
+        explore_data_structure_api.set_base_generation_pending(1)
+
+        tasks._start_base_generation(1)
+
+        self.assertFalse(
+            explore_data_structure_api.is_base_generation_pending(1)
+        )
+
+
+class TestPregenerateExploreDataStructure(TestCase):
+    """Test pregenerate_explore_data_structure"""
+
+    @patch.object(signals, "schedule_base_explore_data_structure")
+    def test_created_current_template_is_scheduled(self, mock_schedule):
+        """test_created_current_template_is_scheduled"""
+        template = MagicMock(pk=1, is_current=True, is_disabled=False)
+
+        signals.pregenerate_explore_data_structure(None, template, True)
+
+        mock_schedule.assert_called_once_with(1)
+
+    @patch.object(signals, "schedule_base_explore_data_structure")
+    def test_template_becoming_current_is_scheduled(self, mock_schedule):
+        """test_template_becoming_current_is_scheduled"""
+        template = MagicMock(
+            pk=1,
+            is_current=True,
+            is_disabled=False,
+            _explore_example_was_current=False,
+        )
+
+        signals.pregenerate_explore_data_structure(None, template, False)
+
+        mock_schedule.assert_called_once_with(1)
+
+    @patch.object(signals, "schedule_base_explore_data_structure")
+    def test_saving_current_template_is_not_scheduled(self, mock_schedule):
+        """test_saving_current_template_is_not_scheduled"""
+        template = MagicMock(
+            pk=1,
+            is_current=True,
+            is_disabled=False,
+            _explore_example_was_current=True,
+        )
+
+        signals.pregenerate_explore_data_structure(None, template, False)
+
+        mock_schedule.assert_not_called()
+
+    @patch.object(signals, "schedule_base_explore_data_structure")
+    def test_other_versions_are_not_scheduled(self, mock_schedule):
+        """test_other_versions_are_not_scheduled"""
+        for is_current, is_disabled in ((False, False), (True, True)):
+            template = MagicMock(
+                pk=1, is_current=is_current, is_disabled=is_disabled
+            )
+            signals.pregenerate_explore_data_structure(None, template, True)
+
+        mock_schedule.assert_not_called()
@@ -0,0 +1,64 @@
+"""Unit tests for cache utilities."""
+
+from unittest import TestCase
+
+from core_explore_example_app.utils.cache import (
+    LRUCache,
+    bump_generation,
+    get_generation,
+    get_generations,
+)
+
+
+class TestLRUCache(TestCase):
+    """Test LRUCache class"""
+
+    def test_get_returns_stored_value(self):
+        """test_get_returns_stored_value"""
+        cache = LRUCache(2)
+        cache.set("key", "value")
+        self.assertEqual(cache.get("key"), "value")
+
+    def test_get_returns_default_if_not_found(self):
+        """test_get_returns_default_if_not_found"""
+        cache = LRUCache(2)
+        self.assertEqual(cache.get("key", "default"), "default")
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """test_least_recently_used_entry_is_evicted"""
+        cache = LRUCache(2)
+        cache.set("key1", "value1")
+        cache.set("key2", "value2")
+        cache.get("key1")
+        cache.set("key3", "value3")
+
+        self.assertIn("key1", cache)
+        self.assertNotIn("key2", cache)
+        self.assertIn("key3", cache)
+
+    def test_size_zero_disables_cache(self):
+        """test_size_zero_disables_cache"""
+        cache = LRUCache(0)
+        cache.set("key", "value")
+        self.assertEqual(len(cache), 0)
+
+
+class TestGeneration(TestCase):
+    """Test generation functions"""
+
+    def test_get_generation_is_stable(self):
+        """test_get_generation_is_stable"""
+        self.assertEqual(
+            get_generation("test", "stable"), get_generation("test", "stable")
+        )
+
+    def test_bump_generation_changes_generation(self):
+        """test_bump_generation_changes_generation"""
+        generation = get_generation("test", "bump")
+        bump_generation("test", "bump")
+        self.assertNotEqual(get_generation("test", "bump"), generation)
+
+    def test_get_generations_returns_generation_of_each_object(self):
+        """test_get_generations_returns_generation_of_each_object"""
+        generations = get_generations("test", ["1", "2"])
+        self.assertEqual(set(generations.keys()), {"1", "2"})
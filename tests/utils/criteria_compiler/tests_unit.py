@@ -0,0 +1,181 @@
+"""Unit tests for the criteria compiler."""
+
+from unittest import TestCase
+
+from core_explore_example_app.utils import criteria_compiler
+from core_explore_example_app.utils.criteria_compiler import (
+    FloatTypeHandler,
+    GregorianTypeHandler,
+    IntTypeHandler,
+    StringTypeHandler,
+    TypeHandler,
+    build_float_criteria,
+    build_int_criteria,
+    build_string_criteria,
+    get_criteria_compiler,
+    register_type_handler,
+)
+
+
+class MockBooleanTypeHandler(TypeHandler):
+    """Mock handler for the boolean type"""
+
+    def compile(self, path, comparison, value):
+        return [{path: value == "true"}]
+
+    def validate(self, element_name, value):
+        if value not in ("true", "false"):
+            return f"Element {element_name} must be a boolean."
+        return None
+
+
+class TestBuildNumberCriteria(TestCase):
+    """Test build_int_criteria and build_float_criteria functions"""
+
+    def test_build_int_criteria_equal(self):
+        """test_build_int_criteria_equal"""
+        self.assertEqual(build_int_criteria("root.a", "=", "5"), {"root.a": 5})
+
+    def test_build_int_criteria_with_operator(self):
+        """test_build_int_criteria_with_operator"""
+        self.assertEqual(
+            build_int_criteria("root.a", "gte", "5"), {"root.a": {"$gte": 5}}
+        )
+
+    def test_build_float_criteria_with_operator(self):
+        """test_build_float_criteria_with_operator"""
+        self.assertEqual(
+            build_float_criteria("root.a", "lt", "2.5"),
+            {"root.a": {"$lt": 2.5}},
+        )
+
+
+class TestBuildStringCriteria(TestCase):
+    """Test build_string_criteria function"""
+
+    def test_build_string_criteria_is(self):
+        """test_build_string_criteria_is"""
+        self.assertEqual(
+            build_string_criteria("root.a", "is", "a.b"), {"root.a": "a.b"}
+        )
+
+    def test_build_string_criteria_like(self):
+        """test_build_string_criteria_like"""
+        self.assertEqual(
+            build_string_criteria("root.a", "like", "a.b"),
+            {"root.a": "/a.b/"},
+        )
+
+    def test_build_string_criteria_starts_with_is_anchored_and_escaped(self):
+        """test_build_string_criteria_starts_with_is_anchored_and_escaped"""
+        self.assertEqual(
+            build_string_criteria("root.a", "starts_with", "a.b"),
+            {"root.a": "/^a\\.b/"},
+        )
+
+    def test_build_string_criteria_is_ignore_case(self):
+        """test_build_string_criteria_is_ignore_case"""
+        self.assertEqual(
+            build_string_criteria("root.a", "is_ignore_case", "a.b"),
+            {"root.a": "/(?i)^a\\.b\\Z/"},
+        )
+
+    def test_build_string_criteria_contains_word_uses_text_search(self):
+        """test_build_string_criteria_contains_word_uses_text_search"""
+        self.assertEqual(
+            build_string_criteria("root.a", "contains_word", "word"),
+            {"$text": {"$search": '"word"'}, "root.a": "/(?i)word/"},
+        )
+
+    def test_build_string_criteria_contains_word_keeps_phrase_closed(self):
+        """test_build_string_criteria_contains_word_keeps_phrase_closed"""
+        criteria = build_string_criteria("root.a", "contains_word", 'a" -b "c')
+
+        self.assertEqual(criteria["$text"], {"$search": '"a  -b  c"'})
+
+
+class TestCriteriaCompiler(TestCase):
+    """Test CriteriaCompiler class"""
+
+    def test_compiler_is_resolved_once_per_prefix(self):
+        """test_compiler_is_resolved_once_per_prefix"""
+        self.assertIs(get_criteria_compiler("xs"), get_criteria_compiler("xs"))
+        self.assertIsNot(
+            get_criteria_compiler("xs"), get_criteria_compiler("xsd")
+        )
+
+    def test_dispatch_table_is_read_only(self):
+        """test_dispatch_table_is_read_only"""
+        with self.assertRaises(TypeError):
+            get_criteria_compiler("xs").dispatch_table["xs:int"] = None
+
+    def test_handlers_are_resolved_by_type(self):
+        """test_handlers_are_resolved_by_type"""
+        compiler = get_criteria_compiler("xs")
+
+        self.assertIsInstance(compiler.get_handler("xs:int"), IntTypeHandler)
+        self.assertIsInstance(
+            compiler.get_handler("xs:double"), FloatTypeHandler
+        )
+        self.assertIsInstance(
+            compiler.get_handler("xs:gYear"), GregorianTypeHandler
+        )
+        self.assertIsInstance(
+            compiler.get_handler("xs:string"), StringTypeHandler
+        )
+        self.assertIsInstance(compiler.get_handler(None), StringTypeHandler)
+
+    def test_handlers_use_prefix(self):
+        """test_handlers_use_prefix"""
+        compiler = get_criteria_compiler("xsd")
+
+        self.assertIsInstance(compiler.get_handler("xsd:int"), IntTypeHandler)
+        self.assertIsInstance(
+            compiler.get_handler("xs:int"), StringTypeHandler
+        )
+
+    def test_gregorian_number_compiles_to_int_and_string_criteria(self):
+        """test_gregorian_number_compiles_to_int_and_string_criteria"""
+        self.assertEqual(
+            get_criteria_compiler("xs").compile(
+                "root.a", "is", "2020", "xs:gYear"
+            ),
+            [{"root.a": 2020}, {"root.a": "2020"}],
+        )
+
+    def test_gregorian_string_compiles_to_string_criteria(self):
+        """test_gregorian_string_compiles_to_string_criteria"""
+        self.assertEqual(
+            get_criteria_compiler("xs").compile(
+                "root.a", "is", "--05", "xs:gMonth"
+            ),
+            [{"root.a": "--05"}],
+        )
+
+
+class TestRegisterTypeHandler(TestCase):
+    """Test register_type_handler function"""
+
+    def setUp(self):
+        """setUp"""
+        self.type_handlers = list(criteria_compiler._type_handlers)
+
+    def tearDown(self):
+        """tearDown"""
+        criteria_compiler._type_handlers[:] = self.type_handlers
+        get_criteria_compiler.cache_clear()
+
+    def test_registered_handler_compiles_and_validates_type(self):
+        """test_registered_handler_compiles_and_validates_type"""
+        get_criteria_compiler("xs")
+        register_type_handler(
+            lambda prefix: [f"{prefix}:boolean"], MockBooleanTypeHandler()
+        )
+        compiler = get_criteria_compiler("xs")
+
+        self.assertEqual(
+            compiler.compile("root.a", "=", "true", "xs:boolean"),
+            [{"root.a": True}],
+        )
+        self.assertIsNotNone(compiler.validate("a", "xs:boolean", "yes"))
+        self.assertIsNone(compiler.validate("a", "xs:boolean", "false"))
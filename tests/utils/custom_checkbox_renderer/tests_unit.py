@@ -0,0 +1,94 @@
+"""Unit tests for the custom checkbox renderer."""
+
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from core_parser_app.tools.parser.renderer.list import (
+    AbstractListRenderer,
+    ListRenderer,
+)
+
+from core_explore_example_app.utils.custom_checkbox_renderer import (
+    CustomCheckboxRenderer,
+)
+
+
+def _init_renderer(renderer, xsd_data):
+    """Initialize a renderer without loading its templates
+
+    Args:
+        renderer:
+        xsd_data:
+
+    Returns:
+
+    """
+    renderer.data = xsd_data
+    renderer.templates = dict()
+
+
+def _render_nested_complex_type(renderer, element):
+    """Render a complex type containing its child complex type
+
+    Args:
+        renderer:
+        element:
+
+    Returns:
+
+    """
+    if element.child is None:
+        return "leaf"
+    return f"<ul>{renderer.render_complex_type(element.child)}</ul>"
+
+
+def _create_complex_types(depth):
+    """Create nested complex types
+
+    Args:
+        depth:
+
+    Returns:
+
+    """
+    element = MagicMock(pk=depth, child=None)
+    for pk in range(depth - 1, 0, -1):
+        element = MagicMock(pk=pk, child=element)
+    return element
+
+
+@patch.object(
+    ListRenderer,
+    "render_complex_type",
+    autospec=True,
+    side_effect=_render_nested_complex_type,
+)
+@patch.object(AbstractListRenderer, "__init__", _init_renderer)
+class TestRenderComplexType(TestCase):
+    """Test render_complex_type method"""
+
+    def test_whole_tree_is_rendered_without_max_depth(
+        self, mock_render_complex_type
+    ):
+        """test_whole_tree_is_rendered_without_max_depth"""
+        element = _create_complex_types(4)
+        renderer = CustomCheckboxRenderer(element, None)
+
+        html_form = renderer.render_complex_type(element)
+
+        self.assertEqual(html_form, "<ul><ul><ul>leaf</ul></ul></ul>")
+        self.assertEqual(mock_render_complex_type.call_count, 4)
+
+    def test_deep_subtrees_are_replaced_by_placeholder(
+        self, mock_render_complex_type
+    ):
+        """test_deep_subtrees_are_replaced_by_placeholder"""
+        element = _create_complex_types(4)
+        renderer = CustomCheckboxRenderer(element, None, max_depth=2)
+
+        html_form = renderer.render_complex_type(element)
+
+        self.assertIn('data-subtree-id="3"', html_form)
+        self.assertNotIn("leaf", html_form)
+        self.assertEqual(mock_render_complex_type.call_count, 2)
+        self.assertEqual(renderer.depth, 0)
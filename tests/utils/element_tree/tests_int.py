@@ -0,0 +1,93 @@
+"""Integration tests for the in-memory trees of data structure elements."""
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core_explore_example_app.utils.element_tree import load_element_tree
+from core_parser_app.components.data_structure.models import (
+    DataStructureElement,
+)
+
+
+def _create_element(tag, parent=None, value=None, options=None):
+    """Create a data structure element
+
+    Args:
+        tag:
+        parent:
+        value:
+        options:
+
+    Returns:
+
+    """
+    return DataStructureElement.objects.create(
+        tag=tag, value=value, options=options or {}, parent=parent
+    )
+
+
+class TestLoadElementTree(TestCase):
+    """Test load_element_tree function"""
+
+    def setUp(self):
+        """setUp"""
+        self.root = _create_element("element", options={"name": "root"})
+        self.iterations = [
+            _create_element("elem-iter", self.root) for _ in range(3)
+        ]
+        self.leaf = _create_element(
+            "input", self.iterations[0], value="true", options={"a": 1}
+        )
+        self.other_root = _create_element("element")
+        _create_element("elem-iter", self.other_root)
+
+    def test_subtree_is_loaded_in_single_query(self):
+        """test_subtree_is_loaded_in_single_query"""
+        with CaptureQueriesContext(connection) as queries:
+            root = load_element_tree(self.root)
+            iteration = root.children.all().order_by("pk")[0]
+            leaf = iteration.children.all()[0]
+            children_count = root.children.count()
+            leaf_children_count = leaf.children.count()
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(children_count, 3)
+        self.assertEqual(leaf_children_count, 0)
+        self.assertEqual(leaf.pk, self.leaf.pk)
+        self.assertEqual(leaf.tag, "input")
+        self.assertEqual(leaf.value, "true")
+        self.assertEqual(leaf.options, {"a": 1})
+
+    def test_children_are_sorted_by_id(self):
+        """test_children_are_sorted_by_id"""
+        root = load_element_tree(self.root)
+
+        self.assertEqual(
+            [child.pk for child in root.children],
+            [iteration.pk for iteration in self.iterations],
+        )
+
+    def test_root_keeps_values_of_instance(self):
+        """test_root_keeps_values_of_instance"""
+        self.root.options["real_root"] = "1"
+
+        root = load_element_tree(self.root)
+
+        self.assertEqual(root.options["real_root"], "1")
+
+    def test_set_children_detaches_other_children(self):
+        """test_set_children_detaches_other_children"""
+        root = load_element_tree(self.root)
+
+        root.children.set([root.children.all()[0]])
+
+        self.assertEqual(root.children.count(), 1)
+        self.assertEqual(
+            list(
+                DataStructureElement.objects.filter(
+                    parent=self.root
+                ).values_list("pk", flat=True)
+            ),
+            [self.iterations[0].pk],
+        )
@@ -0,0 +1,107 @@
+"""Unit tests for the in-memory trees of data structure elements."""
+
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from core_explore_example_app.utils.element_tree import (
+    get_tree_data_structure_id,
+    merge_copied_elements,
+    resolve_element_id,
+)
+
+# pk, tag, value, options, parent_id
+BASE_ROWS = [
+    (1, "element", None, {}, None),
+    (2, "choice-iter", "3", {}, 1),
+    (3, "element", None, {"name": "a"}, 2),
+    (4, "element", None, {"name": "b"}, 2),
+    (5, "element", None, {"name": "c"}, 1),
+]
+
+
+class TestMergeCopiedElements(TestCase):
+    """Test merge_copied_elements function"""
+
+    def test_copied_subtree_takes_place_of_shared_subtree(self):
+        """test_copied_subtree_takes_place_of_shared_subtree"""
+        copied_rows = [
+            (10, "choice-iter", "11", {}, None),
+            (11, "element", None, {"name": "a"}, 10),
+            (12, "element", None, {"name": "b"}, 10),
+        ]
+
+        rows = merge_copied_elements(
+            BASE_ROWS, copied_rows, {"2": "10", "3": "11", "4": "12"}
+        )
+
+        self.assertEqual(
+            [row[0] for row in rows if row[4] == 1],
+            [10, 5],
+        )
+        self.assertEqual(
+            [row[0] for row in rows if row[4] == 10],
+            [11, 12],
+        )
+        self.assertNotIn(2, [row[0] for row in rows])
+
+    def test_choice_selects_copied_child(self):
+        """test_choice_selects_copied_child"""
+        copied_rows = [
+            (10, "element", None, {"name": "a"}, None),
+        ]
+
+        rows = merge_copied_elements(BASE_ROWS, copied_rows, {"3": "10"})
+
+        self.assertEqual(rows[1], (2, "choice-iter", "10", {}, 1))
+        self.assertEqual(rows[2], (10, "element", None, {"name": "a"}, 2))
+
+    def test_detached_elements_are_not_attached(self):
+        """test_detached_elements_are_not_attached"""
+        copied_rows = [
+            (10, "element", None, {"name": "c"}, None),
+            (11, "element", None, {"name": "d"}, None),
+        ]
+
+        rows = merge_copied_elements(BASE_ROWS, copied_rows, {"5": "10"})
+
+        self.assertIn((10, "element", None, {"name": "c"}, 1), rows)
+        self.assertIn((11, "element", None, {"name": "d"}, None), rows)
+
+
+class TestGetTreeDataStructureId(TestCase):
+    """Test get_tree_data_structure_id function"""
+
+    def test_tree_of_base_is_shared_without_copied_elements(self):
+        """test_tree_of_base_is_shared_without_copied_elements"""
+        explore_data_structure = MagicMock(
+            id=2, base_data_structure_id=1, copied_elements={}
+        )
+
+        self.assertEqual(get_tree_data_structure_id(explore_data_structure), 1)
+
+    def test_tree_of_user_with_copied_elements(self):
+        """test_tree_of_user_with_copied_elements"""
+        explore_data_structure = MagicMock(
+            id=2, base_data_structure_id=1, copied_elements={"3": "10"}
+        )
+
+        self.assertEqual(get_tree_data_structure_id(explore_data_structure), 2)
+
+    def test_tree_of_data_structure_without_base(self):
+        """test_tree_of_data_structure_without_base"""
+        explore_data_structure = MagicMock(
+            id=2, base_data_structure_id=None, copied_elements={}
+        )
+
+        self.assertEqual(get_tree_data_structure_id(explore_data_structure), 2)
+
+
+class TestResolveElementId(TestCase):
+    """Test resolve_element_id function"""
+
+    def test_copied_element_resolves_to_copy(self):
+        """test_copied_element_resolves_to_copy"""
+        explore_data_structure = MagicMock(copied_elements={"3": "10"})
+
+        self.assertEqual(resolve_element_id(explore_data_structure, 3), "10")
+        self.assertEqual(resolve_element_id(explore_data_structure, 4), "4")
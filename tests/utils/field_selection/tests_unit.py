@@ -0,0 +1,378 @@
+"""Unit tests for the fields selected by the user."""
+
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from lxml import html
+
+from core_explore_example_app.utils import field_selection
+from core_explore_example_app.utils.cache import (
+    bump_data_structure_revision,
+    get_cache,
+)
+from core_explore_example_app.utils.field_selection import (
+    apply_selection,
+    build_selection_index,
+    get_selection,
+    get_selection_index,
+    get_selection_tree,
+    parse_selection,
+    render_selection_form,
+    render_selection_subtree,
+    update_selection,
+)
+from core_explore_example_app.utils.query_builder import prune_html_tree
+
+MOCK_FORM = (
+    "<div>"
+    "<ul>"
+    '<li class="1"><input type="checkbox"/>a</li>'
+    '<li class="2"><input type="checkbox"/>b</li>'
+    '<li class="3"><span>c</span><ul>'
+    '<li class="4"><input type="checkbox"/>d</li>'
+    '<li class="5"><input type="checkbox"/>e</li>'
+    "</ul></li>"
+    '<li class="6"><span>f</span><ul><input type="checkbox"/>'
+    '<li class="7"><input type="checkbox"/>g</li>'
+    "</ul></li>"
+    "</ul>"
+    "</div>"
+)
+
+
+def _get_pruned_tree(element_ids):
+    """Returns the pruned tree of the form with the given selection
+
+    Args:
+        element_ids:
+
+    Returns:
+
+    """
+    html_tree = html.fromstring(MOCK_FORM)
+    apply_selection(html_tree, element_ids)
+    prune_html_tree(html_tree)
+    return html_tree
+
+
+@patch("core_explore_example_app.utils.query_builder.MONGODB_INDEXING", True)
+class TestGetSelection(TestCase):
+    """Test get_selection function"""
+
+    def test_get_selection_returns_elements_and_parents(self):
+        """test_get_selection_returns_elements_and_parents"""
+        selection = get_selection(_get_pruned_tree(["1", "4", "5"]))
+
+        self.assertEqual(
+            selection,
+            {"elements": ["1", "4", "5"], "parents": {"3": ["4", "5"]}},
+        )
+
+    def test_box_of_element_with_children_is_checked(self):
+        """test_box_of_element_with_children_is_checked"""
+        selection = get_selection(_get_pruned_tree(["6"]))
+
+        self.assertEqual(selection, {"elements": ["6"], "parents": {}})
+
+    def test_selection_renders_same_tree(self):
+        """test_selection_renders_same_tree"""
+        html_tree = _get_pruned_tree(["1", "4", "5", "6"])
+
+        selection = get_selection(html_tree)
+
+        self.assertEqual(
+            html.tostring(_get_pruned_tree(selection["elements"])),
+            html.tostring(html_tree),
+        )
+
+
+def _get_form_content(element_ids, form=MOCK_FORM):
+    """Returns the HTML of the form with the given selection
+
+    Args:
+        element_ids:
+        form:
+
+    Returns:
+
+    """
+    html_tree = html.fromstring(form)
+    apply_selection(html_tree, element_ids)
+    return html.tostring(html_tree, encoding="unicode")
+
+
+@patch("core_explore_example_app.utils.query_builder.MONGODB_INDEXING", True)
+@patch("core_explore_example_app.utils.field_selection.MONGODB_INDEXING", True)
+class TestParseSelection(TestCase):
+    """Test parse_selection function"""
+
+    def test_selection_matches_pruned_form(self):
+        """test_selection_matches_pruned_form"""
+        for element_ids in (["1", "4", "5"], ["4", "5", "6"], ["2", "7"]):
+            selection = parse_selection(_get_form_content(element_ids))
+
+            self.assertEqual(
+                selection, get_selection(_get_pruned_tree(element_ids))
+            )
+
+    def test_nothing_selected_returns_none(self):
+        """test_nothing_selected_returns_none"""
+        self.assertIsNone(parse_selection(_get_form_content([])))
+
+    def test_lists_of_form_with_several_top_elements(self):
+        """test_lists_of_form_with_several_top_elements"""
+        form_content = _get_form_content(["1"], MOCK_FORM[5:-6] * 2)
+
+        self.assertEqual(
+            parse_selection(form_content),
+            {"elements": ["1", "1"], "parents": {}},
+        )
+
+    def test_choice_is_not_a_parent(self):
+        """test_choice_is_not_a_parent"""
+        form_content = _get_form_content(
+            ["4", "5"],
+            "<div><ul>"
+            '<li class="3"><select></select><ul>'
+            '<li class="4"><input type="checkbox"/>d</li>'
+            '<li class="5"><input type="checkbox"/>e</li>'
+            "</ul></li>"
+            "</ul></div>",
+        )
+
+        self.assertEqual(
+            parse_selection(form_content),
+            {"elements": ["4", "5"], "parents": {}},
+        )
+
+
+class TestGetSelectionTree(TestCase):
+    """Test get_selection_tree function"""
+
+    def setUp(self):
+        """setUp"""
+        field_selection._selection_trees.clear()
+        get_cache().clear()
+        self.explore_data_structure = MagicMock(
+            id=1, selected_fields={"elements": ["1"], "parents": {}}
+        )
+
+    @patch("core_explore_example_app.utils.field_selection.get_rendered_form")
+    def test_tree_is_rendered_from_selection(self, mock_get_rendered_form):
+        """test_tree_is_rendered_from_selection"""
+        mock_get_rendered_form.return_value = MOCK_FORM
+
+        selection_tree = get_selection_tree(None, self.explore_data_structure)
+
+        li = html.fromstring(selection_tree).find(".//li[@class='1']")
+        self.assertEqual(li.attrib["select_class"], "element")
+
+    @patch("core_explore_example_app.utils.field_selection.get_rendered_form")
+    def test_tree_is_rendered_once(self, mock_get_rendered_form):
+        """test_tree_is_rendered_once"""
+        mock_get_rendered_form.return_value = MOCK_FORM
+
+        get_selection_tree(None, self.explore_data_structure)
+        field_selection._selection_trees.clear()
+        get_selection_tree(None, self.explore_data_structure)
+
+        self.assertEqual(mock_get_rendered_form.call_count, 1)
+
+    @patch("core_explore_example_app.utils.field_selection.get_rendered_form")
+    def test_tree_is_rendered_again_after_change(self, mock_get_rendered_form):
+        """test_tree_is_rendered_again_after_change"""
+        mock_get_rendered_form.return_value = MOCK_FORM
+
+        get_selection_tree(None, self.explore_data_structure)
+        bump_data_structure_revision(1)
+        get_selection_tree(None, self.explore_data_structure)
+        self.explore_data_structure.selected_fields = {
+            "elements": ["2"],
+            "parents": {},
+        }
+        get_selection_tree(None, self.explore_data_structure)
+
+        self.assertEqual(mock_get_rendered_form.call_count, 3)
+
+    @patch("core_explore_example_app.utils.field_selection.get_rendered_form")
+    def test_no_selection_returns_none(self, mock_get_rendered_form):
+        """test_no_selection_returns_none"""
+        self.explore_data_structure.selected_fields = None
+
+        self.assertIsNone(
+            get_selection_tree(None, self.explore_data_structure)
+        )
+        mock_get_rendered_form.assert_not_called()
+
+
+class TestBuildSelectionIndex(TestCase):
+    """Test build_selection_index function"""
+
+    def test_index_contains_selectable_elements_and_groups(self):
+        """test_index_contains_selectable_elements_and_groups"""
+        selection_index = build_selection_index(html.fromstring(MOCK_FORM))
+
+        self.assertEqual(
+            selection_index,
+            {
+                "positions": {
+                    "1": 0,
+                    "2": 1,
+                    "4": 2,
+                    "5": 3,
+                    "6": 4,
+                    "7": 5,
+                },
+                "parents": {"4": "3", "5": "3", "7": "6"},
+                "leaves": {"3": ["4", "5"], "6": ["7"]},
+            },
+        )
+
+
+@patch("core_explore_example_app.utils.query_builder.MONGODB_INDEXING", True)
+@patch("core_explore_example_app.utils.field_selection.MONGODB_INDEXING", True)
+class TestUpdateSelection(TestCase):
+    """Test update_selection function"""
+
+    def setUp(self):
+        """setUp"""
+        self.selection_index = build_selection_index(
+            html.fromstring(MOCK_FORM)
+        )
+
+    def test_selection_matches_pruned_form(self):
+        """test_selection_matches_pruned_form"""
+        for element_ids in (["1", "4", "5"], ["4", "5", "6"], ["2", "7"]):
+            selection = update_selection(
+                None, self.selection_index, element_ids, []
+            )
+
+            self.assertEqual(
+                selection, get_selection(_get_pruned_tree(element_ids))
+            )
+
+    def test_deselect_leaf_removes_group(self):
+        """test_deselect_leaf_removes_group"""
+        selection = update_selection(
+            None, self.selection_index, ["1", "4", "5"], []
+        )
+
+        selection = update_selection(
+            selection, self.selection_index, [], ["5"]
+        )
+
+        self.assertEqual(selection, {"elements": ["1", "4"], "parents": {}})
+
+    def test_unknown_elements_are_ignored(self):
+        """test_unknown_elements_are_ignored"""
+        selection = {"elements": ["1", "removed"], "parents": {}}
+
+        selection = update_selection(
+            selection, self.selection_index, ["2", "unknown"], []
+        )
+
+        self.assertEqual(selection, {"elements": ["1", "2"], "parents": {}})
+
+    def test_deselect_all_returns_none(self):
+        """test_deselect_all_returns_none"""
+        selection = {"elements": ["1"], "parents": {}}
+
+        self.assertIsNone(
+            update_selection(selection, self.selection_index, [], ["1"])
+        )
+
+
+@patch(
+    "core_explore_example_app.utils.field_selection.MONGODB_INDEXING", False
+)
+class TestUpdateSelectionWithoutMongoDB(TestCase):
+    """Test update_selection function when data is not stored in MongoDB"""
+
+    def test_no_group_without_mongodb(self):
+        """test_no_group_without_mongodb"""
+        selection_index = build_selection_index(html.fromstring(MOCK_FORM))
+
+        selection = update_selection(None, selection_index, ["4", "5"], [])
+
+        self.assertEqual(selection, {"elements": ["4", "5"], "parents": {}})
+
+
+@patch("core_explore_example_app.utils.field_selection.get_rendered_form")
+class TestGetSelectionIndex(TestCase):
+    """Test get_selection_index function"""
+
+    def setUp(self):
+        """setUp"""
+        field_selection._selection_indexes.clear()
+        get_cache().clear()
+
+    def test_index_is_built_once_per_revision(self, mock_get_rendered_form):
+        """test_index_is_built_once_per_revision"""
+        mock_get_rendered_form.return_value = MOCK_FORM
+        explore_data_structure = MagicMock(id=1)
+
+        get_selection_index(None, explore_data_structure)
+        get_selection_index(None, explore_data_structure)
+        bump_data_structure_revision(1)
+        selection_index = get_selection_index(None, explore_data_structure)
+
+        self.assertEqual(mock_get_rendered_form.call_count, 2)
+        self.assertIn("7", selection_index["positions"])
+
+
+@patch("core_explore_example_app.utils.field_selection.get_rendered_form")
+class TestRenderSelectionForm(TestCase):
+    """Test render_selection_form function"""
+
+    def test_boxes_of_selected_fields_are_checked(
+        self, mock_get_rendered_form
+    ):
+        """test_boxes_of_selected_fields_are_checked"""
+        mock_get_rendered_form.return_value = MOCK_FORM
+        explore_data_structure = MagicMock(
+            selected_fields={"elements": ["2"], "parents": {}}
+        )
+
+        form = render_selection_form(None, explore_data_structure)
+
+        html_tree = html.fromstring(form)
+        self.assertEqual(html_tree.tag, "div")
+        checkbox = html_tree.find(".//li[@class='2']/input")
+        self.assertEqual(checkbox.attrib["checked"], "checked")
+        checkbox = html_tree.find(".//li[@class='1']/input")
+        self.assertNotIn("checked", checkbox.attrib)
+
+    def test_form_without_selection_is_not_changed(
+        self, mock_get_rendered_form
+    ):
+        """test_form_without_selection_is_not_changed"""
+        mock_get_rendered_form.return_value = MOCK_FORM
+
+        form = render_selection_form(None, MagicMock(selected_fields=None))
+
+        self.assertEqual(form, MOCK_FORM)
+
+
+@patch("core_explore_example_app.utils.field_selection.render_subtree")
+class TestRenderSelectionSubtree(TestCase):
+    """Test render_selection_subtree function"""
+
+    def test_boxes_of_selected_fields_are_checked(self, mock_render_subtree):
+        """test_boxes_of_selected_fields_are_checked"""
+        mock_render_subtree.return_value = (
+            '<li class="4"><input type="checkbox"/>d</li>'
+            '<li class="5"><input type="checkbox"/>e</li>'
+        )
+        explore_data_structure = MagicMock(
+            selected_fields={"elements": ["5"], "parents": {}}
+        )
+
+        subtree = render_selection_subtree(
+            None, explore_data_structure, MagicMock()
+        )
+
+        html_tree = html.fragment_fromstring(subtree, create_parent="ul")
+        checkbox = html_tree.find(".//li[@class='5']/input")
+        self.assertEqual(checkbox.attrib["checked"], "checked")
+        checkbox = html_tree.find(".//li[@class='4']/input")
+        self.assertNotIn("checked", checkbox.attrib)
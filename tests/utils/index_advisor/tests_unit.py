@@ -0,0 +1,165 @@
+"""Unit tests for the index advisor."""
+
+import json
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from core_explore_example_app.utils.index_advisor import (
+    collect_query_paths,
+    create_indexes,
+    get_index_specs,
+    get_template_queries,
+)
+from tests.mocks import MockMongoCollection
+
+QUERY = {
+    "$and": [
+        {"$or": [{"root.a": 1}, {"root.a.#text": 1}]},
+        {"root.b": {"$gt": 2.0}},
+        {"root.c": "/value/"},
+    ]
+}
+SUB_ELEMENTS_QUERY = {
+    "root.list": {
+        "$elemMatch": {
+            "$and": [
+                {"$or": [{"x": {"$lt": 3}}, {"x.#text": {"$lt": 3}}]},
+                {"y": "value"},
+            ]
+        }
+    }
+}
+
+
+class TestCollectQueryPaths(TestCase):
+    """Test collect_query_paths function"""
+
+    def test_paths_and_operators_are_collected(self):
+        """test_paths_and_operators_are_collected"""
+        paths, elem_match_paths = collect_query_paths(QUERY)
+
+        self.assertEqual(
+            paths,
+            {
+                "root.a": {"$eq"},
+                "root.a.#text": {"$eq"},
+                "root.b": {"$gt"},
+                "root.c": {"$regex"},
+            },
+        )
+        self.assertEqual(elem_match_paths, {})
+
+    def test_elem_match_paths_are_collected_by_parent(self):
+        """test_elem_match_paths_are_collected_by_parent"""
+        paths, elem_match_paths = collect_query_paths(SUB_ELEMENTS_QUERY)
+
+        self.assertEqual(paths, {})
+        self.assertEqual(
+            elem_match_paths,
+            {
+                "root.list": {
+                    "root.list.x": {"$lt"},
+                    "root.list.x.#text": {"$lt"},
+                    "root.list.y": {"$eq"},
+                }
+            },
+        )
+
+
+class TestGetIndexSpecs(TestCase):
+    """Test get_index_specs function"""
+
+    def test_each_path_has_a_compound_index_with_template(self):
+        """test_each_path_has_a_compound_index_with_template"""
+        self.assertEqual(
+            get_index_specs([QUERY]),
+            [
+                [("template", 1), ("dict_content.root.a", 1)],
+                [("template", 1), ("dict_content.root.a.#text", 1)],
+                [("template", 1), ("dict_content.root.b", 1)],
+                [("template", 1), ("dict_content.root.c", 1)],
+            ],
+        )
+
+    def test_elem_match_has_a_multikey_index_with_equality_first(self):
+        """test_elem_match_has_a_multikey_index_with_equality_first"""
+        self.assertEqual(
+            get_index_specs([SUB_ELEMENTS_QUERY]),
+            [
+                [
+                    ("template", 1),
+                    ("dict_content.root.list.y", 1),
+                    ("dict_content.root.list.x", 1),
+                    ("dict_content.root.list.x.#text", 1),
+                ]
+            ],
+        )
+
+    def test_prefix_indexes_are_removed(self):
+        """test_prefix_indexes_are_removed"""
+        index_specs = get_index_specs(
+            [SUB_ELEMENTS_QUERY, {"root.list.y": "value"}, QUERY, QUERY]
+        )
+
+        self.assertEqual(len(index_specs), 5)
+        self.assertNotIn(
+            [("template", 1), ("dict_content.root.list.y", 1)], index_specs
+        )
+
+
+class TestGetTemplateQueries(TestCase):
+    """Test get_template_queries function"""
+
+    @patch(
+        "core_explore_example_app.system.api.get_persistent_queries_by_template"
+    )
+    @patch("core_explore_example_app.system.api.get_saved_queries_by_template")
+    def test_saved_and_persistent_queries_are_returned(
+        self, mock_get_saved_queries, mock_get_persistent_queries
+    ):
+        """test_saved_and_persistent_queries_are_returned"""
+        mock_get_saved_queries.return_value = [
+            MagicMock(query=json.dumps(QUERY))
+        ]
+        mock_get_persistent_queries.return_value = [
+            MagicMock(content=json.dumps(SUB_ELEMENTS_QUERY)),
+            MagicMock(content=None),
+            MagicMock(content="not json"),
+        ]
+
+        self.assertEqual(get_template_queries(1), [QUERY, SUB_ELEMENTS_QUERY])
+
+
+class TestCreateIndexes(TestCase):
+    """Test create_indexes function"""
+
+    def test_missing_indexes_are_created(self):
+        """test_missing_indexes_are_created"""
+        collection = MockMongoCollection()
+        index_specs = get_index_specs([QUERY])
+
+        created_specs = create_indexes(collection, index_specs)
+
+        self.assertEqual(created_specs, index_specs)
+        self.assertEqual(len(collection.index_information()), 5)
+
+    def test_existing_indexes_are_not_created(self):
+        """test_existing_indexes_are_not_created"""
+        collection = MockMongoCollection()
+        index_specs = get_index_specs([QUERY])
+        create_indexes(collection, index_specs[:2])
+
+        created_specs = create_indexes(collection, index_specs)
+
+        self.assertEqual(created_specs, index_specs[2:])
+
+    def test_dry_run_does_not_create_indexes(self):
+        """test_dry_run_does_not_create_indexes"""
+        collection = MockMongoCollection()
+
+        index_specs = create_indexes(
+            collection, get_index_specs([QUERY]), dry_run=True
+        )
+
+        self.assertEqual(len(index_specs), 4)
+        self.assertEqual(len(collection.index_information()), 1)
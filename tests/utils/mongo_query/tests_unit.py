@@ -1,11 +1,22 @@
 """Build Criteria Regression Test"""
 
 from unittest.case import TestCase
+from unittest.mock import MagicMock, patch
 
+from core_explore_example_app.commons.exceptions import MongoQueryException
 from core_explore_example_app.utils.mongo_query import (
     build_or_criteria,
     build_and_criteria,
     build_wildcard_elem_match_criteria,
+    build_criteria,
+    check_query_form,
+    get_wildcard_paths,
+    invert_query,
+)
+from core_explore_example_app.utils.schema_catalog import (
+    ALL_VALUE_LOCATIONS,
+    ELEMENT_VALUE,
+    TEXT_VALUE,
 )
 
 mock_criteria_1 = {"root.variable": "value"}
@@ -232,3 +243,367 @@ class TestBuildWildcardCriteria(TestCase):
         elem_match_criteria["$elemMatch"].update(criteria1)
         elem_match_criteria["$elemMatch"].update(criteria2)
         return {"list_content": elem_match_criteria}
+
+
+class TestBuildCriteria(TestCase):
+    """Test build_criteria function"""
+
+    def test_build_criteria_without_value_locations_uses_both_paths(self):
+        """test_build_criteria_without_value_locations_uses_both_paths"""
+        criteria = build_criteria("root.variable", "is", "value", None, "xs")
+
+        self.assertEqual(criteria, {"$or": [mock_criteria_1, mock_criteria_2]})
+
+    def test_build_criteria_with_all_value_locations_uses_both_paths(self):
+        """test_build_criteria_with_all_value_locations_uses_both_paths"""
+        criteria = build_criteria(
+            "root.variable",
+            "is",
+            "value",
+            None,
+            "xs",
+            value_locations=ALL_VALUE_LOCATIONS,
+        )
+
+        self.assertEqual(criteria, {"$or": [mock_criteria_1, mock_criteria_2]})
+
+    def test_build_criteria_at_element_uses_element_path(self):
+        """test_build_criteria_at_element_uses_element_path"""
+        criteria = build_criteria(
+            "root.variable",
+            "is",
+            "value",
+            None,
+            "xs",
+            value_locations=(ELEMENT_VALUE,),
+        )
+
+        self.assertEqual(criteria, mock_criteria_1)
+
+    def test_build_criteria_at_text_uses_text_path(self):
+        """test_build_criteria_at_text_uses_text_path"""
+        criteria = build_criteria(
+            "root.variable",
+            "is",
+            "value",
+            None,
+            "xs",
+            value_locations=(TEXT_VALUE,),
+        )
+
+        self.assertEqual(criteria, mock_criteria_2)
+
+    def test_build_not_criteria_at_element_inverts_single_path(self):
+        """test_build_not_criteria_at_element_inverts_single_path"""
+        criteria = build_criteria(
+            "root.variable",
+            "gt",
+            "1",
+            "xs:int",
+            "xs",
+            is_not=True,
+            value_locations=(ELEMENT_VALUE,),
+        )
+
+        self.assertEqual(
+            criteria,
+            {
+                "$or": [
+                    {"root.variable": {"$lte": 1}},
+                    {"root.variable": {"$not": {"$exists": True}}},
+                ]
+            },
+        )
+
+    def test_build_criteria_with_wildcard_paths_uses_concrete_paths_and_regex(
+        self,
+    ):
+        """test_build_criteria_with_wildcard_paths_uses_concrete_paths_and_regex"""
+        criteria = build_criteria(
+            "root.variable",
+            "is",
+            "value",
+            None,
+            "xs",
+            use_wildcard=True,
+            value_locations=(ELEMENT_VALUE,),
+            wildcard_paths=("root.variable", "root.other.variable"),
+        )
+
+        self.assertEqual(
+            criteria,
+            {
+                "$or": [
+                    mock_criteria_1,
+                    {"root.other.variable": "value"},
+                    {
+                        "list_content": {
+                            "$elemMatch": {
+                                "path": "/.*root.variable/",
+                                "value": "value",
+                            }
+                        }
+                    },
+                ]
+            },
+        )
+
+    def test_build_criteria_with_wildcard_without_paths_uses_regex(self):
+        """test_build_criteria_with_wildcard_without_paths_uses_regex"""
+        criteria = build_criteria(
+            "root.variable",
+            "is",
+            "value",
+            None,
+            "xs",
+            use_wildcard=True,
+            value_locations=(ELEMENT_VALUE,),
+        )
+
+        self.assertEqual(
+            criteria,
+            {
+                "$or": [
+                    mock_criteria_1,
+                    {
+                        "list_content": {
+                            "$elemMatch": {
+                                "path": "/.*root.variable/",
+                                "value": "value",
+                            }
+                        }
+                    },
+                ]
+            },
+        )
+
+    def test_build_contains_word_criteria_searches_text_once(self):
+        """test_build_contains_word_criteria_searches_text_once"""
+        criteria = build_criteria(
+            "root.variable", "contains_word", "value", None, "xs"
+        )
+
+        self.assertEqual(
+            criteria,
+            {
+                "$and": [
+                    {"$text": {"$search": '"value"'}},
+                    {
+                        "$or": [
+                            {"root.variable": "/(?i)value/"},
+                            {"root.variable.#text": "/(?i)value/"},
+                        ]
+                    },
+                ]
+            },
+        )
+
+    def test_build_not_contains_word_criteria_fails(self):
+        """test_build_not_contains_word_criteria_fails"""
+        with self.assertRaises(MongoQueryException):
+            build_criteria(
+                "root.variable",
+                "contains_word",
+                "value",
+                None,
+                "xs",
+                is_not=True,
+            )
+
+
+class TestGetWildcardPaths(TestCase):
+    """Test get_wildcard_paths function"""
+
+    def test_wildcard_paths_are_the_paths_of_the_same_name(self):
+        """test_wildcard_paths_are_the_paths_of_the_same_name"""
+        element_record = MagicMock(dot_notation="root.a.name")
+        concrete_path_table = {
+            "name": (
+                ("root.a.name", ALL_VALUE_LOCATIONS),
+                ("root.b.name", (ELEMENT_VALUE,)),
+            ),
+            "a": (("root.a", ALL_VALUE_LOCATIONS),),
+        }
+
+        self.assertEqual(
+            get_wildcard_paths(element_record, concrete_path_table),
+            ("root.a.name", "root.a.name.#text", "root.b.name"),
+        )
+
+    def test_wildcard_paths_of_unknown_name_are_empty(self):
+        """test_wildcard_paths_of_unknown_name_are_empty"""
+        element_record = MagicMock(dot_notation="root.unknown")
+
+        self.assertEqual(get_wildcard_paths(element_record, {}), ())
+
+
+@patch(
+    "core_explore_example_app.utils.mongo_query.get_schema_info_by_template_id"
+)
+class TestCheckQueryForm(TestCase):
+    """Test check_query_form function"""
+
+    @patch(
+        "core_explore_example_app.utils.mongo_query.EXPLORE_EXAMPLE_TEXT_SEARCH",
+        True,
+    )
+    def test_contains_word_is_valid(self, mock_get_schema_info):
+        """test_contains_word_is_valid"""
+        mock_get_schema_info.return_value = MagicMock(default_prefix="xs")
+        form_values = [
+            _get_string_field("and", "AND", "contains_word"),
+            _get_string_field("like", "AND", "like"),
+        ]
+
+        self.assertEqual(check_query_form(form_values, 1), [])
+
+    @patch(
+        "core_explore_example_app.utils.mongo_query.EXPLORE_EXAMPLE_TEXT_SEARCH",
+        True,
+    )
+    def test_negated_contains_word_is_not_valid(self, mock_get_schema_info):
+        """test_negated_contains_word_is_not_valid"""
+        mock_get_schema_info.return_value = MagicMock(default_prefix="xs")
+        form_values = [_get_string_field("not", "NOT", "contains_word")]
+
+        self.assertEqual(len(check_query_form(form_values, 1)), 1)
+
+    @patch(
+        "core_explore_example_app.utils.mongo_query.EXPLORE_EXAMPLE_TEXT_SEARCH",
+        True,
+    )
+    def test_contains_word_with_or_is_not_valid(self, mock_get_schema_info):
+        """test_contains_word_with_or_is_not_valid"""
+        mock_get_schema_info.return_value = MagicMock(default_prefix="xs")
+        form_values = [
+            _get_string_field("a", "AND", "like"),
+            _get_string_field("b", "OR", "contains_word"),
+        ]
+
+        self.assertEqual(len(check_query_form(form_values, 1)), 2)
+
+    @patch(
+        "core_explore_example_app.utils.mongo_query.EXPLORE_EXAMPLE_TEXT_SEARCH",
+        True,
+    )
+    def test_contains_word_in_query_with_or_is_not_valid(
+        self, mock_get_schema_info
+    ):
+        """test_contains_word_in_query_with_or_is_not_valid"""
+        mock_get_schema_info.return_value = MagicMock(default_prefix="xs")
+        form_values = [
+            _get_string_field("a", "AND", "contains_word"),
+            _get_string_field("b", "OR", "like"),
+        ]
+
+        self.assertEqual(len(check_query_form(form_values, 1)), 1)
+
+    @patch(
+        "core_explore_example_app.utils.mongo_query.EXPLORE_EXAMPLE_TEXT_SEARCH",
+        True,
+    )
+    def test_several_contains_word_are_not_valid(self, mock_get_schema_info):
+        """test_several_contains_word_are_not_valid"""
+        mock_get_schema_info.return_value = MagicMock(default_prefix="xs")
+        form_values = [
+            _get_string_field("a", "AND", "contains_word"),
+            _get_string_field("b", "AND", "contains_word"),
+        ]
+
+        self.assertEqual(len(check_query_form(form_values, 1)), 1)
+
+    @patch(
+        "core_explore_example_app.utils.mongo_query.EXPLORE_EXAMPLE_TEXT_SEARCH",
+        False,
+    )
+    def test_contains_word_is_not_valid_if_disabled(
+        self, mock_get_schema_info
+    ):
+        """test_contains_word_is_not_valid_if_disabled"""
+        mock_get_schema_info.return_value = MagicMock(default_prefix="xs")
+        form_values = [_get_string_field("a", "AND", "contains_word")]
+
+        self.assertEqual(len(check_query_form(form_values, 1)), 1)
+
+
+def _get_string_field(name, operator, comparison):
+    """Returns a form field on a string element
+
+    Args:
+        name:
+        operator:
+        comparison:
+
+    Returns:
+
+    """
+    return {
+        "id": 1,
+        "name": name,
+        "type": "xs:string",
+        "operator": operator,
+        "comparison": comparison,
+        "value": "value",
+    }
+
+
+class TestInvertQuery(TestCase):
+    """Test invert_query function"""
+
+    def test_invert_query_does_not_modify_query(self):
+        """test_invert_query_does_not_modify_query"""
+        query = {
+            "$and": [
+                {"$or": [mock_criteria_1, mock_criteria_2]},
+                {"root.a": {"$gt": 1}},
+            ]
+        }
+        expected_query = {
+            "$and": [
+                {"$or": [dict(mock_criteria_1), dict(mock_criteria_2)]},
+                {"root.a": {"$gt": 1}},
+            ]
+        }
+
+        invert_query(query)
+
+        self.assertEqual(query, expected_query)
+
+    def test_invert_element_or_text_query(self):
+        """test_invert_element_or_text_query"""
+        self.assertEqual(
+            invert_query({"$or": [mock_criteria_1, mock_criteria_2]}),
+            {
+                "$and": [
+                    {"root.variable": {"$ne": "value"}},
+                    {"root.variable.#text": {"$ne": "value"}},
+                ]
+            },
+        )
+
+    def test_invert_inverted_query_returns_query(self):
+        """test_invert_inverted_query_returns_query"""
+        query = {"$and": [{"root.a": {"$gt": 1}}, {"root.b": "/value/"}]}
+
+        self.assertEqual(invert_query(invert_query(query)), query)
+
+    def test_invert_range_returns_inverted_range_or_missing(self):
+        """test_invert_range_returns_inverted_range_or_missing"""
+        self.assertEqual(
+            invert_query({"root.a": {"$gt": 1}}),
+            {
+                "$or": [
+                    {"root.a": {"$lte": 1}},
+                    {"root.a": {"$not": {"$exists": True}}},
+                ]
+            },
+        )
+
+    def test_invert_not_returns_criteria(self):
+        """test_invert_not_returns_criteria"""
+        self.assertEqual(
+            invert_query(
+                {"$and": [{"root.a": {"$ne": 1}}, {"root.b": {"$not": "/b/"}}]}
+            ),
+            {"$or": [{"root.a": 1}, {"root.b": "/b/"}]},
+        )
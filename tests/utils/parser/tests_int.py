@@ -0,0 +1,81 @@
+"""Integration tests for the parser utils."""
+
+from os.path import dirname, join
+
+import core_parser_app
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from core_explore_example_app.components.explore_data_structure.models import (
+    ExploreDataStructure,
+)
+from core_explore_example_app.utils.parser import generate_form, render_subtree
+from core_main_app.components.template.models import Template
+from core_main_app.utils.tests_tools.MockUser import create_mock_user
+from core_main_app.utils.tests_tools.RequestMock import create_mock_request
+from core_parser_app.components.data_structure.models import (
+    DataStructureElement,
+)
+
+NESTED_XSD = (
+    "<xs:schema xmlns:xs='http://www.w3.org/2001/XMLSchema'>"
+    "<xs:element name='root'><xs:complexType><xs:sequence>"
+    "<xs:element name='a'><xs:complexType><xs:sequence>"
+    "<xs:element name='b' type='xs:string'/>"
+    "<xs:element name='c'><xs:complexType><xs:sequence>"
+    "<xs:element name='d' type='xs:int'/>"
+    "</xs:sequence></xs:complexType></xs:element>"
+    "</xs:sequence></xs:complexType></xs:element>"
+    "</xs:sequence></xs:complexType></xs:element>"
+    "</xs:schema>"
+)
+
+# templates of the parser renderers
+PARSER_TEMPLATES = [
+    dict(
+        settings.TEMPLATES[0],
+        DIRS=[
+            join(
+                dirname(core_parser_app.__file__),
+                "tools",
+                "parser",
+                "templates",
+            )
+        ],
+    )
+]
+
+
+@override_settings(TEMPLATES=PARSER_TEMPLATES)
+class TestRenderSubtree(TestCase):
+    """Test render_subtree function"""
+
+    def setUp(self):
+        """setUp"""
+        template = Template.objects.create(
+            filename="nested.xsd", content=NESTED_XSD, hash="nested_hash"
+        )
+        self.request = create_mock_request(
+            user=create_mock_user("1", has_perm=True)
+        )
+        data_structure = ExploreDataStructure.objects.create(
+            user="1", template=template, name="nested.xsd"
+        )
+        generate_form(
+            NESTED_XSD, data_structure=data_structure, request=self.request
+        )
+        complex_types = DataStructureElement.objects.filter(
+            data_structure=data_structure, tag="complex_type"
+        ).order_by("pk")
+        # complex type of the element a
+        self.complex_type = complex_types[1]
+
+    def test_subtree_is_rendered_in_single_query(self):
+        """test_subtree_is_rendered_in_single_query"""
+        with self.assertNumQueries(1):
+            html_form = render_subtree(self.request, self.complex_type)
+
+        self.assertIn("b<input", html_form)
+        self.assertIn("c<ul", html_form)
+        self.assertIn("d<input", html_form)
+        self.assertNotIn("a<ul", html_form)
@@ -0,0 +1,85 @@
+"""Unit tests for the parser utils."""
+
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from core_explore_example_app.utils import parser
+from core_explore_example_app.utils.cache import (
+    bump_data_structure_revision,
+    get_cache,
+)
+
+SMALL_FORM = "<ul><li>small</li></ul>"
+LARGE_FORM = "<ul>" + "<li>large</li>" * 2000 + "</ul>"
+
+
+@patch("core_explore_example_app.utils.parser.render_form")
+class TestGetRenderedForm(TestCase):
+    """Test get_rendered_form function"""
+
+    def setUp(self):
+        """setUp"""
+        parser.clear_rendered_forms()
+        get_cache().clear()
+        self.explore_data_structure = MagicMock(id=1)
+
+    def test_form_is_rendered_once_per_revision(self, mock_render_form):
+        """test_form_is_rendered_once_per_revision"""
+        mock_render_form.return_value = SMALL_FORM
+
+        parser.get_rendered_form(None, self.explore_data_structure)
+        xsd_form = parser.get_rendered_form(None, self.explore_data_structure)
+
+        self.assertEqual(xsd_form, SMALL_FORM)
+        self.assertEqual(mock_render_form.call_count, 1)
+
+    def test_form_is_rendered_again_after_change(self, mock_render_form):
+        """test_form_is_rendered_again_after_change"""
+        mock_render_form.return_value = SMALL_FORM
+
+        parser.get_rendered_form(None, self.explore_data_structure)
+        bump_data_structure_revision(1)
+        parser.get_rendered_form(None, self.explore_data_structure)
+
+        self.assertEqual(mock_render_form.call_count, 2)
+
+    def test_form_is_shared_between_workers(self, mock_render_form):
+        """test_form_is_shared_between_workers"""
+        mock_render_form.return_value = LARGE_FORM
+
+        parser.get_rendered_form(None, self.explore_data_structure)
+        parser.clear_rendered_forms()
+        xsd_form = parser.get_rendered_form(None, self.explore_data_structure)
+
+        self.assertEqual(xsd_form, LARGE_FORM)
+        self.assertEqual(mock_render_form.call_count, 1)
+
+    @patch("core_explore_example_app.utils.parser.get_cache")
+    def test_large_form_is_compressed_in_shared_cache(
+        self, mock_get_cache, mock_render_form
+    ):
+        """test_large_form_is_compressed_in_shared_cache"""
+        mock_render_form.return_value = LARGE_FORM
+        mock_get_cache.return_value.get.return_value = None
+
+        parser.get_rendered_form(None, self.explore_data_structure)
+
+        cached_form = mock_get_cache.return_value.set.call_args.args[1]
+        self.assertIsInstance(cached_form, bytes)
+        self.assertEqual(parser._decompress_form(cached_form), LARGE_FORM)
+
+
+class TestCompressForm(TestCase):
+    """Test the compression of the forms"""
+
+    def test_small_form_is_not_compressed(self):
+        """test_small_form_is_not_compressed"""
+        self.assertEqual(parser._compress_form(SMALL_FORM), SMALL_FORM)
+
+    def test_large_form_is_compressed(self):
+        """test_large_form_is_compressed"""
+        compressed_form = parser._compress_form(LARGE_FORM)
+
+        self.assertIsInstance(compressed_form, bytes)
+        self.assertLess(len(compressed_form), len(LARGE_FORM))
+        self.assertEqual(parser._decompress_form(compressed_form), LARGE_FORM)
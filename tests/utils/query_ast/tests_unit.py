@@ -0,0 +1,258 @@
+"""Unit tests for the query tree."""
+
+from dataclasses import FrozenInstanceError
+from unittest import TestCase
+
+from core_explore_example_app.commons.exceptions import MongoQueryException
+from core_explore_example_app.utils.query_ast import (
+    AndNode,
+    ComparisonNode,
+    ExclusionNode,
+    OrNode,
+    RangeExclusionNode,
+    TextSearchNode,
+    from_mongo,
+)
+
+ELEMENT_PATHS = ("root.a", "root.a.#text")
+
+
+class TestQueryNodes(TestCase):
+    """Test query nodes"""
+
+    def test_nodes_are_immutable(self):
+        """test_nodes_are_immutable"""
+        node = ComparisonNode(ELEMENT_PATHS, "$gt", 1)
+
+        with self.assertRaises(FrozenInstanceError):
+            node.value = 2
+
+    def test_create_flattens_nested_nodes(self):
+        """test_create_flattens_nested_nodes"""
+        a = ComparisonNode(("a",), "$eq", 1)
+        b = ComparisonNode(("b",), "$eq", 2)
+        c = ComparisonNode(("c",), "$eq", 3)
+
+        self.assertEqual(
+            AndNode.create(AndNode.create(AndNode(), a, b), c),
+            AndNode((a, b, c)),
+        )
+        self.assertEqual(
+            OrNode.create(OrNode.create(a, b), c), OrNode((a, b, c))
+        )
+
+    def test_or_with_empty_and_matches_all(self):
+        """test_or_with_empty_and_matches_all"""
+        node = OrNode.create(AndNode(), ComparisonNode(("a",), "$eq", 1))
+
+        self.assertEqual(node.to_mongo(), {})
+
+    def test_comparison_on_element_paths_lowers_to_or(self):
+        """test_comparison_on_element_paths_lowers_to_or"""
+        self.assertEqual(
+            ComparisonNode(ELEMENT_PATHS, "$gt", 1).to_mongo(),
+            {"$or": [{"root.a": {"$gt": 1}}, {"root.a.#text": {"$gt": 1}}]},
+        )
+
+    def test_lowering_flattens_logical_operators(self):
+        """test_lowering_flattens_logical_operators"""
+        node = OrNode.create(
+            ComparisonNode(ELEMENT_PATHS, "$eq", 1),
+            ComparisonNode(("root.b",), "$eq", 2),
+        )
+
+        self.assertEqual(
+            node.to_mongo(),
+            {"$or": [{"root.a": 1}, {"root.a.#text": 1}, {"root.b": 2}]},
+        )
+
+
+class TestNegate(TestCase):
+    """Test negation of query nodes"""
+
+    def test_negate_range_returns_range_exclusion(self):
+        """test_negate_range_returns_range_exclusion"""
+        self.assertEqual(
+            ComparisonNode(ELEMENT_PATHS, "$gt", 1).negate(),
+            RangeExclusionNode(ELEMENT_PATHS, "$gt", 1),
+        )
+
+    def test_negate_range_matches_inverted_range_or_missing_value(self):
+        """test_negate_range_matches_inverted_range_or_missing_value"""
+        for operator, inverted_operator in (
+            ("$gt", "$lte"),
+            ("$gte", "$lt"),
+            ("$lt", "$gte"),
+            ("$lte", "$gt"),
+        ):
+            self.assertEqual(
+                ComparisonNode(("root.a",), operator, 1).negate().to_mongo(),
+                {
+                    "$or": [
+                        {"root.a": {inverted_operator: 1}},
+                        {"root.a": {"$not": {"$exists": True}}},
+                    ]
+                },
+            )
+
+    def test_negate_range_holds_for_all_paths(self):
+        """test_negate_range_holds_for_all_paths"""
+        self.assertEqual(
+            ComparisonNode(ELEMENT_PATHS, "$gt", 1).negate().to_mongo(),
+            {
+                "$and": [
+                    {
+                        "$or": [
+                            {"root.a": {"$lte": 1}},
+                            {"root.a": {"$not": {"$exists": True}}},
+                        ]
+                    },
+                    {
+                        "$or": [
+                            {"root.a.#text": {"$lte": 1}},
+                            {"root.a.#text": {"$not": {"$exists": True}}},
+                        ]
+                    },
+                ]
+            },
+        )
+
+    def test_negate_equality_excludes_value_from_all_paths(self):
+        """test_negate_equality_excludes_value_from_all_paths"""
+        self.assertEqual(
+            ComparisonNode(ELEMENT_PATHS, "$eq", "v").negate().to_mongo(),
+            {
+                "$and": [
+                    {"root.a": {"$ne": "v"}},
+                    {"root.a.#text": {"$ne": "v"}},
+                ]
+            },
+        )
+
+    def test_negate_regex_excludes_regex(self):
+        """test_negate_regex_excludes_regex"""
+        self.assertEqual(
+            ComparisonNode(("root.a",), "$regex", "/v/").negate().to_mongo(),
+            {"root.a": {"$not": "/v/"}},
+        )
+
+    def test_negate_uses_de_morgan_laws(self):
+        """test_negate_uses_de_morgan_laws"""
+        a = ComparisonNode(("a",), "$gt", 1)
+        b = ComparisonNode(("b",), "$eq", 2)
+
+        self.assertEqual(
+            AndNode.create(a, b).negate(),
+            OrNode((a.negate(), b.negate())),
+        )
+        self.assertEqual(
+            OrNode.create(a, b).negate(),
+            AndNode((a.negate(), b.negate())),
+        )
+
+    def test_negate_twice_returns_node(self):
+        """test_negate_twice_returns_node"""
+        node = OrNode.create(
+            ComparisonNode(ELEMENT_PATHS, "$gte", 1),
+            ExclusionNode(("b",), "$eq", 2),
+        )
+
+        self.assertEqual(node.negate().negate(), node)
+
+    def test_negate_empty_query_fails(self):
+        """test_negate_empty_query_fails"""
+        with self.assertRaises(MongoQueryException):
+            AndNode().negate()
+
+
+class TestFromMongo(TestCase):
+    """Test from_mongo function"""
+
+    def test_from_mongo_parses_operators(self):
+        """test_from_mongo_parses_operators"""
+        node = from_mongo(
+            {
+                "$and": [
+                    {"a": 1},
+                    {"b": "/v/"},
+                    {"c": {"$gt": 1}},
+                    {"d": {"$ne": 1}},
+                    {"e": {"$not": {"$lt": 1}}},
+                    {"f": {"$elemMatch": {"g": 1}}},
+                ]
+            }
+        )
+
+        self.assertEqual(
+            node,
+            AndNode(
+                (
+                    ComparisonNode(("a",), "$eq", 1),
+                    ComparisonNode(("b",), "$regex", "/v/"),
+                    ComparisonNode(("c",), "$gt", 1),
+                    ExclusionNode(("d",), "$eq", 1),
+                    ExclusionNode(("e",), "$lt", 1),
+                    ComparisonNode(("f",), None, {"$elemMatch": {"g": 1}}),
+                )
+            ),
+        )
+
+    def test_from_mongo_replaces_nor(self):
+        """test_from_mongo_replaces_nor"""
+        self.assertEqual(
+            from_mongo({"$nor": [{"a": 1}, {"b": {"$gt": 2}}]}).to_mongo(),
+            {
+                "$and": [
+                    {"a": {"$ne": 1}},
+                    {
+                        "$or": [
+                            {"b": {"$lte": 2}},
+                            {"b": {"$not": {"$exists": True}}},
+                        ]
+                    },
+                ]
+            },
+        )
+
+    def test_from_mongo_parses_range_exclusion(self):
+        """test_from_mongo_parses_range_exclusion"""
+        node = OrNode.create(
+            ComparisonNode(("a",), "$gt", 1).negate(),
+            ComparisonNode(("b",), "$eq", 2),
+        )
+
+        self.assertEqual(from_mongo(node.to_mongo()), node)
+
+    def test_from_mongo_parses_text_search(self):
+        """test_from_mongo_parses_text_search"""
+        node = from_mongo({"$text": {"$search": "word"}, "a": "/word/"})
+
+        self.assertEqual(
+            node,
+            AndNode(
+                (
+                    TextSearchNode({"$search": "word"}),
+                    ComparisonNode(("a",), "$regex", "/word/"),
+                )
+            ),
+        )
+        with self.assertRaises(MongoQueryException):
+            node.negate()
+
+    def test_text_search_can_not_be_combined_with_or(self):
+        """test_text_search_can_not_be_combined_with_or"""
+        with self.assertRaises(MongoQueryException):
+            from_mongo(
+                {"$or": [{"$text": {"$search": "word"}, "a": 1}, {"b": 2}]}
+            )
+
+    def test_from_mongo_then_to_mongo_returns_query(self):
+        """test_from_mongo_then_to_mongo_returns_query"""
+        query = {
+            "$or": [
+                {"$and": [{"a": 1}, {"b": {"$not": {"$gt": 1}}}]},
+                {"c": {"$elemMatch": {"d": 1}}},
+            ]
+        }
+
+        self.assertEqual(from_mongo(query).to_mongo(), query)
@@ -0,0 +1,338 @@
+"""Unit tests for the query builder rendering functions."""
+
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from django.template import loader
+from lxml import etree, html
+
+from core_explore_example_app import signals
+from core_explore_example_app.utils import query_builder
+from core_explore_example_app.utils.cache import bump_generation, get_cache
+from core_explore_example_app.utils.query_cache import TEMPLATE_NAMESPACE
+from core_explore_example_app.utils.schema_catalog import (
+    ELEMENT_VALUE,
+    ElementRecord,
+)
+from core_main_app.access_control.exceptions import AccessControlError
+
+MOCK_SCHEMA_INFO = MagicMock(template_id=1, namespaces={}, default_prefix="xs")
+MOCK_CATALOG = {
+    "1": ElementRecord(
+        1,
+        {"name": "a", "type": "xs:int", "xpath": {"xml": "/root/a"}},
+        {},
+        value_locations=(ELEMENT_VALUE,),
+    ),
+    "2": ElementRecord(
+        2,
+        {"name": "b", "type": "enum", "xpath": {"xml": "/root/b"}},
+        {},
+        enumerations=["x", "y"],
+        value_locations=(ELEMENT_VALUE,),
+    ),
+}
+
+
+class TestRenderTemplates(TestCase):
+    """Test the rendering functions of the query builder"""
+
+    def setUp(self):
+        """setUp"""
+        query_builder.clear_template_cache()
+
+    def tearDown(self):
+        """tearDown"""
+        query_builder.clear_template_cache()
+
+    @patch.object(
+        query_builder.loader, "get_template", wraps=loader.get_template
+    )
+    def test_static_fragment_is_rendered_once(self, mock_get_template):
+        """test_static_fragment_is_rendered_once"""
+        with patch.object(
+            query_builder,
+            "_render_template",
+            wraps=query_builder._render_template,
+        ) as mock_render_template:
+            first_fragment = query_builder.render_numeric_select()
+            second_fragment = query_builder.render_numeric_select()
+
+        self.assertIs(first_fragment, second_fragment)
+        self.assertEqual(mock_render_template.call_count, 1)
+        self.assertEqual(mock_get_template.call_count, 1)
+
+    @patch.object(
+        query_builder.loader, "get_template", wraps=loader.get_template
+    )
+    def test_parameterized_fragment_reuses_compiled_template(
+        self, mock_get_template
+    ):
+        """test_parameterized_fragment_reuses_compiled_template"""
+        first_fragment = query_builder.render_new_criteria("crit1")
+        second_fragment = query_builder.render_new_criteria("crit2")
+
+        self.assertIn("crit1", first_fragment)
+        self.assertIn("crit2", second_fragment)
+        self.assertEqual(mock_get_template.call_count, 1)
+
+    @patch.object(
+        query_builder.loader, "get_template", wraps=loader.get_template
+    )
+    def test_clear_template_cache_renders_fragment_again(
+        self, mock_get_template
+    ):
+        """test_clear_template_cache_renders_fragment_again"""
+        query_builder.render_add_button()
+        query_builder.clear_template_cache()
+        query_builder.render_add_button()
+
+        self.assertEqual(mock_get_template.call_count, 2)
+
+
+class TestInvalidateRenderedTemplates(TestCase):
+    """Test invalidate_rendered_templates signal receiver"""
+
+    @patch("core_explore_example_app.signals.clear_template_cache")
+    @patch(
+        "core_explore_example_app.signals.get_template_directories",
+        return_value={Path("/app/templates")},
+    )
+    def test_template_change_clears_cache(
+        self, mock_get_template_directories, mock_clear_template_cache
+    ):
+        """test_template_change_clears_cache"""
+        signals.invalidate_rendered_templates(
+            None, Path("/app/templates/core_explore_example_app/add.html")
+        )
+
+        mock_clear_template_cache.assert_called_once_with()
+
+    @patch("core_explore_example_app.signals.clear_template_cache")
+    @patch(
+        "core_explore_example_app.signals.get_template_directories",
+        return_value={Path("/app/templates")},
+    )
+    def test_python_change_does_not_clear_cache(
+        self, mock_get_template_directories, mock_clear_template_cache
+    ):
+        """test_python_change_does_not_clear_cache"""
+        signals.invalidate_rendered_templates(
+            None, Path("/app/templates/module.py")
+        )
+
+        mock_clear_template_cache.assert_not_called()
+
+
+@patch(
+    "core_explore_example_app.utils.query_builder.get_catalog_by_template_id",
+    return_value=MOCK_CATALOG,
+)
+class TestGetElementUserInputs(TestCase):
+    """Test get_element_user_inputs function"""
+
+    def setUp(self):
+        """setUp"""
+        query_builder.clear_template_cache()
+        get_cache().clear()
+
+    def test_returns_type_and_user_inputs(self, mock_get_catalog):
+        """test_returns_type_and_user_inputs"""
+        element_type, user_inputs = query_builder.get_element_user_inputs(
+            MOCK_SCHEMA_INFO, "2", None
+        )
+
+        self.assertEqual(element_type, "enum")
+        self.assertIn("x", user_inputs)
+        self.assertIn("y", user_inputs)
+
+    def test_user_inputs_are_built_once(self, mock_get_catalog):
+        """test_user_inputs_are_built_once"""
+        with patch.object(
+            query_builder, "get_user_inputs", return_value="html"
+        ) as mock_get_user_inputs:
+            query_builder.get_element_user_inputs(MOCK_SCHEMA_INFO, "1", None)
+            user_inputs = query_builder.get_element_user_inputs(
+                MOCK_SCHEMA_INFO, "1", None
+            )
+
+        self.assertEqual(user_inputs, ("xs:int", "html"))
+        self.assertEqual(mock_get_user_inputs.call_count, 1)
+
+    def test_user_inputs_are_shared_across_workers(self, mock_get_catalog):
+        """test_user_inputs_are_shared_across_workers"""
+        query_builder.get_element_user_inputs(MOCK_SCHEMA_INFO, "1", None)
+        query_builder.clear_template_cache()
+        with patch.object(
+            query_builder, "get_user_inputs", return_value="html"
+        ) as mock_get_user_inputs:
+            query_builder.get_element_user_inputs(MOCK_SCHEMA_INFO, "1", None)
+
+        mock_get_user_inputs.assert_not_called()
+
+    def test_user_inputs_are_shared_by_element_copies(self, mock_get_catalog):
+        """test_user_inputs_are_shared_by_element_copies"""
+        other_user_catalog = {
+            "101": ElementRecord(
+                101,
+                {"name": "a", "type": "xs:int", "xpath": {"xml": "/root/a"}},
+                {},
+                value_locations=(ELEMENT_VALUE,),
+            ),
+        }
+        with patch.object(
+            query_builder, "get_user_inputs", return_value="html"
+        ) as mock_get_user_inputs:
+            query_builder.get_element_user_inputs(MOCK_SCHEMA_INFO, "1", None)
+            user_inputs = query_builder.get_element_user_inputs(
+                MOCK_SCHEMA_INFO, "101", None, other_user_catalog
+            )
+
+        self.assertEqual(user_inputs, ("xs:int", "html"))
+        self.assertEqual(mock_get_user_inputs.call_count, 1)
+
+    @patch("core_parser_app.components.data_structure_element.api.get_by_id")
+    def test_element_outside_catalog_is_checked(
+        self, mock_get_by_id, mock_get_catalog
+    ):
+        """test_element_outside_catalog_is_checked"""
+        mock_get_by_id.side_effect = AccessControlError("no access")
+        query_builder.get_element_user_inputs(MOCK_SCHEMA_INFO, "1", None)
+
+        with self.assertRaises(AccessControlError):
+            query_builder.get_element_user_inputs(
+                MOCK_SCHEMA_INFO, "201", None, {}
+            )
+
+    def test_given_catalog_is_used(self, mock_get_catalog):
+        """test_given_catalog_is_used"""
+        element_type, _ = query_builder.get_element_user_inputs(
+            MOCK_SCHEMA_INFO, "1", None, MOCK_CATALOG
+        )
+
+        self.assertEqual(element_type, "xs:int")
+        mock_get_catalog.assert_not_called()
+
+    def test_template_change_builds_user_inputs_again(self, mock_get_catalog):
+        """test_template_change_builds_user_inputs_again"""
+        with patch.object(
+            query_builder, "get_user_inputs", return_value="html"
+        ) as mock_get_user_inputs:
+            query_builder.get_element_user_inputs(MOCK_SCHEMA_INFO, "1", None)
+            bump_generation(TEMPLATE_NAMESPACE, 1)
+            query_builder.get_element_user_inputs(MOCK_SCHEMA_INFO, "1", None)
+
+        self.assertEqual(mock_get_user_inputs.call_count, 2)
+
+
+MOCK_FORM = (
+    "<div>"
+    "<ul>"
+    '<li class="1"><input type="checkbox" value="true"/>a</li>'
+    '<li class="2"><input type="checkbox" value="false"/>b</li>'
+    '<li class="3"><span>c</span><ul>'
+    '<li class="4"><input type="checkbox" value="true"/>d</li>'
+    '<li class="5"><input type="checkbox" value="true"/>e</li>'
+    "</ul></li>"
+    '<li class="6"><span>f</span><ul>'
+    '<li class="7"><input type="checkbox" value="false"/>g</li>'
+    "</ul></li>"
+    "</ul>"
+    "</div>"
+)
+
+
+def _get_li(html_tree, element_id):
+    """Returns the li element of an element id
+
+    Args:
+        html_tree:
+        element_id:
+
+    Returns:
+
+    """
+    return html_tree.find(f".//li[@class='{element_id}']")
+
+
+class TestPruneHtmlTree(TestCase):
+    """Test prune_html_tree function"""
+
+    @patch.object(query_builder, "MONGODB_INDEXING", True)
+    def test_selected_elements_are_marked(self):
+        """test_selected_elements_are_marked"""
+        html_tree = html.fromstring(MOCK_FORM)
+
+        any_checked = query_builder.prune_html_tree(html_tree)
+
+        self.assertTrue(any_checked)
+        for element_id in ("1", "4", "5"):
+            li = _get_li(html_tree, element_id)
+            self.assertEqual(li.attrib["select_class"], "element")
+            self.assertEqual(li.attrib["select_id"], element_id)
+        for element_id in ("2", "6", "7"):
+            li = _get_li(html_tree, element_id)
+            self.assertEqual(li.attrib["select_class"], "none")
+        self.assertEqual(
+            _get_li(html_tree, "6").find("./ul").attrib["select_class"],
+            "none",
+        )
+
+    @patch.object(query_builder, "MONGODB_INDEXING", True)
+    def test_parent_of_selected_elements_is_marked(self):
+        """test_parent_of_selected_elements_is_marked"""
+        html_tree = html.fromstring(MOCK_FORM)
+
+        query_builder.prune_html_tree(html_tree)
+
+        li = _get_li(html_tree, "3")
+        self.assertEqual(li.attrib["select_class"], "parent")
+        self.assertEqual(li.attrib["select_id"], "4 5")
+
+    @patch.object(query_builder, "MONGODB_INDEXING", False)
+    def test_parent_is_not_marked_without_mongodb(self):
+        """test_parent_is_not_marked_without_mongodb"""
+        html_tree = html.fromstring(MOCK_FORM)
+
+        query_builder.prune_html_tree(html_tree)
+
+        self.assertNotIn("select_class", _get_li(html_tree, "3").attrib)
+
+    def test_no_selected_element_returns_false(self):
+        """test_no_selected_element_returns_false"""
+        html_tree = html.fromstring(
+            "<div><ul>"
+            '<li class="1"><input type="checkbox" value="false"/>a</li>'
+            "</ul></div>"
+        )
+
+        self.assertFalse(query_builder.prune_html_tree(html_tree))
+        self.assertEqual(html_tree.find("./ul").attrib["select_class"], "none")
+
+    def test_lists_outside_of_the_tree_are_ignored(self):
+        """test_lists_outside_of_the_tree_are_ignored"""
+        html_tree = html.fromstring(
+            "<div><div><ul>"
+            '<li class="1"><input type="checkbox" value="true"/>a</li>'
+            "</ul></div></div>"
+        )
+
+        self.assertFalse(query_builder.prune_html_tree(html_tree))
+        self.assertNotIn("select_class", _get_li(html_tree, "1").attrib)
+
+    def test_deep_tree_is_pruned(self):
+        """test_deep_tree_is_pruned"""
+        html_tree = html.Element("div")
+        ul = etree.SubElement(html_tree, "ul")
+        for _ in range(5000):
+            li = etree.SubElement(ul, "li", {"class": "0"})
+            etree.SubElement(li, "span")
+            ul = etree.SubElement(li, "ul")
+        li = etree.SubElement(ul, "li", {"class": "leaf"})
+        etree.SubElement(li, "input", {"type": "checkbox", "value": "true"})
+
+        self.assertTrue(query_builder.prune_html_tree(html_tree))
+        self.assertEqual(
+            _get_li(html_tree, "leaf").attrib["select_class"], "element"
+        )
@@ -0,0 +1,214 @@
+"""Unit tests for the compiled query cache."""
+
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from core_explore_example_app.utils import query_cache
+from core_explore_example_app.utils.cache import bump_generation
+from core_explore_example_app.utils.mongo_query import fields_to_query
+
+mock_form_values = [
+    {
+        "id": "1",
+        "operator": "",
+        "value": "mock_value",
+        "comparison": "is",
+        "type": "xs:string",
+        "name": "mock_name",
+        "selected": True,
+    }
+]
+
+
+class TestGetFormValuesFingerprint(TestCase):
+    """Test get_form_values_fingerprint function"""
+
+    def test_fingerprint_ignores_display_keys(self):
+        """test_fingerprint_ignores_display_keys"""
+        other_form_values = [dict(mock_form_values[0], name="other_name")]
+        self.assertEqual(
+            query_cache.get_form_values_fingerprint(mock_form_values),
+            query_cache.get_form_values_fingerprint(other_form_values),
+        )
+
+    def test_fingerprint_depends_on_value(self):
+        """test_fingerprint_depends_on_value"""
+        other_form_values = [dict(mock_form_values[0], value="other_value")]
+        self.assertNotEqual(
+            query_cache.get_form_values_fingerprint(mock_form_values),
+            query_cache.get_form_values_fingerprint(other_form_values),
+        )
+
+    def test_fingerprint_depends_on_wildcard(self):
+        """test_fingerprint_depends_on_wildcard"""
+        self.assertNotEqual(
+            query_cache.get_form_values_fingerprint(mock_form_values),
+            query_cache.get_form_values_fingerprint(
+                mock_form_values, use_wildcard=True
+            ),
+        )
+
+
+class TestGetCacheKey(TestCase):
+    """Test get_cache_key function"""
+
+    def test_key_changes_when_template_changes(self):
+        """test_key_changes_when_template_changes"""
+        cache_key = query_cache.get_cache_key("template_1", mock_form_values)
+        bump_generation(query_cache.TEMPLATE_NAMESPACE, "template_1")
+        self.assertNotEqual(
+            query_cache.get_cache_key("template_1", mock_form_values),
+            cache_key,
+        )
+
+    def test_key_changes_when_saved_query_changes(self):
+        """test_key_changes_when_saved_query_changes"""
+        form_values = [{"id": "saved_1", "operator": "", "type": "query"}]
+        cache_key = query_cache.get_cache_key("template_2", form_values)
+        bump_generation(query_cache.SAVED_QUERY_NAMESPACE, "saved_1")
+        self.assertNotEqual(
+            query_cache.get_cache_key("template_2", form_values), cache_key
+        )
+
+    def test_key_depends_on_user(self):
+        """test_key_depends_on_user"""
+        mock_request = MagicMock()
+        mock_request.user.id = 1
+        mock_other_request = MagicMock()
+        mock_other_request.user.id = 2
+        self.assertNotEqual(
+            query_cache.get_cache_key(
+                "template_6", mock_form_values, request=mock_request
+            ),
+            query_cache.get_cache_key(
+                "template_6", mock_form_values, request=mock_other_request
+            ),
+        )
+
+
+class TestFieldsToQueryCache(TestCase):
+    """Test fields_to_query cache"""
+
+    def setUp(self):
+        """setUp"""
+        query_cache.clear_local_cache()
+
+    @patch(
+        "core_explore_example_app.utils.mongo_query._compile_fields_to_query"
+    )
+    def test_query_is_compiled_once(self, mock_compile_fields_to_query):
+        """test_query_is_compiled_once"""
+        mock_compile_fields_to_query.return_value = {"root.a": "mock_value"}
+
+        fields_to_query(mock_form_values, "template_3")
+        query = fields_to_query(mock_form_values, "template_3")
+
+        self.assertEqual(query, {"root.a": "mock_value"})
+        self.assertEqual(mock_compile_fields_to_query.call_count, 1)
+
+    @patch(
+        "core_explore_example_app.utils.mongo_query._compile_fields_to_query"
+    )
+    def test_cached_query_can_be_modified_safely(
+        self, mock_compile_fields_to_query
+    ):
+        """test_cached_query_can_be_modified_safely"""
+        mock_compile_fields_to_query.return_value = {"root.a": "mock_value"}
+
+        fields_to_query(mock_form_values, "template_4")["root.a"] = "modified"
+
+        self.assertEqual(
+            fields_to_query(mock_form_values, "template_4"),
+            {"root.a": "mock_value"},
+        )
+
+    @patch(
+        "core_explore_example_app.utils.mongo_query._compile_fields_to_query"
+    )
+    def test_query_is_compiled_again_when_template_changes(
+        self, mock_compile_fields_to_query
+    ):
+        """test_query_is_compiled_again_when_template_changes"""
+        mock_compile_fields_to_query.return_value = {"root.a": "mock_value"}
+
+        fields_to_query(mock_form_values, "template_5")
+        bump_generation(query_cache.TEMPLATE_NAMESPACE, "template_5")
+        fields_to_query(mock_form_values, "template_5")
+
+        self.assertEqual(mock_compile_fields_to_query.call_count, 2)
+
+    @patch(
+        "core_explore_example_app.utils.mongo_query._compile_fields_to_query"
+    )
+    def test_query_is_compiled_again_for_another_user(
+        self, mock_compile_fields_to_query
+    ):
+        """test_query_is_compiled_again_for_another_user"""
+        mock_compile_fields_to_query.return_value = {"root.a": "mock_value"}
+        mock_request = MagicMock()
+        mock_request.user.id = 1
+        mock_other_request = MagicMock()
+        mock_other_request.user.id = 2
+
+        fields_to_query(mock_form_values, "template_7", request=mock_request)
+        fields_to_query(
+            mock_form_values, "template_7", request=mock_other_request
+        )
+
+        self.assertEqual(mock_compile_fields_to_query.call_count, 2)
+
+
+class TestGetParsedSavedQueries(TestCase):
+    """Test get_parsed_saved_queries function"""
+
+    def setUp(self):
+        """setUp"""
+        query_cache.clear_local_cache()
+
+    @patch(
+        "core_explore_example_app.components.saved_query.api.get_by_id_list"
+    )
+    def test_saved_queries_are_fetched_at_once(self, mock_get_by_id_list):
+        """test_saved_queries_are_fetched_at_once"""
+        mock_get_by_id_list.return_value = [
+            MagicMock(id=1, query='{"a": 1}'),
+            MagicMock(id=2, query='{"b": 2}'),
+        ]
+
+        parsed_queries = query_cache.get_parsed_saved_queries(["1", "2", "3"])
+
+        mock_get_by_id_list.assert_called_once()
+        self.assertEqual(parsed_queries, {"1": {"a": 1}, "2": {"b": 2}})
+
+    @patch("core_explore_example_app.utils.query_cache.json.loads")
+    @patch(
+        "core_explore_example_app.components.saved_query.api.get_by_id_list"
+    )
+    def test_saved_queries_are_parsed_once(
+        self, mock_get_by_id_list, mock_json_loads
+    ):
+        """test_saved_queries_are_parsed_once"""
+        mock_get_by_id_list.return_value = [MagicMock(id=1, query='{"a": 1}')]
+        mock_json_loads.return_value = {"a": 1}
+
+        query_cache.get_parsed_saved_queries(["1"])
+        query_cache.get_parsed_saved_queries(["1"])
+
+        self.assertEqual(mock_json_loads.call_count, 1)
+
+    @patch("core_explore_example_app.utils.query_cache.json.loads")
+    @patch(
+        "core_explore_example_app.components.saved_query.api.get_by_id_list"
+    )
+    def test_saved_queries_are_parsed_again_when_modified(
+        self, mock_get_by_id_list, mock_json_loads
+    ):
+        """test_saved_queries_are_parsed_again_when_modified"""
+        mock_get_by_id_list.return_value = [MagicMock(id=1, query='{"a": 1}')]
+        mock_json_loads.return_value = {"a": 1}
+
+        query_cache.get_parsed_saved_queries(["1"])
+        bump_generation(query_cache.SAVED_QUERY_NAMESPACE, "1")
+        query_cache.get_parsed_saved_queries(["1"])
+
+        self.assertEqual(mock_json_loads.call_count, 2)
@@ -0,0 +1,148 @@
+"""Unit tests for the query explanation."""
+
+from unittest import TestCase
+
+from core_explore_example_app.utils.query_explain import (
+    explain_query,
+    get_query_depth,
+    get_regex_predicates,
+    iter_predicates,
+)
+from tests.mocks import MockMongoCollection
+
+MOCK_QUERY = {
+    "$and": [
+        {"root.a": "/^start/"},
+        {
+            "$or": [
+                {"root.b": {"$gt": 1}},
+                {"root.c": {"$elemMatch": {"d": {"$not": "/value/"}}}},
+            ]
+        },
+        {"$text": {"$search": "word"}},
+    ]
+}
+
+
+class TestGetQueryDepth(TestCase):
+    """Test get_query_depth function"""
+
+    def test_criteria_has_no_depth(self):
+        """test_criteria_has_no_depth"""
+        self.assertEqual(get_query_depth({"root.a": 1}), 0)
+
+    def test_depth_counts_logical_operators_and_elem_match(self):
+        """test_depth_counts_logical_operators_and_elem_match"""
+        self.assertEqual(get_query_depth(MOCK_QUERY), 3)
+
+
+class TestPredicates(TestCase):
+    """Test iter_predicates and get_regex_predicates functions"""
+
+    def test_iter_predicates_returns_all_predicates(self):
+        """test_iter_predicates_returns_all_predicates"""
+        self.assertEqual(
+            list(iter_predicates(MOCK_QUERY)),
+            [
+                ("root.a", "$regex", "/^start/"),
+                ("root.b", "$gt", 1),
+                ("root.c.d", "$not", "/value/"),
+                (None, "$text", {"$search": "word"}),
+            ],
+        )
+
+    def test_get_regex_predicates_reports_anchors(self):
+        """test_get_regex_predicates_reports_anchors"""
+        self.assertEqual(
+            get_regex_predicates(iter_predicates(MOCK_QUERY)),
+            [
+                {
+                    "path": "root.a",
+                    "pattern": "^start",
+                    "negated": False,
+                    "anchored": True,
+                },
+                {
+                    "path": "root.c.d",
+                    "pattern": "value",
+                    "negated": True,
+                    "anchored": False,
+                },
+            ],
+        )
+
+
+class TestExplainQuery(TestCase):
+    """Test explain_query function"""
+
+    def test_explain_without_collection_does_not_report_indexes(self):
+        """test_explain_without_collection_does_not_report_indexes"""
+        explanation = explain_query(MOCK_QUERY, "1")
+
+        self.assertEqual(explanation["query"], MOCK_QUERY)
+        self.assertEqual(explanation["depth"], 3)
+        self.assertEqual(explanation["predicate_count"], 4)
+        self.assertEqual(
+            explanation["paths"],
+            [
+                {"path": "root.a", "operators": ["$regex"], "indexed": None},
+                {"path": "root.b", "operators": ["$gt"], "indexed": None},
+                {"path": "root.c.d", "operators": ["$not"], "indexed": None},
+            ],
+        )
+        self.assertIsNone(explanation["winning_plan"])
+
+    def test_explain_with_collection_reports_indexes(self):
+        """test_explain_with_collection_reports_indexes"""
+        collection = MockMongoCollection()
+        collection.create_index([("template", 1), ("dict_content.root.a", 1)])
+
+        explanation = explain_query(
+            {"root.a": 1, "root.b": 2}, "1", collection
+        )
+
+        self.assertEqual(
+            [path["indexed"] for path in explanation["paths"]], [True, False]
+        )
+
+    def test_explain_with_collection_returns_winning_plan(self):
+        """test_explain_with_collection_returns_winning_plan"""
+        collection = MockMongoCollection()
+        collection.create_index([("template", 1), ("dict_content.root.a", 1)])
+
+        explanation = explain_query({"root.a": "/^a/"}, "1", collection)
+
+        self.assertEqual(
+            explanation["winning_plan"],
+            {
+                "stage": "FETCH",
+                "filter": {
+                    "dict_content.root.a": "re.compile('^a')",
+                    "template": 1,
+                },
+                "inputStage": {
+                    "stage": "IXSCAN",
+                    "indexName": "template_1_dict_content.root.a_1",
+                },
+            },
+        )
+
+    def test_winning_plan_is_explained_without_running_query(self):
+        """test_winning_plan_is_explained_without_running_query"""
+        collection = MockMongoCollection()
+
+        explain_query({"root.a": 1}, "1", collection)
+
+        self.assertEqual(
+            collection.database.commands,
+            [
+                (
+                    "explain",
+                    {
+                        "find": "data",
+                        "filter": {"dict_content.root.a": 1, "template": 1},
+                    },
+                    {"verbosity": "queryPlanner"},
+                )
+            ],
+        )
@@ -0,0 +1,142 @@
+"""Unit tests for the query normalizer."""
+
+from unittest import TestCase
+
+from core_explore_example_app.utils.mongo_query import (
+    build_and_criteria,
+    build_or_criteria,
+)
+from core_explore_example_app.utils.query_normalizer import normalize_query
+
+
+class TestNormalizeQuery(TestCase):
+    """Test normalize_query function"""
+
+    def test_left_deep_and_chain_is_flattened(self):
+        """test_left_deep_and_chain_is_flattened"""
+        query = {"a": 1}
+        for criteria in ({"b": 2}, {"c": 3}, {"d": 4}):
+            query = build_and_criteria(query, criteria)
+
+        self.assertEqual(
+            normalize_query(query),
+            {"$and": [{"a": 1}, {"b": 2}, {"c": 3}, {"d": 4}]},
+        )
+
+    def test_left_deep_or_chain_is_flattened(self):
+        """test_left_deep_or_chain_is_flattened"""
+        query = build_or_criteria(
+            build_or_criteria({"a": 1}, {"b": 2}), {"c": 3}
+        )
+
+        self.assertEqual(
+            normalize_query(query),
+            {"$or": [{"a": 1}, {"b": 2}, {"c": 3}]},
+        )
+
+    def test_mixed_chain_keeps_precedence(self):
+        """test_mixed_chain_keeps_precedence"""
+        query = build_and_criteria(
+            build_or_criteria({"a": 1}, {"b": 2}), {"c": 3}
+        )
+
+        self.assertEqual(
+            normalize_query(query),
+            {"$and": [{"$or": [{"a": 1}, {"b": 2}]}, {"c": 3}]},
+        )
+
+    def test_empty_seed_is_removed_from_and(self):
+        """test_empty_seed_is_removed_from_and"""
+        query = build_and_criteria(build_and_criteria({}, {"a": 1}), {"b": 2})
+
+        self.assertEqual(
+            normalize_query(query), {"$and": [{"a": 1}, {"b": 2}]}
+        )
+
+    def test_single_criteria_is_unwrapped(self):
+        """test_single_criteria_is_unwrapped"""
+        self.assertEqual(
+            normalize_query(build_and_criteria({}, {"a": 1})), {"a": 1}
+        )
+
+    def test_empty_seed_in_or_matches_all_documents(self):
+        """test_empty_seed_in_or_matches_all_documents"""
+        query = build_and_criteria(build_or_criteria({}, {"a": 1}), {"b": 2})
+
+        self.assertEqual(normalize_query(query), {"b": 2})
+
+    def test_duplicate_criteria_are_removed(self):
+        """test_duplicate_criteria_are_removed"""
+        query = build_and_criteria(
+            build_or_criteria({"a": 1}, {"a.#text": 1}),
+            build_or_criteria({"a.#text": 1}, {"a": 1}),
+            build_or_criteria({"a": 1}, {"a.#text": 1}),
+        )
+
+        self.assertEqual(
+            normalize_query(query),
+            {
+                "$and": [
+                    {"$or": [{"a": 1}, {"a.#text": 1}]},
+                    {"$or": [{"a.#text": 1}, {"a": 1}]},
+                ]
+            },
+        )
+
+    def test_range_criteria_on_same_path_keep_tightest_bounds(self):
+        """test_range_criteria_on_same_path_keep_tightest_bounds"""
+        query = build_and_criteria(
+            build_and_criteria({"a": {"$gt": 1}}, {"b": {"$lt": 0}}),
+            {"a": {"$lte": 5}},
+            {"a": {"$gte": 3}},
+            {"a": {"$lt": 5}},
+        )
+
+        self.assertEqual(
+            normalize_query(query),
+            {
+                "$and": [
+                    {"a": {"$gte": 3}},
+                    {"b": {"$lt": 0}},
+                    {"a": {"$lt": 5}},
+                ]
+            },
+        )
+
+    def test_range_criteria_are_not_merged_in_one_operator_document(self):
+        """test_range_criteria_are_not_merged_in_one_operator_document"""
+        query = build_and_criteria({"a": {"$gt": 1}}, {"a": {"$lt": 10}})
+
+        self.assertEqual(normalize_query(query), query)
+
+    def test_range_criteria_in_or_are_not_merged(self):
+        """test_range_criteria_in_or_are_not_merged"""
+        query = build_or_criteria({"a": {"$gt": 1}}, {"a": {"$lt": 0}})
+
+        self.assertEqual(normalize_query(query), query)
+
+    def test_range_criteria_with_other_operators_are_not_merged(self):
+        """test_range_criteria_with_other_operators_are_not_merged"""
+        query = build_and_criteria(
+            {"a": {"$gt": 1}}, {"a": {"$not": {"$gt": 5}}}
+        )
+
+        self.assertEqual(normalize_query(query), query)
+
+    def test_elem_match_query_is_normalized(self):
+        """test_elem_match_query_is_normalized"""
+        query = {"a": {"$elemMatch": {"$and": [{"$and": [{"b": 1}]}]}}}
+
+        self.assertEqual(
+            normalize_query(query), {"a": {"$elemMatch": {"b": 1}}}
+        )
+
+    def test_query_is_not_modified(self):
+        """test_query_is_not_modified"""
+        query = build_and_criteria({"a": {"$gt": 1}}, {"a": {"$gt": 5}})
+
+        normalize_query(query)
+
+        self.assertEqual(
+            query, {"$and": [{"a": {"$gt": 1}}, {"a": {"$gt": 5}}]}
+        )
@@ -0,0 +1,337 @@
+"""Unit tests for the query builder form compilation."""
+
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from core_explore_example_app.commons.exceptions import MongoQueryException
+from core_explore_example_app.utils import query_cache
+from core_explore_example_app.utils.cache import get_cache
+from core_explore_example_app.utils.query_pipeline import (
+    compile_form,
+    compile_forms,
+    compile_sub_elements_form,
+)
+from core_explore_example_app.utils.schema_catalog import (
+    ELEMENT_VALUE,
+    ElementRecord,
+)
+
+MOCK_CATALOG = {
+    "1": ElementRecord(
+        1,
+        {"name": "a", "type": "xs:int", "xpath": {"xml": "/root/list/a"}},
+        {},
+        value_locations=(ELEMENT_VALUE,),
+    ),
+    "2": ElementRecord(
+        2,
+        {"name": "b", "type": "xs:string", "xpath": {"xml": "/root/list/b"}},
+        {},
+        value_locations=(ELEMENT_VALUE,),
+    ),
+}
+
+
+def _get_field(element_id, operator, comparison, value, selected=True):
+    """Returns a form field
+
+    Args:
+        element_id:
+        operator:
+        comparison:
+        value:
+        selected:
+
+    Returns:
+
+    """
+    record = MOCK_CATALOG[element_id]
+    return {
+        "id": element_id,
+        "name": record.name,
+        "type": record.type,
+        "operator": operator,
+        "comparison": comparison,
+        "value": value,
+        "selected": selected,
+    }
+
+
+@patch(
+    "core_explore_example_app.utils.mongo_query.get_catalog_by_template_id",
+    return_value=MOCK_CATALOG,
+)
+@patch(
+    "core_explore_example_app.utils.query_pipeline.get_schema_info_by_template_id",
+    return_value=MagicMock(template_id=1, namespaces={}, default_prefix="xs"),
+)
+class TestCompileForm(TestCase):
+    """Test compile_form function"""
+
+    def setUp(self):
+        """setUp"""
+        query_cache.clear_local_cache()
+        get_cache().clear()
+
+    def test_compile_form_returns_query_and_displayed_query(
+        self, mock_get_schema_info, mock_get_catalog
+    ):
+        """test_compile_form_returns_query_and_displayed_query"""
+        form_values = [
+            _get_field("1", "AND", "gt", "1"),
+            _get_field("2", "OR", "is", "value"),
+        ]
+
+        compiled_form = compile_form(form_values, "1")
+
+        self.assertEqual(compiled_form.errors, [])
+        self.assertEqual(
+            compiled_form.query,
+            {"$or": [{"root.list.a": {"$gt": 1}}, {"root.list.b": "value"}]},
+        )
+        self.assertEqual(
+            compiled_form.displayed_query, "(( AND a &gt; 1) OR b is value)"
+        )
+        self.assertEqual(mock_get_schema_info.call_count, 1)
+        self.assertEqual(mock_get_catalog.call_count, 1)
+
+    def test_compile_form_uses_compiled_query_cache(
+        self, mock_get_schema_info, mock_get_catalog
+    ):
+        """test_compile_form_uses_compiled_query_cache"""
+        form_values = [_get_field("1", "AND", "gt", "1")]
+
+        compile_form(form_values, "1")
+        compiled_form = compile_form(form_values, "1")
+
+        self.assertEqual(compiled_form.query, {"root.list.a": {"$gt": 1}})
+        self.assertEqual(mock_get_catalog.call_count, 1)
+
+    def test_compile_form_with_errors_returns_errors_only(
+        self, mock_get_schema_info, mock_get_catalog
+    ):
+        """test_compile_form_with_errors_returns_errors_only"""
+        form_values = [
+            _get_field("1", "AND", "gt", "not a number"),
+            _get_field("2", "AND", "is", "value"),
+        ]
+
+        compiled_form = compile_form(form_values, "1")
+
+        self.assertEqual(
+            compiled_form.errors, ["Element a must be an integer."]
+        )
+        self.assertIsNone(compiled_form.query)
+        self.assertIsNone(compiled_form.displayed_query)
+
+    def test_compile_empty_form_returns_error(
+        self, mock_get_schema_info, mock_get_catalog
+    ):
+        """test_compile_empty_form_returns_error"""
+        compiled_form = compile_form([], "1")
+
+        self.assertEqual(compiled_form.errors, ["The query is empty."])
+
+    @patch(
+        "core_explore_example_app.utils.query_cache.get_parsed_saved_queries",
+        return_value={},
+    )
+    def test_compile_form_with_missing_saved_query_returns_error(
+        self,
+        mock_get_parsed_saved_queries,
+        mock_get_schema_info,
+        mock_get_catalog,
+    ):
+        """test_compile_form_with_missing_saved_query_returns_error"""
+        form_values = [
+            {"id": "3", "name": "q", "type": "query", "operator": "AND"}
+        ]
+
+        compiled_form = compile_form(form_values, "1")
+
+        self.assertEqual(
+            compiled_form.errors, ["The saved query does not exist anymore."]
+        )
+
+    def test_compile_form_with_function_uses_function(
+        self, mock_get_schema_info, mock_get_catalog
+    ):
+        """test_compile_form_with_function_uses_function"""
+        form_values = [_get_field("1", "AND", "gt", "1")]
+        mock_fields_to_query = MagicMock(return_value={"mock": "query"})
+
+        compiled_form = compile_form(
+            form_values, "1", fields_to_query_func=mock_fields_to_query
+        )
+
+        self.assertEqual(compiled_form.query, {"mock": "query"})
+        mock_fields_to_query.assert_called_once_with(
+            form_values, "1", request=None
+        )
+        mock_get_catalog.assert_not_called()
+
+    def test_compile_form_with_failing_function_returns_error(
+        self, mock_get_schema_info, mock_get_catalog
+    ):
+        """test_compile_form_with_failing_function_returns_error"""
+        form_values = [_get_field("1", "AND", "gt", "1")]
+        mock_fields_to_query = MagicMock(
+            side_effect=MongoQueryException("error")
+        )
+
+        compiled_form = compile_form(
+            form_values, "1", fields_to_query_func=mock_fields_to_query
+        )
+
+        self.assertEqual(compiled_form.errors, ["error"])
+        self.assertIsNone(compiled_form.query)
+
+
+@patch(
+    "core_explore_example_app.utils.query_pipeline.get_catalog_by_template_id",
+    return_value=MOCK_CATALOG,
+)
+@patch(
+    "core_explore_example_app.utils.query_pipeline.get_schema_info_by_template_id",
+    return_value=MagicMock(template_id=1, namespaces={}, default_prefix="xs"),
+)
+class TestCompileSubElementsForm(TestCase):
+    """Test compile_sub_elements_form function"""
+
+    def test_compile_returns_query_on_selected_sub_elements(
+        self, mock_get_schema_info, mock_get_catalog
+    ):
+        """test_compile_returns_query_on_selected_sub_elements"""
+        form_values = [
+            _get_field("1", "AND", "gt", "1"),
+            _get_field("2", "NOT", "is", "value"),
+            _get_field("2", "AND", "is", "ignored", selected=False),
+        ]
+
+        compiled_form = compile_sub_elements_form(form_values, "1")
+
+        self.assertEqual(compiled_form.errors, [])
+        self.assertEqual(
+            compiled_form.query,
+            {
+                "root.list": {
+                    "$elemMatch": {
+                        "$and": [{"a": {"$gt": 1}}, {"b": {"$ne": "value"}}]
+                    }
+                }
+            },
+        )
+        self.assertEqual(
+            compiled_form.displayed_query, "list(a &gt; 1, NOT(b is value))"
+        )
+
+    def test_compile_without_selected_sub_elements_returns_error(
+        self, mock_get_schema_info, mock_get_catalog
+    ):
+        """test_compile_without_selected_sub_elements_returns_error"""
+        form_values = [_get_field("1", "AND", "gt", "1", selected=False)]
+
+        compiled_form = compile_sub_elements_form(form_values, "1")
+
+        self.assertEqual(compiled_form.errors, ["The query is empty."])
+        self.assertIsNone(compiled_form.query)
+
+
+@patch(
+    "core_explore_example_app.utils.mongo_query.get_catalog_by_template_id",
+    return_value=MOCK_CATALOG,
+)
+@patch(
+    "core_explore_example_app.utils.query_pipeline.get_catalog_by_template_id",
+    return_value=MOCK_CATALOG,
+)
+@patch(
+    "core_explore_example_app.utils.query_pipeline.get_schema_info_by_template_id",
+    return_value=MagicMock(template_id=1, namespaces={}, default_prefix="xs"),
+)
+class TestCompileForms(TestCase):
+    """Test compile_forms function"""
+
+    def setUp(self):
+        """setUp"""
+        query_cache.clear_local_cache()
+        get_cache().clear()
+        self.items = [
+            {
+                "template_id": "1",
+                "form_values": [_get_field("1", "AND", "gt", str(index))],
+            }
+            for index in range(4)
+        ]
+
+    def test_compile_forms_returns_results_in_order(
+        self, mock_get_schema_info, mock_get_catalog, mock_query_get_catalog
+    ):
+        """test_compile_forms_returns_results_in_order"""
+        results = compile_forms(self.items)
+
+        self.assertEqual(
+            [result["query"] for result in results],
+            [{"root.list.a": {"$gt": index}} for index in range(4)],
+        )
+        self.assertEqual(results[0]["displayed_query"], "( AND a &gt; 0)")
+        self.assertEqual(results[0]["errors"], [])
+
+    def test_compile_forms_resolves_template_once(
+        self, mock_get_schema_info, mock_get_catalog, mock_query_get_catalog
+    ):
+        """test_compile_forms_resolves_template_once"""
+        compile_forms(self.items)
+
+        self.assertEqual(mock_get_schema_info.call_count, 1)
+        self.assertEqual(mock_get_catalog.call_count, 1)
+        mock_query_get_catalog.assert_not_called()
+
+    def test_compile_forms_reports_errors_per_item(
+        self, mock_get_schema_info, mock_get_catalog, mock_query_get_catalog
+    ):
+        """test_compile_forms_reports_errors_per_item"""
+        self.items[1]["form_values"] = [_get_field("1", "AND", "gt", "a")]
+
+        results = compile_forms(self.items)
+
+        self.assertEqual(
+            results[1]["errors"], ["Element a must be an integer."]
+        )
+        self.assertIsNone(results[1]["query"])
+        self.assertEqual(results[2]["errors"], [])
+
+    def test_compile_forms_reports_template_errors_per_item(
+        self, mock_get_schema_info, mock_get_catalog, mock_query_get_catalog
+    ):
+        """test_compile_forms_reports_template_errors_per_item"""
+        mock_get_schema_info.side_effect = [
+            MagicMock(template_id=1, namespaces={}, default_prefix="xs"),
+            Exception("missing template"),
+        ]
+        self.items[1]["template_id"] = "2"
+
+        results = compile_forms(self.items)
+
+        self.assertEqual(results[1]["template_id"], "2")
+        self.assertEqual(results[1]["errors"], ["missing template"])
+        self.assertEqual(results[2]["errors"], [])
+
+    @patch(
+        "core_explore_example_app.utils.query_pipeline.EXPLORE_EXAMPLE_BATCH_COMPILE_THREAD_THRESHOLD",
+        2,
+    )
+    @patch(
+        "core_explore_example_app.utils.query_pipeline.EXPLORE_EXAMPLE_BATCH_COMPILE_WORKERS",
+        3,
+    )
+    def test_compile_forms_in_threads_returns_results_in_order(
+        self, mock_get_schema_info, mock_get_catalog, mock_query_get_catalog
+    ):
+        """test_compile_forms_in_threads_returns_results_in_order"""
+        results = compile_forms(self.items)
+
+        self.assertEqual(
+            [result["query"] for result in results],
+            [{"root.list.a": {"$gt": index}} for index in range(4)],
+        )
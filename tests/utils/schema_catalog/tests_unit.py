@@ -0,0 +1,404 @@
+"""Unit tests for the schema catalog."""
+
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from core_explore_example_app.settings import (
+    EXPLORE_EXAMPLE_CATALOG_CACHE_TIMEOUT,
+)
+from core_explore_example_app.utils.schema_catalog import (
+    ALL_VALUE_LOCATIONS,
+    ELEMENT_VALUE,
+    TEXT_VALUE,
+    Catalog,
+    ElementRecord,
+    build_catalog,
+    build_concrete_path_table,
+    build_merged_catalog,
+    get_catalog,
+    get_concrete_path_table,
+    get_element_record,
+)
+from core_main_app.commons.exceptions import XMLError
+
+NAMESPACES = {"xs": "http://www.w3.org/2001/XMLSchema"}
+
+# pk, tag, value, options, parent_id
+MOCK_ROWS = [
+    (1, "element", None, {"name": "root", "xpath": {"xml": "/root"}}, None),
+    (2, "elem-iter", None, {}, 1),
+    (3, "complex_type", None, {}, 2),
+    (4, "sequence", None, {}, 3),
+    (5, "sequence-iter", None, {}, 4),
+    (
+        6,
+        "element",
+        None,
+        {
+            "name": "color",
+            "label": "Color",
+            "type": "colorType",
+            "xpath": {"xml": "/xs:root/xs:color"},
+        },
+        5,
+    ),
+    (7, "elem-iter", None, {}, 6),
+    (8, "simple_type", None, {}, 7),
+    (9, "restriction", None, {}, 8),
+    (10, "enumeration", "red", {}, 9),
+    (11, "enumeration", "blue", {}, 9),
+    (
+        12,
+        "element",
+        None,
+        {"name": "size", "type": "xs:int", "xpath": {"xml": "/root/size"}},
+        5,
+    ),
+    (13, "elem-iter", None, {}, 12),
+    (14, "input", None, {}, 13),
+    (
+        15,
+        "element",
+        None,
+        {"name": "length", "xpath": {"xml": "/root/length"}},
+        5,
+    ),
+    (16, "elem-iter", None, {}, 15),
+    (17, "complex_type", None, {}, 16),
+    (18, "simple_content", None, {}, 17),
+    (19, "extension", None, {}, 18),
+    (
+        20,
+        "attribute",
+        None,
+        {"name": "unit", "min": 1, "xpath": {"xml": "/root/length/@unit"}},
+        19,
+    ),
+    (
+        21,
+        "element",
+        None,
+        {
+            "name": "other",
+            "xmlns": "urn:other",
+            "xpath": {"xml": "/root/other"},
+        },
+        5,
+    ),
+    (22, "elem-iter", None, {}, 21),
+    (23, "input", None, {}, 22),
+]
+
+
+def _mock_values_list(mock_data_structure_element):
+    """Returns mock rows for the catalog query
+
+    Args:
+        mock_data_structure_element:
+
+    Returns:
+
+    """
+    queryset = mock_data_structure_element.objects.filter.return_value
+    queryset.order_by.return_value.values_list.return_value = MOCK_ROWS
+
+
+class TestBuildCatalog(TestCase):
+    """Test build_catalog function"""
+
+    @patch(
+        "core_explore_example_app.utils.schema_catalog.DataStructureElement"
+    )
+    def test_catalog_contains_elements_with_xpath(
+        self, mock_data_structure_element
+    ):
+        """test_catalog_contains_elements_with_xpath"""
+        _mock_values_list(mock_data_structure_element)
+
+        catalog = build_catalog(1, NAMESPACES)
+
+        self.assertEqual(
+            set(catalog.keys()), {"1", "6", "12", "15", "20", "21"}
+        )
+
+    @patch(
+        "core_explore_example_app.utils.schema_catalog.DataStructureElement"
+    )
+    def test_record_contains_paths(self, mock_data_structure_element):
+        """test_record_contains_paths"""
+        _mock_values_list(mock_data_structure_element)
+
+        record = build_catalog(1, NAMESPACES)["6"]
+
+        self.assertEqual(record.dot_notation, "root.color")
+        self.assertEqual(record.parent_path, "root")
+        self.assertEqual(record.parent_name, "root")
+        self.assertEqual(record.label, "Color")
+
+    @patch(
+        "core_explore_example_app.utils.schema_catalog.DataStructureElement"
+    )
+    def test_record_contains_enumerations(self, mock_data_structure_element):
+        """test_record_contains_enumerations"""
+        _mock_values_list(mock_data_structure_element)
+
+        catalog = build_catalog(1, NAMESPACES)
+
+        self.assertEqual(catalog["6"].get_enumerations(), ["red", "blue"])
+        with self.assertRaises(XMLError):
+            catalog["12"].get_enumerations()
+
+    @patch(
+        "core_explore_example_app.utils.schema_catalog.DataStructureElement"
+    )
+    def test_simple_type_values_are_at_element(
+        self, mock_data_structure_element
+    ):
+        """test_simple_type_values_are_at_element"""
+        _mock_values_list(mock_data_structure_element)
+
+        catalog = build_catalog(1, NAMESPACES)
+
+        self.assertEqual(catalog["6"].value_locations, (ELEMENT_VALUE,))
+        self.assertEqual(catalog["12"].value_locations, (ELEMENT_VALUE,))
+
+    @patch(
+        "core_explore_example_app.utils.schema_catalog.DataStructureElement"
+    )
+    def test_attribute_values_are_at_attribute(
+        self, mock_data_structure_element
+    ):
+        """test_attribute_values_are_at_attribute"""
+        _mock_values_list(mock_data_structure_element)
+
+        catalog = build_catalog(1, NAMESPACES)
+
+        self.assertEqual(catalog["20"].value_locations, (ELEMENT_VALUE,))
+
+    @patch(
+        "core_explore_example_app.utils.schema_catalog.DataStructureElement"
+    )
+    def test_simple_content_with_required_attribute_values_are_at_text(
+        self, mock_data_structure_element
+    ):
+        """test_simple_content_with_required_attribute_values_are_at_text"""
+        _mock_values_list(mock_data_structure_element)
+
+        catalog = build_catalog(1, NAMESPACES)
+
+        self.assertEqual(catalog["15"].value_locations, (TEXT_VALUE,))
+
+    @patch(
+        "core_explore_example_app.utils.schema_catalog.DataStructureElement"
+    )
+    def test_root_and_namespaced_element_values_are_anywhere(
+        self, mock_data_structure_element
+    ):
+        """test_root_and_namespaced_element_values_are_anywhere"""
+        _mock_values_list(mock_data_structure_element)
+
+        catalog = build_catalog(1, NAMESPACES)
+
+        self.assertEqual(catalog["1"].value_locations, ALL_VALUE_LOCATIONS)
+        self.assertEqual(catalog["21"].value_locations, ALL_VALUE_LOCATIONS)
+
+
+class TestBuildMergedCatalog(TestCase):
+    """Test build_merged_catalog function"""
+
+    def setUp(self):
+        """setUp"""
+        self.explore_data_structure = MagicMock(
+            id=2,
+            base_data_structure_id=1,
+            copied_elements={"12": "100", "13": "101", "14": "102"},
+        )
+        # copy of the size element, replacing the shared one
+        self.copied_rows = [
+            (
+                100,
+                "element",
+                None,
+                {
+                    "name": "size",
+                    "type": "xs:int",
+                    "xpath": {"xml": "/root/size"},
+                },
+                None,
+            ),
+            (101, "elem-iter", None, {}, 100),
+            (102, "input", None, {}, 101),
+        ]
+
+    @patch("core_explore_example_app.utils.schema_catalog._get_element_rows")
+    def test_copied_elements_replace_shared_elements(
+        self, mock_get_element_rows
+    ):
+        """test_copied_elements_replace_shared_elements"""
+        mock_get_element_rows.side_effect = lambda data_structure_id: (
+            MOCK_ROWS if data_structure_id == 1 else self.copied_rows
+        )
+
+        catalog = build_merged_catalog(self.explore_data_structure, NAMESPACES)
+
+        self.assertEqual(catalog["100"].dot_notation, "root.size")
+        self.assertEqual(catalog["100"].value_locations, (ELEMENT_VALUE,))
+        self.assertEqual(catalog["12"].element_id, "100")
+        self.assertEqual(catalog["6"].element_id, "6")
+
+
+class TestGetCatalog(TestCase):
+    """Test get_catalog function"""
+
+    @patch("core_explore_example_app.utils.schema_catalog.build_catalog")
+    @patch("core_explore_example_app.utils.schema_catalog.get_cache")
+    def test_shared_cache_entry_expires(
+        self, mock_get_cache, mock_build_catalog
+    ):
+        """test_shared_cache_entry_expires"""
+        mock_get_cache.return_value.get.return_value = None
+        mock_build_catalog.return_value = {}
+
+        get_catalog("catalog_timeout_test", NAMESPACES)
+
+        self.assertEqual(
+            mock_get_cache.return_value.set.call_args.kwargs["timeout"],
+            EXPLORE_EXAMPLE_CATALOG_CACHE_TIMEOUT,
+        )
+
+
+class TestConcretePathTable(TestCase):
+    """Test the concrete path table"""
+
+    def _get_catalog(self):
+        """Returns a catalog with the same element name at two paths
+
+        Returns:
+
+        """
+        return {
+            "1": ElementRecord(
+                1, {"xpath": {"xml": "/root/a/name"}}, NAMESPACES
+            ),
+            "2": ElementRecord(
+                2,
+                {"xpath": {"xml": "/root/b/name"}},
+                NAMESPACES,
+                value_locations=(ELEMENT_VALUE,),
+            ),
+            "3": ElementRecord(3, {"xpath": {"xml": "/root/a"}}, NAMESPACES),
+        }
+
+    def test_build_table_groups_paths_by_name(self):
+        """test_build_table_groups_paths_by_name"""
+        table = build_concrete_path_table(self._get_catalog())
+
+        self.assertEqual(
+            table,
+            {
+                "name": (
+                    ("root.a.name", ALL_VALUE_LOCATIONS),
+                    ("root.b.name", (ELEMENT_VALUE,)),
+                ),
+                "a": (("root.a", ALL_VALUE_LOCATIONS),),
+            },
+        )
+
+    @patch(
+        "core_explore_example_app.utils.schema_catalog.build_concrete_path_table"
+    )
+    def test_table_is_built_once_per_data_structure_revision(
+        self, mock_build_concrete_path_table
+    ):
+        """test_table_is_built_once_per_data_structure_revision"""
+        mock_build_concrete_path_table.return_value = {"name": ()}
+
+        get_concrete_path_table(
+            Catalog(self._get_catalog(), "concrete_paths_ds", 1)
+        )
+        table = get_concrete_path_table(
+            Catalog(self._get_catalog(), "concrete_paths_ds", 1)
+        )
+        get_concrete_path_table(
+            Catalog(self._get_catalog(), "concrete_paths_ds", 2)
+        )
+
+        self.assertEqual(table, {"name": ()})
+        self.assertEqual(mock_build_concrete_path_table.call_count, 2)
+
+    def test_tables_of_users_are_built_from_their_catalogs(self):
+        """test_tables_of_users_are_built_from_their_catalogs"""
+        user_1_catalog = Catalog(
+            {
+                "1": ElementRecord(
+                    1, {"xpath": {"xml": "/root/a/name"}}, NAMESPACES
+                ),
+            },
+            "user_1_ds",
+            1,
+        )
+        user_2_catalog = Catalog(
+            {
+                "11": ElementRecord(
+                    11, {"xpath": {"xml": "/root/a/name"}}, NAMESPACES
+                ),
+                "12": ElementRecord(
+                    12, {"xpath": {"xml": "/root/b/name"}}, NAMESPACES
+                ),
+            },
+            "user_2_ds",
+            1,
+        )
+
+        get_concrete_path_table(user_1_catalog)
+        table = get_concrete_path_table(user_2_catalog)
+
+        self.assertEqual(
+            table["name"],
+            (
+                ("root.a.name", ALL_VALUE_LOCATIONS),
+                ("root.b.name", ALL_VALUE_LOCATIONS),
+            ),
+        )
+        self.assertEqual(
+            get_concrete_path_table(user_1_catalog)["name"],
+            (("root.a.name", ALL_VALUE_LOCATIONS),),
+        )
+
+    def test_table_of_catalog_without_data_structure_is_built(self):
+        """test_table_of_catalog_without_data_structure_is_built"""
+        self.assertEqual(get_concrete_path_table({}), {})
+
+
+class TestGetElementRecord(TestCase):
+    """Test get_element_record function"""
+
+    @patch("core_parser_app.components.data_structure_element.api.get_by_id")
+    def test_record_from_catalog_does_not_query_database(self, mock_get_by_id):
+        """test_record_from_catalog_does_not_query_database"""
+        record = ElementRecord("1", {"xpath": {"xml": "/root/a"}}, NAMESPACES)
+
+        result = get_element_record(
+            "1", NAMESPACES, MagicMock(), {"1": record}
+        )
+
+        self.assertIs(result, record)
+        mock_get_by_id.assert_not_called()
+
+    @patch("core_explore_example_app.utils.schema_catalog.get_enumerations")
+    @patch("core_parser_app.components.data_structure_element.api.get_by_id")
+    def test_record_not_in_catalog_is_built_from_database(
+        self, mock_get_by_id, mock_get_enumerations
+    ):
+        """test_record_not_in_catalog_is_built_from_database"""
+        mock_element = MagicMock()
+        mock_element.id = 2
+        mock_element.options = {"name": "b", "xpath": {"xml": "/root/b"}}
+        mock_get_by_id.return_value = mock_element
+        mock_get_enumerations.side_effect = XMLError("no simple type")
+
+        result = get_element_record("2", NAMESPACES, MagicMock(), {})
+
+        self.assertEqual(result.dot_notation, "root.b")
+        self.assertIsNone(result.enumerations)
+        self.assertEqual(result.value_locations, ALL_VALUE_LOCATIONS)
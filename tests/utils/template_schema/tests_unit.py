@@ -0,0 +1,78 @@
+"""Unit tests for the template schema information."""
+
+from unittest import TestCase
+from unittest.mock import MagicMock, PropertyMock, patch
+
+from core_explore_example_app.settings import (
+    EXPLORE_EXAMPLE_SCHEMA_CACHE_TIMEOUT,
+)
+from core_explore_example_app.utils.template_schema import get_schema_info
+
+XSD_CONTENT = (
+    "<xs:schema xmlns:xs='http://www.w3.org/2001/XMLSchema'>"
+    "<xs:element name='root' type='xs:string'/></xs:schema>"
+)
+
+
+def _create_mock_template(template_id, template_hash):
+    """Returns a mock template counting content reads
+
+    Args:
+        template_id:
+        template_hash:
+
+    Returns:
+
+    """
+    template = MagicMock()
+    template.id = template_id
+    template.hash = template_hash
+    content = PropertyMock(return_value=XSD_CONTENT)
+    type(template).content = content
+    return template, content
+
+
+class TestGetSchemaInfo(TestCase):
+    """Test get_schema_info function"""
+
+    def test_returns_namespaces_and_default_prefix(self):
+        """test_returns_namespaces_and_default_prefix"""
+        template, _ = _create_mock_template("schema_1", "hash_1")
+
+        schema_info = get_schema_info(template)
+
+        self.assertEqual(schema_info.default_prefix, "xs")
+        self.assertIn("xs", schema_info.namespaces)
+        self.assertIn("xs:int", schema_info.xsd_numbers)
+
+    def test_content_is_read_once(self):
+        """test_content_is_read_once"""
+        template, content = _create_mock_template("schema_2", "hash_2")
+
+        get_schema_info(template)
+        get_schema_info(template)
+
+        self.assertEqual(content.call_count, 1)
+
+    def test_content_is_read_again_if_hash_changes(self):
+        """test_content_is_read_again_if_hash_changes"""
+        template, content = _create_mock_template("schema_3", "hash_3")
+
+        get_schema_info(template)
+        template.hash = "hash_3_updated"
+        get_schema_info(template)
+
+        self.assertEqual(content.call_count, 2)
+
+    @patch("core_explore_example_app.utils.template_schema.get_cache")
+    def test_shared_cache_entry_expires(self, mock_get_cache):
+        """test_shared_cache_entry_expires"""
+        mock_get_cache.return_value.get.return_value = None
+        template, _ = _create_mock_template("schema_4", "hash_4")
+
+        get_schema_info(template)
+
+        self.assertEqual(
+            mock_get_cache.return_value.set.call_args.kwargs["timeout"],
+            EXPLORE_EXAMPLE_SCHEMA_CACHE_TIMEOUT,
+        )
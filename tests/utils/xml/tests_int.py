@@ -0,0 +1,67 @@
+"""Integration tests for XML utilities."""
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core_explore_example_app.utils.xml import get_enumerations
+from core_main_app.commons.exceptions import XMLError
+from core_parser_app.components.data_structure.models import (
+    DataStructureElement,
+)
+
+
+def _create_element(tag, value=None, parent=None):
+    """Create a data structure element
+
+    Args:
+        tag:
+        value:
+        parent:
+
+    Returns:
+
+    """
+    return DataStructureElement.objects.create(
+        tag=tag, value=value, parent=parent
+    )
+
+
+class TestGetEnumerations(TestCase):
+    """Test get_enumerations function"""
+
+    def setUp(self):
+        """setUp"""
+        self.element = _create_element("element", "root")
+        simple_type = _create_element("simple_type", parent=self.element)
+        restriction = _create_element("restriction", parent=simple_type)
+        for value in ("a", "b", "c"):
+            _create_element("enumeration", value, restriction)
+        _create_element("pattern", "[a-c]", restriction)
+
+    def test_get_enumerations_returns_enumerations(self):
+        """test_get_enumerations_returns_enumerations"""
+        self.assertEqual(get_enumerations(self.element), ["a", "b", "c"])
+
+    def test_get_enumerations_uses_single_query(self):
+        """test_get_enumerations_uses_single_query"""
+        with CaptureQueriesContext(connection) as queries:
+            get_enumerations(self.element)
+
+        self.assertEqual(len(queries), 1)
+
+    def test_get_enumerations_is_kept_on_element(self):
+        """test_get_enumerations_is_kept_on_element"""
+        get_enumerations(self.element)
+        with CaptureQueriesContext(connection) as queries:
+            enumerations = get_enumerations(self.element)
+
+        self.assertEqual(enumerations, ["a", "b", "c"])
+        self.assertEqual(len(queries), 0)
+
+    def test_get_enumerations_without_simple_type_raises_error(self):
+        """test_get_enumerations_without_simple_type_raises_error"""
+        element = _create_element("element", "leaf")
+
+        with self.assertRaises(XMLError):
+            get_enumerations(element)
@@ -2,7 +2,10 @@
 
 from unittest import TestCase
 
-from core_explore_example_app.utils.xml import validate_element_value
+from core_explore_example_app.utils.xml import (
+    find_enumerations,
+    validate_element_value,
+)
 
 
 class TestValidateElementValue(TestCase):
@@ -51,3 +54,27 @@ class TestValidateElementValue(TestCase):
                 "mock_element", "xs:string", "mock_string", "xs"
             )
         )
+
+
+class TestFindEnumerations(TestCase):
+    """Test find_enumerations function"""
+
+    def test_enumerations_of_first_simple_type_are_returned(self):
+        """test_enumerations_of_first_simple_type_are_returned"""
+        elements = {
+            1: ("element", "root"),
+            2: ("simple_type", None),
+            3: ("restriction", None),
+            4: ("enumeration", "a"),
+            5: ("pattern", "a"),
+            6: ("enumeration", "b"),
+        }
+        children = {1: [2], 2: [3], 3: [4, 5, 6]}
+
+        self.assertEqual(find_enumerations(1, elements, children), ["a", "b"])
+
+    def test_missing_simple_type_returns_none(self):
+        """test_missing_simple_type_returns_none"""
+        elements = {1: ("element", "root")}
+
+        self.assertIsNone(find_enumerations(1, elements, {}))
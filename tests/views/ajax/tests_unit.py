@@ -7,8 +7,14 @@ from unittest.mock import MagicMock, patch
 from django.test import RequestFactory
 from rest_framework import status
 
-from core_explore_example_app.views.user.ajax import save_fields, GetQueryView
-from core_main_app.commons.exceptions import ModelError
+from core_explore_example_app.views.user.ajax import (
+    render_subtree,
+    save_fields,
+    update_selected_fields,
+    ExplainQueryView,
+    GetQueryView,
+)
+from core_main_app.commons.exceptions import DoesNotExist, ModelError
 from core_main_app.utils.tests_tools.MockUser import create_mock_user
 from tests.mocks import MockQueryObject
 
@@ -32,10 +38,10 @@ class TestSaveFields(TestCase):
         "core_explore_example_app.components.explore_data_structure.api.get_by_user_id_and_template_id"
     )
     @mock.patch(
-        "core_explore_example_app.components.explore_data_structure.api.upsert"
+        "core_explore_example_app.components.explore_data_structure.api.save_selected_fields"
     )
     def test_view_returns_response(
-        self, mock_upsert, mock_get_by_user_id_and_template_id
+        self, mock_save_selected_fields, mock_get_by_user_id_and_template_id
     ):
         """test_view_returns_response
 
@@ -44,7 +50,7 @@ class TestSaveFields(TestCase):
         """
         # Init mocks
         mock_get_by_user_id_and_template_id.return_value = MagicMock()
-        mock_upsert.return_value = None
+        mock_save_selected_fields.return_value = None
         # Create data payload
         data = {
             "formContent": "test",
@@ -65,10 +71,90 @@ class TestSaveFields(TestCase):
         "core_explore_example_app.components.explore_data_structure.api.get_by_user_id_and_template_id"
     )
     @mock.patch(
-        "core_explore_example_app.components.explore_data_structure.api.upsert"
+        "core_explore_example_app.components.explore_data_structure.api.save_selected_fields"
+    )
+    def test_view_saves_selection(
+        self, mock_save_selected_fields, mock_get_by_user_id_and_template_id
+    ):
+        """test_view_saves_selection
+
+        Returns:
+
+        """
+        # Init mocks
+        explore_data_structure = MagicMock(copied_elements={})
+        mock_get_by_user_id_and_template_id.return_value = (
+            explore_data_structure
+        )
+        # Create data payload
+        data = {
+            "formContent": '<div><ul><li class="1">'
+            '<input type="checkbox" value="true"/></li></ul></div>',
+            "templateID": "1",
+        }
+
+        # Create request
+        request = self.factory.post(
+            "core_explore_example_save_fields", data=data
+        )
+        # Set user
+        request.user = self.user1
+
+        response = save_fields(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            explore_data_structure.selected_fields,
+            {"elements": ["1"], "parents": {}},
+        )
+
+    @mock.patch(
+        "core_explore_example_app.components.explore_data_structure.api.get_by_user_id_and_template_id"
+    )
+    @mock.patch(
+        "core_explore_example_app.components.explore_data_structure.api.save_selected_fields"
+    )
+    def test_view_saves_selection_of_copied_elements(
+        self, mock_save_selected_fields, mock_get_by_user_id_and_template_id
+    ):
+        """test_view_saves_selection_of_copied_elements
+
+        Returns:
+
+        """
+        # Init mocks
+        explore_data_structure = MagicMock(copied_elements={"1": "3"})
+        mock_get_by_user_id_and_template_id.return_value = (
+            explore_data_structure
+        )
+        # Create data payload, form rendered before the element was copied
+        data = {
+            "formContent": '<div><ul><li class="1">'
+            '<input type="checkbox" value="true"/></li></ul></div>',
+            "templateID": "1",
+        }
+
+        # Create request
+        request = self.factory.post(
+            "core_explore_example_save_fields", data=data
+        )
+        # Set user
+        request.user = self.user1
+
+        response = save_fields(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            explore_data_structure.selected_fields,
+            {"elements": ["3"], "parents": {}},
+        )
+
+    @mock.patch(
+        "core_explore_example_app.components.explore_data_structure.api.get_by_user_id_and_template_id"
+    )
+    @mock.patch(
+        "core_explore_example_app.components.explore_data_structure.api.save_selected_fields"
     )
     def test_view_with_bad_input_returns_500_response(
-        self, mock_upsert, mock_get_by_user_id_and_template_id
+        self, mock_save_selected_fields, mock_get_by_user_id_and_template_id
     ):
         """test_view_with_bad_input_returns_500_response
 
@@ -77,7 +163,7 @@ class TestSaveFields(TestCase):
         """
         # Init mocks
         mock_get_by_user_id_and_template_id.return_value = MagicMock()
-        mock_upsert.return_value = None
+        mock_save_selected_fields.return_value = None
         # Create data payload
         data = {
             "formContent": "te$t",
@@ -95,6 +181,201 @@ class TestSaveFields(TestCase):
         self.assertEqual(response.status_code, 400)
 
 
+class TestUpdateSelectedFields(TestCase):
+    """Test update_selected_fields view"""
+
+    def setUp(self):
+        """setUp"""
+        self.factory = RequestFactory()
+        self.user1 = create_mock_user(user_id="1")
+        # bypass permission checks to access view
+        self.user1.has_perm = MagicMock()
+        self.user1.has_perm.return_value = True
+
+    @patch(
+        "core_explore_example_app.views.user.ajax.get_selection_index",
+        return_value={
+            "positions": {"1": 0, "2": 1},
+            "parents": {},
+            "leaves": {},
+        },
+    )
+    @patch(
+        "core_explore_example_app.components.explore_data_structure.api.get_by_user_id_and_template_id"
+    )
+    @patch(
+        "core_explore_example_app.components.explore_data_structure.api.save_selected_fields"
+    )
+    def test_view_updates_selection(
+        self,
+        mock_save_selected_fields,
+        mock_get_by_user_id_and_template_id,
+        mock_get_selection_index,
+    ):
+        """test_view_updates_selection"""
+        explore_data_structure = MagicMock(
+            selected_fields={"elements": ["1"], "parents": {}},
+            copied_elements={},
+        )
+        mock_get_by_user_id_and_template_id.return_value = (
+            explore_data_structure
+        )
+        data = {
+            "selected": json.dumps(["2"]),
+            "deselected": json.dumps(["1"]),
+            "templateID": "1",
+        }
+        request = self.factory.post(
+            "core_explore_example_update_selected_fields", data=data
+        )
+        request.user = self.user1
+
+        response = update_selected_fields(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            explore_data_structure.selected_fields,
+            {"elements": ["2"], "parents": {}},
+        )
+        mock_save_selected_fields.assert_called_once_with(
+            explore_data_structure
+        )
+
+    @patch(
+        "core_explore_example_app.views.user.ajax.get_selection_index",
+        return_value={
+            "positions": {"1": 0, "3": 1},
+            "parents": {},
+            "leaves": {},
+        },
+    )
+    @patch(
+        "core_explore_example_app.components.explore_data_structure.api.get_by_user_id_and_template_id"
+    )
+    @patch(
+        "core_explore_example_app.components.explore_data_structure.api.save_selected_fields"
+    )
+    def test_view_updates_selection_with_copied_elements(
+        self,
+        mock_save_selected_fields,
+        mock_get_by_user_id_and_template_id,
+        mock_get_selection_index,
+    ):
+        """test_view_updates_selection_with_copied_elements"""
+        explore_data_structure = MagicMock(
+            selected_fields={"elements": ["1"], "parents": {}},
+            copied_elements={"2": "3"},
+        )
+        mock_get_by_user_id_and_template_id.return_value = (
+            explore_data_structure
+        )
+        data = {
+            "selected": json.dumps(["2"]),
+            "templateID": "1",
+        }
+        request = self.factory.post(
+            "core_explore_example_update_selected_fields", data=data
+        )
+        request.user = self.user1
+
+        response = update_selected_fields(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            explore_data_structure.selected_fields,
+            {"elements": ["1", "3"], "parents": {}},
+        )
+
+    @patch(
+        "core_explore_example_app.components.explore_data_structure.api.get_by_user_id_and_template_id"
+    )
+    def test_view_with_bad_input_returns_400_response(
+        self, mock_get_by_user_id_and_template_id
+    ):
+        """test_view_with_bad_input_returns_400_response"""
+        data = {"selected": "not json", "templateID": "1"}
+        request = self.factory.post(
+            "core_explore_example_update_selected_fields", data=data
+        )
+        request.user = self.user1
+
+        response = update_selected_fields(request)
+
+        self.assertEqual(response.status_code, 400)
+
+
+class TestRenderSubtree(TestCase):
+    """Test render_subtree view"""
+
+    def setUp(self):
+        """setUp"""
+        self.factory = RequestFactory()
+        self.user1 = create_mock_user(user_id="1")
+        # bypass permission checks to access view
+        self.user1.has_perm = MagicMock()
+        self.user1.has_perm.return_value = True
+
+    @patch(
+        "core_explore_example_app.views.user.ajax.render_selection_subtree",
+        return_value="<li>subtree</li>",
+    )
+    @patch(
+        "core_explore_example_app.components.explore_data_structure.api.get_tree_element"
+    )
+    @patch(
+        "core_explore_example_app.components.explore_data_structure.api.get_by_id"
+    )
+    def test_view_returns_subtree(
+        self,
+        mock_get_explore_data_structure,
+        mock_get_element,
+        mock_render_selection_subtree,
+    ):
+        """test_view_returns_subtree"""
+        explore_data_structure = MagicMock(id=1)
+        mock_get_explore_data_structure.return_value = explore_data_structure
+        element = MagicMock(data_structure_id=1, tag="complex_type")
+        mock_get_element.return_value = element
+        request = self.factory.post(
+            "core_explore_example_render_subtree", data={"id": "2"}
+        )
+        request.user = self.user1
+
+        response = render_subtree(request, "1")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"<li>subtree</li>")
+        mock_render_selection_subtree.assert_called_once_with(
+            request, explore_data_structure, element
+        )
+
+    @patch("core_explore_example_app.views.user.ajax.render_selection_subtree")
+    @patch(
+        "core_explore_example_app.components.explore_data_structure.api.get_tree_element"
+    )
+    @patch(
+        "core_explore_example_app.components.explore_data_structure.api.get_by_id"
+    )
+    def test_element_of_other_data_structure_returns_400_response(
+        self,
+        mock_get_explore_data_structure,
+        mock_get_element,
+        mock_render_selection_subtree,
+    ):
+        """test_element_of_other_data_structure_returns_400_response"""
+        mock_get_explore_data_structure.return_value = MagicMock(id=1)
+        mock_get_element.side_effect = DoesNotExist("not in the tree")
+        request = self.factory.post(
+            "core_explore_example_render_subtree", data={"id": "2"}
+        )
+        request.user = self.user1
+
+        response = render_subtree(request, "1")
+
+        self.assertEqual(response.status_code, 400)
+        mock_render_selection_subtree.assert_not_called()
+
+
 class TestGetQueryViewsPost(TestCase):
     """Test GetQueryView post method"""
 
@@ -193,17 +474,19 @@ class TestGetQueryViewsPost(TestCase):
             status.HTTP_400_BAD_REQUEST,
         )
 
-    @patch("core_explore_example_app.views.user.ajax.check_query_form")
+    @patch("core_explore_example_app.views.user.ajax.compile_form")
     @patch("core_explore_common_app.components.query.api.get_by_id")
     def test_errors_in_query_form_fails(
-        self, mock_query_get_by_id, mock_check_query_form
+        self, mock_query_get_by_id, mock_compile_form
     ):
         """test_errors_in_query_form_fails"""
         mock_query_object = MockQueryObject()
         mock_query_object.data_sources = ["mock_data_source_1"]
 
         mock_query_get_by_id.return_value = mock_query_object
-        mock_check_query_form.return_value = ["mock_check_query_form_error"]
+        mock_compile_form.return_value = MagicMock(
+            errors=["mock_compile_form_error"]
+        )
 
         data = {
             "queryID": "mock_query_id",
@@ -220,25 +503,20 @@ class TestGetQueryViewsPost(TestCase):
             status.HTTP_400_BAD_REQUEST,
         )
 
-    @patch(
-        "core_explore_example_app.views.user.ajax.GetQueryView.fields_to_query_func"
-    )
-    @patch("core_explore_example_app.views.user.ajax.check_query_form")
+    @patch("core_explore_example_app.views.user.ajax.compile_form")
     @patch("core_explore_common_app.components.query.api.get_by_id")
     def test_errors_in_query_content_creation_fails(
         self,
         mock_query_get_by_id,
-        mock_check_query_form,
-        mock_fields_to_query_func,
+        mock_compile_form,
     ):
         """test_errors_in_query_content_creation_fails"""
         mock_query_object = MockQueryObject()
         mock_query_object.data_sources = [{}]
 
         mock_query_get_by_id.return_value = mock_query_object
-        mock_check_query_form.return_value = []
-        mock_fields_to_query_func.side_effect = Exception(
-            "mock_fields_to_query_func_exception"
+        mock_compile_form.side_effect = Exception(
+            "mock_compile_form_exception"
         )
 
         data = {
@@ -257,16 +535,12 @@ class TestGetQueryViewsPost(TestCase):
         )
 
     @patch("core_explore_common_app.components.query.api.upsert")
-    @patch(
-        "core_explore_example_app.views.user.ajax.GetQueryView.fields_to_query_func"
-    )
-    @patch("core_explore_example_app.views.user.ajax.check_query_form")
+    @patch("core_explore_example_app.views.user.ajax.compile_form")
     @patch("core_explore_common_app.components.query.api.get_by_id")
     def test_errors_in_query_upsert_fails(
         self,
         mock_query_get_by_id,
-        mock_check_query_form,
-        mock_fields_to_query_func,
+        mock_compile_form,
         mock_query_upsert,
     ):
         """test_errors_in_query_upsert_fails"""
@@ -274,8 +548,8 @@ class TestGetQueryViewsPost(TestCase):
         mock_query_object.data_sources = [{}]
 
         mock_query_get_by_id.return_value = mock_query_object
-        mock_check_query_form.return_value = []
-        mock_fields_to_query_func.return_value = {"mock_field": "mock_value"}
+        mock_compile_form.return_value = MagicMock(errors=[])
+        mock_compile_form.return_value.query = {"mock_field": "mock_value"}
         mock_query_upsert.side_effect = Exception(
             "mock_query_upsert_exception"
         )
@@ -296,16 +570,12 @@ class TestGetQueryViewsPost(TestCase):
         )
 
     @patch("core_explore_common_app.components.query.api.upsert")
-    @patch(
-        "core_explore_example_app.views.user.ajax.GetQueryView.fields_to_query_func"
-    )
-    @patch("core_explore_example_app.views.user.ajax.check_query_form")
+    @patch("core_explore_example_app.views.user.ajax.compile_form")
     @patch("core_explore_common_app.components.query.api.get_by_id")
     def test_success_returns_200_status_code(
         self,
         mock_query_get_by_id,
-        mock_check_query_form,
-        mock_fields_to_query_func,
+        mock_compile_form,
         mock_query_upsert,
     ):
         """test_success_returns_200_status_code"""
@@ -313,8 +583,8 @@ class TestGetQueryViewsPost(TestCase):
         mock_query_object.data_sources = [{}]
 
         mock_query_get_by_id.return_value = mock_query_object
-        mock_check_query_form.return_value = []
-        mock_fields_to_query_func.return_value = {"mock_field": "mock_value"}
+        mock_compile_form.return_value = MagicMock(errors=[])
+        mock_compile_form.return_value.query = {"mock_field": "mock_value"}
         mock_query_upsert.return_value = None
 
         data = {
@@ -331,3 +601,111 @@ class TestGetQueryViewsPost(TestCase):
             GetQueryView().post(request).status_code,
             status.HTTP_200_OK,
         )
+
+    @patch("core_explore_common_app.components.query.api.upsert")
+    @patch("core_explore_example_app.views.user.ajax.compile_form")
+    @patch("core_explore_common_app.components.query.api.get_by_id")
+    def test_success_stores_normalized_query(
+        self,
+        mock_query_get_by_id,
+        mock_compile_form,
+        mock_query_upsert,
+    ):
+        """test_success_stores_normalized_query"""
+        mock_query_object = MockQueryObject()
+        mock_query_object.data_sources = [{}]
+
+        mock_query_get_by_id.return_value = mock_query_object
+        mock_compile_form.return_value = MagicMock(errors=[])
+        mock_compile_form.return_value.query = {
+            "$and": [{}, {"$and": [{"a": 1}, {"b": 2}]}]
+        }
+
+        data = {
+            "queryID": "mock_query_id",
+            "templateID": "mock_template_id",
+            "orderByField": "mock_field_1",
+            "formValues": json.dumps({"form_value": "mock_form_value"}),
+        }
+
+        request = self.factory.post(self.view_name, data=data)
+        request.user = self.user1
+        GetQueryView().post(request)
+
+        self.assertEqual(
+            json.loads(mock_query_object.content),
+            {"$and": [{"a": 1}, {"b": 2}]},
+        )
+
+
+class TestExplainQueryViewPost(TestCase):
+    """Test ExplainQueryView post method"""
+
+    def setUp(self):
+        """setUp"""
+        self.factory = RequestFactory()
+        self.view_name = "core_explore_example_explain_query"
+        self.user1 = create_mock_user(user_id="1")
+        # bypass permission checks to access view
+        self.user1.has_perm = MagicMock()
+        self.user1.has_perm.return_value = True
+
+    def test_request_without_template_id_fails(self):
+        """test_request_without_template_id_fails"""
+        data = {"formValues": json.dumps([])}
+
+        request = self.factory.post(self.view_name, data=data)
+        request.user = self.user1
+
+        self.assertEqual(
+            ExplainQueryView().post(request).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    @patch("core_explore_example_app.views.user.ajax.compile_form")
+    def test_errors_in_query_form_fails(self, mock_compile_form):
+        """test_errors_in_query_form_fails"""
+        mock_compile_form.return_value = MagicMock(errors=["error"])
+        data = {"templateID": "1", "formValues": json.dumps([])}
+
+        request = self.factory.post(self.view_name, data=data)
+        request.user = self.user1
+
+        self.assertEqual(
+            ExplainQueryView().post(request).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    @patch("core_explore_example_app.views.user.ajax.get_data_collection")
+    @patch("core_explore_example_app.views.user.ajax.compile_form")
+    def test_success_returns_explanation(
+        self,
+        mock_compile_form,
+        mock_get_data_collection,
+    ):
+        """test_success_returns_explanation"""
+        mock_compile_form.return_value = MagicMock(errors=[])
+        mock_compile_form.return_value.query = {
+            "$and": [{"root.a": 1}, {"root.b": "/b/"}]
+        }
+        mock_get_data_collection.return_value = None
+        data = {"templateID": "1", "formValues": json.dumps([])}
+
+        request = self.factory.post(self.view_name, data=data)
+        request.user = self.user1
+        response = ExplainQueryView().post(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        explanation = json.loads(response.content)
+        self.assertEqual(explanation["predicate_count"], 2)
+        self.assertEqual(
+            explanation["regex_predicates"],
+            [
+                {
+                    "path": "root.b",
+                    "pattern": "b",
+                    "negated": False,
+                    "anchored": False,
+                }
+            ],
+        )